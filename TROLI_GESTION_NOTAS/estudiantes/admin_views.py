@@ -1,12 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib import messages
 from django.db.models import Q, Avg, Count
 from django.contrib.auth.decorators import login_required
 from django.core.mail import send_mail
 from django.utils import timezone
 from .decorators import admin_required
-from .models import Usuario, Curso, Inscripcion, Calificacion, HistorialCalificacion, Notificacion
+from .models import Usuario, Curso, Periodo, Inscripcion, Calificacion, HistorialCalificacion, Notificacion, RankingCurso
 from .forms import UsuarioAdminForm, CursoAdminForm, InscripcionAdminForm
+from . import analitica, autorizacion, cache_reportes, cupos, limites, rankings, reportes
 
 @login_required
 @admin_required
@@ -152,7 +154,7 @@ def admin_usuario_eliminar(request, usuario_id):
     US-019: Eliminar (desactivar) usuario del sistema (SOFT DELETE)
     Solo administradores pueden acceder
     """
-    if request.user.rol not in ['administrador', 'coordinador']:
+    if not autorizacion.tiene_rol(request, 'administrador', 'coordinador'):
         messages.error(request, 'No tienes permisos para realizar esta acción')
         return redirect('dashboard')
     
@@ -170,18 +172,10 @@ def admin_usuario_eliminar(request, usuario_id):
             messages.error(request, 'No se puede eliminar el último administrador activo del sistema')
             return redirect('admin_usuarios_lista')
     
-    # Obtener estadísticas del usuario
-    if usuario.rol == 'estudiante':
-        inscripciones_activas = Inscripcion.objects.filter(estudiante=usuario, activo=True).count()
-        calificaciones_count = Calificacion.objects.filter(inscripcion__estudiante=usuario).count()
-    elif usuario.rol == 'profesor':
+    # Cursos activos del profesor (se necesitan también al confirmar)
+    cursos_asignados = 0
+    if usuario.rol == 'profesor':
         cursos_asignados = Curso.objects.filter(profesor=usuario, activo=True).count()
-        calificaciones_registradas = Calificacion.objects.filter(profesor=usuario).count()
-    else:
-        inscripciones_activas = 0
-        calificaciones_count = 0
-        cursos_asignados = 0
-        calificaciones_registradas = 0
     
     if request.method == 'POST':
         motivo = request.POST.get('motivo', '').strip()
@@ -202,9 +196,9 @@ def admin_usuario_eliminar(request, usuario_id):
         usuario.activo = False
         usuario.save()
         
-        # Si es estudiante: desactivar inscripciones
+        # Si es estudiante: desactivar inscripciones (sus cupos pasan a las listas de espera)
         if usuario.rol == 'estudiante':
-            Inscripcion.objects.filter(estudiante=usuario, activo=True).update(activo=False)
+            cupos.retirar_estudiante(usuario.id)
         
         # Si es profesor: desasignar cursos
         if usuario.rol == 'profesor':
@@ -229,12 +223,23 @@ def admin_usuario_eliminar(request, usuario_id):
         messages.success(request, f'El usuario {usuario.first_name} {usuario.last_name} ha sido desactivado correctamente')
         return redirect('admin_usuarios_lista')
     
+    # Estadísticas solo para la página de confirmación, con una consulta agregada por rol
+    inscripciones_activas = calificaciones_count = calificaciones_registradas = 0
+    if usuario.rol == 'estudiante':
+        conteo = Inscripcion.objects.filter(estudiante=usuario).aggregate(
+            activas=Count('id', filter=Q(activo=True), distinct=True),
+            calificaciones=Count('calificacion'),
+        )
+        inscripciones_activas, calificaciones_count = conteo['activas'], conteo['calificaciones']
+    elif usuario.rol == 'profesor':
+        calificaciones_registradas = Calificacion.objects.filter(profesor=usuario).count()
+    
     context = {
         'usuario': usuario,
-        'inscripciones_activas': inscripciones_activas if usuario.rol == 'estudiante' else 0,
-        'calificaciones_count': calificaciones_count if usuario.rol == 'estudiante' else 0,
-        'cursos_asignados': cursos_asignados if usuario.rol == 'profesor' else 0,
-        'calificaciones_registradas': calificaciones_registradas if usuario.rol == 'profesor' else 0,
+        'inscripciones_activas': inscripciones_activas,
+        'calificaciones_count': calificaciones_count,
+        'cursos_asignados': cursos_asignados,
+        'calificaciones_registradas': calificaciones_registradas,
     }
     
     return render(request, 'estudiantes/admin/eliminar_usuario.html', context)
@@ -256,9 +261,8 @@ def admin_cursos_lista(request):
             Q(profesor__username__icontains=search)
         )
     
-    # Agregar estadísticas a cada curso
-    for curso in cursos:
-        curso.num_estudiantes = Inscripcion.objects.filter(curso=curso, activo=True).count()
+    # Estadísticas de cada curso calculadas en la misma consulta
+    cursos = cursos.con_estadisticas()
     
     context = {
         'cursos': cursos,
@@ -291,6 +295,8 @@ def admin_curso_editar(request, curso_id):
         form = CursoAdminForm(request.POST, instance=curso)
         if form.is_valid():
             form.save()
+            # Si subió el cupo, los cupos nuevos pasan a la lista de espera
+            cupos.promover(curso.id)
             messages.success(request, f'Curso {curso.nombre} actualizado exitosamente')
             return redirect('admin_cursos_lista')
     else:
@@ -306,7 +312,7 @@ def admin_curso_eliminar(request, curso_id):
     
     if request.method == 'POST':
         curso.activo = False
-        curso.save()
+        curso.save(update_fields=['activo'])
         messages.success(request, f'Curso {curso.nombre} desactivado exitosamente')
         return redirect('admin_cursos_lista')
     
@@ -354,9 +360,13 @@ def admin_inscripcion_crear(request):
     if request.method == 'POST':
         form = InscripcionAdminForm(request.POST)
         if form.is_valid():
-            inscripcion = form.save()
-            messages.success(request, f'Inscripción creada exitosamente')
-            return redirect('admin_inscripciones_lista')
+            try:
+                cupos.crear(form.save(commit=False))
+            except cupos.CursoLleno:
+                form.add_error('curso', 'El curso no tiene cupos disponibles.')
+            else:
+                messages.success(request, f'Inscripción creada exitosamente')
+                return redirect('admin_inscripciones_lista')
     else:
         form = InscripcionAdminForm()
     
@@ -369,9 +379,10 @@ def admin_inscripcion_eliminar(request, inscripcion_id):
     inscripcion = get_object_or_404(Inscripcion, id=inscripcion_id)
     
     if request.method == 'POST':
-        inscripcion.activo = False
-        inscripcion.save()
+        promovidas = cupos.desactivar(inscripcion)
         messages.success(request, 'Inscripción desactivada exitosamente')
+        for promovida in promovidas:
+            messages.info(request, f'{promovida.estudiante.username} pasó de la lista de espera al curso')
         return redirect('admin_inscripciones_lista')
     
     return render(request, 'admin/inscripcion_confirmar_eliminar.html', {'inscripcion': inscripcion})
@@ -429,44 +440,67 @@ def admin_historial_lista(request):
 @admin_required
 def admin_reportes(request):
     """Reportes y estadísticas"""
+    # Rankings materializados: se mantienen al calificar, aquí solo se leen
+    if not RankingCurso.objects.exists() and Curso.objects.exists():
+        messages.info(request, 'Los rankings aún no se han calculado: ejecute "python manage.py reconstruir_rankings".')
+    
     # Estadísticas por curso
-    cursos_stats = Curso.objects.filter(activo=True).annotate(
-        num_estudiantes=Count('inscripcion', filter=Q(inscripcion__activo=True)),
-        promedio=Avg('inscripcion__calificacion__nota')
-    ).order_by('-num_estudiantes')
-    
-    # Estudiantes con mejor rendimiento
-    estudiantes_top = Usuario.objects.filter(
-        rol='estudiante', 
-        activo=True
-    ).annotate(
-        promedio=Avg('inscripcion__calificacion__nota')
-    ).order_by('-promedio')[:10]
-    
-    # Estadísticas generales
-    total_calificaciones = Calificacion.objects.count()
-    promedio_general = Calificacion.objects.aggregate(Avg('nota'))['nota__avg']
+    cursos_stats = RankingCurso.objects.filter(
+        curso__activo=True
+    ).select_related('curso__profesor').order_by('-num_estudiantes', 'curso_id')
+    
+    # Estudiantes con mejor rendimiento (primera página del ranking global)
+    estudiantes_top = rankings.pagina_global(por_pagina=10)['resultados']
+    
+    # Estadísticas generales sobre las frecuencias de cada nota (GROUP BY), sin cargar todas las notas
+    datos = analitica.cargar_frecuencias()
+    resumen = analitica.resumen(datos['notas'], datos['pesos'])
     
     context = {
         'cursos_stats': cursos_stats,
         'estudiantes_top': estudiantes_top,
-        'total_calificaciones': total_calificaciones,
-        'promedio_general': promedio_general,
+        'total_calificaciones': resumen['total'],
+        'promedio_general': resumen['promedio'],
+        'resumen_notas': resumen,
+        'histograma': analitica.histograma(datos['notas'], pesos=datos['pesos']),
+        'por_tipo': analitica.desglose_por_tipo(datos),
     }
     return render(request, 'admin/reportes.html', context)
 
+@login_required
+@admin_required
+def admin_ranking_estudiantes(request):
+    """Ranking global de estudiantes paginado (JSON)"""
+    pagina = rankings.pagina_global(rankings.cursor_solicitado(request))
+    return JsonResponse({
+        'success': True,
+        'tiene_siguiente': pagina['tiene_siguiente'],
+        'siguiente': pagina['siguiente'],
+        'resultados': rankings.filas_estudiantes(pagina),
+    })
+
+
+@login_required
+@admin_required
+def admin_ranking_cursos(request):
+    """Ranking de cursos por promedio o por número de estudiantes (JSON)"""
+    orden = 'estudiantes' if request.GET.get('orden') == 'estudiantes' else 'promedio'
+    pagina = rankings.pagina_cursos(rankings.cursor_solicitado(request), orden=orden)
+    return JsonResponse({
+        'success': True,
+        'tiene_siguiente': pagina['tiene_siguiente'],
+        'siguiente': pagina['siguiente'],
+        'resultados': rankings.filas_cursos(pagina),
+    })
+
 # ============= GENERACIÓN DE REPORTES ACADÉMICOS =============
 
 from django.http import HttpResponse, JsonResponse
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.pdfgen import canvas
+from django.urls import reverse
 import json
+import re
 from datetime import datetime
-from .models import ReporteAcademico, HistorialReporte
+from .models import ReporteAcademico, HistorialReporte, ResultadoReporte
 from .forms import ReporteAcademicoForm
 
 @login_required
@@ -474,8 +508,7 @@ from .forms import ReporteAcademicoForm
 def admin_generar_reporte(request):
     """Página para generar nuevo reporte con filtros avanzados"""
     # Obtener datos para los filtros
-    semestres = ['2024-1', '2024-2', '2025-1', '2025-2']  # Esto podría venir de la BD
-    grupos = ['Grupo A', 'Grupo B', 'Grupo C', 'Grupo D']  # Ejemplo de grupos
+    semestres, grupos = _opciones_filtros()
     asignaturas = Curso.objects.filter(activo=True).order_by('nombre')
     
     # Obtener reportes guardados del usuario actual
@@ -489,9 +522,21 @@ def admin_generar_reporte(request):
     # Variables para la vista previa
     datos_reporte = None
     filtros_aplicados = {}
+    resultado_guardado = None
+    
+    # Abrir un reporte guardado: se muestran las filas precalculadas
+    if request.method == 'GET' and request.GET.get('reporte'):
+        reporte = get_object_or_404(ReporteAcademico, id=request.GET['reporte'])
+        resultado_guardado = ResultadoReporte.objects.filter(reporte=reporte).first()
+        if resultado_guardado is None:
+            # Aún no lo procesó el comando precalcular_reportes
+            reportes.precalcular(reporte)
+            resultado_guardado = ResultadoReporte.objects.get(reporte=reporte)
+        datos_reporte = cache_reportes.deserializar(resultado_guardado.datos)
+        filtros_aplicados = {**reportes.filtros_de_reporte(reporte), 'tipo_reporte': reporte.tipo_reporte}
     
     # Si se solicita generar vista previa
-    if request.method == 'GET' and request.GET.get('preview'):
+    elif request.method == 'GET' and request.GET.get('preview'):
         # Validar campos obligatorios
         semestre = request.GET.get('semestre', '').strip()
         tipo_reporte = request.GET.get('tipo_reporte', '').strip()
@@ -517,8 +562,11 @@ def admin_generar_reporte(request):
                 'estado_academico': estado_academico,
             }
             
-            # Generar datos según tipo de reporte
-            datos_reporte = _generar_datos_reporte(tipo_reporte, filtros_aplicados)
+            # Generar datos según tipo de reporte (reutiliza el resultado en caché si sigue vigente)
+            datos_reporte, _ = cache_reportes.obtener_o_calcular(tipo_reporte, filtros_aplicados, reportes.generar_datos)
+    
+    if datos_reporte is not None and reportes.riesgo_pendiente(filtros_aplicados['tipo_reporte'], filtros_aplicados):
+        messages.warning(request, reportes.AVISO_RIESGO_PENDIENTE)
     
     context = {
         'semestres': semestres,
@@ -528,106 +576,25 @@ def admin_generar_reporte(request):
         'historial': historial,
         'datos_reporte': datos_reporte,
         'filtros_aplicados': filtros_aplicados,
+        'tasa_aciertos_cache': HistorialReporte.tasa_aciertos_cache(),
+        'resultado_guardado': resultado_guardado,
     }
     
     return render(request, 'admin/generar_reporte.html', context)
 
-def _generar_datos_reporte(tipo_reporte, filtros):
-    """Función auxiliar para generar los datos del reporte según tipo y filtros"""
-    # Construir query base de calificaciones
-    query = Calificacion.objects.select_related(
-        'inscripcion__estudiante',
-        'inscripcion__curso',
-        'profesor'
+def _opciones_filtros():
+    """Semestres y grupos disponibles para los filtros de reportes"""
+    semestres = list(Periodo.objects.values_list('codigo', flat=True))
+    if not semestres:
+        semestres = [Periodo.actual().codigo]
+    grupos = list(
+        Inscripcion.objects.exclude(grupo='').order_by('grupo').values_list('grupo', flat=True).distinct()
     )
-    
-    # Aplicar filtros opcionales
-    if filtros.get('asignatura_id'):
-        query = query.filter(inscripcion__curso_id=filtros['asignatura_id'])
-    
-    if filtros.get('fecha_desde'):
-        query = query.filter(fecha_evaluacion__gte=filtros['fecha_desde'])
-    
-    if filtros.get('fecha_hasta'):
-        query = query.filter(fecha_evaluacion__lte=filtros['fecha_hasta'])
-    
-    # Generar datos según tipo de reporte
-    if tipo_reporte == 'notas_estudiante':
-        # Agrupar por estudiante
-        datos = []
-        estudiantes = Usuario.objects.filter(rol='estudiante', activo=True)
-        
-        for estudiante in estudiantes:
-            calificaciones = query.filter(inscripcion__estudiante=estudiante)
-            if calificaciones.exists():
-                promedio = calificaciones.aggregate(Avg('nota'))['nota__avg']
-                datos.append({
-                    'matricula': estudiante.username,
-                    'nombre': estudiante.get_full_name(),
-                    'total_notas': calificaciones.count(),
-                    'promedio': round(promedio, 2) if promedio else 0,
-                    'estado': 'Aprobado' if promedio and promedio >= 3.0 else 'Reprobado'
-                })
-        
-        return datos
-    
-    elif tipo_reporte == 'notas_asignatura':
-        # Agrupar por asignatura
-        datos = []
-        cursos = Curso.objects.filter(activo=True)
-        
-        for curso in cursos:
-            calificaciones = query.filter(inscripcion__curso=curso)
-            if calificaciones.exists():
-                promedio = calificaciones.aggregate(Avg('nota'))['nota__avg']
-                datos.append({
-                    'codigo': curso.codigo,
-                    'nombre': curso.nombre,
-                    'profesor': curso.profesor.get_full_name(),
-                    'estudiantes': calificaciones.values('inscripcion__estudiante').distinct().count(),
-                    'promedio': round(promedio, 2) if promedio else 0
-                })
-        
-        return datos
-    
-    elif tipo_reporte == 'resumen_general':
-        # Resumen general del sistema
-        total_estudiantes = Usuario.objects.filter(rol='estudiante', activo=True).count()
-        total_cursos = Curso.objects.filter(activo=True).count()
-        total_calificaciones = query.count()
-        promedio_general = query.aggregate(Avg('nota'))['nota__avg']
-        
-        return [{
-            'total_estudiantes': total_estudiantes,
-            'total_cursos': total_cursos,
-            'total_calificaciones': total_calificaciones,
-            'promedio_general': round(promedio_general, 2) if promedio_general else 0
-        }]
-    
-    elif tipo_reporte == 'estudiantes_riesgo':
-        # Estudiantes con promedio < 3.0
-        datos = []
-        estudiantes = Usuario.objects.filter(rol='estudiante', activo=True)
-        
-        for estudiante in estudiantes:
-            calificaciones = query.filter(inscripcion__estudiante=estudiante)
-            if calificaciones.exists():
-                promedio = calificaciones.aggregate(Avg('nota'))['nota__avg']
-                if promedio and promedio < 3.0:
-                    datos.append({
-                        'matricula': estudiante.username,
-                        'nombre': estudiante.get_full_name(),
-                        'promedio': round(promedio, 2),
-                        'cursos_reprobados': calificaciones.filter(nota__lt=3.0).count(),
-                        'estado': 'En Riesgo'
-                    })
-        
-        return datos
-    
-    return []
+    return semestres, grupos
 
 @login_required
 @admin_required
+@limites.limitar('exportar_pdf')
 def admin_exportar_reporte_pdf(request):
     """Exportar reporte a PDF"""
     if request.method != 'POST':
@@ -652,10 +619,12 @@ def admin_exportar_reporte_pdf(request):
         'estado_academico': request.POST.get('estado_academico', ''),
     }
     
-    # Generar datos
-    datos = _generar_datos_reporte(tipo_reporte, filtros)
+    # Generar datos (la vista previa con los mismos filtros ya los dejó en caché)
+    datos, desde_cache = cache_reportes.obtener_o_calcular(tipo_reporte, filtros, reportes.generar_datos)
     
     if not datos:
+        if reportes.riesgo_pendiente(tipo_reporte, filtros):
+            return JsonResponse({'error': reportes.AVISO_RIESGO_PENDIENTE}, status=400)
         return JsonResponse({'error': 'No hay datos para exportar'}, status=400)
     
     # Obtener nombre personalizado si existe
@@ -673,105 +642,14 @@ def admin_exportar_reporte_pdf(request):
         usuario=request.user,
         tipo_reporte=tipo_reporte,
         filtros_aplicados=json.dumps(filtros),
-        formato_exportacion='pdf'
+        formato_exportacion='pdf',
+        desde_cache=desde_cache
     )
     
     # Crear PDF
     response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.pdf"'
-    
-    # Generar PDF con ReportLab
-    doc = SimpleDocTemplate(response, pagesize=letter)
-    elementos = []
-    styles = getSampleStyleSheet()
-    
-    # Título
-    titulo_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#1B3C53'),
-        spaceAfter=30,
-        alignment=1  # Centrado
-    )
-    
-    # Usar nombre personalizado si existe, sino usar el nombre por defecto
-    if nombre_pdf:
-        titulo_reporte = nombre_pdf
-    else:
-        tipo_nombre = dict([
-            ('notas_estudiante', 'Notas por Estudiante'),
-            ('notas_asignatura', 'Notas por Asignatura'),
-            ('resumen_general', 'Resumen General'),
-            ('estudiantes_riesgo', 'Estudiantes en Riesgo'),
-        ]).get(tipo_reporte, 'Reporte Académico')
-        titulo_reporte = f"Reporte Académico: {tipo_nombre}"
-    
-    elementos.append(Paragraph(titulo_reporte, titulo_style))
-    elementos.append(Paragraph(f"Semestre: {semestre}", styles['Normal']))
-    elementos.append(Paragraph(f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
-    elementos.append(Spacer(1, 0.3*inch))
-    
-    # Construir tabla según tipo de reporte
-    if tipo_reporte == 'notas_estudiante':
-        data = [['Matrícula', 'Nombre', 'Total Notas', 'Promedio', 'Estado']]
-        for item in datos:
-            data.append([
-                item['matricula'],
-                item['nombre'],
-                str(item['total_notas']),
-                str(item['promedio']),
-                item['estado']
-            ])
-    
-    elif tipo_reporte == 'notas_asignatura':
-        data = [['Código', 'Asignatura', 'Profesor', 'Estudiantes', 'Promedio']]
-        for item in datos:
-            data.append([
-                item['codigo'],
-                item['nombre'],
-                item['profesor'],
-                str(item['estudiantes']),
-                str(item['promedio'])
-            ])
-    
-    elif tipo_reporte == 'resumen_general':
-        data = [['Indicador', 'Valor']]
-        item = datos[0]
-        data.append(['Total Estudiantes', str(item['total_estudiantes'])])
-        data.append(['Total Cursos', str(item['total_cursos'])])
-        data.append(['Total Calificaciones', str(item['total_calificaciones'])])
-        data.append(['Promedio General', str(item['promedio_general'])])
-    
-    elif tipo_reporte == 'estudiantes_riesgo':
-        data = [['Matrícula', 'Nombre', 'Promedio', 'Cursos Reprobados', 'Estado']]
-        for item in datos:
-            data.append([
-                item['matricula'],
-                item['nombre'],
-                str(item['promedio']),
-                str(item['cursos_reprobados']),
-                item['estado']
-            ])
-    
-    # Crear tabla
-    tabla = Table(data)
-    tabla.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1B3C53')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    elementos.append(tabla)
-    elementos.append(Spacer(1, 0.3*inch))
-    elementos.append(Paragraph("Sistema de Gestión de Notas - TROLI", styles['Normal']))
-    
-    doc.build(elementos)
+    reportes.escribir_pdf(response, tipo_reporte, semestre, datos, nombre_pdf or None)
     
     return response
 
@@ -850,10 +728,56 @@ def admin_cargar_reporte_guardado(request, reporte_id):
         'fecha_desde': reporte.fecha_desde.strftime('%Y-%m-%d') if reporte.fecha_desde else '',
         'fecha_hasta': reporte.fecha_hasta.strftime('%Y-%m-%d') if reporte.fecha_hasta else '',
         'estado_academico': reporte.estado_academico or '',
+        'url_resultado': f"{reverse('admin_generar_reporte')}?reporte={reporte.id}",
+        'datos_al': None,
     }
     
+    # Fecha de los datos precalculados, si existen
+    resultado = ResultadoReporte.objects.filter(reporte=reporte).only('fecha_datos').first()
+    if resultado:
+        datos['datos_al'] = timezone.localtime(resultado.fecha_datos).strftime('%d/%m/%Y %H:%M')
+    
     return JsonResponse(datos)
 
+@login_required
+@admin_required
+def admin_actualizar_reporte_guardado(request, reporte_id):
+    """Recalcula a demanda el resultado de un reporte guardado"""
+    reporte = get_object_or_404(ReporteAcademico, id=reporte_id)
+    if request.method == 'POST':
+        reportes.precalcular(reporte, forzar=True)
+        messages.success(request, f'Reporte "{reporte.nombre}" actualizado con los datos actuales')
+    return redirect(f"{reverse('admin_generar_reporte')}?reporte={reporte.id}")
+
+@login_required
+@admin_required
+def admin_descargar_reporte_guardado(request, reporte_id, formato):
+    """Descarga el PDF o CSV precalculado de un reporte guardado"""
+    reporte = get_object_or_404(ReporteAcademico, id=reporte_id)
+    resultado = get_object_or_404(ResultadoReporte, reporte=reporte)
+    if not resultado.archivo_pdf:
+        # Resultados guardados antes de generar siempre el PDF: se rehacen en vez de servir 0 bytes
+        reportes.precalcular(reporte, forzar=True)
+        resultado.refresh_from_db()
+    
+    if formato == 'csv':
+        response = HttpResponse(resultado.archivo_csv, content_type='text/csv; charset=utf-8')
+    else:
+        formato = 'pdf'
+        response = HttpResponse(bytes(resultado.archivo_pdf), content_type='application/pdf')
+    nombre_archivo = re.sub(r'[^\w\s\-]', '', reporte.nombre).replace(' ', '_') or f'reporte_{reporte.id}'
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.{formato}"'
+    
+    HistorialReporte.objects.create(
+        reporte=reporte,
+        usuario=request.user,
+        tipo_reporte=reporte.tipo_reporte,
+        filtros_aplicados=json.dumps(reportes.filtros_de_reporte(reporte)),
+        formato_exportacion=formato,
+        desde_cache=True
+    )
+    return response
+
 @login_required
 @admin_required
 def admin_editar_reporte(request, reporte_id):
@@ -861,8 +785,7 @@ def admin_editar_reporte(request, reporte_id):
     reporte = get_object_or_404(ReporteAcademico, id=reporte_id, usuario_creador=request.user)
     
     # Obtener datos para los selectores
-    semestres = ['2024-1', '2024-2', '2025-1', '2025-2']
-    grupos = ['Grupo A', 'Grupo B', 'Grupo C', 'Grupo D']
+    semestres, grupos = _opciones_filtros()
     asignaturas = Curso.objects.filter(activo=True).order_by('nombre')
     
     if request.method == 'POST':
@@ -934,3 +857,133 @@ def admin_eliminar_reporte(request, reporte_id):
     }
     
     return render(request, 'admin/reporte_confirmar_eliminar.html', context)
+
+# ============= COMPROBANTES MASIVOS =============
+
+from django.http import FileResponse
+from .models import LoteComprobantes
+import os
+
+@login_required
+@admin_required
+def admin_comprobantes(request):
+    """Lotes de comprobantes de calificaciones por cohorte (cierre de semestre)"""
+    if request.method == 'POST':
+        periodo = get_object_or_404(Periodo, codigo=request.POST.get('semestre', '').strip())
+        curso_id = request.POST.get('asignatura', '').strip()
+        lote = LoteComprobantes.objects.create(
+            periodo=periodo,
+            curso_id=curso_id or None,
+            grupo=request.POST.get('grupo', '').strip(),
+            creado_por=request.user,
+        )
+        messages.success(
+            request,
+            f'Lote #{lote.id} creado. Se procesará con el comando generar_comprobantes.'
+        )
+        return redirect('admin_comprobantes')
+    
+    semestres, grupos = _opciones_filtros()
+    context = {
+        'lotes': LoteComprobantes.objects.select_related('periodo', 'curso', 'creado_por')[:20],
+        'semestres': semestres,
+        'grupos': grupos,
+        'asignaturas': Curso.objects.filter(activo=True).order_by('nombre'),
+    }
+    return render(request, 'admin/comprobantes.html', context)
+
+@login_required
+@admin_required
+def admin_comprobantes_progreso(request, lote_id):
+    """Progreso de un lote de comprobantes (JSON)"""
+    lote = get_object_or_404(LoteComprobantes, id=lote_id)
+    return JsonResponse({
+        'estado': lote.estado,
+        'procesados': lote.procesados,
+        'total': lote.total_estudiantes,
+        'porcentaje': lote.porcentaje(),
+    })
+
+@login_required
+@admin_required
+def admin_comprobantes_descargar(request, lote_id):
+    """Descarga el ZIP de un lote completado"""
+    lote = get_object_or_404(LoteComprobantes, id=lote_id, estado='completado')
+    if not lote.archivo or not os.path.exists(lote.archivo):
+        messages.error(request, 'El archivo del lote ya no está disponible')
+        return redirect('admin_comprobantes')
+    return FileResponse(open(lote.archivo, 'rb'), as_attachment=True, filename=os.path.basename(lote.archivo))
+
+# ============= IMPORTACIÓN CSV =============
+
+import io
+from django.conf import settings
+from . import importacion
+
+@login_required
+@admin_required
+def admin_importar(request):
+    """Importación masiva de usuarios, cursos o inscripciones desde CSV"""
+    resultado = None
+    tipo = request.POST.get('tipo') or request.GET.get('tipo') or 'usuarios'
+    if request.method == 'POST':
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            messages.error(request, 'Selecciona un archivo CSV')
+            return redirect('admin_importar')
+        try:
+            texto = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+            resultado = importacion.importar(texto, tipo)
+        except ValueError as e:
+            messages.error(request, f'No se pudo importar el archivo: {e}')
+            return redirect(f"{reverse('admin_importar')}?tipo={tipo}")
+        
+        if resultado['errores']:
+            # El reporte completo de errores queda disponible para descargar
+            nombre = f"errores_{tipo}_{timezone.now().strftime('%Y%m%d%H%M%S')}.csv"
+            carpeta = os.path.join(settings.MEDIA_ROOT, 'importaciones')
+            os.makedirs(carpeta, exist_ok=True)
+            with open(os.path.join(carpeta, nombre), 'w', encoding='utf-8', newline='') as destino:
+                importacion.escribir_errores(destino, resultado['errores'])
+            resultado['archivo_errores'] = nombre
+        
+        Notificacion.objects.create(
+            usuario=request.user,
+            tipo='sistema',
+            titulo='Importación CSV',
+            mensaje=f"Importación de {tipo}: {resultado['creados']} creados, {len(resultado['errores'])} filas con errores."
+        )
+        messages.success(request, f"Se crearon {resultado['creados']} registros de {tipo}.")
+    
+    context = {
+        'tipo': tipo,
+        'formatos': [
+            (t, columnas, importacion.COLUMNAS_OPCIONALES[t]) for t, columnas in importacion.COLUMNAS.items()
+        ],
+        'resultado': resultado,
+        'errores_muestra': resultado['errores'][:200] if resultado else [],
+    }
+    return render(request, 'admin/importar.html', context)
+
+@login_required
+@admin_required
+def admin_importar_errores(request, nombre):
+    """Descarga el reporte de errores de una importación"""
+    if not re.fullmatch(r'errores_\w+_\d{14}\.csv', nombre):
+        return redirect('admin_importar')
+    ruta = os.path.join(settings.MEDIA_ROOT, 'importaciones', nombre)
+    if not os.path.exists(ruta):
+        messages.error(request, 'El reporte de errores ya no está disponible')
+        return redirect('admin_importar')
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre)
+
+# ============= LÍMITES DE FRECUENCIA =============
+
+@login_required
+@admin_required
+def admin_limites(request):
+    """Contadores de peticiones permitidas y rechazadas por límite (JSON)"""
+    return JsonResponse({
+        nombre: dict(valores, capacidad=limites.LIMITES[nombre][0], recarga_por_minuto=limites.LIMITES[nombre][1] * 60)
+        for nombre, valores in limites.contadores().items()
+    })
@@ -0,0 +1,222 @@
+"""
+Analítica de calificaciones vectorizada con NumPy
+
+Las notas de un curso o cohorte se cargan en arreglos con una sola consulta
+(values_list) y todas las estadísticas se calculan sobre esos arreglos,
+sin recorrer calificación por calificación en Python.
+
+Para toda la institución no se cargan las notas sino sus frecuencias
+(cargar_frecuencias): las notas tienen un decimal entre 0.0 y 5.0, así que
+agrupadas por tipo y nota son a lo más 51 filas por tipo, y las estadísticas
+se calculan ponderando cada nota por su cantidad.
+"""
+import numpy as np
+from django.db.models import Case, Count, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast
+
+from .models import Calificacion
+
+# Códigos numéricos para los tipos de evaluación (posición en TIPOS_EVALUACION)
+TIPOS_EVALUACION = [codigo for codigo, _ in Calificacion.TIPOS_EVALUACION]
+_CODIGO_TIPO = {codigo: i for i, codigo in enumerate(TIPOS_EVALUACION)}
+_DTYPE_FILA = np.dtype([('estudiante', np.int64), ('tipo', np.int8), ('nota', np.float64)])
+
+# Rangos de desempeño usados en la vista de estudiantes por curso
+# (límite inferior de cada rango a partir de "aceptable")
+RANGOS_DESEMPENO = ['insuficiente', 'aceptable', 'bueno', 'sobresaliente', 'excelente']
+_LIMITES_DESEMPENO = np.array([3.0, 3.5, 4.0, 4.6])
+
+PERCENTILES_DEFECTO = (10, 25, 50, 75, 90)
+BINS_DEFECTO = np.linspace(0.0, 5.0, 11)
+NOTA_APROBATORIA = 3.0
+
+
+def cargar_notas(**filtros):
+    """
+    Carga las calificaciones que cumplen los filtros en arreglos NumPy
+    Retorna un diccionario con los arreglos 'estudiantes', 'tipos' y 'notas'
+    """
+    # El código del tipo y la conversión a float se resuelven en la base de datos
+    # para que cada fila llegue como una tupla numérica lista para NumPy
+    codigo_tipo = Case(
+        *[When(tipo_evaluacion=codigo, then=Value(i)) for codigo, i in _CODIGO_TIPO.items()],
+        default=Value(-1),
+        output_field=IntegerField()
+    )
+    filas = Calificacion.objects.filter(**filtros).values_list(
+        'inscripcion__estudiante_id', codigo_tipo, Cast('nota', FloatField())
+    )
+    return arreglos_desde_filas(list(filas))
+
+
+def cargar_frecuencias(**filtros):
+    """
+    Cantidad de calificaciones por tipo y nota (GROUP BY en la base de datos)
+    Retorna un diccionario con los arreglos 'tipos', 'notas' y 'pesos' (cantidad de cada par)
+    """
+    filas = list(
+        Calificacion.objects.filter(**filtros)
+        .values_list('tipo_evaluacion', 'nota')
+        .annotate(cantidad=Count('id'))
+        .order_by()
+    )
+    return {
+        'tipos': np.array([_CODIGO_TIPO.get(tipo, -1) for tipo, _, _ in filas], dtype=np.int8),
+        'notas': np.array([float(nota) for _, nota, _ in filas], dtype=np.float64),
+        'pesos': np.array([cantidad for _, _, cantidad in filas], dtype=np.int64),
+    }
+
+
+def arreglos_desde_filas(filas):
+    """Convierte filas (estudiante_id, código de tipo, nota) en arreglos NumPy"""
+    registros = np.fromiter(filas, dtype=_DTYPE_FILA, count=len(filas))
+    return {
+        'estudiantes': registros['estudiante'],
+        'tipos': registros['tipo'],
+        'notas': registros['nota'],
+    }
+
+
+def _percentiles_ponderados(notas, pesos, q):
+    """Igual que np.percentile (interpolación lineal) sobre las notas repetidas según sus pesos"""
+    orden = np.argsort(notas)
+    notas, acumulado = notas[orden], np.cumsum(pesos[orden])
+    posiciones = (acumulado[-1] - 1) * np.asarray(q, dtype=np.float64) / 100
+    inferior = np.floor(posiciones)
+    superior = np.minimum(inferior + 1, acumulado[-1] - 1)
+    bajo = notas[np.searchsorted(acumulado, inferior, side='right')]
+    alto = notas[np.searchsorted(acumulado, superior, side='right')]
+    return bajo + (posiciones - inferior) * (alto - bajo)
+
+
+def percentiles(notas, q=PERCENTILES_DEFECTO, pesos=None):
+    """Percentiles de las notas como diccionario {percentil: valor}; pesos: cantidad de cada nota"""
+    if not notas.size:
+        return {}
+    valores = np.percentile(notas, q) if pesos is None else _percentiles_ponderados(notas, pesos, q)
+    return {int(p): round(float(v), 2) for p, v in zip(q, valores)}
+
+
+def histograma(notas, bins=BINS_DEFECTO, pesos=None):
+    """
+    Histograma de notas con bins configurables (número de bins o límites)
+    Retorna una lista de diccionarios con 'desde', 'hasta' y 'cantidad'
+    """
+    if isinstance(bins, int):
+        bins = np.linspace(0.0, 5.0, bins + 1)
+    cantidades, limites = np.histogram(notas, bins=bins, weights=pesos)
+    return [
+        {'desde': round(float(limites[i]), 2), 'hasta': round(float(limites[i + 1]), 2), 'cantidad': int(c)}
+        for i, c in enumerate(cantidades)
+    ]
+
+
+def distribucion_desempeno(notas):
+    """Cantidad de notas en cada rango de desempeño (excelente, bueno, ...)"""
+    indices = np.digitize(notas, _LIMITES_DESEMPENO)
+    conteos = np.bincount(indices, minlength=len(RANGOS_DESEMPENO))
+    return {rango: int(conteos[i]) for i, rango in enumerate(RANGOS_DESEMPENO)}
+
+
+def resumen(notas, pesos=None):
+    """Estadísticas descriptivas de un arreglo de notas; pesos: cantidad de cada nota"""
+    if not notas.size:
+        return {
+            'total': 0, 'promedio': None, 'desviacion': None,
+            'nota_maxima': None, 'nota_minima': None,
+            'tasa_aprobacion': 0, 'percentiles': {},
+        }
+    if pesos is not None:
+        total = int(pesos.sum())
+        promedio = float(np.dot(notas, pesos) / total)
+        return {
+            'total': total,
+            'promedio': promedio,
+            'desviacion': float(np.sqrt(np.dot(pesos, (notas - promedio) ** 2) / total)),
+            'nota_maxima': float(notas.max()),
+            'nota_minima': float(notas.min()),
+            'tasa_aprobacion': float(pesos[notas >= NOTA_APROBATORIA].sum() / total * 100),
+            'percentiles': percentiles(notas, pesos=pesos),
+        }
+    return {
+        'total': int(notas.size),
+        'promedio': float(notas.mean()),
+        'desviacion': float(notas.std()),
+        'nota_maxima': float(notas.max()),
+        'nota_minima': float(notas.min()),
+        'tasa_aprobacion': float((notas >= NOTA_APROBATORIA).mean() * 100),
+        'percentiles': percentiles(notas),
+    }
+
+
+def promedios_por_estudiante(datos):
+    """
+    Promedio, número de notas y z-score de cada estudiante
+    El z-score compara el promedio del estudiante con los promedios del grupo
+    Retorna un diccionario {estudiante_id: {...}}
+    """
+    if not datos['notas'].size:
+        return {}
+    ids, inversos = np.unique(datos['estudiantes'], return_inverse=True)
+    conteos = np.bincount(inversos)
+    promedios = np.bincount(inversos, weights=datos['notas']) / conteos
+    desviacion = promedios.std()
+    if desviacion > 0:
+        z_scores = (promedios - promedios.mean()) / desviacion
+    else:
+        z_scores = np.zeros_like(promedios)
+    return {
+        int(ids[i]): {
+            'promedio': float(promedios[i]),
+            'total_calificaciones': int(conteos[i]),
+            'z_score': round(float(z_scores[i]), 2),
+        }
+        for i in range(ids.size)
+    }
+
+
+def desglose_por_tipo(datos):
+    """Cantidad, promedio y desviación de las notas por tipo de evaluación (con 'pesos' si vienen frecuencias)"""
+    notas = datos['notas']
+    tipos = datos['tipos'].astype(np.int64)
+    pesos = datos.get('pesos')
+    pesos = np.ones_like(notas) if pesos is None else pesos.astype(np.float64)
+    validos = tipos >= 0
+    notas, tipos, pesos = notas[validos], tipos[validos], pesos[validos]
+    minimo = len(TIPOS_EVALUACION)
+    conteos = np.bincount(tipos, weights=pesos, minlength=minimo)
+    sumas = np.bincount(tipos, weights=notas * pesos, minlength=minimo)
+    sumas_cuadrados = np.bincount(tipos, weights=notas * notas * pesos, minlength=minimo)
+    etiquetas = dict(Calificacion.TIPOS_EVALUACION)
+
+    desglose = []
+    for i, codigo in enumerate(TIPOS_EVALUACION):
+        if not conteos[i]:
+            continue
+        promedio = sumas[i] / conteos[i]
+        varianza = max(sumas_cuadrados[i] / conteos[i] - promedio * promedio, 0.0)
+        desglose.append({
+            'tipo': codigo,
+            'nombre': etiquetas[codigo],
+            'total': int(conteos[i]),
+            'promedio': round(float(promedio), 2),
+            'desviacion': round(float(np.sqrt(varianza)), 2),
+        })
+    return desglose
+
+
+def analizar(bins=BINS_DEFECTO, **filtros):
+    """Carga las notas según los filtros y calcula todas las estadísticas"""
+    datos = cargar_notas(**filtros)
+    return analizar_arreglos(datos, bins=bins)
+
+
+def analizar_arreglos(datos, bins=BINS_DEFECTO):
+    """Calcula todas las estadísticas a partir de arreglos ya cargados"""
+    return {
+        'resumen': resumen(datos['notas']),
+        'histograma': histograma(datos['notas'], bins),
+        'distribucion': distribucion_desempeno(datos['notas']),
+        'por_estudiante': promedios_por_estudiante(datos),
+        'por_tipo': desglose_por_tipo(datos),
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EstudiantesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "estudiantes"
+
+    def ready(self):
+        # Registrar señales de invalidación de cachés
+        from . import signals  # noqa: F401
@@ -0,0 +1,159 @@
+"""
+Contexto de autorización en caché
+
+Para decidir si un usuario puede entrar a una vista basta con su rol, si está
+activo y los cursos que dicta o en los que está inscrito. Ese contexto se
+guarda en la sesión y se valida contra un token por usuario en la caché de
+Django; las señales (ver signals.py) borran el token cuando cambian el
+usuario, sus cursos o sus inscripciones, y el siguiente request reconstruye
+el contexto.
+
+El mismo token versiona la copia del usuario que guarda BackendUsuarioEnCache,
+así que cargar request.user tampoco consulta la base de datos mientras el
+usuario no cambie. Si la caché se vacía, los tokens se regeneran y todo se
+reconstruye: nunca se usa un contexto viejo.
+
+Todo esto exige que la caché sea compartida por todos los workers (Memcached,
+Redis, archivos): con la caché en memoria de cada proceso, la señal que borra
+el token solo lo borra en el worker que atendió el cambio y los demás seguirían
+usando el contexto viejo. Sin caché compartida (ver cache_compartida) el
+contexto y el usuario se leen de la base de datos en cada request.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .models import Curso, Inscripcion, Usuario
+
+CLAVE_SESION = 'autorizacion'
+_ATRIBUTO = '_contexto_autorizacion'
+
+# Backends cuyo contenido vive en cada proceso (o no se guarda)
+CACHES_LOCALES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_compartida(alias='default'):
+    """La caché `alias` la ven todos los workers (no es la de memoria de cada proceso)"""
+    return settings.CACHES[alias]['BACKEND'] not in CACHES_LOCALES
+
+
+def _clave_token(usuario_id):
+    return f'autorizacion:token:{usuario_id}'
+
+
+def token(usuario_id):
+    """Token vigente del usuario; se crea uno nuevo si no existe"""
+    clave = _clave_token(usuario_id)
+    valor = cache.get(clave)
+    if valor is None:
+        valor = uuid.uuid4().hex
+        # Si otro proceso lo creó entre tanto, se usa ese
+        if not cache.add(clave, valor, None):
+            valor = cache.get(clave, valor)
+    return valor
+
+
+def invalidar(*usuario_ids):
+    """Descarta el contexto y el usuario en caché de los usuarios indicados"""
+    cache.delete_many([_clave_token(i) for i in usuario_ids if i])
+
+
+# ============= CONTEXTO =============
+
+def construir(usuario_id):
+    """Contexto de autorización leído de la base de datos"""
+    fila = Usuario.objects.filter(id=usuario_id).values_list('rol', 'activo').first()
+    if fila is None:
+        return None
+    return {
+        'usuario_id': usuario_id,
+        'rol': fila[0],
+        'activo': fila[1],
+        'cursos_dictados': list(Curso.objects.filter(profesor_id=usuario_id).order_by('id').values_list('id', flat=True)),
+        'cursos_inscritos': list(
+            Inscripcion.objects.filter(estudiante_id=usuario_id, activo=True).values_list('curso_id', flat=True)
+        ),
+    }
+
+
+def contexto(request):
+    """
+    Contexto del usuario de la sesión, o None si no hay sesión iniciada
+    No carga request.user
+    """
+    usuario_id = request.session.get(SESSION_KEY)
+    if usuario_id is None:
+        return None
+    usuario_id = int(usuario_id)
+    if not cache_compartida():
+        return _contexto_sin_cache(request, usuario_id)
+    vigente = token(usuario_id)
+    guardado = request.session.get(CLAVE_SESION)
+    if guardado and guardado['usuario_id'] == usuario_id and guardado['token'] == vigente:
+        return guardado
+
+    nuevo = construir(usuario_id)
+    if nuevo is None:
+        request.session.pop(CLAVE_SESION, None)
+        return None
+    nuevo['token'] = vigente
+    request.session[CLAVE_SESION] = nuevo
+    return nuevo
+
+
+def _contexto_sin_cache(request, usuario_id):
+    """Contexto leído de la base de datos una vez por request; no se guarda en la sesión"""
+    guardado = getattr(request, _ATRIBUTO, None)
+    if guardado is None or guardado['usuario_id'] != usuario_id:
+        request.session.pop(CLAVE_SESION, None)
+        guardado = construir(usuario_id)
+        if guardado is not None:
+            # El token identifica el contenido del contexto (lo usan los ETag de condicional.py)
+            guardado['token'] = hashlib.sha256(repr(sorted(guardado.items())).encode('utf-8')).hexdigest()[:32]
+            setattr(request, _ATRIBUTO, guardado)
+    return guardado
+
+
+def tiene_rol(request, *roles):
+    ctx = contexto(request)
+    return ctx is not None and ctx['rol'] in roles
+
+
+def dicta_curso(request, curso_id):
+    """El usuario de la sesión es el profesor del curso"""
+    ctx = contexto(request)
+    return ctx is not None and int(curso_id) in ctx['cursos_dictados']
+
+
+def inscrito_en(request, curso_id):
+    """El usuario de la sesión tiene una inscripción activa en el curso"""
+    ctx = contexto(request)
+    return ctx is not None and int(curso_id) in ctx['cursos_inscritos']
+
+
+# ============= USUARIO EN CACHÉ =============
+
+class BackendUsuarioEnCache(ModelBackend):
+    """
+    ModelBackend que guarda en caché el usuario cargado desde la sesión
+    La verificación del hash de sesión de Django sigue funcionando porque
+    cambiar la contraseña guarda el usuario e invalida su token
+    Sin caché compartida se comporta como ModelBackend
+    """
+    def get_user(self, user_id):
+        if not cache_compartida():
+            return super().get_user(user_id)
+        clave = f'autorizacion:usuario:{user_id}:{token(user_id)}'
+        usuario = cache.get(clave)
+        if usuario is None:
+            usuario = super().get_user(user_id)
+            if usuario is not None:
+                cache.set(clave, usuario, 60 * 60)
+        return usuario
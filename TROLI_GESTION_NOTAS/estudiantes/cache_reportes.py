@@ -0,0 +1,139 @@
+"""
+Caché de resultados de reportes académicos
+
+Cada resultado se guarda en CacheReporte con una clave derivada del tipo de
+reporte y de los filtros normalizados, junto con la etiqueta de versión de
+los datos que usó. Las escrituras de notas, inscripciones, cursos y usuarios
+incrementan la versión de su ámbito (VersionDatos, ver signals.py), así que
+un resultado guardado se reutiliza solo mientras sus datos no hayan cambiado.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db.models import CharField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+
+from .models import CacheReporte, VersionDatos
+
+VERSION_GLOBAL = 'global'
+VERSION_USUARIOS = 'usuarios'
+VERSION_RIESGO = 'riesgo'
+
+# Claves de filtros que afectan el resultado (tipo_reporte forma parte de la clave aparte)
+CAMPOS_FILTRO = ['semestre', 'grupo', 'asignatura_id', 'fecha_desde', 'fecha_hasta', 'estado_academico']
+
+
+def clave_curso(curso_id):
+    return f'curso:{curso_id}'
+
+
+def versiones_cursos(curso_ids):
+    """Versión actual de los datos de cada curso: {curso_id: versión}"""
+    claves = {clave_curso(c): c for c in curso_ids}
+    versiones = dict(VersionDatos.objects.filter(clave__in=claves).values_list('clave', 'version'))
+    return {curso_id: versiones.get(clave, 0) for clave, curso_id in claves.items()}
+
+
+def version_curso(campo='curso_id'):
+    """Expresión con la versión actual del curso de cada fila, para comparar en la misma consulta"""
+    clave = Concat(Value('curso:'), Cast(OuterRef(campo), CharField()))
+    return Coalesce(Subquery(VersionDatos.objects.filter(clave=clave).values('version')[:1]), 0)
+
+
+# ============= VERSIONES DE DATOS =============
+
+def incrementar_version(*claves):
+    """Marca como cambiados los datos de los ámbitos indicados"""
+    for clave in claves:
+        if not VersionDatos.objects.filter(clave=clave).update(version=F('version') + 1):
+            VersionDatos.objects.get_or_create(clave=clave, defaults={'version': 1})
+
+
+def invalidar_curso(curso_id):
+    """Un cambio en los datos de un curso cambia también la versión global"""
+    incrementar_version(VERSION_GLOBAL, clave_curso(curso_id))
+
+
+def etiqueta_version(tipo_reporte, filtros):
+    """
+    Etiqueta con las versiones de los ámbitos que usa el reporte
+    Un reporte filtrado por asignatura depende solo de la versión de ese curso
+    """
+    ambito = clave_curso(filtros['asignatura_id']) if filtros.get('asignatura_id') else VERSION_GLOBAL
+    claves = [ambito, VERSION_USUARIOS]
+    if tipo_reporte == 'estudiantes_riesgo':
+        claves.append(VERSION_RIESGO)
+    versiones = dict(VersionDatos.objects.filter(clave__in=claves).values_list('clave', 'version'))
+    return '|'.join(f'{c}={versiones.get(c, 0)}' for c in claves)
+
+
+# ============= SERIALIZACIÓN =============
+
+class _CodificadorReporte(json.JSONEncoder):
+    """Conserva los Decimal para que el reporte en caché se vea igual al recién calculado"""
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return {'__decimal__': str(o)}
+        return super().default(o)
+
+
+def _decodificar(objeto):
+    if len(objeto) == 1 and '__decimal__' in objeto:
+        return Decimal(objeto['__decimal__'])
+    return objeto
+
+
+def serializar(datos):
+    return json.dumps(datos, cls=_CodificadorReporte)
+
+
+def deserializar(texto):
+    return json.loads(texto, object_hook=_decodificar)
+
+
+# ============= LECTURA Y ESCRITURA =============
+
+def normalizar_filtros(filtros):
+    """Filtros sin espacios ni valores vacíos, como texto, en orden fijo"""
+    normalizados = {}
+    for campo in CAMPOS_FILTRO:
+        valor = filtros.get(campo)
+        valor = str(valor).strip() if valor is not None else ''
+        if valor:
+            normalizados[campo] = valor
+    return normalizados
+
+
+def clave_reporte(tipo_reporte, filtros_normalizados):
+    texto = json.dumps([tipo_reporte, filtros_normalizados], sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def obtener_o_calcular(tipo_reporte, filtros, calcular):
+    """
+    Devuelve (datos, desde_cache) para el reporte
+    `calcular(tipo_reporte, filtros)` solo se ejecuta si no hay un resultado
+    guardado con la versión actual de los datos
+    """
+    normalizados = normalizar_filtros(filtros)
+    clave = clave_reporte(tipo_reporte, normalizados)
+    etiqueta = etiqueta_version(tipo_reporte, normalizados)
+
+    guardado = CacheReporte.objects.filter(clave=clave, etiqueta_version=etiqueta).only('id', 'datos').first()
+    if guardado is not None:
+        CacheReporte.objects.filter(id=guardado.id).update(aciertos=F('aciertos') + 1)
+        return deserializar(guardado.datos), True
+
+    datos = calcular(tipo_reporte, normalizados)
+    CacheReporte.objects.update_or_create(
+        clave=clave,
+        defaults={
+            'tipo_reporte': tipo_reporte,
+            'filtros': json.dumps(normalizados),
+            'etiqueta_version': etiqueta,
+            'datos': serializar(datos),
+            'aciertos': 0,
+        }
+    )
+    return datos, False
@@ -0,0 +1,110 @@
+"""
+Edición y eliminación de calificaciones con control de concurrencia optimista
+
+Cada calificación lleva un número de versión que sube con cada cambio. El
+formulario envía la versión que mostró y el cambio se aplica con un UPDATE
+condicionado a esa versión (WHERE id = ... AND version = ...): si otro
+profesor o un administrador la modificó entremedio no se actualiza ninguna
+fila y se lanza ConflictoVersion, en vez de pisar el cambio ajeno. No se
+bloquea la tabla ni se leen filas con SELECT ... FOR UPDATE.
+
+La nota anterior que va al historial es la de la versión que se reemplaza, y
+el historial y la notificación se escriben en la misma transacción que el
+cambio: si hay conflicto no queda ninguno de los tres.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from . import rankings
+from .models import Calificacion, HistorialCalificacion, Notificacion
+
+
+class ConflictoVersion(Exception):
+    """La calificación cambió (o se eliminó) desde que se mostró el formulario"""
+
+    def __init__(self, actual):
+        super().__init__('La calificación fue modificada por otro usuario')
+        self.actual = actual
+
+
+def leer_version(valor):
+    """Versión enviada por el formulario; 0 (nunca coincide) si falta o no es un número"""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _reclamar(calificacion, version, **cambios):
+    """UPDATE condicionado a la versión; lanza ConflictoVersion si no se actualizó la fila"""
+    filas = Calificacion.objects.filter(id=calificacion.id, version=version).update(
+        version=F('version') + 1, **cambios
+    )
+    if not filas:
+        raise ConflictoVersion(Calificacion.objects.filter(id=calificacion.id).first())
+    calificacion.version = version + 1
+
+
+def actualizar(calificacion, version, usuario, tipo_evaluacion, nota, observaciones,
+               motivo='Actualización de calificación'):
+    """Cambia la calificación si sigue en la versión indicada y registra el cambio en el historial"""
+    if calificacion.version != version:
+        raise ConflictoVersion(calificacion)
+    # La nota leída corresponde a esta versión; si el UPDATE la encuentra igual, es la que se reemplaza
+    nota_anterior = calificacion.nota
+    with transaction.atomic():
+        _reclamar(
+            calificacion, version,
+            tipo_evaluacion=tipo_evaluacion,
+            nota=nota,
+            observaciones=observaciones,
+            profesor=usuario,
+            fecha_modificacion=timezone.now(),
+        )
+        calificacion.tipo_evaluacion = tipo_evaluacion
+        calificacion.nota = nota
+        calificacion.observaciones = observaciones
+        calificacion.profesor = usuario
+        HistorialCalificacion.objects.create(
+            calificacion=calificacion,
+            nota_anterior=nota_anterior,
+            nota_nueva=nota,
+            usuario_modificacion=usuario,
+            motivo=motivo
+        )
+        Notificacion.objects.create(
+            usuario=calificacion.inscripcion.estudiante,
+            tipo='cambio_nota',
+            titulo='Calificación modificada',
+            mensaje=f'Se actualizó tu calificación en {calificacion.inscripcion.curso.nombre} a {nota}.'
+        )
+        # update() no envía pre_save ni post_save; las definitivas, rankings y reportes dependen de esas señales
+        rankings.recordar_calificacion(calificacion, calificacion.inscripcion_id, nota_anterior)
+        post_save.send(sender=Calificacion, instance=calificacion, created=False,
+                       update_fields=None, raw=False, using=Calificacion.objects.db)
+    return calificacion
+
+
+def eliminar(calificacion, version, usuario, motivo):
+    """Elimina la calificación si sigue en la versión indicada, dejando el historial de la eliminación"""
+    if calificacion.version != version:
+        raise ConflictoVersion(calificacion)
+    with transaction.atomic():
+        # Subir la versión primero reserva la fila: una edición concurrente con la versión vieja falla
+        _reclamar(calificacion, version)
+        HistorialCalificacion.objects.create(
+            calificacion=calificacion,
+            nota_anterior=calificacion.nota,
+            nota_nueva=None,  # Indica eliminación
+            usuario_modificacion=usuario,
+            motivo=f"ELIMINACIÓN: {motivo}"
+        )
+        Notificacion.objects.create(
+            usuario=calificacion.inscripcion.estudiante,
+            tipo='sistema',
+            titulo='Calificación eliminada',
+            mensaje=f'Se eliminó una calificación en {calificacion.inscripcion.curso.nombre}. Motivo: {motivo}'
+        )
+        calificacion.delete()
@@ -0,0 +1,119 @@
+"""
+Renderizado del comprobante de calificaciones en PDF
+
+Este módulo no usa el ORM: recibe los datos ya consultados como diccionarios
+simples para que pueda ejecutarse en procesos separados (ver
+comprobantes_lote.py). Los estilos de ReportLab se construyen una sola vez
+por proceso al importar el módulo y se comparten entre comprobantes.
+"""
+import io
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+# ============= ESTILOS PRECALCULADOS =============
+
+_ESTILOS = getSampleStyleSheet()
+
+_ESTILO_TITULO = ParagraphStyle(
+    'CustomTitle',
+    parent=_ESTILOS['Heading1'],
+    fontSize=18,
+    textColor=colors.HexColor('#1B3C53'),
+    spaceAfter=30,
+    alignment=1  # Centrado
+)
+
+_TABLA_INFO = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F9F3EF')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+])
+
+_TABLA_NOTAS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1B3C53')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+])
+
+_TABLA_PROMEDIO = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#6B9BD1')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+])
+
+
+# ============= RENDERIZADO =============
+
+def escribir_comprobante(destino, datos):
+    """
+    Escribe el comprobante en `destino` (respuesta HTTP o buffer)
+    `datos` tiene las claves 'estudiante' (first_name, last_name, username,
+    email), 'fecha_emision' (texto), 'cursos' (lista con nombre, codigo y
+    calificaciones como tuplas tipo/nota/fecha/profesor) y 'promedio'
+    """
+    estudiante = datos['estudiante']
+    doc = SimpleDocTemplate(destino, pagesize=letter)
+    elements = []
+
+    elements.append(Paragraph('COMPROBANTE DE CALIFICACIONES', _ESTILO_TITULO))
+    elements.append(Paragraph('Sistema de Gestión de Notas - TROLI', _ESTILOS['Normal']))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Información del estudiante
+    info_data = [
+        ['Estudiante:', f"{estudiante['first_name']} {estudiante['last_name']}"],
+        ['Usuario:', estudiante['username']],
+        ['Email:', estudiante['email']],
+        ['Fecha de emisión:', datos['fecha_emision']],
+    ]
+    info_table = Table(info_data, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(_TABLA_INFO)
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Tabla de calificaciones por curso
+    elements.append(Paragraph('CALIFICACIONES POR CURSO', _ESTILOS['Heading2']))
+    elements.append(Spacer(1, 0.2*inch))
+
+    for curso in datos['cursos']:
+        elements.append(Paragraph(f"<b>{curso['nombre']} ({curso['codigo']})</b>", _ESTILOS['Normal']))
+        data = [['Tipo', 'Calificación', 'Fecha', 'Profesor']]
+        data.extend(list(fila) for fila in curso['calificaciones'])
+        table = Table(data, colWidths=[1.5*inch, 1*inch, 1.2*inch, 2*inch])
+        table.setStyle(_TABLA_NOTAS)
+        elements.append(table)
+        elements.append(Spacer(1, 0.2*inch))
+
+    # Promedio general
+    if datos['promedio']:
+        promedio_table = Table([['PROMEDIO GENERAL:', f"{datos['promedio']:.1f}"]], colWidths=[4*inch, 2*inch])
+        promedio_table.setStyle(_TABLA_PROMEDIO)
+        elements.append(promedio_table)
+
+    # Pie de página
+    elements.append(Spacer(1, 0.5*inch))
+    elements.append(Paragraph('<i>Documento generado automáticamente por el Sistema TROLI</i>', _ESTILOS['Normal']))
+
+    doc.build(elements)
+
+
+def comprobante_pdf(datos):
+    """Comprobante en PDF como bytes (función usada por el pool de procesos)"""
+    buffer = io.BytesIO()
+    escribir_comprobante(buffer, datos)
+    return buffer.getvalue()
@@ -0,0 +1,231 @@
+"""
+Generación masiva de comprobantes de calificaciones (LoteComprobantes)
+
+Las notas de toda la cohorte se leen con una sola consulta ordenada por
+estudiante que se recorre en streaming (iterator) y se agrupa por estudiante.
+Los PDF se renderizan en un pool de procesos por bloques y se escriben en un
+ZIP en disco. El ZIP se cierra al final de cada bloque, así que si el proceso
+se interrumpe el lote se puede reanudar con los estudiantes que faltan.
+
+Solo una ejecución escribe el ZIP de un lote: antes de empezar lo reclama con
+un UPDATE condicionado (ver reclamar) que le asigna un token de ejecución, y
+antes de cada bloque renueva el latido con un UPDATE filtrado por ese token.
+Un lote en proceso solo se reanuda cuando su latido venció, es decir cuando la
+ejecución anterior murió; si dos cron se cruzan, el segundo lo salta.
+"""
+import os
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Calificacion, Inscripcion, LoteComprobantes
+from . import comprobantes
+
+COMPROBANTES_POR_PROCESO = 8  # Tamaño del bloque que recibe cada proceso
+LATIDO_VENCIDO = timedelta(minutes=10)  # Sin latido por este tiempo, la ejecución se da por muerta
+_NOMBRES_TIPO = dict(Calificacion.TIPOS_EVALUACION)
+
+
+class LoteEnProceso(Exception):
+    """Otra ejecución viva está procesando el lote"""
+
+
+def _abandonado():
+    """Condición de los lotes en proceso cuya ejecución dejó de dar señales"""
+    return Q(estado='en_proceso') & (Q(latido__isnull=True) | Q(latido__lt=timezone.now() - LATIDO_VENCIDO))
+
+
+def reclamar(lote):
+    """
+    Toma el lote para esta ejecución si nadie lo está procesando (o su ejecución
+    murió); retorna el token de ejecución o lanza LoteEnProceso. El UPDATE
+    condicionado se aplica de a uno por fila: de dos ejecuciones que reclaman a
+    la vez, solo una lo toma
+    """
+    ejecucion = uuid.uuid4().hex
+    tomado = LoteComprobantes.objects.filter(id=lote.id).filter(~Q(estado='en_proceso') | _abandonado()).update(
+        estado='en_proceso', ejecucion=ejecucion, latido=timezone.now()
+    )
+    if not tomado:
+        raise LoteEnProceso(f'El lote {lote.id} lo está procesando otra ejecución')
+    return ejecucion
+
+
+def _latido(lote, ejecucion, **campos):
+    """Renueva el latido (y guarda `campos`) si el lote sigue siendo de esta ejecución"""
+    if not LoteComprobantes.objects.filter(id=lote.id, ejecucion=ejecucion).update(latido=timezone.now(), **campos):
+        raise LoteEnProceso(f'Otra ejecución tomó el lote {lote.id}')
+
+
+def _inscripciones(lote):
+    """Inscripciones de estudiantes que forman la cohorte del lote"""
+    filtros = {'periodo_id': lote.periodo_id, 'estudiante__rol': 'estudiante'}
+    if lote.curso_id:
+        filtros['curso_id'] = lote.curso_id
+    if lote.grupo:
+        filtros['grupo'] = lote.grupo
+    return Inscripcion.objects.filter(**filtros)
+
+
+def nombre_entrada(username):
+    return f'comprobante_{username}.pdf'
+
+
+def datos_por_estudiante(calificaciones, fecha_emision):
+    """
+    Genera (nombre de entrada en el ZIP, datos del comprobante) por estudiante
+    a partir de una única consulta ordenada recorrida en streaming
+    """
+    filas = calificaciones.order_by(
+        'inscripcion__estudiante_id', 'inscripcion__curso__nombre', 'inscripcion__curso_id', '-fecha_evaluacion'
+    ).values_list(
+        'inscripcion__estudiante_id',
+        'inscripcion__estudiante__username',
+        'inscripcion__estudiante__first_name',
+        'inscripcion__estudiante__last_name',
+        'inscripcion__estudiante__email',
+        'inscripcion__curso_id',
+        'inscripcion__curso__nombre',
+        'inscripcion__curso__codigo',
+        'tipo_evaluacion',
+        'nota',
+        'fecha_evaluacion',
+        'profesor__first_name',
+        'profesor__last_name',
+    ).iterator(chunk_size=2000)
+
+    for _, filas_estudiante in groupby(filas, key=lambda f: f[0]):
+        filas_estudiante = list(filas_estudiante)
+        estudiante = filas_estudiante[0]
+        cursos = []
+        for _, filas_curso in groupby(filas_estudiante, key=lambda f: f[5]):
+            filas_curso = list(filas_curso)
+            cursos.append({
+                'nombre': filas_curso[0][6],
+                'codigo': filas_curso[0][7],
+                'calificaciones': [
+                    (
+                        _NOMBRES_TIPO.get(f[8], f[8]),
+                        str(f[9]),
+                        f[10].strftime('%d/%m/%Y') if f[10] else 'N/A',
+                        f'{f[11]} {f[12]}',
+                    )
+                    for f in filas_curso
+                ],
+            })
+        notas = [f[9] for f in filas_estudiante]
+        yield nombre_entrada(estudiante[1]), {
+            'estudiante': {
+                'username': estudiante[1], 'first_name': estudiante[2],
+                'last_name': estudiante[3], 'email': estudiante[4],
+            },
+            'fecha_emision': fecha_emision,
+            'cursos': cursos,
+            'promedio': float(sum(notas) / len(notas)),
+        }
+
+
+def _entradas_existentes(ruta):
+    """Comprobantes ya escritos en el ZIP de una ejecución anterior"""
+    if not os.path.exists(ruta):
+        return set()
+    try:
+        with zipfile.ZipFile(ruta) as archivo_zip:
+            return set(archivo_zip.namelist())
+    except zipfile.BadZipFile:
+        # El ZIP quedó incompleto: se empieza de nuevo
+        os.remove(ruta)
+        return set()
+
+
+def ruta_zip(lote):
+    return os.path.join(
+        settings.MEDIA_ROOT, 'comprobantes', f'comprobantes_{lote.periodo.codigo}_{lote.id}.zip'
+    )
+
+
+def generar(lote, procesos=None):
+    """
+    Genera (o reanuda) el ZIP de comprobantes del lote
+    `procesos` es el número de procesos que renderizan PDF (por defecto, uno por CPU)
+    Lanza LoteEnProceso si otra ejecución viva lo tiene
+    """
+    procesos = procesos or os.cpu_count() or 1
+    ejecucion = reclamar(lote)
+    lote.refresh_from_db()
+    ruta = lote.archivo or ruta_zip(lote)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+    existentes = _entradas_existentes(ruta)
+    total = _inscripciones(lote).filter(
+        calificacion__isnull=False
+    ).values('estudiante_id').distinct().count()
+    procesados = len(existentes)
+    _latido(lote, ejecucion, archivo=ruta, total_estudiantes=total, procesados=procesados, mensaje_error='')
+
+    fecha_emision = timezone.localtime().strftime('%d/%m/%Y %H:%M')
+    pendientes = (
+        (nombre, datos)
+        for nombre, datos in datos_por_estudiante(
+            Calificacion.objects.filter(inscripcion__in=_inscripciones(lote)), fecha_emision
+        )
+        if nombre not in existentes
+    )
+    ejecutor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        while True:
+            bloque = list(islice(pendientes, procesos * COMPROBANTES_POR_PROCESO))
+            if not bloque:
+                break
+            # Antes de tocar el ZIP se confirma que el lote sigue siendo de esta ejecución
+            _latido(lote, ejecucion)
+            datos = [d for _, d in bloque]
+            if ejecutor is None:
+                pdfs = map(comprobantes.comprobante_pdf, datos)
+            else:
+                pdfs = ejecutor.map(comprobantes.comprobante_pdf, datos)
+            # Abrir y cerrar el ZIP por bloque deja el archivo válido tras cada bloque
+            modo = 'a' if os.path.exists(ruta) else 'w'
+            with zipfile.ZipFile(ruta, modo, compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+                for (nombre, _), pdf in zip(bloque, pdfs):
+                    archivo_zip.writestr(nombre, pdf)
+            procesados += len(bloque)
+            _latido(lote, ejecucion, procesados=procesados)
+    except LoteEnProceso:
+        raise
+    except Exception as e:
+        LoteComprobantes.objects.filter(id=lote.id, ejecucion=ejecucion).update(estado='error', mensaje_error=str(e))
+        raise
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    if not os.path.exists(ruta):
+        # Cohorte sin calificaciones: ZIP vacío
+        zipfile.ZipFile(ruta, 'w').close()
+    _latido(lote, ejecucion, estado='completado', procesados=procesados, fecha_fin=timezone.now())
+    lote.refresh_from_db()
+    return lote
+
+
+def procesar_pendientes(procesos=None):
+    """
+    Procesa los lotes pendientes y los interrumpidos (en proceso sin latido reciente);
+    salta los que otra ejecución tomó. Retorna los lotes procesados
+    """
+    lotes = LoteComprobantes.objects.filter(
+        Q(estado='pendiente') | _abandonado()
+    ).select_related('periodo').order_by('fecha_creacion')
+    procesados = []
+    for lote in lotes:
+        try:
+            procesados.append(generar(lote, procesos))
+        except LoteEnProceso:
+            continue
+    return procesados
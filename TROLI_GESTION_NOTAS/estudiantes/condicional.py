@@ -0,0 +1,81 @@
+"""
+GET condicional (ETag / Last-Modified) para las páginas del estudiante
+
+La versión de los datos de un estudiante se arma con pocas consultas baratas:
+la última modificación y el total de sus calificaciones, la última
+notificación y cuántas tiene (y sin leer), las versiones de datos de sus
+cursos y del riesgo académico (ver cache_reportes.py) y el token de su
+contexto de autorización (ver autorizacion.py). Si el navegador envía la misma
+versión, se responde 304 sin ejecutar la vista.
+
+No se usa la respuesta condicional cuando hay mensajes pendientes en la
+sesión, porque la página guardada en el navegador no los mostraría.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Count, Max, Q
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import Calificacion, Notificacion, VersionDatos
+from . import autorizacion, cache_reportes
+
+_ATRIBUTO = '_version_datos_estudiante'
+
+
+def version_datos(request):
+    """
+    (etag, última modificación) de los datos del estudiante de la sesión
+    Retorna (None, None) si no aplica la respuesta condicional
+    """
+    if hasattr(request, _ATRIBUTO):
+        return getattr(request, _ATRIBUTO)
+
+    version = (None, None)
+    contexto = autorizacion.contexto(request)
+    if contexto is not None and contexto['rol'] == 'estudiante' and not len(messages.get_messages(request)):
+        usuario_id = contexto['usuario_id']
+        notas = Calificacion.objects.filter(inscripcion__estudiante_id=usuario_id).aggregate(
+            ultima=Max('fecha_modificacion'), total=Count('id')
+        )
+        avisos = Notificacion.objects.filter(usuario_id=usuario_id).aggregate(
+            ultima=Max('fecha_creacion'), total=Count('id'), sin_leer=Count('id', filter=Q(leida=False))
+        )
+        claves = [cache_reportes.VERSION_RIESGO] + [
+            cache_reportes.clave_curso(c) for c in contexto['cursos_inscritos']
+        ]
+        versiones = sorted(VersionDatos.objects.filter(clave__in=claves).values_list('clave', 'version'))
+
+        partes = [
+            usuario_id, contexto['token'], request.META.get('CSRF_COOKIE', ''),
+            notas['ultima'], notas['total'], avisos['ultima'], avisos['total'], avisos['sin_leer'], versiones,
+        ]
+        etag = hashlib.sha256(repr(partes).encode('utf-8')).hexdigest()[:32]
+        fechas = [f for f in (notas['ultima'], avisos['ultima']) if f]
+        version = (etag, max(fechas) if fechas else None)
+
+    setattr(request, _ATRIBUTO, version)
+    return version
+
+
+def _etag(request, *args, **kwargs):
+    return version_datos(request)[0]
+
+
+def _ultima_modificacion(request, *args, **kwargs):
+    return version_datos(request)[1]
+
+
+def condicional_estudiante(view_func):
+    """
+    Responde 304 si los datos del estudiante no cambiaron desde la última visita
+    El navegador debe revalidar siempre (no-cache) para no mostrar datos viejos
+    """
+    @wraps(view_func)
+    @cache_control(private=True, no_cache=True)
+    @condition(etag_func=_etag, last_modified_func=_ultima_modificacion)
+    def wrapper(request, *args, **kwargs):
+        return view_func(request, *args, **kwargs)
+    return wrapper
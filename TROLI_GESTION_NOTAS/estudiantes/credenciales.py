@@ -0,0 +1,79 @@
+"""
+Servicio de credenciales por lotes
+
+El hash de cada contraseña es costoso en CPU (el algoritmo depende de
+PERFIL_HASH en settings), así que en las cargas y restablecimientos masivos
+se reparte entre un pool de procesos. Este módulo no importa modelos al
+cargarse para que los procesos del pool puedan iniciarse también con spawn
+(Windows): cada proceso configura Django una sola vez al arrancar.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+CONTRASENAS_POR_PROCESO = 64  # Contraseñas que recibe cada proceso en cada envío
+TAMANO_LOTE = 1000  # Filas por UPDATE en bulk_update
+
+
+def _iniciar_proceso(modulo_settings):
+    """Configura Django en el proceso hijo si aún no lo está (spawn)"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', modulo_settings)
+    if not apps.ready:
+        django.setup()
+
+
+def crear_pool(procesos=None):
+    """
+    Pool de procesos para hashear; None si se pide un solo proceso
+    `procesos` por defecto es uno por CPU
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=procesos,
+        initializer=_iniciar_proceso,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'gestion_notas.settings'),),
+    )
+
+
+def hashear_contrasenas(contrasenas, ejecutor=None, algoritmo='default'):
+    """
+    Retorna la lista de hashes en el mismo orden que `contrasenas`
+    `algoritmo` es el de un hasher de PASSWORD_HASHERS ('default' usa el del perfil)
+    """
+    hashear = partial(make_password, hasher=algoritmo)
+    if ejecutor is None:
+        return [hashear(c) for c in contrasenas]
+    return list(ejecutor.map(hashear, contrasenas, chunksize=CONTRASENAS_POR_PROCESO))
+
+
+def actualizar_contrasenas(contrasenas_por_usuario, procesos=None):
+    """
+    Cambia las contraseñas de muchos usuarios a la vez
+    `contrasenas_por_usuario` es un diccionario {id de usuario: contraseña en claro}
+    Retorna el número de usuarios actualizados
+    """
+    Usuario = get_user_model()
+    ids = list(contrasenas_por_usuario)
+    ejecutor = crear_pool(procesos)
+    try:
+        actualizados = 0
+        for inicio in range(0, len(ids), TAMANO_LOTE):
+            lote = ids[inicio:inicio + TAMANO_LOTE]
+            hashes = hashear_contrasenas([contrasenas_por_usuario[i] for i in lote], ejecutor)
+            actualizados += Usuario.objects.bulk_update(
+                [Usuario(id=i, password=h) for i, h in zip(lote, hashes)], ['password'], batch_size=TAMANO_LOTE
+            )
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+        # bulk_update no dispara señales: las sesiones deben ver la contraseña nueva
+        from .autorizacion import invalidar
+        invalidar(*ids)
+    return actualizados
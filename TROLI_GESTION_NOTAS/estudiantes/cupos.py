@@ -0,0 +1,189 @@
+"""
+Cupos de cursos, contador de inscritos y lista de espera
+
+Curso.inscritos cuenta las inscripciones activas y solo se modifica con
+UPDATE condicionados: reservar un cupo es
+
+    UPDATE curso SET inscritos = inscritos + 1
+    WHERE id = ... AND (cupo IS NULL OR inscritos < cupo)
+
+que la base de datos aplica de a uno por fila, así que dos peticiones
+simultáneas no pueden tomar el mismo cupo y no se lee el contador para luego
+escribirlo. La reserva y la inscripción van en la misma transacción: si la
+inscripción falla, el cupo se devuelve solo.
+
+Sin cupo, el estudiante queda en ListaEspera; al desactivarse una inscripción
+(o al subir el cupo del curso) los cupos libres pasan al primero de la lista.
+Pedir dos veces la misma inscripción es idempotente: la restricción única de
+(estudiante, curso, periodo) impide una segunda fila y la segunda petición
+informa el estado actual sin consumir otro cupo. Las inscripciones siempre se
+toman en el periodo vigente; las de periodos anteriores quedan como historial.
+
+Las cargas masivas (importación CSV, cargar_datos) no revisan el cupo y
+recuentan el contador con recontar().
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
+
+from . import rankings
+from .models import Curso, Inscripcion, ListaEspera, Notificacion, Periodo
+
+# Intentos de inscribir() ante una inscripción o lista de espera creada en paralelo
+INTENTOS = 3
+INSCRITO = 'inscrito'
+YA_INSCRITO = 'ya_inscrito'
+EN_ESPERA = 'en_espera'
+YA_EN_ESPERA = 'ya_en_espera'
+
+
+class CursoLleno(Exception):
+    """El curso no tiene cupos disponibles"""
+
+
+# ============= CONTADOR =============
+
+def _reservar(curso_id):
+    """Toma un cupo del curso si queda alguno; retorna si lo tomó"""
+    return bool(
+        Curso.objects.filter(id=curso_id)
+        .filter(Q(cupo__isnull=True) | Q(inscritos__lt=F('cupo')))
+        .update(inscritos=F('inscritos') + 1)
+    )
+
+
+def _liberar(curso_id):
+    Curso.objects.filter(id=curso_id, inscritos__gt=0).update(inscritos=F('inscritos') - 1)
+
+
+def recontar(curso_ids=None):
+    """Recalcula el contador de inscritos desde las inscripciones activas; retorna los cursos actualizados"""
+    activas = (Inscripcion.objects.filter(curso=OuterRef('pk'), activo=True)
+               .values('curso').annotate(total=Count('id')).values('total'))
+    cursos = Curso.objects.all() if curso_ids is None else Curso.objects.filter(id__in=curso_ids)
+    return cursos.update(inscritos=Coalesce(Subquery(activas), 0))
+
+
+def _guardada(inscripcion, activo_anterior):
+    # Los UPDATE condicionados no envían pre_save ni post_save; los rankings y reportes dependen de esas señales
+    rankings.recordar_inscripcion(inscripcion, inscripcion.curso_id, inscripcion.estudiante_id, activo_anterior)
+    post_save.send(sender=Inscripcion, instance=inscripcion, created=False,
+                   update_fields=None, raw=False, using=Inscripcion.objects.db)
+
+
+# ============= INSCRIPCIÓN =============
+
+def _activar(estudiante, curso):
+    """
+    Inscripción activa en el periodo vigente con un cupo ya reservado; reactiva la del
+    periodo si el estudiante se había retirado. Una inscripción de un periodo anterior no
+    se reutiliza (conservaría su periodo y grupo): se crea una nueva
+    """
+    periodo = Periodo.actual()
+    filtro = {'estudiante': estudiante, 'curso': curso, 'periodo': periodo}
+    if Inscripcion.objects.filter(activo=False, **filtro).update(activo=True):
+        inscripcion = Inscripcion.objects.get(**filtro)
+        _guardada(inscripcion, activo_anterior=False)
+        return inscripcion
+    # Si otra petición del mismo estudiante ya la creó, la restricción única lanza IntegrityError
+    return Inscripcion.objects.create(activo=True, **filtro)
+
+
+def estado(estudiante_id, curso_id):
+    """(YA_INSCRITO, inscripción), (YA_EN_ESPERA, fila de la lista) o None"""
+    inscripcion = Inscripcion.objects.filter(estudiante_id=estudiante_id, curso_id=curso_id, activo=True).first()
+    if inscripcion:
+        return YA_INSCRITO, inscripcion
+    espera = ListaEspera.objects.filter(estudiante_id=estudiante_id, curso_id=curso_id).first()
+    if espera:
+        return YA_EN_ESPERA, espera
+    return None
+
+
+def inscribir(estudiante, curso):
+    """
+    Inscribe al estudiante si hay cupo o lo agrega a la lista de espera
+    Retorna (INSCRITO, inscripción), (EN_ESPERA, fila de la lista) o, si ya lo había
+    pedido antes, (YA_INSCRITO, ...) / (YA_EN_ESPERA, ...)
+    """
+    for intento in range(1, INTENTOS + 1):
+        actual = estado(estudiante.id, curso.id)
+        if actual:
+            return actual
+        try:
+            with transaction.atomic():
+                # La reserva es la primera escritura: en SQLite toma el bloqueo de escritura de entrada
+                if _reservar(curso.id):
+                    inscripcion = _activar(estudiante, curso)
+                    ListaEspera.objects.filter(estudiante=estudiante, curso=curso).delete()
+                    return INSCRITO, inscripcion
+                # Sin cupo: una petición repetida pudo tomar el último después de la primera consulta
+                actual = estado(estudiante.id, curso.id)
+                if actual:
+                    return actual
+                return EN_ESPERA, ListaEspera.objects.create(curso=curso, estudiante=estudiante)
+        except IntegrityError:
+            # Una petición repetida del mismo estudiante llegó antes; el rollback devolvió el cupo.
+            # Si tras varios intentos el estado sigue sin aparecer, el conflicto es otro
+            if intento == INTENTOS:
+                raise
+
+
+def crear(inscripcion):
+    """Guarda una inscripción nueva (panel de administración) tomando un cupo si queda activa"""
+    with transaction.atomic():
+        if inscripcion.activo and not _reservar(inscripcion.curso_id):
+            raise CursoLleno()
+        inscripcion.save()
+        ListaEspera.objects.filter(estudiante_id=inscripcion.estudiante_id, curso_id=inscripcion.curso_id).delete()
+    return inscripcion
+
+
+def posicion_en_espera(espera):
+    """Lugar (desde 1) del estudiante en la lista de espera de su curso"""
+    return ListaEspera.objects.filter(curso_id=espera.curso_id, id__lte=espera.id).count()
+
+
+# ============= RETIRO Y LISTA DE ESPERA =============
+
+def promover(curso_id):
+    """Asigna los cupos libres del curso a la lista de espera, en orden de llegada; retorna las inscripciones"""
+    promovidas = []
+    with transaction.atomic():
+        # Cada reserva bloquea la fila del curso hasta el final: las promociones de un curso no se cruzan
+        while _reservar(curso_id):
+            espera = (ListaEspera.objects.filter(curso_id=curso_id)
+                      .select_related('estudiante', 'curso').order_by('id').first())
+            if espera is None:
+                _liberar(curso_id)
+                break
+            espera.delete()
+            promovidas.append(_activar(espera.estudiante, espera.curso))
+            Notificacion.objects.create(
+                usuario=espera.estudiante,
+                tipo='sistema',
+                titulo='Cupo asignado',
+                mensaje=f'Se liberó un cupo en {espera.curso.nombre} y quedaste inscrito.'
+            )
+    return promovidas
+
+
+def desactivar(inscripcion):
+    """Retira la inscripción y pasa su cupo al primero de la lista de espera; retorna las inscripciones promovidas"""
+    with transaction.atomic():
+        # Condicionado a que siga activa: repetir el retiro no libera un segundo cupo
+        if not Inscripcion.objects.filter(id=inscripcion.id, activo=True).update(activo=False):
+            return []
+        inscripcion.activo = False
+        _guardada(inscripcion, activo_anterior=True)
+        _liberar(inscripcion.curso_id)
+        return promover(inscripcion.curso_id)
+
+
+def retirar_estudiante(estudiante_id):
+    """Retira al estudiante de todos sus cursos y listas de espera (usuario desactivado)"""
+    with transaction.atomic():
+        ListaEspera.objects.filter(estudiante_id=estudiante_id).delete()
+        for inscripcion in Inscripcion.objects.filter(estudiante_id=estudiante_id, activo=True):
+            desactivar(inscripcion)
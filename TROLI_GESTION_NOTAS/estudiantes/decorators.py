@@ -1,15 +1,18 @@
 from django.shortcuts import redirect
 from django.contrib import messages
 from functools import wraps
+from . import autorizacion
 
 def admin_required(view_func):
     """Decorador para verificar que el usuario sea administrador"""
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
+        # El rol sale del contexto de autorización en sesión, sin cargar el usuario
+        contexto = autorizacion.contexto(request)
+        if contexto is None:
             messages.error(request, 'Debe iniciar sesión para acceder')
             return redirect('login')
-        if request.user.rol != 'administrador':
+        if contexto['rol'] != 'administrador':
             messages.error(request, 'No tiene permisos de administrador')
             return redirect('dashboard')
         return view_func(request, *args, **kwargs)
@@ -19,10 +22,12 @@ def profesor_required(view_func):
     """Decorador para verificar que el usuario sea profesor"""
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
+        # El rol sale del contexto de autorización en sesión, sin cargar el usuario
+        contexto = autorizacion.contexto(request)
+        if contexto is None:
             messages.error(request, 'Debe iniciar sesión para acceder')
             return redirect('login')
-        if request.user.rol not in ['profesor', 'administrador']:
+        if contexto['rol'] not in ['profesor', 'administrador']:
             messages.error(request, 'No tiene permisos de profesor')
             return redirect('dashboard')
         return view_func(request, *args, **kwargs)
@@ -32,10 +37,12 @@ def estudiante_required(view_func):
     """Decorador para verificar que el usuario sea estudiante"""
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
+        # El rol sale del contexto de autorización en sesión, sin cargar el usuario
+        contexto = autorizacion.contexto(request)
+        if contexto is None:
             messages.error(request, 'Debe iniciar sesión para acceder')
             return redirect('login')
-        if request.user.rol != 'estudiante':
+        if contexto['rol'] != 'estudiante':
             messages.error(request, 'No tiene permisos de estudiante')
             return redirect('dashboard')
         return view_func(request, *args, **kwargs)
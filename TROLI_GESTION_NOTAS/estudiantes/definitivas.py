@@ -0,0 +1,141 @@
+"""
+Motor de notas definitivas ponderadas
+
+La nota definitiva de una inscripción es el promedio de cada tipo de evaluación
+multiplicado por su porcentaje (PonderacionEvaluacion), normalizado sobre los
+porcentajes ya evaluados. Si el curso no tiene ponderaciones se usa el
+promedio simple de todas sus notas.
+
+Los resultados se guardan en NotaDefinitiva y se recalculan por curso, en una
+sola pasada, cuando la caché fue invalidada (ver signals.py).
+
+Cada fila guarda la versión de datos del curso (cache_reportes) leída antes
+de calcular, y solo se usa mientras esa siga siendo la versión actual. Así una
+nota registrada durante el cálculo deja obsoleto el resultado aunque se guarde
+después de la invalidación. Las filas se escriben con upsert, de modo que dos
+cálculos simultáneos del mismo curso no chocan en la restricción única.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Avg, Count, F
+
+from .cache_reportes import version_curso, versiones_cursos
+from .models import Calificacion, Inscripcion, NotaDefinitiva, PonderacionEvaluacion
+
+NOTA_APROBATORIA = Decimal('3.0')
+_DOS_DECIMALES = Decimal('0.01')
+
+
+def pesos_por_curso(curso_ids):
+    """Ponderaciones de los cursos indicados: {curso_id: {tipo: porcentaje}}"""
+    pesos = defaultdict(dict)
+    filas = PonderacionEvaluacion.objects.filter(
+        curso_id__in=curso_ids, porcentaje__gt=0
+    ).values_list('curso_id', 'tipo_evaluacion', 'porcentaje')
+    for curso_id, tipo, porcentaje in filas:
+        pesos[curso_id][tipo] = porcentaje
+    return pesos
+
+
+def calcular_definitivas(calificaciones):
+    """
+    Calcula la nota definitiva de cada inscripción presente en el queryset
+    de calificaciones con una consulta agregada por (inscripción, tipo)
+    Retorna {inscripcion_id: {'nota', 'porcentaje_evaluado', 'total_calificaciones'}}
+    """
+    filas = list(
+        calificaciones.order_by()
+        .values('inscripcion_id', 'inscripcion__curso_id', 'tipo_evaluacion')
+        .annotate(promedio=Avg('nota'), total=Count('id'))
+    )
+    pesos = pesos_por_curso({f['inscripcion__curso_id'] for f in filas})
+
+    acumulado = {}
+    for fila in filas:
+        datos = acumulado.setdefault(fila['inscripcion_id'], {
+            'suma': Decimal('0'), 'peso': Decimal('0'), 'total_calificaciones': 0,
+        })
+        promedio = Decimal(fila['promedio'])
+        pesos_curso = pesos.get(fila['inscripcion__curso_id'])
+        if pesos_curso:
+            # Promedio del tipo multiplicado por su porcentaje
+            peso = pesos_curso.get(fila['tipo_evaluacion'], Decimal('0'))
+            datos['suma'] += promedio * peso
+            datos['peso'] += peso
+        else:
+            # Sin ponderación: promedio simple de todas las notas
+            datos['suma'] += promedio * fila['total']
+            datos['peso'] += fila['total']
+        datos['total_calificaciones'] += fila['total']
+        datos['ponderado'] = bool(pesos_curso)
+
+    resultado = {}
+    for inscripcion_id, datos in acumulado.items():
+        nota = None
+        if datos['peso']:
+            nota = (datos['suma'] / datos['peso']).quantize(_DOS_DECIMALES, rounding=ROUND_HALF_UP)
+        resultado[inscripcion_id] = {
+            'nota': nota,
+            'porcentaje_evaluado': datos['peso'] if datos['ponderado'] else Decimal('100'),
+            'total_calificaciones': datos['total_calificaciones'],
+        }
+    return resultado
+
+
+def actualizar_cursos(curso_ids):
+    """Recalcula y guarda la nota definitiva de todas las inscripciones de los cursos"""
+    curso_ids = list(curso_ids)
+    if not curso_ids:
+        return
+    with transaction.atomic():
+        # La versión se lee antes que las notas: si cambian durante el cálculo, la versión ya no coincide
+        versiones = versiones_cursos(curso_ids)
+        calculadas = calcular_definitivas(
+            Calificacion.objects.filter(inscripcion__curso_id__in=curso_ids)
+        )
+        inscripciones = Inscripcion.objects.filter(curso_id__in=curso_ids).values_list('id', 'curso_id')
+        filas = []
+        for inscripcion_id, curso_id in inscripciones:
+            datos = calculadas.get(inscripcion_id, {})
+            filas.append(NotaDefinitiva(
+                inscripcion_id=inscripcion_id,
+                curso_id=curso_id,
+                nota=datos.get('nota'),
+                porcentaje_evaluado=datos.get('porcentaje_evaluado', Decimal('0')),
+                total_calificaciones=datos.get('total_calificaciones', 0),
+                version=versiones[curso_id],
+            ))
+        NotaDefinitiva.objects.bulk_create(
+            filas, batch_size=500, update_conflicts=True, unique_fields=['inscripcion'],
+            update_fields=['curso', 'nota', 'porcentaje_evaluado', 'total_calificaciones', 'version', 'fecha_calculo'],
+        )
+
+
+def _vigentes(inscripcion_ids):
+    """Notas definitivas guardadas con la versión actual de los datos de su curso"""
+    return NotaDefinitiva.objects.filter(inscripcion_id__in=inscripcion_ids).annotate(
+        version_actual=version_curso()
+    ).filter(version=F('version_actual'))
+
+
+def definitivas_de(inscripciones):
+    """
+    Notas definitivas en caché para las inscripciones dadas: {inscripcion_id: NotaDefinitiva}
+    Los cursos sin caché válida se recalculan completos antes de responder
+    """
+    inscripciones = list(inscripciones)
+    ids = [i.id for i in inscripciones]
+    cache = {n.inscripcion_id: n for n in _vigentes(ids)}
+    cursos_faltantes = {i.curso_id for i in inscripciones if i.id not in cache}
+    if cursos_faltantes:
+        actualizar_cursos(cursos_faltantes)
+        faltantes = [i for i in ids if i not in cache]
+        cache.update({n.inscripcion_id: n for n in NotaDefinitiva.objects.filter(inscripcion_id__in=faltantes)})
+    return cache
+
+
+def invalidar_curso(curso_id):
+    """Descarta las notas definitivas guardadas de un curso"""
+    NotaDefinitiva.objects.filter(curso_id=curso_id).delete()
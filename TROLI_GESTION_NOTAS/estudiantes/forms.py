@@ -3,7 +3,9 @@ from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import FieldError, ValidationError
 from django.core.validators import validate_email
 import re
-from .models import Usuario, Curso, Inscripcion, ReporteAcademico
+from decimal import Decimal
+from .models import Usuario, Curso, Periodo, Inscripcion, Calificacion, PonderacionEvaluacion, ReporteAcademico
+from . import definitivas
 
 class CustomUserCreationForm(UserCreationForm):
     class Meta:
@@ -205,12 +207,13 @@ class CursoAdminForm(forms.ModelForm):
     """Formulario para crear/editar cursos desde el panel de administración"""
     class Meta:
         model = Curso
-        fields = ['codigo', 'nombre', 'descripcion', 'creditos', 'profesor', 'activo']
+        fields = ['codigo', 'nombre', 'descripcion', 'creditos', 'cupo', 'profesor', 'activo']
         widgets = {
             'codigo': forms.TextInput(attrs={'class': 'form-control'}),
             'nombre': forms.TextInput(attrs={'class': 'form-control'}),
             'descripcion': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'creditos': forms.NumberInput(attrs={'class': 'form-control'}),
+            'cupo': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Sin límite'}),
             'profesor': forms.Select(attrs={'class': 'form-control'}),
             'activo': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
@@ -220,14 +223,64 @@ class CursoAdminForm(forms.ModelForm):
         # Filtrar solo profesores activos
         self.fields['profesor'].queryset = Usuario.objects.filter(rol='profesor', activo=True)
 
+        # Un campo de porcentaje por cada tipo de evaluación (opcional)
+        actuales = {}
+        if self.instance and self.instance.pk:
+            actuales = dict(self.instance.ponderaciones.values_list('tipo_evaluacion', 'porcentaje'))
+        for tipo, etiqueta in Calificacion.TIPOS_EVALUACION:
+            self.fields[f'peso_{tipo}'] = forms.DecimalField(
+                required=False,
+                min_value=Decimal('0'),
+                max_value=Decimal('100'),
+                max_digits=5,
+                decimal_places=2,
+                label=f'{etiqueta} (%)',
+                initial=actuales.get(tipo),
+                widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+            )
+
+    def campos_ponderacion(self):
+        """Campos de porcentaje por tipo de evaluación, para la plantilla"""
+        return [self[f'peso_{tipo}'] for tipo, _ in Calificacion.TIPOS_EVALUACION]
+
+    def clean(self):
+        cleaned = super().clean()
+        pesos = [cleaned.get(f'peso_{tipo}') for tipo, _ in Calificacion.TIPOS_EVALUACION]
+        definidos = [p for p in pesos if p]
+        # Si se define una ponderación, los porcentajes deben sumar 100
+        if definidos and sum(definidos) != Decimal('100'):
+            raise ValidationError('Los porcentajes de evaluación deben sumar 100%.')
+        return cleaned
+
+    def save(self, commit=True):
+        curso = super().save(commit=False)
+        if commit:
+            # Al editar se guardan solo los campos del formulario: el contador de inscritos
+            # cambia con cada inscripción y el valor leído al abrir el formulario ya no sirve
+            curso.save(update_fields=None if curso._state.adding else self.Meta.fields)
+            self.guardar_ponderaciones(curso)
+        return curso
+
+    def guardar_ponderaciones(self, curso):
+        """Reemplaza la ponderación del curso por la del formulario"""
+        curso.ponderaciones.all().delete()
+        PonderacionEvaluacion.objects.bulk_create([
+            PonderacionEvaluacion(curso=curso, tipo_evaluacion=tipo, porcentaje=self.cleaned_data[f'peso_{tipo}'])
+            for tipo, _ in Calificacion.TIPOS_EVALUACION
+            if self.cleaned_data.get(f'peso_{tipo}')
+        ])
+        definitivas.invalidar_curso(curso.id)
+
 class InscripcionAdminForm(forms.ModelForm):
     """Formulario para crear inscripciones desde el panel de administración"""
     class Meta:
         model = Inscripcion
-        fields = ['estudiante', 'curso', 'activo']
+        fields = ['estudiante', 'curso', 'periodo', 'grupo', 'activo']
         widgets = {
             'estudiante': forms.Select(attrs={'class': 'form-control'}),
             'curso': forms.Select(attrs={'class': 'form-control'}),
+            'periodo': forms.Select(attrs={'class': 'form-control'}),
+            'grupo': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ejemplo: Grupo A'}),
             'activo': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
     
@@ -235,6 +288,12 @@ class InscripcionAdminForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['estudiante'].queryset = Usuario.objects.filter(rol='estudiante', activo=True)
         self.fields['curso'].queryset = Curso.objects.filter(activo=True)
+        # Por defecto se inscribe en el semestre vigente
+        self.fields['periodo'].empty_label = 'Semestre vigente'
+    
+    def clean_periodo(self):
+        # Se resuelve aquí para que la validación de inscripción repetida incluya el periodo
+        return self.cleaned_data.get('periodo') or Periodo.actual()
 
 class ReporteAcademicoForm(forms.ModelForm):
     """Formulario para guardar reportes académicos"""
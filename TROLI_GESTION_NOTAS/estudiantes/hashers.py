@@ -0,0 +1,22 @@
+"""
+Hashers de contraseñas con parámetros configurables desde settings
+
+Se seleccionan con PERFIL_HASH en settings.py (ver PASSWORD_HASHERS).
+Conservan el nombre de algoritmo de Django, así que los hashes existentes
+se siguen verificando y se actualizan al nuevo perfil en el siguiente
+inicio de sesión.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class Argon2Configurable(Argon2PasswordHasher):
+    """Argon2 con costo de tiempo, memoria y paralelismo tomados de ARGON2_PARAMETROS"""
+    time_cost = settings.ARGON2_PARAMETROS.get('time_cost', Argon2PasswordHasher.time_cost)
+    memory_cost = settings.ARGON2_PARAMETROS.get('memory_cost', Argon2PasswordHasher.memory_cost)
+    parallelism = settings.ARGON2_PARAMETROS.get('parallelism', Argon2PasswordHasher.parallelism)
+
+
+class PBKDF2Configurable(PBKDF2PasswordHasher):
+    """PBKDF2 con las iteraciones de PBKDF2_ITERACIONES; nunca menos que las de Django"""
+    iterations = max(settings.PBKDF2_ITERACIONES, PBKDF2PasswordHasher.iterations)
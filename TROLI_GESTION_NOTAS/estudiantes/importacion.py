@@ -0,0 +1,310 @@
+"""
+Importación masiva desde CSV de usuarios, cursos e inscripciones
+
+El archivo se lee en streaming y se procesa por bloques de filas. En cada
+bloque la unicidad (usuario, email, código de curso, inscripción) y las
+referencias (profesor, estudiante, curso) se validan con una consulta por
+conjunto en lugar de una consulta por fila; las contraseñas se hashean en un
+pool de procesos (ver credenciales.py) y las filas válidas se insertan con
+bulk_create. Las filas con errores no detienen la carga: se devuelven con su
+número de fila y el motivo.
+
+bulk_create no dispara las señales de post_save, así que se actualizan
+explícitamente los rankings, las versiones de datos de reportes y el
+contexto de autorización de los profesores y estudiantes afectados.
+"""
+import csv
+import re
+from datetime import date
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import Curso, Inscripcion, Periodo, Usuario
+from . import autorizacion, cache_reportes, credenciales, cupos, rankings
+
+TAMANO_BLOQUE = 1000
+
+COLUMNAS = {
+    'usuarios': ['username', 'email', 'first_name', 'last_name', 'rol', 'telefono', 'password'],
+    'cursos': ['codigo', 'nombre', 'profesor'],
+    'inscripciones': ['estudiante', 'curso'],
+}
+COLUMNAS_OPCIONALES = {
+    'usuarios': [],
+    'cursos': ['creditos', 'descripcion'],
+    'inscripciones': ['periodo', 'grupo'],
+}
+
+_ROLES = {valor for valor, _ in Usuario.ROLES}
+_TIPOS = list(COLUMNAS)
+
+
+# ============= LECTURA =============
+
+def leer_csv(archivo, tipo):
+    """
+    Genera (número de fila, diccionario) a partir de un archivo de texto
+    La fila 1 es el encabezado; lanza ValueError si faltan columnas obligatorias
+    """
+    if tipo not in COLUMNAS:
+        raise ValueError(f'Tipo de importación no válido: {tipo}. Opciones: {", ".join(_TIPOS)}')
+    lector = csv.DictReader(archivo)
+    encabezado = [c.strip().lower() for c in (lector.fieldnames or [])]
+    faltantes = [c for c in COLUMNAS[tipo] if c not in encabezado]
+    if faltantes:
+        raise ValueError(f'Faltan columnas obligatorias: {", ".join(faltantes)}')
+    lector.fieldnames = encabezado
+    for numero, fila in enumerate(lector, start=2):
+        yield numero, {k: (v or '').strip() for k, v in fila.items() if k}
+
+
+def _bloques(filas):
+    while True:
+        bloque = list(islice(filas, TAMANO_BLOQUE))
+        if not bloque:
+            return
+        yield bloque
+
+
+# ============= VALIDACIÓN POR FILA =============
+
+def _error_contrasena(pwd):
+    """Mismas reglas que UsuarioAdminForm"""
+    if not (8 <= len(pwd) <= 20):
+        return 'La contraseña debe tener entre 8 y 20 caracteres.'
+    if not re.search(r'[A-Z]', pwd):
+        return 'La contraseña debe incluir al menos una letra mayúscula.'
+    if not re.search(r'[a-z]', pwd):
+        return 'La contraseña debe incluir al menos una letra minúscula.'
+    if not re.search(r'\d', pwd):
+        return 'La contraseña debe incluir al menos un número.'
+    if not re.search(r'[^A-Za-z0-9]', pwd):
+        return 'La contraseña debe incluir al menos un carácter especial.'
+    return None
+
+
+def _error_usuario(fila):
+    if not (4 <= len(fila['username']) <= 20):
+        return 'El usuario debe tener entre 4 y 20 caracteres.'
+    if not fila['email']:
+        return 'El email es obligatorio.'
+    try:
+        validate_email(fila['email'])
+    except ValidationError:
+        return 'Email no válido.'
+    nombre = f"{fila['first_name']} {fila['last_name']}".strip()
+    if not (3 <= len(nombre) <= 100):
+        return 'El nombre completo debe tener entre 3 y 100 caracteres.'
+    if fila['rol'] not in _ROLES:
+        return f"Rol no válido: {fila['rol']}"
+    if not re.fullmatch(r'\d{10}', fila['telefono']):
+        return 'El teléfono debe contener exactamente 10 dígitos.'
+    return _error_contrasena(fila['password'])
+
+
+def _periodo_por_codigo(codigo, cache):
+    """Periodo a partir de su código (2025-1, 2025-2); vacío es el semestre vigente"""
+    if codigo not in cache:
+        if not codigo:
+            cache[codigo] = Periodo.actual()
+        else:
+            coincidencia = re.fullmatch(r'(\d{4})-([12])', codigo)
+            cache[codigo] = Periodo.para_fecha(
+                date(int(coincidencia.group(1)), 1 if coincidencia.group(2) == '1' else 7, 1)
+            ) if coincidencia else None
+    return cache[codigo]
+
+
+# ============= IMPORTACIÓN POR BLOQUES =============
+
+def _importar_usuarios(bloque, vistos, ejecutor):
+    errores, validas = [], []
+    for numero, fila in bloque:
+        fila['email'] = fila['email'].lower()
+        error = _error_usuario(fila)
+        if not error and fila['username'].lower() in vistos['username']:
+            error = 'Usuario repetido en el archivo.'
+        if not error and fila['email'] in vistos['email']:
+            error = 'Email repetido en el archivo.'
+        if error:
+            errores.append((numero, error))
+            continue
+        vistos['username'].add(fila['username'].lower())
+        vistos['email'].add(fila['email'])
+        validas.append((numero, fila))
+
+    # Unicidad contra la base de datos: una consulta por campo para todo el bloque
+    usuarios_existentes = set(
+        Usuario.objects.annotate(u=Lower('username'))
+        .filter(u__in=[f['username'].lower() for _, f in validas]).values_list('u', flat=True)
+    )
+    emails_existentes = set(
+        Usuario.objects.annotate(e=Lower('email'))
+        .filter(e__in=[f['email'] for _, f in validas]).values_list('e', flat=True)
+    )
+    nuevas = []
+    for numero, fila in validas:
+        if fila['username'].lower() in usuarios_existentes:
+            errores.append((numero, 'Ya existe un usuario con ese nombre de usuario.'))
+        elif fila['email'] in emails_existentes:
+            errores.append((numero, 'Ya existe un usuario con ese correo electrónico.'))
+        else:
+            nuevas.append(fila)
+
+    hashes = credenciales.hashear_contrasenas([f['password'] for f in nuevas], ejecutor)
+    Usuario.objects.bulk_create([
+        Usuario(
+            username=f['username'], email=f['email'], first_name=f['first_name'],
+            last_name=f['last_name'], rol=f['rol'], telefono=f['telefono'], password=h,
+        )
+        for f, h in zip(nuevas, hashes)
+    ], batch_size=TAMANO_BLOQUE)
+    return len(nuevas), errores
+
+
+def _importar_cursos(bloque, vistos):
+    errores, validas = [], []
+    for numero, fila in bloque:
+        creditos = fila.get('creditos') or '3'
+        if not fila['codigo'] or len(fila['codigo']) > 20:
+            error = 'El código es obligatorio (máximo 20 caracteres).'
+        elif not fila['nombre'] or len(fila['nombre']) > 100:
+            error = 'El nombre es obligatorio (máximo 100 caracteres).'
+        elif not creditos.isdigit():
+            error = 'Los créditos deben ser un número entero.'
+        elif fila['codigo'] in vistos['codigo']:
+            error = 'Código repetido en el archivo.'
+        else:
+            error = None
+        if error:
+            errores.append((numero, error))
+            continue
+        vistos['codigo'].add(fila['codigo'])
+        fila['creditos'] = int(creditos)
+        validas.append((numero, fila))
+
+    codigos_existentes = set(
+        Curso.objects.filter(codigo__in=[f['codigo'] for _, f in validas]).values_list('codigo', flat=True)
+    )
+    profesores = dict(
+        Usuario.objects.filter(username__in={f['profesor'] for _, f in validas}, rol='profesor', activo=True)
+        .values_list('username', 'id')
+    )
+    nuevos = []
+    for numero, fila in validas:
+        if fila['codigo'] in codigos_existentes:
+            errores.append((numero, 'Ya existe un curso con ese código.'))
+        elif fila['profesor'] not in profesores:
+            errores.append((numero, f"No existe el profesor {fila['profesor']}."))
+        else:
+            nuevos.append(Curso(
+                codigo=fila['codigo'], nombre=fila['nombre'], descripcion=fila.get('descripcion', ''),
+                creditos=fila['creditos'], profesor_id=profesores[fila['profesor']],
+            ))
+    Curso.objects.bulk_create(nuevos, batch_size=TAMANO_BLOQUE)
+    autorizacion.invalidar(*{c.profesor_id for c in nuevos})
+    return len(nuevos), errores
+
+
+def _importar_inscripciones(bloque, vistos, periodos):
+    errores, validas = [], []
+    for numero, fila in bloque:
+        periodo = _periodo_por_codigo(fila.get('periodo', ''), periodos)
+        if periodo is None:
+            errores.append((numero, f"Periodo no válido: {fila['periodo']} (formato 2025-1)."))
+        elif len(fila.get('grupo', '')) > 50:
+            errores.append((numero, 'El grupo tiene máximo 50 caracteres.'))
+        elif (fila['estudiante'], fila['curso'], periodo.id) in vistos['inscripcion']:
+            errores.append((numero, 'Inscripción repetida en el archivo.'))
+        else:
+            vistos['inscripcion'].add((fila['estudiante'], fila['curso'], periodo.id))
+            validas.append((numero, fila, periodo))
+
+    estudiantes = dict(
+        Usuario.objects.filter(username__in={f['estudiante'] for _, f, _ in validas}, rol='estudiante')
+        .values_list('username', 'id')
+    )
+    cursos = dict(
+        Curso.objects.filter(codigo__in={f['curso'] for _, f, _ in validas}).values_list('codigo', 'id')
+    )
+    existentes = set(
+        Inscripcion.objects.filter(
+            estudiante_id__in=estudiantes.values(), curso_id__in=cursos.values()
+        ).values_list('estudiante_id', 'curso_id', 'periodo_id')
+    )
+    nuevas = []
+    for numero, fila, periodo in validas:
+        estudiante_id, curso_id = estudiantes.get(fila['estudiante']), cursos.get(fila['curso'])
+        if estudiante_id is None:
+            errores.append((numero, f"No existe el estudiante {fila['estudiante']}."))
+        elif curso_id is None:
+            errores.append((numero, f"No existe el curso {fila['curso']}."))
+        elif (estudiante_id, curso_id, periodo.id) in existentes:
+            errores.append((numero, 'El estudiante ya está inscrito en ese curso en ese periodo.'))
+        else:
+            nuevas.append(Inscripcion(
+                estudiante_id=estudiante_id, curso_id=curso_id, periodo=periodo, grupo=fila.get('grupo', ''),
+            ))
+    Inscripcion.objects.bulk_create(nuevas, batch_size=TAMANO_BLOQUE)
+    autorizacion.invalidar(*{i.estudiante_id for i in nuevas})
+    # La carga masiva no revisa el cupo; el contador de inscritos se recalcula
+    cupos.recontar({i.curso_id for i in nuevas})
+    return len(nuevas), errores
+
+
+def _actualizar_derivados(tipo, creados):
+    """Lo que harían las señales de post_save para las filas insertadas"""
+    if not creados:
+        return
+    if tipo == 'usuarios':
+        cache_reportes.incrementar_version(cache_reportes.VERSION_USUARIOS)
+    else:
+        # Los cursos nuevos aparecen en el ranking; las inscripciones cambian el número de estudiantes
+        rankings.reconstruir()
+        cache_reportes.incrementar_version(cache_reportes.VERSION_GLOBAL)
+
+
+def importar(archivo, tipo, procesos=None, progreso=None):
+    """
+    Importa el CSV `archivo` (texto) de tipo 'usuarios', 'cursos' o 'inscripciones'
+    Retorna {'creados': n, 'errores': [(fila, motivo), ...]}
+    `progreso(filas_leidas)` se llama después de cada bloque
+    """
+    filas = leer_csv(archivo, tipo)
+    vistos = {'username': set(), 'email': set(), 'codigo': set(), 'inscripcion': set()}
+    periodos = {}
+    resultado = {'creados': 0, 'errores': []}
+    leidas = 0
+    ejecutor = credenciales.crear_pool(procesos) if tipo == 'usuarios' else None
+    try:
+        for bloque in _bloques(filas):
+            # Cada bloque se inserta completo o no se inserta
+            with transaction.atomic():
+                if tipo == 'usuarios':
+                    creados, errores = _importar_usuarios(bloque, vistos, ejecutor)
+                elif tipo == 'cursos':
+                    creados, errores = _importar_cursos(bloque, vistos)
+                else:
+                    creados, errores = _importar_inscripciones(bloque, vistos, periodos)
+            resultado['creados'] += creados
+            resultado['errores'].extend(errores)
+            leidas += len(bloque)
+            if progreso:
+                progreso(leidas)
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+        _actualizar_derivados(tipo, resultado['creados'])
+    resultado['errores'].sort()
+    return resultado
+
+
+def escribir_errores(destino, errores):
+    """Reporte de errores por fila en CSV"""
+    escritor = csv.writer(destino)
+    escritor.writerow(['fila', 'error'])
+    escritor.writerows(errores)
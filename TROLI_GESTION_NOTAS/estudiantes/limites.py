@@ -0,0 +1,157 @@
+"""
+Limitación de frecuencia con ventana deslizante en la caché de Django
+
+Cada límite tiene una capacidad (intentos seguidos permitidos) y una tasa
+(intentos por segundo a largo plazo). El tiempo se divide en ventanas de
+capacidad / tasa segundos y cada identificador (usuario, IP) tiene un contador
+por ventana que se crea con cache.add y se incrementa con cache.incr. Para que
+no pasen dos capacidades seguidas en el cambio de ventana, los intentos de la
+ventana anterior se cuentan en proporción a lo que aún se solapa con los
+últimos capacidad / tasa segundos: anterior * (1 - fracción transcurrida) +
+actual. No se lee el contador actual para después escribirlo: el valor que
+retorna incr decide, así que dos peticiones simultáneas nunca gastan el mismo
+intento; un intento rechazado se devuelve con cache.decr. El contador de la
+ventana anterior ya no recibe intentos y basta con leerlo. Los contadores
+expiran solos al terminar la ventana siguiente, sin tareas periódicas. Se
+consulta antes del trabajo costoso (el hash de la contraseña en el login, el
+armado de un PDF) para que una ráfaga de peticiones no ocupe todos los workers.
+
+Los valores por defecto se pueden cambiar con LIMITES_FRECUENCIA en settings.
+Con varios procesos o servidores la caché debe ser compartida y con incr
+atómico (Memcached o Redis; DatabaseCache implementa incr leyendo y
+escribiendo); con la caché en memoria cada proceso lleva su propia cuenta.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# nombre: (capacidad, intentos por segundo); la ventana dura capacidad / tasa segundos
+LIMITES = {
+    'login_usuario': (5, 1 / 60),      # 5 intentos por usuario cada 5 minutos
+    'login_ip': (20, 1 / 6),           # 20 intentos por IP cada 2 minutos
+    'cambiar_contrasena': (5, 1 / 60),
+    'exportar_pdf': (10, 1 / 6),
+}
+LIMITES.update(getattr(settings, 'LIMITES_FRECUENCIA', {}))
+
+
+def _clave(nombre, identificador):
+    # Los identificadores (usuario, IP) se guardan con hash para acotar el largo de la clave
+    resumen = hashlib.sha256(str(identificador).lower().encode('utf-8')).hexdigest()[:32]
+    return f'limite:{nombre}:{resumen}'
+
+
+def _incrementar(clave, expiracion):
+    """Suma 1 al contador y retorna el nuevo valor, sin leerlo antes"""
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        # Primera vez: si otro proceso la creó entre tanto, add no la pisa
+        if cache.add(clave, 1, expiracion):
+            return 1
+        return cache.incr(clave)
+
+
+def _contar(nombre, resultado):
+    _incrementar(f'limite:contador:{nombre}:{resultado}', None)
+
+
+def _ventana(nombre, ahora):
+    """(número de ventana, fracción transcurrida, duración en segundos) del límite en el instante `ahora`"""
+    capacidad, tasa = LIMITES[nombre]
+    duracion = capacidad / tasa
+    numero = int(ahora // duracion)
+    return numero, ahora / duracion - numero, duracion
+
+
+# ============= VENTANA DESLIZANTE =============
+
+def consumir(nombre, identificador, ahora=None):
+    """
+    Intenta gastar un intento en los últimos capacidad / tasa segundos; retorna (permitido, segundos de espera)
+    Los segundos de espera son 0 si se permitió
+    """
+    capacidad = LIMITES[nombre][0]
+    numero, fraccion, duracion = _ventana(nombre, time.time() if ahora is None else ahora)
+    clave = _clave(nombre, identificador)
+    # El contador sigue vivo durante la ventana siguiente, donde pesa como anterior
+    usados = _incrementar(f'{clave}:{numero}', math.ceil((2 - fraccion) * duracion) + 1)
+    anteriores = cache.get(f'{clave}:{numero - 1}', 0)
+    if anteriores * (1 - fraccion) + usados <= capacidad:
+        _contar(nombre, 'permitidos')
+        return True, 0
+    try:
+        cache.decr(f'{clave}:{numero}')
+    except ValueError:
+        pass
+    _contar(nombre, 'rechazados')
+    if usados <= capacidad:
+        # Cabe en esta ventana cuando el peso de la anterior baje lo suficiente
+        espera = (1 - (capacidad - usados) / anteriores - fraccion) * duracion
+    else:
+        espera = (1 - fraccion) * duracion
+    return False, max(math.ceil(espera), 1)
+
+
+def reiniciar(nombre, identificador):
+    """Devuelve los intentos recientes (por ejemplo, tras un inicio de sesión correcto)"""
+    numero, _, _ = _ventana(nombre, time.time())
+    clave = _clave(nombre, identificador)
+    cache.delete_many([f'{clave}:{numero}', f'{clave}:{numero - 1}'])
+
+
+def contadores():
+    """Peticiones permitidas y rechazadas por cada límite desde que arrancó la caché"""
+    claves = [
+        f'limite:contador:{nombre}:{resultado}' for nombre in LIMITES for resultado in ('permitidos', 'rechazados')
+    ]
+    valores = cache.get_many(claves)
+    return {
+        nombre: {
+            resultado: valores.get(f'limite:contador:{nombre}:{resultado}', 0)
+            for resultado in ('permitidos', 'rechazados')
+        }
+        for nombre in LIMITES
+    }
+
+
+# ============= USO EN VISTAS =============
+
+def ip_cliente(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def respuesta_limitada(espera):
+    """Respuesta 429 con el tiempo de espera sugerido"""
+    response = HttpResponse(
+        f'Demasiadas solicitudes. Intenta de nuevo en {espera} segundos.', status=429
+    )
+    response['Retry-After'] = str(espera)
+    return response
+
+
+def limitar(nombre, por='usuario', metodos=None):
+    """
+    Decorador que aplica el límite `nombre` a una vista
+    `por` es 'usuario' (usuario autenticado, o IP si no hay sesión) o 'ip';
+    `metodos` restringe el límite a ciertos métodos HTTP (por ejemplo ['POST'])
+    """
+    def decorador(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if metodos is None or request.method in metodos:
+                if por == 'usuario' and request.user.is_authenticated:
+                    identificador = f'u{request.user.pk}'
+                else:
+                    identificador = ip_cliente(request)
+                permitido, espera = consumir(nombre, identificador)
+                if not permitido:
+                    return respuesta_limitada(espera)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorador
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import get_hasher
+from django.conf import settings
+from estudiantes import credenciales
+import os
+import time
+
+class Command(BaseCommand):
+    help = (
+        'Mide el tiempo de hashear muchas contraseñas: antes (PBKDF2 de Django, una por una, '
+        'como set_password) y después (hasher del perfil PERFIL_HASH en el pool de procesos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=10000, help='Contraseñas a hashear (por defecto 10000)')
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos del pool (por defecto, uno por CPU)')
+
+    def handle(self, *args, **options):
+        contrasenas = [f'Clave{i}@Troli' for i in range(options['cantidad'])]
+        procesos = options['procesos'] or os.cpu_count() or 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Hasheando {len(contrasenas)} contraseñas (perfil {settings.PERFIL_HASH}, {procesos} procesos)...'
+        ))
+
+        inicio = time.perf_counter()
+        credenciales.hashear_contrasenas(contrasenas, algoritmo='pbkdf2_sha256')
+        antes = time.perf_counter() - inicio
+        self.stdout.write(f'   - Antes   (pbkdf2_sha256, secuencial): {antes:.2f} s')
+
+        inicio = time.perf_counter()
+        ejecutor = credenciales.crear_pool(procesos)
+        try:
+            credenciales.hashear_contrasenas(contrasenas, ejecutor)
+        finally:
+            if ejecutor is not None:
+                ejecutor.shutdown()
+        despues = time.perf_counter() - inicio
+        self.stdout.write(f'   - Después ({get_hasher().algorithm}, pool de {procesos}): {despues:.2f} s')
+
+        self.stdout.write(self.style.SUCCESS(f'Aceleración: {antes / max(despues, 1e-6):.1f}x'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from estudiantes.models import Usuario
+from estudiantes import autorizacion
+import time
+
+MOTORES = [
+    ('db', 'django.contrib.sessions.backends.db'),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db'),
+    ('escritura diferida', 'estudiantes.sesiones'),
+]
+
+class Command(BaseCommand):
+    help = 'Mide peticiones por segundo al dashboard de estudiante con cada motor de sesiones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=300, help='Peticiones por motor (por defecto 300)')
+        parser.add_argument('--usuario', help='Estudiante con el que se inicia sesión (por defecto, el primero activo)')
+
+    def handle(self, *args, **options):
+        estudiantes = Usuario.objects.filter(rol='estudiante', activo=True)
+        if options['usuario']:
+            estudiantes = estudiantes.filter(username=options['usuario'])
+        estudiante = estudiantes.order_by('id').first()
+        if not estudiante:
+            raise CommandError('No hay un estudiante activo para la prueba (ejecuta cargar_datos)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Dashboard de {estudiante.username}, {options["peticiones"]} peticiones por motor...'
+        ))
+        if not autorizacion.cache_compartida():
+            self.stdout.write(self.style.WARNING(
+                'Sin caché compartida (CACHE_REDIS_URL) estudiantes.sesiones escribe directo en la base de datos'
+            ))
+        for nombre, motor in MOTORES:
+            with override_settings(SESSION_ENGINE=motor):
+                cliente = Client(HTTP_HOST='localhost')
+                cliente.force_login(estudiante)
+                cliente.get('/dashboard/estudiante/')  # Calentamiento
+                inicio = time.perf_counter()
+                for _ in range(options['peticiones']):
+                    cliente.get('/dashboard/estudiante/')
+                duracion = time.perf_counter() - inicio
+            self.stdout.write(f'   - {nombre:<20} {options["peticiones"] / duracion:8.1f} peticiones/s')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from estudiantes.riesgo import calcular_riesgo
+import time
+
+class Command(BaseCommand):
+    help = (
+        'Calcula el puntaje de riesgo académico de todos los estudiantes activos. '
+        'Pensado para ejecutarse periódicamente (por ejemplo con cron).'
+    )
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(self.style.SUCCESS('Calculando riesgo académico...'))
+        inicio = time.perf_counter()
+        conteo = calcular_riesgo()
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(f'   - Riesgo alto:  {conteo["alto"]}')
+        self.stdout.write(f'   - Riesgo medio: {conteo["medio"]}')
+        self.stdout.write(f'   - Riesgo bajo:  {conteo["bajo"]}')
+        self.stdout.write(self.style.SUCCESS(f'Cálculo completado en {duracion:.2f} s'))
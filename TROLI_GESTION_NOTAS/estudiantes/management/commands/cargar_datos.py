@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from estudiantes.models import Usuario, Curso, Inscripcion, Calificacion, Notificacion
+from estudiantes.models import Usuario, Curso, Periodo, Inscripcion, Calificacion, Notificacion
+from estudiantes import cupos
 from django.utils import timezone
 from decimal import Decimal
 
@@ -126,10 +127,12 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.WARNING('Curso Programación I ya existe'))
 
-        # Crear Inscripciones
+        # Crear Inscripciones (en el semestre vigente)
+        periodo = Periodo.actual()
         insc1, created = Inscripcion.objects.get_or_create(
             estudiante=estudiante1,
             curso=curso1,
+            periodo=periodo,
             defaults={'activo': True}
         )
         if created:
@@ -138,7 +141,8 @@ class Command(BaseCommand):
         inscripcion2, created = Inscripcion.objects.get_or_create(
             estudiante=estudiante1,
             curso=curso2,
-            defaults={'estado': 'activo'}
+            periodo=periodo,
+            defaults={'activo': True}
         )
         if created:
             self.stdout.write(self.style.SUCCESS('Inscripción creada: Juan en Física I'))
@@ -146,7 +150,8 @@ class Command(BaseCommand):
         inscripcion3, created = Inscripcion.objects.get_or_create(
             estudiante=estudiante2,
             curso=curso1,
-            defaults={'estado': 'activo'}
+            periodo=periodo,
+            defaults={'activo': True}
         )
         if created:
             self.stdout.write(self.style.SUCCESS('Inscripción creada: Ana en Matemáticas I'))
@@ -229,6 +234,9 @@ class Command(BaseCommand):
         if created:
             self.stdout.write(self.style.SUCCESS('Notificación creada para Ana'))
 
+        # Las inscripciones se crearon sin pasar por los cupos
+        cupos.recontar()
+
         self.stdout.write(self.style.SUCCESS('\nCarga de datos completada exitosamente!'))
         self.stdout.write(self.style.SUCCESS('\nResumen:'))
         self.stdout.write(f'   - Usuarios: {Usuario.objects.count()}')
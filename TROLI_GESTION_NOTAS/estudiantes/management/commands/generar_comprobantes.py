@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from estudiantes.models import Curso, LoteComprobantes, Periodo
+from estudiantes.comprobantes_lote import LoteEnProceso, generar, procesar_pendientes
+import time
+
+class Command(BaseCommand):
+    help = (
+        'Genera en un ZIP los comprobantes de calificaciones de una cohorte usando varios procesos. '
+        'Sin argumentos procesa los lotes pendientes o interrumpidos creados desde el panel.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', metavar='CODIGO', help='Crea y procesa un lote para el semestre (ej. 2025-2)')
+        parser.add_argument('--curso', type=int, metavar='ID', help='Limita el lote nuevo a un curso')
+        parser.add_argument('--grupo', default='', help='Limita el lote nuevo a un grupo')
+        parser.add_argument('--lote', type=int, metavar='ID', help='Reanuda un lote existente')
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos para renderizar PDF (por defecto, uno por CPU)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+
+        if options['lote']:
+            lote = LoteComprobantes.objects.filter(id=options['lote']).first()
+            if not lote:
+                raise CommandError(f'No existe el lote {options["lote"]}')
+            try:
+                lotes = [generar(lote, options['procesos'])]
+            except LoteEnProceso as e:
+                raise CommandError(str(e))
+        elif options['periodo']:
+            periodo = Periodo.objects.filter(codigo=options['periodo']).first()
+            if not periodo:
+                raise CommandError(f'No existe el periodo {options["periodo"]}')
+            curso = None
+            if options['curso']:
+                curso = Curso.objects.filter(id=options['curso']).first()
+                if not curso:
+                    raise CommandError(f'No existe el curso {options["curso"]}')
+            lote = LoteComprobantes.objects.create(periodo=periodo, curso=curso, grupo=options['grupo'])
+            lotes = [generar(lote, options['procesos'])]
+        else:
+            lotes = procesar_pendientes(options['procesos'])
+
+        for lote in lotes:
+            self.stdout.write(f'   - Lote {lote.id} ({lote.periodo}): {lote.procesados} comprobantes en {lote.archivo}')
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(f'{len(lotes)} lote(s) generados en {duracion:.2f} s'))
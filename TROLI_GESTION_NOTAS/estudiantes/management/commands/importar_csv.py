@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from estudiantes.importacion import COLUMNAS, escribir_errores, importar
+import time
+
+class Command(BaseCommand):
+    help = (
+        'Importa usuarios, cursos o inscripciones desde un archivo CSV con encabezado. '
+        'Las filas con errores se omiten y se listan al final (o en --errores).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=list(COLUMNAS), help='Qué contiene el archivo')
+        parser.add_argument('archivo', help='Ruta del archivo CSV (UTF-8)')
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos para hashear contraseñas (por defecto, uno por CPU)')
+        parser.add_argument('--errores', metavar='RUTA', help='Escribe el reporte de errores por fila en un CSV')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'Importando {options["tipo"]} desde {options["archivo"]}...'))
+        inicio = time.perf_counter()
+        try:
+            with open(options['archivo'], encoding='utf-8-sig', newline='') as archivo:
+                resultado = importar(
+                    archivo, options['tipo'], options['procesos'],
+                    progreso=lambda leidas: self.stdout.write(f'   - {leidas} filas leídas')
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        duracion = time.perf_counter() - inicio
+
+        errores = resultado['errores']
+        if options['errores']:
+            with open(options['errores'], 'w', encoding='utf-8', newline='') as destino:
+                escribir_errores(destino, errores)
+        else:
+            for fila, motivo in errores:
+                self.stdout.write(self.style.WARNING(f'   - Fila {fila}: {motivo}'))
+        self.stdout.write(f'   - Creados: {resultado["creados"]}')
+        self.stdout.write(f'   - Con errores: {len(errores)}')
+        self.stdout.write(self.style.SUCCESS(f'Importación completada en {duracion:.2f} s'))
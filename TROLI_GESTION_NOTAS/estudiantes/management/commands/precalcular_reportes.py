@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from estudiantes.reportes import precalcular_activos
+import time
+
+class Command(BaseCommand):
+    help = (
+        'Precalcula los reportes guardados activos (filas, PDF y CSV) para que abrirlos sea inmediato. '
+        'Pensado para ejecutarse fuera de horas pico con cron, o en bucle con --cada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forzar', action='store_true',
+            help='Regenera todos los reportes aunque sus datos no hayan cambiado'
+        )
+        parser.add_argument(
+            '--cada', type=int, default=0, metavar='MINUTOS',
+            help='Se queda en ejecución y repite el precálculo cada MINUTOS minutos'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.stdout.write(self.style.SUCCESS('Precalculando reportes guardados...'))
+            inicio = time.perf_counter()
+            regenerados, sin_cambios = precalcular_activos(forzar=options['forzar'])
+            duracion = time.perf_counter() - inicio
+
+            self.stdout.write(f'   - Regenerados:  {regenerados}')
+            self.stdout.write(f'   - Sin cambios:  {sin_cambios}')
+            self.stdout.write(self.style.SUCCESS(f'Precálculo completado en {duracion:.2f} s'))
+
+            if not options['cada']:
+                break
+            time.sleep(options['cada'] * 60)
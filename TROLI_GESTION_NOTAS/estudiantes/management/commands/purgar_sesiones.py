@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+from estudiantes.sesiones import volcar_pendientes
+import time
+
+class Command(BaseCommand):
+    help = (
+        'Vuelca a la base de datos las sesiones pendientes de la caché y elimina por lotes '
+        'las sesiones vencidas. Pensado para ejecutarse periódicamente (por ejemplo con cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Sesiones eliminadas por consulta (por defecto 1000)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Purgando sesiones vencidas...'))
+        inicio = time.perf_counter()
+        volcadas = volcar_pendientes()
+
+        # Lotes pequeños para no bloquear la tabla de sesiones (SQLite) durante mucho tiempo
+        ahora = timezone.now()
+        eliminadas = 0
+        while True:
+            claves = list(
+                Session.objects.filter(expire_date__lt=ahora).values_list('session_key', flat=True)[:options['lote']]
+            )
+            if not claves:
+                break
+            eliminadas += Session.objects.filter(session_key__in=claves).delete()[0]
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(f'   - Sesiones volcadas desde caché: {volcadas}')
+        self.stdout.write(f'   - Sesiones vencidas eliminadas:  {eliminadas}')
+        self.stdout.write(self.style.SUCCESS(f'Purga completada en {duracion:.2f} s'))
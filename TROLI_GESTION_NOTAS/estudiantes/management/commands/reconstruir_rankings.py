@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from estudiantes.rankings import reconstruir
+import time
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye desde cero los rankings materializados de estudiantes y cursos. '
+        'Los rankings se mantienen solos al calificar; usar tras cargas masivas o para corregir desajustes.'
+    )
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(self.style.SUCCESS('Reconstruyendo rankings...'))
+        inicio = time.perf_counter()
+        conteo = reconstruir()
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(f'   - Ranking global:    {conteo["estudiantes"]} estudiantes')
+        self.stdout.write(f'   - Rankings por curso: {conteo["estudiantes_curso"]} filas')
+        self.stdout.write(f'   - Ranking de cursos: {conteo["cursos"]} cursos')
+        self.stdout.write(self.style.SUCCESS(f'Reconstrucción completada en {duracion:.2f} s'))
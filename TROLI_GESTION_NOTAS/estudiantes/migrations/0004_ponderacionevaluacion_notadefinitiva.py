@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:59
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0003_reporteacademico_historialreporte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotaDefinitiva',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nota', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('porcentaje_evaluado', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=5)),
+                ('total_calificaciones', models.IntegerField(default=0)),
+                ('fecha_calculo', models.DateTimeField(auto_now=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='estudiantes.curso')),
+                ('inscripcion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='nota_definitiva', to='estudiantes.inscripcion')),
+            ],
+            options={
+                'verbose_name': 'Nota Definitiva',
+                'verbose_name_plural': 'Notas Definitivas',
+            },
+        ),
+        migrations.CreateModel(
+            name='PonderacionEvaluacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_evaluacion', models.CharField(choices=[('parcial', 'Parcial'), ('final', 'Final'), ('taller', 'Taller'), ('participacion', 'Participación'), ('proyecto', 'Proyecto'), ('quiz', 'Quiz')], max_length=15)),
+                ('porcentaje', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0')), django.core.validators.MaxValueValidator(Decimal('100'))])),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ponderaciones', to='estudiantes.curso')),
+            ],
+            options={
+                'verbose_name': 'Ponderación de Evaluación',
+                'verbose_name_plural': 'Ponderaciones de Evaluación',
+                'unique_together': {('curso', 'tipo_evaluacion')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0004_ponderacionevaluacion_notadefinitiva'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiesgoAcademico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nivel', models.CharField(choices=[('bajo', 'Bajo'), ('medio', 'Medio'), ('alto', 'Alto')], max_length=10)),
+                ('puntaje', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('promedio', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('tendencia', models.FloatField(default=0)),
+                ('total_evaluaciones', models.IntegerField(default=0)),
+                ('evaluaciones_reprobadas', models.IntegerField(default=0)),
+                ('cursos_en_riesgo', models.IntegerField(default=0)),
+                ('motivos', models.TextField(blank=True, default='[]')),
+                ('fecha_calculo', models.DateTimeField(auto_now=True)),
+                ('estudiante', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='riesgo_academico', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Riesgo Académico',
+                'verbose_name_plural': 'Riesgos Académicos',
+                'indexes': [models.Index(fields=['nivel', '-puntaje'], name='riesgo_nivel_puntaje_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:03
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0005_riesgoacademico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingEstudianteCurso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_notas', models.DecimalField(decimal_places=1, default=Decimal('0'), max_digits=10)),
+                ('total_calificaciones', models.IntegerField(default=0)),
+                ('promedio', models.DecimalField(decimal_places=3, max_digits=4)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='estudiantes.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ranking de Estudiante por Curso',
+                'verbose_name_plural': 'Ranking de Estudiantes por Curso',
+                'indexes': [models.Index(fields=['curso', '-promedio', 'estudiante'], name='ranking_curso_idx')],
+                'unique_together': {('curso', 'estudiante')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RankingEstudiante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_notas', models.DecimalField(decimal_places=1, default=Decimal('0'), max_digits=10)),
+                ('total_calificaciones', models.IntegerField(default=0)),
+                ('promedio', models.DecimalField(decimal_places=3, max_digits=4)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('estudiante', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ranking_global', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ranking de Estudiante',
+                'verbose_name_plural': 'Ranking de Estudiantes',
+                'indexes': [models.Index(fields=['-promedio', 'estudiante'], name='ranking_global_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RankingCurso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('num_estudiantes', models.IntegerField(default=0)),
+                ('suma_notas', models.DecimalField(decimal_places=1, default=Decimal('0'), max_digits=12)),
+                ('total_calificaciones', models.IntegerField(default=0)),
+                ('promedio', models.DecimalField(blank=True, decimal_places=3, max_digits=4, null=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('curso', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ranking', to='estudiantes.curso')),
+            ],
+            options={
+                'verbose_name': 'Ranking de Curso',
+                'verbose_name_plural': 'Ranking de Cursos',
+                'indexes': [models.Index(fields=['-num_estudiantes'], name='ranking_cursos_estud_idx'), models.Index(fields=['-promedio'], name='ranking_cursos_prom_idx')],
+            },
+        ),
+    ]
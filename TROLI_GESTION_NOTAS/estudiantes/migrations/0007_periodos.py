@@ -0,0 +1,72 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:06
+
+from collections import defaultdict
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def asignar_periodos(apps, schema_editor):
+    """Asigna a cada inscripción existente el semestre de su fecha de inscripción"""
+    Periodo = apps.get_model('estudiantes', 'Periodo')
+    Inscripcion = apps.get_model('estudiantes', 'Inscripcion')
+
+    por_periodo = defaultdict(list)
+    for inscripcion_id, fecha in Inscripcion.objects.values_list('id', 'fecha_inscripcion'):
+        fecha = timezone.localtime(fecha).date() if timezone.is_aware(fecha) else fecha.date()
+        por_periodo[(fecha.year, 1 if fecha.month <= 6 else 2)].append(inscripcion_id)
+
+    for (anio, semestre), ids in por_periodo.items():
+        periodo, _ = Periodo.objects.get_or_create(
+            codigo=f"{anio}-{semestre}",
+            defaults={
+                'fecha_inicio': date(anio, 1, 1) if semestre == 1 else date(anio, 7, 1),
+                'fecha_fin': date(anio, 6, 30) if semestre == 1 else date(anio, 12, 31),
+            }
+        )
+        Inscripcion.objects.filter(id__in=ids).update(periodo=periodo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0006_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Periodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=10, unique=True)),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField()),
+            ],
+            options={
+                'verbose_name': 'Periodo Académico',
+                'verbose_name_plural': 'Periodos Académicos',
+                'ordering': ['-fecha_inicio'],
+            },
+        ),
+        migrations.AddField(
+            model_name='inscripcion',
+            name='grupo',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='inscripcion',
+            name='periodo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='estudiantes.periodo'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['periodo', 'curso'], name='inscripcion_periodo_curso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['periodo', 'grupo'], name='inscripcion_periodo_grupo_idx'),
+        ),
+        migrations.RunPython(asignar_periodos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0007_periodos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('tipo_reporte', models.CharField(max_length=20)),
+                ('filtros', models.TextField()),
+                ('etiqueta_version', models.CharField(max_length=100)),
+                ('datos', models.TextField()),
+                ('aciertos', models.PositiveIntegerField(default=0)),
+                ('fecha_calculo', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Caché de Reporte',
+                'verbose_name_plural': 'Caché de Reportes',
+            },
+        ),
+        migrations.CreateModel(
+            name='VersionDatos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=30, unique=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión de Datos',
+                'verbose_name_plural': 'Versiones de Datos',
+            },
+        ),
+        migrations.AddField(
+            model_name='historialreporte',
+            name='desde_cache',
+            field=models.BooleanField(default=False),
+        ),
+    ]
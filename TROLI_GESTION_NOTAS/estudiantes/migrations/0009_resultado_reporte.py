@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0008_cache_reportes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultadoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datos', models.TextField()),
+                ('archivo_pdf', models.BinaryField()),
+                ('archivo_csv', models.TextField()),
+                ('etiqueta_version', models.CharField(max_length=100)),
+                ('fecha_datos', models.DateTimeField()),
+                ('reporte', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resultado', to='estudiantes.reporteacademico')),
+            ],
+            options={
+                'verbose_name': 'Resultado de Reporte',
+                'verbose_name_plural': 'Resultados de Reportes',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0009_resultado_reporte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteComprobantes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grupo', models.CharField(blank=True, default='', max_length=50)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=15)),
+                ('total_estudiantes', models.IntegerField(default=0)),
+                ('procesados', models.IntegerField(default=0)),
+                ('archivo', models.CharField(blank=True, max_length=255)),
+                ('mensaje_error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('curso', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='estudiantes.curso')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='estudiantes.periodo')),
+            ],
+            options={
+                'verbose_name': 'Lote de Comprobantes',
+                'verbose_name_plural': 'Lotes de Comprobantes',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0010_lote_comprobantes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calificacion',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='historialcalificacion',
+            name='calificacion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='estudiantes.calificacion'),
+        ),
+        migrations.AlterField(
+            model_name='historialcalificacion',
+            name='nota_nueva',
+            field=models.DecimalField(blank=True, decimal_places=1, max_digits=3, null=True),
+        ),
+    ]
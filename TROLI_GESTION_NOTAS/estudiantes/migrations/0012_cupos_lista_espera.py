@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def contar_inscritos(apps, schema_editor):
+    """Inicializa el contador de inscritos de cada curso con sus inscripciones activas"""
+    Curso = apps.get_model('estudiantes', 'Curso')
+    Inscripcion = apps.get_model('estudiantes', 'Inscripcion')
+    activas = (Inscripcion.objects.filter(curso=OuterRef('pk'), activo=True)
+               .values('curso').annotate(total=Count('id')).values('total'))
+    Curso.objects.update(inscritos=Coalesce(Subquery(activas), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0011_calificacion_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curso',
+            name='cupo',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='curso',
+            name='inscritos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='estudiantes.curso')),
+                ('estudiante', models.ForeignKey(limit_choices_to={'rol': 'estudiante'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lista de Espera',
+                'verbose_name_plural': 'Listas de Espera',
+                'indexes': [models.Index(fields=['curso', 'id'], name='lista_espera_orden_idx')],
+                'unique_together': {('estudiante', 'curso')},
+            },
+        ),
+        migrations.RunPython(contar_inscritos, migrations.RunPython.noop),
+    ]
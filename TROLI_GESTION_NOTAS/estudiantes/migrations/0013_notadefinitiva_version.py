@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0012_cupos_lista_espera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notadefinitiva',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0013_notadefinitiva_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='rankingcurso',
+            name='ranking_cursos_estud_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rankingcurso',
+            name='ranking_cursos_prom_idx',
+        ),
+        migrations.AddIndex(
+            model_name='rankingcurso',
+            index=models.Index(fields=['-num_estudiantes', 'curso'], name='ranking_cursos_estud_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rankingcurso',
+            index=models.Index(fields=['-promedio', 'curso'], name='ranking_cursos_prom_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def asignar_periodos_pendientes(apps, schema_editor):
+    """
+    Asigna el semestre de su fecha de inscripción a las inscripciones que quedaron sin periodo
+    (creadas con bulk_create o .update() después de 0007, que no pasan por Inscripcion.save())
+    """
+    Periodo = apps.get_model('estudiantes', 'Periodo')
+    Inscripcion = apps.get_model('estudiantes', 'Inscripcion')
+
+    por_periodo = defaultdict(list)
+    for inscripcion_id, fecha in Inscripcion.objects.filter(periodo__isnull=True).values_list('id', 'fecha_inscripcion'):
+        fecha = timezone.localtime(fecha).date() if timezone.is_aware(fecha) else fecha.date()
+        por_periodo[(fecha.year, 1 if fecha.month <= 6 else 2)].append(inscripcion_id)
+
+    for (anio, semestre), ids in por_periodo.items():
+        periodo, _ = Periodo.objects.get_or_create(
+            codigo=f"{anio}-{semestre}",
+            defaults={
+                'fecha_inicio': date(anio, 1, 1) if semestre == 1 else date(anio, 7, 1),
+                'fecha_fin': date(anio, 6, 30) if semestre == 1 else date(anio, 12, 31),
+            }
+        )
+        Inscripcion.objects.filter(id__in=ids).update(periodo=periodo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0014_rankings_cursor'),
+    ]
+
+    operations = [
+        migrations.RunPython(asignar_periodos_pendientes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    # El relleno de periodos va en 0015: en PostgreSQL no se puede alterar la tabla
+    # en la misma transacción que actualizó sus claves foráneas
+    dependencies = [
+        ('estudiantes', '0015_inscripcion_periodo_pendiente'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inscripcion',
+            name='periodo',
+            field=models.ForeignKey(blank=True, on_delete=django.db.models.deletion.PROTECT, to='estudiantes.periodo'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='inscripcion',
+            unique_together={('estudiante', 'curso', 'periodo')},
+        ),
+    ]
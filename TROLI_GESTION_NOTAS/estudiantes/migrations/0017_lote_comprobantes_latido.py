@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0016_inscripcion_unica_por_periodo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotecomprobantes',
+            name='ejecucion',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='lotecomprobantes',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
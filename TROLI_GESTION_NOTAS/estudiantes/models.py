@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models import Avg, Count, F, FloatField, Q, ExpressionWrapper
+from django.db.models.functions import NullIf
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+from datetime import date
 from decimal import Decimal
+import json
 
 # Modelo personalizado de Usuario que extiende el usuario de Django
 class Usuario(AbstractUser):
@@ -42,6 +47,33 @@ class Usuario(AbstractUser):
     def __str__(self):
         return f"{self.username} - {self.get_rol_display()}"
 
+# QuerySet con estadísticas agregadas de cursos
+class CursoQuerySet(models.QuerySet):
+    """
+    Permite obtener las estadísticas de todos los cursos en una sola consulta
+    en lugar de hacer conteos por cada curso
+    """
+    def con_estadisticas(self):
+        """
+        Anota estudiantes activos, número de calificaciones, promedio
+        y tasa de aprobación (porcentaje de notas >= 3.0)
+        """
+        return self.annotate(
+            estudiantes_count=Count('inscripcion', filter=Q(inscripcion__activo=True), distinct=True),
+            calificaciones_count=Count('inscripcion__calificacion', distinct=True),
+            calificaciones_aprobadas=Count(
+                'inscripcion__calificacion',
+                filter=Q(inscripcion__calificacion__nota__gte=Decimal('3.0')),
+                distinct=True
+            ),
+            promedio=Avg('inscripcion__calificacion__nota'),
+        ).annotate(
+            tasa_aprobacion=ExpressionWrapper(
+                F('calificaciones_aprobadas') * 100.0 / NullIf(F('calificaciones_count'), 0),
+                output_field=FloatField()
+            )
+        )
+
 # Modelo para representar un curso o materia
 class Curso(models.Model):
     """
@@ -55,6 +87,12 @@ class Curso(models.Model):
     creditos = models.IntegerField(default=3)
     activo = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Cupo máximo de inscritos activos (vacío: sin límite) y contador de inscritos activos,
+    # mantenido con UPDATE condicionados en cupos.py; no se edita en formularios
+    cupo = models.PositiveIntegerField(null=True, blank=True)
+    inscritos = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = CursoQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
@@ -63,24 +101,101 @@ class Curso(models.Model):
         verbose_name = "Curso"
         verbose_name_plural = "Cursos"
 
+# Modelo para los periodos académicos (semestres)
+class Periodo(models.Model):
+    """
+    Semestre académico, por ejemplo 2025-1 (enero a junio) o 2025-2 (julio a diciembre)
+    Las inscripciones pertenecen a un periodo para que los reportes consulten
+    solo las filas del semestre solicitado
+    """
+    codigo = models.CharField(max_length=10, unique=True)
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField()
+    
+    def __str__(self):
+        return self.codigo
+    
+    @staticmethod
+    def codigo_para_fecha(fecha):
+        """Código del semestre al que pertenece una fecha"""
+        return f"{fecha.year}-{1 if fecha.month <= 6 else 2}"
+    
+    @classmethod
+    def para_fecha(cls, fecha):
+        """Obtiene (o crea) el periodo que contiene la fecha"""
+        if fecha.month <= 6:
+            inicio, fin = date(fecha.year, 1, 1), date(fecha.year, 6, 30)
+        else:
+            inicio, fin = date(fecha.year, 7, 1), date(fecha.year, 12, 31)
+        periodo, _ = cls.objects.get_or_create(
+            codigo=cls.codigo_para_fecha(fecha),
+            defaults={'fecha_inicio': inicio, 'fecha_fin': fin}
+        )
+        return periodo
+    
+    @classmethod
+    def actual(cls):
+        return cls.para_fecha(timezone.localdate())
+    
+    class Meta:
+        verbose_name = "Periodo Académico"
+        verbose_name_plural = "Periodos Académicos"
+        ordering = ['-fecha_inicio']
+
 # Modelo para la inscripción de estudiantes en cursos
 class Inscripcion(models.Model):
     """
     Relaciona estudiantes con cursos
-    Permite que un estudiante esté inscrito en múltiples cursos
+    Permite que un estudiante esté inscrito en múltiples cursos, y en el mismo
+    curso una vez por periodo (por ejemplo si lo repite)
     """
     estudiante = models.ForeignKey(Usuario, on_delete=models.CASCADE, limit_choices_to={'rol': 'estudiante'})
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
+    # blank: save() asigna el periodo vigente; las cargas masivas (bulk_create) deben indicarlo
+    periodo = models.ForeignKey(Periodo, on_delete=models.PROTECT, blank=True)
+    grupo = models.CharField(max_length=50, blank=True, default='')
     fecha_inscripcion = models.DateTimeField(auto_now_add=True)
     activo = models.BooleanField(default=True)
     
     def __str__(self):
         return f"{self.estudiante.username} - {self.curso.nombre}"
     
+    def save(self, *args, **kwargs):
+        # Las inscripciones nuevas quedan en el periodo vigente
+        if self.periodo_id is None:
+            fecha = timezone.localtime(self.fecha_inscripcion).date() if self.fecha_inscripcion else timezone.localdate()
+            self.periodo = Periodo.para_fecha(fecha)
+        super().save(*args, **kwargs)
+    
     class Meta:
-        unique_together = ['estudiante', 'curso']
+        unique_together = ['estudiante', 'curso', 'periodo']
         verbose_name = "Inscripción"
         verbose_name_plural = "Inscripciones"
+        indexes = [
+            models.Index(fields=['periodo', 'curso'], name='inscripcion_periodo_curso_idx'),
+            models.Index(fields=['periodo', 'grupo'], name='inscripcion_periodo_grupo_idx'),
+        ]
+
+# Modelo para la lista de espera de cursos sin cupo
+class ListaEspera(models.Model):
+    """
+    Estudiantes esperando cupo en un curso, atendidos en orden de llegada (id)
+    Al liberarse un cupo el primero de la lista queda inscrito (ver cupos.py)
+    """
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='lista_espera')
+    estudiante = models.ForeignKey(Usuario, on_delete=models.CASCADE, limit_choices_to={'rol': 'estudiante'})
+    fecha_solicitud = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.estudiante.username} - {self.curso.codigo} (en espera)"
+    
+    class Meta:
+        unique_together = ['estudiante', 'curso']
+        verbose_name = "Lista de Espera"
+        verbose_name_plural = "Listas de Espera"
+        indexes = [
+            models.Index(fields=['curso', 'id'], name='lista_espera_orden_idx'),
+        ]
 
 # Modelo para las calificaciones
 class Calificacion(models.Model):
@@ -109,6 +224,8 @@ class Calificacion(models.Model):
     profesor = models.ForeignKey(Usuario, on_delete=models.CASCADE, limit_choices_to={'rol': 'profesor'})
     fecha_registro = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
+    # Sube en cada edición; las ediciones se aplican solo sobre la versión que se mostró (ver calificaciones.py)
+    version = models.PositiveIntegerField(default=1)
     
     def __str__(self):
         return f"{self.inscripcion.estudiante.username} - {self.inscripcion.curso.nombre} - {self.nota}"
@@ -117,15 +234,161 @@ class Calificacion(models.Model):
         verbose_name = "Calificación"
         verbose_name_plural = "Calificaciones"
 
+# Modelo para la ponderación de cada tipo de evaluación en un curso
+class PonderacionEvaluacion(models.Model):
+    """
+    Porcentaje que aporta cada tipo de evaluación a la nota definitiva del curso
+    Si un curso no tiene ponderaciones se usa el promedio simple de sus notas
+    """
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='ponderaciones')
+    tipo_evaluacion = models.CharField(max_length=15, choices=Calificacion.TIPOS_EVALUACION)
+    porcentaje = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0')), MaxValueValidator(Decimal('100'))]
+    )
+    
+    def __str__(self):
+        return f"{self.curso.codigo} - {self.get_tipo_evaluacion_display()}: {self.porcentaje}%"
+    
+    class Meta:
+        unique_together = ['curso', 'tipo_evaluacion']
+        verbose_name = "Ponderación de Evaluación"
+        verbose_name_plural = "Ponderaciones de Evaluación"
+
+# Modelo para la nota definitiva calculada de cada inscripción
+class NotaDefinitiva(models.Model):
+    """
+    Caché de la nota definitiva ponderada de cada inscripción
+    Se invalida (borra) para todo el curso cuando cambia una calificación
+    o una ponderación del curso, y se recalcula por lotes al consultarla.
+    Solo vale mientras la versión de datos del curso sea la que se usó al calcularla
+    """
+    inscripcion = models.OneToOneField(Inscripcion, on_delete=models.CASCADE, related_name='nota_definitiva')
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
+    nota = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    porcentaje_evaluado = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0'))
+    total_calificaciones = models.IntegerField(default=0)
+    # Versión de los datos del curso (VersionDatos 'curso:<id>') leída antes de calcular
+    version = models.PositiveIntegerField(default=0)
+    fecha_calculo = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.inscripcion} - {self.nota}"
+    
+    class Meta:
+        verbose_name = "Nota Definitiva"
+        verbose_name_plural = "Notas Definitivas"
+
+# Modelo para el puntaje de riesgo académico precalculado
+class RiesgoAcademico(models.Model):
+    """
+    Puntaje de alerta temprana de cada estudiante activo
+    Lo calcula por lotes el comando calcular_riesgo; el reporte de riesgo
+    y el estado académico solo consultan esta tabla
+    """
+    NIVELES = [
+        ('bajo', 'Bajo'),
+        ('medio', 'Medio'),
+        ('alto', 'Alto'),
+    ]
+    
+    estudiante = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name='riesgo_academico')
+    nivel = models.CharField(max_length=10, choices=NIVELES)
+    puntaje = models.DecimalField(max_digits=5, decimal_places=2)
+    promedio = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    tendencia = models.FloatField(default=0)  # Cambio de nota cada 30 días
+    total_evaluaciones = models.IntegerField(default=0)
+    evaluaciones_reprobadas = models.IntegerField(default=0)
+    cursos_en_riesgo = models.IntegerField(default=0)
+    motivos = models.TextField(blank=True, default='[]')  # JSON con la lista de motivos
+    fecha_calculo = models.DateTimeField(auto_now=True)
+    
+    def lista_motivos(self):
+        return json.loads(self.motivos or '[]')
+    
+    def __str__(self):
+        return f"{self.estudiante.username} - {self.get_nivel_display()} ({self.puntaje})"
+    
+    class Meta:
+        verbose_name = "Riesgo Académico"
+        verbose_name_plural = "Riesgos Académicos"
+        indexes = [
+            models.Index(fields=['nivel', '-puntaje'], name='riesgo_nivel_puntaje_idx'),
+        ]
+
+# Modelos para los rankings materializados
+class RankingEstudiante(models.Model):
+    """
+    Promedio global de cada estudiante, mantenido al cambiar sus calificaciones
+    La posición se obtiene ordenando por el índice de promedio
+    """
+    estudiante = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name='ranking_global')
+    suma_notas = models.DecimalField(max_digits=10, decimal_places=1, default=Decimal('0'))
+    total_calificaciones = models.IntegerField(default=0)
+    promedio = models.DecimalField(max_digits=4, decimal_places=3)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.estudiante.username} - {self.promedio}"
+    
+    class Meta:
+        verbose_name = "Ranking de Estudiante"
+        verbose_name_plural = "Ranking de Estudiantes"
+        indexes = [
+            models.Index(fields=['-promedio', 'estudiante'], name='ranking_global_idx'),
+        ]
+
+class RankingEstudianteCurso(models.Model):
+    """Promedio de cada estudiante dentro de un curso (posición en la clase)"""
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
+    estudiante = models.ForeignKey(Usuario, on_delete=models.CASCADE)
+    suma_notas = models.DecimalField(max_digits=10, decimal_places=1, default=Decimal('0'))
+    total_calificaciones = models.IntegerField(default=0)
+    promedio = models.DecimalField(max_digits=4, decimal_places=3)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.curso.codigo} - {self.estudiante.username} - {self.promedio}"
+    
+    class Meta:
+        unique_together = ['curso', 'estudiante']
+        verbose_name = "Ranking de Estudiante por Curso"
+        verbose_name_plural = "Ranking de Estudiantes por Curso"
+        indexes = [
+            models.Index(fields=['curso', '-promedio', 'estudiante'], name='ranking_curso_idx'),
+        ]
+
+class RankingCurso(models.Model):
+    """Estadísticas materializadas de cada curso para el ranking de cursos"""
+    curso = models.OneToOneField(Curso, on_delete=models.CASCADE, related_name='ranking')
+    num_estudiantes = models.IntegerField(default=0)
+    suma_notas = models.DecimalField(max_digits=12, decimal_places=1, default=Decimal('0'))
+    total_calificaciones = models.IntegerField(default=0)
+    promedio = models.DecimalField(max_digits=4, decimal_places=3, null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.curso.codigo} - {self.promedio}"
+    
+    class Meta:
+        verbose_name = "Ranking de Curso"
+        verbose_name_plural = "Ranking de Cursos"
+        indexes = [
+            models.Index(fields=['-num_estudiantes', 'curso'], name='ranking_cursos_estud_idx'),
+            models.Index(fields=['-promedio', 'curso'], name='ranking_cursos_prom_idx'),
+        ]
+
 # Modelo para el historial de cambios en calificaciones
 class HistorialCalificacion(models.Model):
     """
     Registra todos los cambios realizados en las calificaciones
     Permite auditoría y seguimiento de modificaciones
     """
-    calificacion = models.ForeignKey(Calificacion, on_delete=models.CASCADE)
+    # El registro de una eliminación se conserva aunque la calificación ya no exista
+    calificacion = models.ForeignKey(Calificacion, on_delete=models.SET_NULL, null=True, blank=True)
     nota_anterior = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
-    nota_nueva = models.DecimalField(max_digits=3, decimal_places=1)
+    nota_nueva = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)  # None: eliminada
     usuario_modificacion = models.ForeignKey(Usuario, on_delete=models.CASCADE)
     fecha_cambio = models.DateTimeField(auto_now_add=True)
     motivo = models.TextField(blank=True, null=True)
@@ -225,12 +488,123 @@ class HistorialReporte(models.Model):
     tipo_reporte = models.CharField(max_length=20)
     filtros_aplicados = models.TextField()  # JSON con los filtros usados
     formato_exportacion = models.CharField(max_length=10, choices=FORMATOS)
+    desde_cache = models.BooleanField(default=False)  # Datos servidos desde CacheReporte
     fecha_generacion = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"Reporte generado por {self.usuario.username} - {self.fecha_generacion}"
     
+    @classmethod
+    def tasa_aciertos_cache(cls):
+        """Porcentaje de reportes generados con datos de la caché (None si no hay historial)"""
+        conteo = cls.objects.aggregate(total=Count('id'), aciertos=Count('id', filter=Q(desde_cache=True)))
+        if not conteo['total']:
+            return None
+        return conteo['aciertos'] * 100.0 / conteo['total']
+    
     class Meta:
         verbose_name = "Historial de Reporte"
         verbose_name_plural = "Historial de Reportes"
         ordering = ['-fecha_generacion']
+
+# Modelo para el resultado precalculado de un reporte guardado
+class ResultadoReporte(models.Model):
+    """
+    Filas y archivos (PDF y CSV) de un ReporteAcademico generados por el
+    comando precalcular_reportes o al actualizarlo manualmente
+    """
+    reporte = models.OneToOneField(ReporteAcademico, on_delete=models.CASCADE, related_name='resultado')
+    datos = models.TextField()  # JSON con las filas del reporte
+    archivo_pdf = models.BinaryField()
+    archivo_csv = models.TextField()
+    etiqueta_version = models.CharField(max_length=100)
+    fecha_datos = models.DateTimeField()  # Momento en que se calcularon los datos
+    
+    def __str__(self):
+        return f"{self.reporte.nombre} - datos al {self.fecha_datos}"
+    
+    class Meta:
+        verbose_name = "Resultado de Reporte"
+        verbose_name_plural = "Resultados de Reportes"
+
+# Modelo para las versiones de los datos usados por los reportes
+class VersionDatos(models.Model):
+    """
+    Contador que aumenta cada vez que cambian los datos de un ámbito:
+    'global', 'curso:<id>', 'usuarios' o 'riesgo'
+    Los resultados en CacheReporte quedan obsoletos cuando cambia la versión
+    """
+    clave = models.CharField(max_length=30, unique=True)
+    version = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.clave} v{self.version}"
+    
+    class Meta:
+        verbose_name = "Versión de Datos"
+        verbose_name_plural = "Versiones de Datos"
+
+# Modelo para la caché de resultados de reportes
+class CacheReporte(models.Model):
+    """
+    Filas calculadas de un reporte para un tipo y filtros normalizados
+    Solo son válidas mientras la etiqueta de versión coincida con VersionDatos
+    """
+    clave = models.CharField(max_length=64, unique=True)  # SHA-256 de tipo + filtros
+    tipo_reporte = models.CharField(max_length=20)
+    filtros = models.TextField()  # JSON con los filtros normalizados
+    etiqueta_version = models.CharField(max_length=100)
+    datos = models.TextField()  # JSON con las filas del reporte
+    aciertos = models.PositiveIntegerField(default=0)
+    fecha_calculo = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.tipo_reporte} ({self.etiqueta_version})"
+    
+    class Meta:
+        verbose_name = "Caché de Reporte"
+        verbose_name_plural = "Caché de Reportes"
+
+# Modelo para la generación masiva de comprobantes de calificaciones
+class LoteComprobantes(models.Model):
+    """
+    Trabajo que genera el comprobante de calificaciones de cada estudiante
+    de una cohorte (periodo y, opcionalmente, curso y grupo) en un ZIP
+    Lo procesa el comando generar_comprobantes; si se interrumpe, al
+    reanudarlo continúa con los estudiantes que faltan en el ZIP
+    La ejecución que lo procesa se identifica con `ejecucion` y renueva
+    `latido` en cada bloque (ver comprobantes_lote.reclamar)
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+    
+    periodo = models.ForeignKey(Periodo, on_delete=models.PROTECT)
+    curso = models.ForeignKey(Curso, on_delete=models.SET_NULL, null=True, blank=True)
+    grupo = models.CharField(max_length=50, blank=True, default='')
+    estado = models.CharField(max_length=15, choices=ESTADOS, default='pendiente')
+    total_estudiantes = models.IntegerField(default=0)
+    procesados = models.IntegerField(default=0)
+    archivo = models.CharField(max_length=255, blank=True)  # Ruta del ZIP en disco
+    mensaje_error = models.TextField(blank=True)
+    creado_por = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    ejecucion = models.CharField(max_length=32, blank=True)  # Token de la ejecución que tiene el lote
+    latido = models.DateTimeField(null=True, blank=True)  # Última señal de vida de esa ejecución
+    
+    def __str__(self):
+        return f"Comprobantes {self.periodo} - {self.get_estado_display()}"
+    
+    def porcentaje(self):
+        if not self.total_estudiantes:
+            return 100 if self.estado == 'completado' else 0
+        return round(self.procesados * 100 / self.total_estudiantes)
+    
+    class Meta:
+        verbose_name = "Lote de Comprobantes"
+        verbose_name_plural = "Lotes de Comprobantes"
+        ordering = ['-fecha_creacion']
@@ -0,0 +1,330 @@
+"""
+Rankings materializados de estudiantes (global y por curso) y de cursos
+
+Las tablas RankingEstudiante, RankingEstudianteCurso y RankingCurso se
+actualizan de forma incremental cuando cambia una calificación o inscripción
+(ver signals.py): cada fila afectada recibe la diferencia con un UPDATE
+(F('suma_notas') + nueva - anterior, F('total_calificaciones') ± 1), sin
+volver a agregar las calificaciones. Los valores anteriores se toman en
+pre_save, o los pasa quien actualiza con UPDATE condicionado (ver recordar_*).
+Solo reconstruir() (comando reconstruir_rankings) agrega todo de nuevo.
+
+Las lecturas recorren el índice de promedio por páginas con un cursor
+(keyset, ver _pagina), por lo que leer una página cuesta lo mismo sin importar
+el total de filas ni qué tan profunda sea la página.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from .models import (
+    Calificacion, Curso, Inscripcion,
+    RankingCurso, RankingEstudiante, RankingEstudianteCurso,
+)
+
+POR_PAGINA = 20
+_TRES_DECIMALES = Decimal('0.001')
+# Atributo de la instancia con los valores previos al cambio (ver recordar_*)
+_ANTERIOR = '_ranking_anterior'
+
+
+def _promedio(suma, total):
+    if not total:
+        return None
+    return (Decimal(suma) / total).quantize(_TRES_DECIMALES)
+
+
+# ============= ACTUALIZACIÓN INCREMENTAL =============
+
+def _aplicar(modelo, filtro, suma, total, **extra):
+    """
+    Suma la diferencia a una fila de ranking en un solo UPDATE (F('suma_notas') + suma,
+    F('total_calificaciones') + total y el promedio en la misma sentencia), sin volver
+    a agregar las calificaciones. La fila se crea con la primera nota o inscripción;
+    las de estudiantes se eliminan cuando se quedan sin notas
+    """
+    nueva_suma = F('suma_notas') + suma
+    nuevo_total = F('total_calificaciones') + total
+    sin_notas = None if modelo._meta.get_field('promedio').null else Decimal('0')
+    cambios = {
+        'suma_notas': nueva_suma,
+        'total_calificaciones': nuevo_total,
+        'promedio': Case(
+            When(total_calificaciones__gt=-total, then=Round(Cast(nueva_suma, FloatField()) / nuevo_total, 3)),
+            default=Value(sin_notas),
+            output_field=FloatField(),
+        ),
+        # update() no aplica auto_now
+        'fecha_actualizacion': timezone.now(),
+        **{campo: F(campo) + delta for campo, delta in extra.items()},
+    }
+    if not modelo.objects.filter(**filtro).update(**cambios):
+        if total <= 0 and not any(delta > 0 for delta in extra.values()):
+            return
+        _, creada = modelo.objects.get_or_create(**filtro, defaults={
+            'suma_notas': suma,
+            'total_calificaciones': total,
+            'promedio': _promedio(suma, total) if total else sin_notas,
+            **extra,
+        })
+        if not creada:
+            # Otra petición la creó entremedio
+            modelo.objects.filter(**filtro).update(**cambios)
+    if total < 0 and sin_notas is not None:
+        modelo.objects.filter(total_calificaciones__lte=0, **filtro).delete()
+
+
+def _sumar(curso_id, estudiante_id, suma, total):
+    """Aplica la diferencia de notas de un estudiante en un curso a las tres tablas"""
+    if not suma and not total:
+        return
+    _aplicar(RankingEstudiante, {'estudiante_id': estudiante_id}, suma, total)
+    _aplicar(RankingEstudianteCurso, {'curso_id': curso_id, 'estudiante_id': estudiante_id}, suma, total)
+    _aplicar(RankingCurso, {'curso_id': curso_id}, suma, total)
+
+
+def _sumar_inscripcion(inscripcion_id, suma, total):
+    fila = Inscripcion.objects.filter(id=inscripcion_id).values_list('curso_id', 'estudiante_id').first()
+    if fila:
+        _sumar(*fila, suma, total)
+
+
+def _inscritos(curso_id, delta):
+    _aplicar(RankingCurso, {'curso_id': curso_id}, Decimal('0'), 0, num_estudiantes=delta)
+
+
+def recordar_calificacion(calificacion, inscripcion_id, nota):
+    """Guarda en la instancia la inscripción y la nota que tenía antes del cambio (pre_save)"""
+    setattr(calificacion, _ANTERIOR, (inscripcion_id, Decimal(str(nota))))
+
+
+def recordar_inscripcion(inscripcion, curso_id, estudiante_id, activo):
+    """Guarda en la instancia el curso, el estudiante y el estado que tenía antes del cambio (pre_save)"""
+    setattr(inscripcion, _ANTERIOR, (curso_id, estudiante_id, activo))
+
+
+def calificacion_guardada(calificacion):
+    """Suma la nota nueva y resta la anterior (si la había) en los rankings afectados"""
+    anterior = calificacion.__dict__.pop(_ANTERIOR, None)
+    nota = Decimal(str(calificacion.nota))
+    if anterior is None:
+        _sumar_inscripcion(calificacion.inscripcion_id, nota, 1)
+        return
+    inscripcion_id, nota_anterior = anterior
+    if inscripcion_id == calificacion.inscripcion_id:
+        _sumar_inscripcion(inscripcion_id, nota - nota_anterior, 0)
+    else:
+        _sumar_inscripcion(inscripcion_id, -nota_anterior, -1)
+        _sumar_inscripcion(calificacion.inscripcion_id, nota, 1)
+
+
+def calificacion_eliminada(calificacion):
+    """Resta la nota eliminada de los rankings afectados"""
+    _sumar_inscripcion(calificacion.inscripcion_id, -Decimal(str(calificacion.nota)), -1)
+
+
+def inscripcion_guardada(inscripcion):
+    """Ajusta los inscritos del curso y, si la inscripción cambió de curso o estudiante, mueve sus notas"""
+    anterior = inscripcion.__dict__.pop(_ANTERIOR, None)
+    if anterior is None:
+        if inscripcion.activo:
+            _inscritos(inscripcion.curso_id, 1)
+        return
+    curso_id, estudiante_id, activo = anterior
+    if (curso_id, estudiante_id) != (inscripcion.curso_id, inscripcion.estudiante_id):
+        notas = Calificacion.objects.filter(inscripcion_id=inscripcion.id).aggregate(suma=Sum('nota'), total=Count('id'))
+        if notas['total']:
+            _sumar(curso_id, estudiante_id, -notas['suma'], -notas['total'])
+            _sumar(inscripcion.curso_id, inscripcion.estudiante_id, notas['suma'], notas['total'])
+    if (curso_id, activo) != (inscripcion.curso_id, inscripcion.activo):
+        if activo:
+            _inscritos(curso_id, -1)
+        if inscripcion.activo:
+            _inscritos(inscripcion.curso_id, 1)
+
+
+def inscripcion_eliminada(inscripcion):
+    """Sus notas ya se restaron al eliminarse en cascada; queda el contador de inscritos"""
+    if inscripcion.activo:
+        _inscritos(inscripcion.curso_id, -1)
+
+
+def crear_curso(curso_id):
+    """Fila vacía para que todo curso nuevo aparezca en el ranking de cursos"""
+    RankingCurso.objects.get_or_create(curso_id=curso_id)
+
+
+# ============= RECONSTRUCCIÓN COMPLETA =============
+
+def reconstruir():
+    """Regenera todas las tablas de ranking con consultas agregadas por lotes"""
+    globales = [
+        RankingEstudiante(
+            estudiante_id=f['inscripcion__estudiante_id'],
+            suma_notas=f['suma'],
+            total_calificaciones=f['total'],
+            promedio=_promedio(f['suma'], f['total']),
+        )
+        for f in Calificacion.objects.order_by().values('inscripcion__estudiante_id')
+        .annotate(suma=Sum('nota'), total=Count('id'))
+    ]
+    por_curso = [
+        RankingEstudianteCurso(
+            curso_id=f['inscripcion__curso_id'],
+            estudiante_id=f['inscripcion__estudiante_id'],
+            suma_notas=f['suma'],
+            total_calificaciones=f['total'],
+            promedio=_promedio(f['suma'], f['total']),
+        )
+        for f in Calificacion.objects.order_by().values('inscripcion__curso_id', 'inscripcion__estudiante_id')
+        .annotate(suma=Sum('nota'), total=Count('id'))
+    ]
+    notas_cursos = {
+        f['inscripcion__curso_id']: f
+        for f in Calificacion.objects.order_by().values('inscripcion__curso_id')
+        .annotate(suma=Sum('nota'), total=Count('id'))
+    }
+    cursos = []
+    for curso in Curso.objects.annotate(
+        num_estudiantes=Count('inscripcion', filter=Q(inscripcion__activo=True))
+    ).only('id'):
+        notas = notas_cursos.get(curso.id, {'suma': Decimal('0'), 'total': 0})
+        cursos.append(RankingCurso(
+            curso_id=curso.id,
+            num_estudiantes=curso.num_estudiantes,
+            suma_notas=notas['suma'],
+            total_calificaciones=notas['total'],
+            promedio=_promedio(notas['suma'], notas['total']),
+        ))
+
+    with transaction.atomic():
+        RankingEstudiante.objects.all().delete()
+        RankingEstudianteCurso.objects.all().delete()
+        RankingCurso.objects.all().delete()
+        RankingEstudiante.objects.bulk_create(globales, batch_size=500)
+        RankingEstudianteCurso.objects.bulk_create(por_curso, batch_size=500)
+        RankingCurso.objects.bulk_create(cursos, batch_size=500)
+    return {'estudiantes': len(globales), 'estudiantes_curso': len(por_curso), 'cursos': len(cursos)}
+
+
+# ============= LECTURA PAGINADA =============
+
+def _leer_cursor(texto, tipo_valor):
+    """(valor, id, posición) de la última fila de la página anterior, o None si no hay o no es válido"""
+    try:
+        valor, ultimo_id, posicion = (texto or '').split('_')
+        return tipo_valor(valor), int(ultimo_id), max(int(posicion), 0)
+    except (ValueError, ArithmeticError):
+        return None
+
+
+def _pagina(queryset, campo, campo_id, despues, por_pagina, tipo_valor=Decimal):
+    """
+    Página de queryset ordenado por campo descendente y campo_id ascendente, a partir del cursor
+    despues (keyset): se filtra por las filas que siguen a la última vista en vez de saltar
+    las anteriores con OFFSET, así que leer una página profunda cuesta lo mismo que la primera.
+    Pide una fila extra para saber si hay siguiente.
+    """
+    queryset = queryset.order_by(f'-{campo}', campo_id)
+    inicio = 0
+    cursor = _leer_cursor(despues, tipo_valor)
+    if cursor:
+        valor, ultimo_id, inicio = cursor
+        queryset = queryset.filter(Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, f'{campo_id}__gt': ultimo_id}))
+    filas = list(queryset[:por_pagina + 1])
+    tiene_siguiente = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    siguiente = None
+    if tiene_siguiente:
+        ultima = filas[-1]
+        siguiente = f'{getattr(ultima, campo)}_{getattr(ultima, campo_id)}_{inicio + len(filas)}'
+    return {
+        'tiene_anterior': inicio > 0,
+        'tiene_siguiente': tiene_siguiente,
+        'siguiente': siguiente,
+        'resultados': [{'posicion': inicio + i + 1, 'fila': fila} for i, fila in enumerate(filas)],
+    }
+
+
+def pagina_global(despues=None, por_pagina=POR_PAGINA):
+    """Página del ranking global de estudiantes activos"""
+    queryset = RankingEstudiante.objects.filter(estudiante__activo=True).select_related('estudiante')
+    return _pagina(queryset, 'promedio', 'estudiante_id', despues, por_pagina)
+
+
+def pagina_curso(curso_id, despues=None, por_pagina=POR_PAGINA):
+    """Página del ranking de estudiantes dentro de un curso"""
+    queryset = RankingEstudianteCurso.objects.filter(
+        curso_id=curso_id, estudiante__activo=True
+    ).select_related('estudiante')
+    return _pagina(queryset, 'promedio', 'estudiante_id', despues, por_pagina)
+
+
+def pagina_cursos(despues=None, por_pagina=POR_PAGINA, orden='promedio'):
+    """Página del ranking de cursos activos (por promedio o por número de estudiantes)"""
+    queryset = RankingCurso.objects.filter(curso__activo=True).select_related('curso__profesor')
+    if orden == 'estudiantes':
+        return _pagina(queryset, 'num_estudiantes', 'curso_id', despues, por_pagina, tipo_valor=int)
+    # Los cursos sin calificaciones no entran al ranking por promedio
+    return _pagina(queryset.filter(promedio__isnull=False), 'promedio', 'curso_id', despues, por_pagina)
+
+
+def cursor_solicitado(request):
+    """Cursor de la página pedida (parámetro despues, que entrega la página anterior como siguiente)"""
+    return request.GET.get('despues')
+
+
+def filas_estudiantes(pagina):
+    """Filas JSON de una página del ranking de estudiantes (global o de un curso)"""
+    return [
+        {
+            'posicion': item['posicion'],
+            'estudiante_id': item['fila'].estudiante_id,
+            'nombre': item['fila'].estudiante.get_full_name(),
+            'promedio': float(item['fila'].promedio),
+            'total_calificaciones': item['fila'].total_calificaciones,
+        }
+        for item in pagina['resultados']
+    ]
+
+
+def filas_cursos(pagina):
+    """Filas JSON de una página del ranking de cursos"""
+    return [
+        {
+            'posicion': item['posicion'],
+            'curso_id': item['fila'].curso_id,
+            'nombre': item['fila'].curso.nombre,
+            'codigo': item['fila'].curso.codigo,
+            'num_estudiantes': item['fila'].num_estudiantes,
+            'promedio': float(item['fila'].promedio) if item['fila'].promedio is not None else None,
+        }
+        for item in pagina['resultados']
+    ]
+
+
+def posicion_global(estudiante_id):
+    """Posición de un estudiante en el ranking global o None"""
+    fila = RankingEstudiante.objects.filter(estudiante_id=estudiante_id).first()
+    if not fila:
+        return None
+    adelante = RankingEstudiante.objects.filter(estudiante__activo=True).filter(
+        Q(promedio__gt=fila.promedio) | Q(promedio=fila.promedio, estudiante_id__lt=estudiante_id)
+    ).count()
+    return adelante + 1
+
+
+def posicion_en_curso(curso_id, estudiante_id):
+    """Posición de un estudiante en su curso (puesto en la clase) o None"""
+    fila = RankingEstudianteCurso.objects.filter(curso_id=curso_id, estudiante_id=estudiante_id).first()
+    if not fila:
+        return None
+    adelante = RankingEstudianteCurso.objects.filter(
+        curso_id=curso_id, estudiante__activo=True
+    ).filter(
+        Q(promedio__gt=fila.promedio) | Q(promedio=fila.promedio, estudiante_id__lt=estudiante_id)
+    ).count()
+    return adelante + 1
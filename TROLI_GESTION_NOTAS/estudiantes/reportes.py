@@ -0,0 +1,380 @@
+"""
+Generación de reportes académicos
+
+Contiene el cálculo de las filas de cada tipo de reporte, su exportación a
+PDF y CSV, y el precálculo de los reportes guardados (ReporteAcademico) que
+ejecuta el comando precalcular_reportes fuera de horas pico.
+"""
+import csv
+import io
+from datetime import datetime
+
+from django.db.models import Avg, Count
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from .models import (
+    Usuario, Curso, Periodo, Inscripcion, Calificacion,
+    ReporteAcademico, ResultadoReporte, RiesgoAcademico,
+)
+from . import cache_reportes, definitivas
+
+NOMBRES_REPORTE = dict(ReporteAcademico.TIPOS_REPORTE)
+AVISO_RIESGO_PENDIENTE = (
+    'El riesgo académico aún no se ha calculado: el reporte estará disponible después de la '
+    'próxima ejecución de "python manage.py calcular_riesgo".'
+)
+
+
+# ============= DATOS =============
+
+def condiciones_inscripcion(filtros):
+    """
+    Filtros de periodo, grupo, asignatura y estado expresados sobre Inscripcion
+    (cubiertos por los índices inscripcion_periodo_curso_idx e inscripcion_periodo_grupo_idx)
+    """
+    condiciones = {}
+    if filtros.get('semestre'):
+        condiciones['periodo__codigo'] = filtros['semestre']
+    if filtros.get('grupo'):
+        condiciones['grupo'] = filtros['grupo']
+    if filtros.get('asignatura_id'):
+        condiciones['curso_id'] = filtros['asignatura_id']
+    if filtros.get('estado_academico') == 'suspendido':
+        condiciones['activo'] = False
+    return condiciones
+
+
+def generar_datos(tipo_reporte, filtros):
+    """Genera las filas del reporte según tipo y filtros"""
+    condiciones = condiciones_inscripcion(filtros)
+    
+    # Query base de calificaciones limitada al periodo, grupo y asignatura
+    query = Calificacion.objects.filter(**{f'inscripcion__{k}': v for k, v in condiciones.items()})
+    
+    if filtros.get('fecha_desde'):
+        query = query.filter(fecha_evaluacion__gte=filtros['fecha_desde'])
+    
+    if filtros.get('fecha_hasta'):
+        query = query.filter(fecha_evaluacion__lte=filtros['fecha_hasta'])
+    
+    # Generar datos según tipo de reporte
+    if tipo_reporte == 'notas_estudiante':
+        # Agrupar por estudiante en una sola consulta
+        filas = query.filter(
+            inscripcion__estudiante__rol='estudiante',
+            inscripcion__estudiante__activo=True
+        ).values(
+            'inscripcion__estudiante_id'
+        ).annotate(
+            total=Count('id'),
+            promedio=Avg('nota')
+        ).order_by('inscripcion__estudiante_id')
+        filas = list(filas)
+        estudiantes = Usuario.objects.in_bulk([f['inscripcion__estudiante_id'] for f in filas])
+        
+        datos = []
+        for fila in filas:
+            estudiante = estudiantes[fila['inscripcion__estudiante_id']]
+            promedio = fila['promedio']
+            datos.append({
+                'matricula': estudiante.username,
+                'nombre': estudiante.get_full_name(),
+                'total_notas': fila['total'],
+                'promedio': round(promedio, 2) if promedio else 0,
+                'estado': 'Aprobado' if promedio and promedio >= 3.0 else 'Reprobado'
+            })
+        
+        estado = filtros.get('estado_academico')
+        if estado in ('aprobado', 'reprobado'):
+            datos = [d for d in datos if d['estado'].lower() == estado]
+        
+        return datos
+    
+    elif tipo_reporte == 'notas_asignatura':
+        # Agrupar por asignatura en una sola consulta
+        filas = list(
+            query.filter(inscripcion__curso__activo=True)
+            .values('inscripcion__curso_id')
+            .annotate(
+                estudiantes=Count('inscripcion__estudiante', distinct=True),
+                promedio=Avg('nota')
+            ).order_by('inscripcion__curso_id')
+        )
+        cursos = Curso.objects.select_related('profesor').in_bulk([f['inscripcion__curso_id'] for f in filas])
+        
+        datos = []
+        for fila in filas:
+            curso = cursos[fila['inscripcion__curso_id']]
+            promedio = fila['promedio']
+            datos.append({
+                'codigo': curso.codigo,
+                'nombre': curso.nombre,
+                'profesor': curso.profesor.get_full_name(),
+                'estudiantes': fila['estudiantes'],
+                'promedio': round(promedio, 2) if promedio else 0
+            })
+        
+        return datos
+    
+    elif tipo_reporte == 'resumen_general':
+        # Resumen del periodo (o de todo el sistema si no hay filtros)
+        inscripciones = Inscripcion.objects.filter(**condiciones)
+        total_estudiantes = inscripciones.filter(
+            estudiante__rol='estudiante', estudiante__activo=True
+        ).values('estudiante_id').distinct().count()
+        total_cursos = inscripciones.filter(curso__activo=True).values('curso_id').distinct().count()
+        total_calificaciones = query.count()
+        promedio_general = query.aggregate(Avg('nota'))['nota__avg']
+        
+        return [{
+            'total_estudiantes': total_estudiantes,
+            'total_cursos': total_cursos,
+            'total_calificaciones': total_calificaciones,
+            'promedio_general': round(promedio_general, 2) if promedio_general else 0
+        }]
+    
+    elif tipo_reporte == 'estudiantes_riesgo':
+        if usa_riesgo_precalculado(filtros):
+            return datos_riesgo_precalculado(condiciones)
+        
+        # Otro semestre o rango de fechas: estudiantes cuyo promedio de notas
+        # definitivas, calculadas solo con las notas filtradas (en lote), es < 3.0
+        calculadas = definitivas.calcular_definitivas(
+            query.filter(inscripcion__estudiante__rol='estudiante', inscripcion__estudiante__activo=True)
+        )
+        notas_por_inscripcion = {i: d['nota'] for i, d in calculadas.items()}
+        inscripciones = Inscripcion.objects.filter(id__in=notas_por_inscripcion.keys())
+
+        notas_por_estudiante = {}
+        for insc in inscripciones:
+            nota = notas_por_inscripcion.get(insc.id)
+            if nota is not None:
+                notas_por_estudiante.setdefault(insc.estudiante_id, []).append(nota)
+
+        datos = []
+        estudiantes = Usuario.objects.in_bulk(notas_por_estudiante.keys())
+        for estudiante_id, notas in notas_por_estudiante.items():
+            promedio = sum(notas) / len(notas)
+            if promedio < definitivas.NOTA_APROBATORIA:
+                estudiante = estudiantes[estudiante_id]
+                datos.append({
+                    'matricula': estudiante.username,
+                    'nombre': estudiante.get_full_name(),
+                    'promedio': round(promedio, 2),
+                    'cursos_reprobados': sum(1 for n in notas if n < definitivas.NOTA_APROBATORIA),
+                    'estado': 'En Riesgo'
+                })
+        datos.sort(key=lambda d: d['promedio'])
+        
+        return datos
+    
+    return []
+
+
+def usa_riesgo_precalculado(filtros):
+    """Semestre vigente sin rango de fechas: el reporte de riesgo se lee de RiesgoAcademico (calcular_riesgo)"""
+    semestre_actual = Periodo.codigo_para_fecha(timezone.localdate())
+    return (not (filtros.get('fecha_desde') or filtros.get('fecha_hasta'))
+            and filtros.get('semestre', semestre_actual) in ('', semestre_actual))
+
+
+def riesgo_pendiente(tipo_reporte, filtros):
+    """El reporte pedido se lee del riesgo precalculado y calcular_riesgo aún no se ha ejecutado"""
+    return (tipo_reporte == 'estudiantes_riesgo' and usa_riesgo_precalculado(filtros)
+            and not RiesgoAcademico.objects.exists())
+
+
+def datos_riesgo_precalculado(condiciones):
+    """
+    Estudiantes con riesgo medio o alto según la tabla RiesgoAcademico
+    Si la tabla aún no se ha calculado no hay filas (ver riesgo_pendiente); el cálculo
+    completo queda para el comando calcular_riesgo, nunca dentro de una petición
+    """
+    riesgos = RiesgoAcademico.objects.filter(
+        nivel__in=['alto', 'medio']
+    ).select_related('estudiante').order_by('-puntaje')
+    if condiciones:
+        # Solo estudiantes con inscripciones en el periodo/grupo/asignatura pedidos
+        condiciones = {'activo': True, **condiciones}
+        riesgos = riesgos.filter(
+            estudiante_id__in=Inscripcion.objects.filter(**condiciones).values('estudiante_id')
+        )
+    
+    return [{
+        'matricula': r.estudiante.username,
+        'nombre': r.estudiante.get_full_name(),
+        'promedio': r.promedio if r.promedio is not None else 0,
+        'cursos_reprobados': r.cursos_en_riesgo,
+        'estado': f'Riesgo {r.get_nivel_display()}',
+        'puntaje': r.puntaje,
+        'motivos': r.lista_motivos(),
+    } for r in riesgos]
+
+
+# ============= EXPORTACIÓN =============
+
+def filas_tabla(tipo_reporte, datos):
+    """Filas de la tabla exportada (la primera es el encabezado)"""
+    if tipo_reporte == 'notas_estudiante':
+        filas = [['Matrícula', 'Nombre', 'Total Notas', 'Promedio', 'Estado']]
+        for item in datos:
+            filas.append([
+                item['matricula'],
+                item['nombre'],
+                str(item['total_notas']),
+                str(item['promedio']),
+                item['estado']
+            ])
+    
+    elif tipo_reporte == 'notas_asignatura':
+        filas = [['Código', 'Asignatura', 'Profesor', 'Estudiantes', 'Promedio']]
+        for item in datos:
+            filas.append([
+                item['codigo'],
+                item['nombre'],
+                item['profesor'],
+                str(item['estudiantes']),
+                str(item['promedio'])
+            ])
+    
+    elif tipo_reporte == 'resumen_general':
+        filas = [['Indicador', 'Valor']]
+        for item in datos[:1]:
+            filas.append(['Total Estudiantes', str(item['total_estudiantes'])])
+            filas.append(['Total Cursos', str(item['total_cursos'])])
+            filas.append(['Total Calificaciones', str(item['total_calificaciones'])])
+            filas.append(['Promedio General', str(item['promedio_general'])])
+    
+    elif tipo_reporte == 'estudiantes_riesgo':
+        filas = [['Matrícula', 'Nombre', 'Promedio', 'Cursos Reprobados', 'Estado']]
+        for item in datos:
+            filas.append([
+                item['matricula'],
+                item['nombre'],
+                str(item['promedio']),
+                str(item['cursos_reprobados']),
+                item['estado']
+            ])
+    
+    else:
+        filas = [[]]
+    
+    return filas
+
+
+def escribir_pdf(destino, tipo_reporte, semestre, datos, titulo=None, fecha=None):
+    """Escribe el reporte en PDF con ReportLab en `destino` (respuesta HTTP o buffer)"""
+    doc = SimpleDocTemplate(destino, pagesize=letter)
+    elementos = []
+    styles = getSampleStyleSheet()
+    
+    # Título
+    titulo_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor=colors.HexColor('#1B3C53'),
+        spaceAfter=30,
+        alignment=1  # Centrado
+    )
+    
+    # Usar nombre personalizado si existe, sino usar el nombre por defecto
+    if not titulo:
+        titulo = f"Reporte Académico: {NOMBRES_REPORTE.get(tipo_reporte, 'Reporte Académico')}"
+    fecha = fecha or datetime.now()
+    
+    elementos.append(Paragraph(titulo, titulo_style))
+    elementos.append(Paragraph(f"Semestre: {semestre}", styles['Normal']))
+    elementos.append(Paragraph(f"Fecha de generación: {fecha.strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    elementos.append(Spacer(1, 0.3*inch))
+    
+    # Crear tabla
+    tabla = Table(filas_tabla(tipo_reporte, datos))
+    tabla.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1B3C53')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    
+    elementos.append(tabla)
+    if not datos:
+        elementos.append(Spacer(1, 0.2*inch))
+        elementos.append(Paragraph("No hay datos para los filtros seleccionados.", styles['Normal']))
+    elementos.append(Spacer(1, 0.3*inch))
+    elementos.append(Paragraph("Sistema de Gestión de Notas - TROLI", styles['Normal']))
+    
+    doc.build(elementos)
+
+
+def contenido_csv(tipo_reporte, datos):
+    """Reporte en formato CSV (texto)"""
+    salida = io.StringIO()
+    csv.writer(salida).writerows(filas_tabla(tipo_reporte, datos))
+    return salida.getvalue()
+
+
+# ============= REPORTES GUARDADOS PRECALCULADOS =============
+
+def filtros_de_reporte(reporte):
+    """Filtros de un ReporteAcademico con el mismo formato que usa la vista previa"""
+    return {
+        'semestre': reporte.semestre or '',
+        'grupo': reporte.grupo or '',
+        'asignatura_id': reporte.asignatura_id or '',
+        'fecha_desde': reporte.fecha_desde.strftime('%Y-%m-%d') if reporte.fecha_desde else '',
+        'fecha_hasta': reporte.fecha_hasta.strftime('%Y-%m-%d') if reporte.fecha_hasta else '',
+        'estado_academico': reporte.estado_academico or '',
+    }
+
+
+def precalcular(reporte, forzar=False):
+    """
+    Calcula las filas, el PDF y el CSV de un reporte guardado y los guarda en
+    ResultadoReporte. Sin `forzar`, no hace nada si los datos no cambiaron
+    desde el último precálculo. Retorna True si se regeneró.
+    """
+    filtros = filtros_de_reporte(reporte)
+    normalizados = cache_reportes.normalizar_filtros(filtros)
+    etiqueta = cache_reportes.etiqueta_version(reporte.tipo_reporte, normalizados)
+    if not forzar and ResultadoReporte.objects.filter(reporte=reporte, etiqueta_version=etiqueta).exists():
+        return False
+    
+    datos, _ = cache_reportes.obtener_o_calcular(reporte.tipo_reporte, filtros, generar_datos)
+    fecha = timezone.now()
+    # Sin datos también se genera el PDF (tabla vacía con aviso), para no guardar un archivo vacío
+    pdf = io.BytesIO()
+    escribir_pdf(pdf, reporte.tipo_reporte, reporte.semestre, datos, reporte.nombre,
+                 timezone.localtime(fecha))
+    
+    ResultadoReporte.objects.update_or_create(
+        reporte=reporte,
+        defaults={
+            'datos': cache_reportes.serializar(datos),
+            'archivo_pdf': pdf.getvalue(),
+            'archivo_csv': contenido_csv(reporte.tipo_reporte, datos),
+            'etiqueta_version': etiqueta,
+            'fecha_datos': fecha,
+        }
+    )
+    return True
+
+
+def precalcular_activos(forzar=False):
+    """Precalcula todos los reportes guardados activos; retorna (regenerados, sin cambios)"""
+    regenerados = sin_cambios = 0
+    for reporte in ReporteAcademico.objects.filter(activo=True).order_by('id'):
+        if precalcular(reporte, forzar=forzar):
+            regenerados += 1
+        else:
+            sin_cambios += 1
+    return regenerados, sin_cambios
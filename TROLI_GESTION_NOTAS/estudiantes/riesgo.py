@@ -0,0 +1,158 @@
+"""
+Puntaje de alerta temprana (riesgo académico)
+
+Calcula en una sola pasada por lotes el riesgo de todos los estudiantes
+activos a partir de:
+- promedio actual (promedio de sus notas definitivas)
+- tendencia de sus notas a lo largo de fecha_evaluacion (pendiente)
+- evaluaciones reprobadas
+- cursos en riesgo (nota definitiva < 3.0)
+
+El resultado se guarda en RiesgoAcademico; ver el comando calcular_riesgo.
+"""
+import json
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .models import Calificacion, Inscripcion, RiesgoAcademico
+from . import cache_reportes, definitivas
+
+NOTA_APROBATORIA = 3.0
+NOTA_ALERTA = 3.5
+TENDENCIA_ALERTA = -0.2  # Caída de nota cada 30 días considerada preocupante
+UMBRAL_ALTO = 60
+UMBRAL_MEDIO = 30
+
+
+def _tendencias(ids, dias, notas):
+    """
+    Pendiente de la recta de mínimos cuadrados (nota vs. días) por estudiante,
+    expresada como cambio de nota cada 30 días
+    """
+    unicos, inversos = np.unique(ids, return_inverse=True)
+    n = np.bincount(inversos).astype(np.float64)
+    # Centrar los días mejora la precisión numérica de las sumas
+    x = dias - dias.mean()
+    sx = np.bincount(inversos, weights=x)
+    sy = np.bincount(inversos, weights=notas)
+    sxx = np.bincount(inversos, weights=x * x)
+    sxy = np.bincount(inversos, weights=x * notas)
+    denominador = n * sxx - sx * sx
+    pendientes = np.zeros_like(n)
+    validos = denominador > 0
+    pendientes[validos] = (n[validos] * sxy[validos] - sx[validos] * sy[validos]) / denominador[validos]
+    reprobadas = np.bincount(inversos, weights=(notas < NOTA_APROBATORIA).astype(np.float64))
+    return {
+        int(unicos[i]): {
+            'tendencia': float(pendientes[i] * 30),
+            'total': int(n[i]),
+            'reprobadas': int(reprobadas[i]),
+        }
+        for i in range(unicos.size)
+    }
+
+
+def puntuar(promedio, tendencia, total_evaluaciones, evaluaciones_reprobadas, cursos_en_riesgo):
+    """Combina los indicadores en un puntaje de 0 a 100 y la lista de motivos"""
+    puntaje = 0.0
+    motivos = []
+    if promedio is not None:
+        if promedio < NOTA_APROBATORIA:
+            puntaje += 40
+            motivos.append(f'Promedio {promedio:.2f} por debajo de {NOTA_APROBATORIA}')
+        elif promedio < NOTA_ALERTA:
+            puntaje += 20
+            motivos.append(f'Promedio {promedio:.2f} cercano al mínimo')
+    if tendencia <= TENDENCIA_ALERTA:
+        puntaje += 20
+        motivos.append(f'Tendencia descendente ({tendencia:+.2f} cada 30 días)')
+    if evaluaciones_reprobadas:
+        puntaje += 20 * evaluaciones_reprobadas / max(total_evaluaciones, 1)
+        motivos.append(f'{evaluaciones_reprobadas} de {total_evaluaciones} evaluaciones reprobadas')
+    if cursos_en_riesgo:
+        puntaje += min(10 * cursos_en_riesgo, 20)
+        motivos.append(f'{cursos_en_riesgo} curso(s) con nota definitiva reprobatoria')
+    return round(puntaje, 2), motivos
+
+
+def nivel_de(puntaje):
+    if puntaje >= UMBRAL_ALTO:
+        return 'alto'
+    if puntaje >= UMBRAL_MEDIO:
+        return 'medio'
+    return 'bajo'
+
+
+def calcular_riesgo():
+    """
+    Recalcula el riesgo de todos los estudiantes activos y reemplaza la tabla
+    RiesgoAcademico. Retorna el número de estudiantes puntuados por nivel.
+    """
+    inscripciones = list(
+        Inscripcion.objects.filter(
+            activo=True, estudiante__rol='estudiante', estudiante__activo=True
+        ).only('id', 'curso_id', 'estudiante_id')
+    )
+    notas_definitivas = definitivas.definitivas_de(inscripciones)
+
+    # Promedio actual y cursos en riesgo a partir de las definitivas en caché
+    por_estudiante = {}
+    for insc in inscripciones:
+        datos = por_estudiante.setdefault(insc.estudiante_id, {'notas': [], 'cursos_en_riesgo': 0})
+        definitiva = notas_definitivas.get(insc.id)
+        if definitiva is not None and definitiva.nota is not None:
+            datos['notas'].append(definitiva.nota)
+            if definitiva.nota < definitivas.NOTA_APROBATORIA:
+                datos['cursos_en_riesgo'] += 1
+
+    # Tendencia y evaluaciones reprobadas con una sola consulta vectorizada
+    filas = Calificacion.objects.filter(
+        inscripcion__activo=True,
+        inscripcion__estudiante__rol='estudiante',
+        inscripcion__estudiante__activo=True,
+    ).values_list('inscripcion__estudiante_id', 'fecha_evaluacion', Cast('nota', FloatField()))
+    filas = list(filas)
+    evaluaciones = {}
+    if filas:
+        ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+        dias = np.fromiter((f[1].toordinal() for f in filas), dtype=np.float64, count=len(filas))
+        notas = np.fromiter((f[2] for f in filas), dtype=np.float64, count=len(filas))
+        evaluaciones = _tendencias(ids, dias, notas)
+
+    registros = []
+    conteo = {'bajo': 0, 'medio': 0, 'alto': 0}
+    for estudiante_id, datos in por_estudiante.items():
+        promedio = None
+        if datos['notas']:
+            promedio = sum(datos['notas']) / len(datos['notas'])
+        eval_est = evaluaciones.get(estudiante_id, {'tendencia': 0.0, 'total': 0, 'reprobadas': 0})
+        puntaje, motivos = puntuar(
+            float(promedio) if promedio is not None else None,
+            eval_est['tendencia'],
+            eval_est['total'],
+            eval_est['reprobadas'],
+            datos['cursos_en_riesgo'],
+        )
+        nivel = nivel_de(puntaje)
+        conteo[nivel] += 1
+        registros.append(RiesgoAcademico(
+            estudiante_id=estudiante_id,
+            nivel=nivel,
+            puntaje=Decimal(str(puntaje)),
+            promedio=promedio.quantize(Decimal('0.01')) if promedio is not None else None,
+            tendencia=round(eval_est['tendencia'], 4),
+            total_evaluaciones=eval_est['total'],
+            evaluaciones_reprobadas=eval_est['reprobadas'],
+            cursos_en_riesgo=datos['cursos_en_riesgo'],
+            motivos=json.dumps(motivos, ensure_ascii=False),
+        ))
+
+    with transaction.atomic():
+        RiesgoAcademico.objects.all().delete()
+        RiesgoAcademico.objects.bulk_create(registros, batch_size=500)
+    cache_reportes.incrementar_version(cache_reportes.VERSION_RIESGO)
+    return conteo
@@ -0,0 +1,134 @@
+"""
+Motor de sesiones en caché con escritura diferida a la base de datos
+
+Es el motor cached_db de Django con una diferencia: al modificar una sesión
+existente (mensajes, contexto de autorización, etc.) se escribe en la base de
+datos como máximo una vez cada SESIONES_VOLCADO_SEGUNDOS por sesión. Cada
+sesión tiene su propia marca en la caché ('escrita', tomada con cache.add, que
+es atómico): el primer guardado del intervalo la consigue y escribe en la base
+de datos; los demás solo actualizan la caché y dejan la sesión marcada como
+pendiente (otra marca por sesión). El comando purgar_sesiones vuelca las
+pendientes recorriendo las sesiones vigentes por lotes. No hay un registro
+compartido de pendientes que leer y reescribir.
+
+Crear, rotar y eliminar sesiones, y todo guardado que cambie la
+autenticación (inicio y cierre de sesión, cambio de contraseña), siempre va
+directo a la base de datos. Si la caché se pierde, una sesión conserva su
+usuario y pierde como máximo los cambios de sus últimos
+SESIONES_VOLCADO_SEGUNDOS (por ejemplo, mensajes pendientes).
+
+La caché de sesiones tiene que ser compartida por todos los workers; con la
+caché en memoria de cada proceso (ver autorizacion.cache_compartida) el motor
+lee y escribe directo en la base de datos, como el motor db de Django.
+"""
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.utils import timezone
+
+from .autorizacion import cache_compartida
+
+CLAVES_AUTENTICACION = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+TAMANO_LOTE = 500
+
+
+def _cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def _diferida():
+    """La escritura diferida solo es segura con una caché de sesiones compartida"""
+    return cache_compartida(settings.SESSION_CACHE_ALIAS)
+
+
+def _clave_escrita(session_key):
+    return f'sesiones:escrita:{session_key}'
+
+
+def _clave_pendiente(session_key):
+    return f'sesiones:pendiente:{session_key}'
+
+
+def _autenticacion(datos):
+    return {clave: datos.get(clave) for clave in CLAVES_AUTENTICACION}
+
+
+class SessionStore(CachedDBStore):
+    def load(self):
+        datos = super().load() if _diferida() else DBStore.load(self)
+        # Lo que hay en la base de datos: los cambios de autenticación nunca se difieren
+        self._autenticacion_en_bd = _autenticacion(datos)
+        return datos
+
+    def save(self, must_create=False):
+        if not _diferida():
+            DBStore.save(self, must_create)
+            return
+        directo = (
+            must_create or self.session_key is None
+            or _autenticacion(self._get_session()) != getattr(self, '_autenticacion_en_bd', None)
+        )
+        intervalo = getattr(settings, 'SESIONES_VOLCADO_SEGUNDOS', 30)
+        if not directo and not self._cache.add(_clave_escrita(self.session_key), True, intervalo):
+            # Ya se escribió en este intervalo: solo caché, y la sesión queda pendiente
+            self._cache.set(self.cache_key, self._get_session(), self.get_expiry_age())
+            self._cache.set(_clave_pendiente(self.session_key), True, self.get_expiry_age())
+            return
+
+        if self.session_key is not None:
+            # La marca se borra antes de escribir: un guardado que llegue después la vuelve a poner
+            self._cache.delete(_clave_pendiente(self.session_key))
+        super().save(must_create)
+        self._cache.set(_clave_escrita(self.session_key), True, intervalo)
+        self._autenticacion_en_bd = _autenticacion(self._get_session())
+
+    def delete(self, session_key=None):
+        clave = session_key or self.session_key
+        if not _diferida():
+            DBStore.delete(self, session_key)
+            return
+        super().delete(session_key)
+        if clave is not None:
+            self._cache.delete_many([_clave_escrita(clave), _clave_pendiente(clave)])
+
+
+def volcar_pendientes():
+    """Escribe en la base de datos las sesiones modificadas solo en caché; retorna cuántas"""
+    if not _diferida():
+        return 0
+    cache = _cache()
+    ahora = timezone.now()
+    volcadas = 0
+    ultima = ''
+    while True:
+        lote = list(
+            Session.objects.filter(expire_date__gte=ahora, session_key__gt=ultima)
+            .order_by('session_key').values_list('session_key', flat=True)[:TAMANO_LOTE]
+        )
+        if not lote:
+            return volcadas
+        ultima = lote[-1]
+        marcas = cache.get_many([_clave_pendiente(k) for k in lote])
+        pendientes = [k for k in lote if _clave_pendiente(k) in marcas]
+        if not pendientes:
+            continue
+        # Igual que en save: la marca se borra antes de leer los datos que se vuelcan
+        cache.delete_many([_clave_pendiente(k) for k in pendientes])
+        datos = cache.get_many([CachedDBStore.cache_key_prefix + k for k in pendientes])
+        existentes = Session.objects.in_bulk(pendientes)
+        actualizar = []
+        for clave in pendientes:
+            sesion = existentes.get(clave)
+            data = datos.get(CachedDBStore.cache_key_prefix + clave)
+            # Sesiones eliminadas o ya vencidas en caché no se vuelcan
+            if sesion is None or data is None:
+                continue
+            store = SessionStore(clave)
+            store._session_cache = data
+            sesion.session_data = store.encode(data)
+            sesion.expire_date = store.get_expiry_date()
+            actualizar.append(sesion)
+        volcadas += Session.objects.bulk_update(actualizar, ['session_data', 'expire_date'], batch_size=TAMANO_LOTE)
@@ -0,0 +1,116 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Calificacion, Curso, Inscripcion, PonderacionEvaluacion, ReporteAcademico, ResultadoReporte, Usuario
+from . import autorizacion, cache_reportes, definitivas, rankings
+
+
+@receiver([post_save, post_delete], sender=Calificacion)
+def invalidar_definitivas_por_calificacion(sender, instance, **kwargs):
+    """Un cambio en una calificación invalida las notas definitivas y los reportes de su curso"""
+    curso_id = Inscripcion.objects.filter(id=instance.inscripcion_id).values_list('curso_id', flat=True).first()
+    if curso_id:
+        definitivas.invalidar_curso(curso_id)
+        cache_reportes.invalidar_curso(curso_id)
+
+
+@receiver([post_save, post_delete], sender=PonderacionEvaluacion)
+def invalidar_definitivas_por_ponderacion(sender, instance, **kwargs):
+    """Un cambio en la ponderación invalida las notas definitivas y los reportes del curso"""
+    definitivas.invalidar_curso(instance.curso_id)
+    cache_reportes.invalidar_curso(instance.curso_id)
+
+
+@receiver(pre_save, sender=Calificacion)
+def recordar_calificacion_anterior(sender, instance, **kwargs):
+    """La nota que se reemplaza, para restarla de los rankings en post_save"""
+    if instance.pk:
+        anterior = Calificacion.objects.filter(pk=instance.pk).values_list('inscripcion_id', 'nota').first()
+        if anterior:
+            rankings.recordar_calificacion(instance, *anterior)
+
+
+@receiver(post_save, sender=Calificacion)
+def actualizar_rankings_por_calificacion(sender, instance, **kwargs):
+    """Aplica la diferencia de la nota a las filas de ranking del estudiante y curso afectados"""
+    rankings.calificacion_guardada(instance)
+
+
+@receiver(post_delete, sender=Calificacion)
+def actualizar_rankings_por_calificacion_eliminada(sender, instance, **kwargs):
+    rankings.calificacion_eliminada(instance)
+
+
+@receiver(pre_save, sender=Inscripcion)
+def recordar_inscripcion_anterior(sender, instance, **kwargs):
+    """Curso, estudiante y estado previos, para ajustar los rankings en post_save"""
+    if instance.pk:
+        anterior = Inscripcion.objects.filter(pk=instance.pk).values_list('curso_id', 'estudiante_id', 'activo').first()
+        if anterior:
+            rankings.recordar_inscripcion(instance, *anterior)
+
+
+@receiver(post_save, sender=Inscripcion)
+def actualizar_rankings_por_inscripcion(sender, instance, **kwargs):
+    """Inscribir o retirar cambia los rankings y reportes del curso"""
+    cache_reportes.invalidar_curso(instance.curso_id)
+    rankings.inscripcion_guardada(instance)
+
+
+@receiver(post_delete, sender=Inscripcion)
+def actualizar_rankings_por_inscripcion_eliminada(sender, instance, **kwargs):
+    cache_reportes.invalidar_curso(instance.curso_id)
+    rankings.inscripcion_eliminada(instance)
+
+
+@receiver(post_save, sender=Curso)
+def crear_ranking_curso(sender, instance, created, **kwargs):
+    """Todo curso nuevo aparece en el ranking de cursos aunque no tenga inscritos"""
+    if created:
+        rankings.crear_curso(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Curso)
+def invalidar_reportes_por_curso(sender, instance, **kwargs):
+    """Nombre, profesor o estado del curso aparecen en los reportes"""
+    cache_reportes.invalidar_curso(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_reportes_por_usuario(sender, instance, update_fields=None, **kwargs):
+    """Los datos de usuarios aparecen en los reportes; el inicio de sesión no los cambia"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    cache_reportes.incrementar_version(cache_reportes.VERSION_USUARIOS)
+
+
+@receiver(post_save, sender=ReporteAcademico)
+def descartar_resultado_reporte(sender, instance, created, **kwargs):
+    """Si cambian los filtros del reporte guardado, su resultado precalculado ya no aplica"""
+    if not created:
+        ResultadoReporte.objects.filter(reporte=instance).delete()
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_autorizacion_por_usuario(sender, instance, **kwargs):
+    """Rol, estado o contraseña nuevos: se descarta el contexto y el usuario en caché"""
+    autorizacion.invalidar(instance.id)
+
+
+@receiver(pre_save, sender=Curso)
+def invalidar_autorizacion_profesor_anterior(sender, instance, **kwargs):
+    """Si el curso cambia de profesor, el anterior deja de tenerlo en su contexto"""
+    if instance.pk:
+        anterior = Curso.objects.filter(pk=instance.pk).values_list('profesor_id', flat=True).first()
+        if anterior != instance.profesor_id:
+            autorizacion.invalidar(anterior)
+
+
+@receiver([post_save, post_delete], sender=Curso)
+def invalidar_autorizacion_por_curso(sender, instance, **kwargs):
+    autorizacion.invalidar(instance.profesor_id)
+
+
+@receiver([post_save, post_delete], sender=Inscripcion)
+def invalidar_autorizacion_por_inscripcion(sender, instance, **kwargs):
+    autorizacion.invalidar(instance.estudiante_id)
@@ -1,3 +1,1153 @@
-from django.test import TestCase
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import (
+    Usuario, Curso, Inscripcion, Calificacion, NotaDefinitiva, PonderacionEvaluacion, RiesgoAcademico,
+    RankingCurso, RankingEstudiante, RankingEstudianteCurso, Periodo, HistorialReporte,
+    ReporteAcademico, ResultadoReporte, LoteComprobantes, HistorialCalificacion, ListaEspera, Notificacion,
+)
+from . import (
+    analitica, autorizacion, cache_reportes, calificaciones, comprobantes_lote, credenciales, cupos, definitivas,
+    hashers, importacion, limites, rankings, reportes, riesgo, sesiones,
+)
+
+
+# Las pruebas crean muchos usuarios: con MD5 (sin costo) el hash no las hace lentas.
+# Solo aquí; settings.py no lo incluye en PASSWORD_HASHERS
+HASHERS_CONFIGURADOS = list(settings.PASSWORD_HASHERS)
+_HASHERS_DE_PRUEBA = override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'] + HASHERS_CONFIGURADOS
+)
+
+
+def setUpModule():
+    _HASHERS_DE_PRUEBA.enable()
+
+
+def tearDownModule():
+    _HASHERS_DE_PRUEBA.disable()
+
+
+def crear_datos_basicos():
+    """Crea un profesor, un curso y dos estudiantes inscritos"""
+    profesor = Usuario.objects.create_user(username='profe', password='Profe123@', rol='profesor')
+    curso = Curso.objects.create(nombre='Matemáticas I', codigo='MAT101', profesor=profesor)
+    estudiantes = [
+        Usuario.objects.create_user(username=f'est{i}', password='Est123@', rol='estudiante')
+        for i in range(2)
+    ]
+    inscripciones = [Inscripcion.objects.create(estudiante=e, curso=curso) for e in estudiantes]
+    return profesor, curso, inscripciones
+
+
+def calificar(inscripcion, nota, tipo='parcial'):
+    return Calificacion.objects.create(
+        inscripcion=inscripcion,
+        tipo_evaluacion=tipo,
+        nota=Decimal(nota),
+        fecha_evaluacion=timezone.now().date(),
+        profesor=inscripcion.curso.profesor,
+    )
+
+
+class CursoEstadisticasTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        calificar(self.inscripciones[0], '4.0')
+        calificar(self.inscripciones[0], '2.0', 'quiz')
+        calificar(self.inscripciones[1], '3.0')
+
+    def test_con_estadisticas_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            curso = Curso.objects.con_estadisticas().get(id=self.curso.id)
+        self.assertEqual(curso.estudiantes_count, 2)
+        self.assertEqual(curso.calificaciones_count, 3)
+        self.assertEqual(round(float(curso.promedio), 2), 3.0)
+        self.assertAlmostEqual(curso.tasa_aprobacion, 200 / 3)
+
+    def test_curso_sin_calificaciones(self):
+        otro = Curso.objects.create(nombre='Física I', codigo='FIS101', profesor=self.profesor)
+        curso = Curso.objects.con_estadisticas().get(id=otro.id)
+        self.assertEqual(curso.calificaciones_count, 0)
+        self.assertIsNone(curso.promedio)
+        self.assertIsNone(curso.tasa_aprobacion)
+
+    def test_dashboard_profesor_usa_estadisticas(self):
+        self.client.force_login(self.profesor)
+        response = self.client.get('/dashboard/profesor/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cursos'][0].estudiantes_count, 2)
+
+    def test_perfil_profesor(self):
+        # Una nota registrada por otro profesor y una inscripción retirada
+        otro = Usuario.objects.create_user(username='profe2', password='Profe123@', rol='profesor')
+        Calificacion.objects.filter(inscripcion=self.inscripciones[1]).update(profesor=otro)
+        Inscripcion.objects.filter(id=self.inscripciones[1].id).update(activo=False)
+        self.client.force_login(self.profesor)
+        response = self.client.get('/perfil/')
+        self.assertEqual(response.context['total_estudiantes'], 2)
+        self.assertEqual(response.context['total_calificaciones'], 2)
+        self.assertEqual(round(float(response.context['promedio_cursos']), 2), 3.0)
+
+
+class AnaliticaTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        for nota in ('4.6', '4.0', '2.0'):
+            calificar(self.inscripciones[0], nota)
+        calificar(self.inscripciones[1], '3.0', 'quiz')
+
+    def test_analizar_curso(self):
+        with self.assertNumQueries(1):
+            analisis = analitica.analizar(inscripcion__curso=self.curso)
+        self.assertEqual(analisis['resumen']['total'], 4)
+        self.assertAlmostEqual(analisis['resumen']['promedio'], 3.4)
+        self.assertEqual(analisis['resumen']['percentiles'][50], 3.5)
+        self.assertEqual(
+            analisis['distribucion'],
+            {'insuficiente': 1, 'aceptable': 1, 'bueno': 0, 'sobresaliente': 1, 'excelente': 1}
+        )
+        self.assertEqual(sum(b['cantidad'] for b in analisis['histograma']), 4)
+        por_estudiante = analisis['por_estudiante']
+        self.assertEqual(por_estudiante[self.inscripciones[0].estudiante_id]['total_calificaciones'], 3)
+        self.assertEqual(por_estudiante[self.inscripciones[0].estudiante_id]['z_score'], 1.0)
+        self.assertEqual([t['tipo'] for t in analisis['por_tipo']], ['parcial', 'quiz'])
+
+    def test_histograma_con_bins_configurables(self):
+        datos = analitica.cargar_notas(inscripcion__curso=self.curso)
+        bins = analitica.histograma(datos['notas'], bins=2)
+        self.assertEqual([b['cantidad'] for b in bins], [1, 3])
+
+    def test_frecuencias_dan_las_mismas_estadisticas(self):
+        for nota in ('4.6', '1.5', '3.0', '3.0', '5.0', '0.0'):
+            calificar(self.inscripciones[1], nota, 'taller')
+        notas = analitica.cargar_notas()
+        frecuencias = analitica.cargar_frecuencias()
+        self.assertLess(frecuencias['notas'].size, notas['notas'].size)
+        ponderado, directo = analitica.resumen(frecuencias['notas'], frecuencias['pesos']), analitica.resumen(notas['notas'])
+        for clave in ('total', 'promedio', 'desviacion', 'nota_maxima', 'nota_minima', 'tasa_aprobacion'):
+            self.assertAlmostEqual(ponderado[clave], directo[clave])
+        self.assertEqual(ponderado['percentiles'], directo['percentiles'])
+        self.assertEqual(analitica.histograma(frecuencias['notas'], pesos=frecuencias['pesos']),
+                         analitica.histograma(notas['notas']))
+        self.assertEqual(analitica.desglose_por_tipo(frecuencias), analitica.desglose_por_tipo(notas))
+        for q in (0, 1, 33, 50, 99, 100):
+            self.assertEqual(analitica.percentiles(frecuencias['notas'], (q,), frecuencias['pesos']),
+                             analitica.percentiles(notas['notas'], (q,)))
+
+    def test_sin_notas(self):
+        analisis = analitica.analizar(inscripcion__curso_id=0)
+        self.assertEqual(analisis['resumen']['total'], 0)
+        self.assertEqual(analisis['por_estudiante'], {})
+        self.assertEqual(analisis['por_tipo'], [])
+
+    def test_vistas_exponen_analitica(self):
+        self.client.force_login(self.profesor)
+        response = self.client.get(f'/profesor/curso/{self.curso.id}/estudiantes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['excelente'], 1)
+        self.assertEqual(response.context['total_calificaciones'], 4)
+        self.assertIsNotNone(response.context['estudiantes'][0]['ultima_calificacion'])
+
+        admin = Usuario.objects.create_user(username='admin', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        response = self.client.get('/admin-panel/reportes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['resumen_notas']['total'], 4)
+
+
+class NotaDefinitivaTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        PonderacionEvaluacion.objects.create(curso=self.curso, tipo_evaluacion='parcial', porcentaje=Decimal('30'))
+        PonderacionEvaluacion.objects.create(curso=self.curso, tipo_evaluacion='final', porcentaje=Decimal('70'))
+        calificar(self.inscripciones[0], '5.0', 'parcial')
+        calificar(self.inscripciones[0], '2.0', 'final')
+        calificar(self.inscripciones[0], '0.0', 'quiz')  # sin peso: no cuenta
+        calificar(self.inscripciones[1], '4.0', 'parcial')
+
+    def test_definitiva_ponderada(self):
+        notas = definitivas.definitivas_de(self.inscripciones)
+        primera = notas[self.inscripciones[0].id]
+        self.assertEqual(primera.nota, Decimal('2.90'))
+        self.assertEqual(primera.porcentaje_evaluado, Decimal('100'))
+        # Solo el parcial evaluado: la nota se normaliza sobre el 30%
+        segunda = notas[self.inscripciones[1].id]
+        self.assertEqual(segunda.nota, Decimal('4.00'))
+        self.assertEqual(segunda.porcentaje_evaluado, Decimal('30'))
+
+    def test_cache_e_invalidacion(self):
+        definitivas.definitivas_de(self.inscripciones)
+        with self.assertNumQueries(1):
+            definitivas.definitivas_de(self.inscripciones)
+        calificar(self.inscripciones[1], '1.0', 'final')
+        self.assertFalse(NotaDefinitiva.objects.filter(curso=self.curso).exists())
+        notas = definitivas.definitivas_de(self.inscripciones)
+        self.assertEqual(notas[self.inscripciones[1].id].nota, Decimal('1.90'))
+
+    def test_resultado_de_una_version_anterior_no_se_usa(self):
+        definitivas.definitivas_de(self.inscripciones)
+        # Nota cambiada mientras se calculaba: la fila se guardó después de la invalidación
+        Calificacion.objects.filter(inscripcion=self.inscripciones[1]).update(nota=Decimal('1.0'))
+        cache_reportes.invalidar_curso(self.curso.id)
+        self.assertTrue(NotaDefinitiva.objects.filter(curso=self.curso).exists())
+        notas = definitivas.definitivas_de(self.inscripciones)
+        self.assertEqual(notas[self.inscripciones[1].id].nota, Decimal('1.00'))
+
+    def test_recalcular_sobre_filas_existentes(self):
+        # Dos cálculos del mismo curso sin invalidación entremedio (lecturas simultáneas en frío)
+        definitivas.actualizar_cursos([self.curso.id])
+        definitivas.actualizar_cursos([self.curso.id])
+        self.assertEqual(NotaDefinitiva.objects.filter(curso=self.curso).count(), len(self.inscripciones))
+
+    def test_curso_sin_ponderacion_usa_promedio_simple(self):
+        self.curso.ponderaciones.all().delete()
+        notas = definitivas.definitivas_de(self.inscripciones)
+        self.assertEqual(notas[self.inscripciones[0].id].nota, Decimal('2.33'))
+
+    def test_estado_academico_usa_definitiva(self):
+        self.client.force_login(self.inscripciones[0].estudiante)
+        response = self.client.get('/estudiante/estado-academico/')
+        self.assertEqual(response.context['estado'], 'Reprobado')
+        self.assertEqual(response.context['promedio_general'], Decimal('2.90'))
+        response = self.client.get('/estudiante/mis-calificaciones/')
+        self.assertEqual(response.context['calificaciones_por_curso'][0]['definitiva'], Decimal('2.90'))
+
+    def test_reporte_riesgo_por_fechas_usa_definitiva(self):
+        hoy = timezone.now().date().isoformat()
+        datos = reportes.generar_datos('estudiantes_riesgo', {'fecha_desde': hoy})
+        self.assertEqual([d['matricula'] for d in datos], ['est0'])
+        self.assertEqual(datos[0]['cursos_reprobados'], 1)
+
+
+class RiesgoAcademicoTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        hoy = timezone.now().date()
+        # Estudiante 0: notas bajas y en descenso
+        for dias, nota in ((60, '3.5'), (30, '2.5'), (0, '1.5')):
+            c = calificar(self.inscripciones[0], nota)
+            Calificacion.objects.filter(id=c.id).update(fecha_evaluacion=hoy - timedelta(days=dias))
+        calificar(self.inscripciones[1], '4.5')
+
+    def test_calcular_riesgo(self):
+        conteo = riesgo.calcular_riesgo()
+        self.assertEqual(conteo, {'bajo': 1, 'medio': 0, 'alto': 1})
+        alto = RiesgoAcademico.objects.get(estudiante=self.inscripciones[0].estudiante)
+        self.assertEqual(alto.nivel, 'alto')
+        self.assertAlmostEqual(alto.tendencia, -1.0)
+        self.assertEqual(alto.evaluaciones_reprobadas, 2)
+        self.assertEqual(alto.cursos_en_riesgo, 1)
+        self.assertEqual(len(alto.lista_motivos()), 4)
+
+    def test_reporte_riesgo_lee_tabla(self):
+        riesgo.calcular_riesgo()
+        with self.assertNumQueries(1):
+            datos = reportes.generar_datos('estudiantes_riesgo', {})
+        self.assertEqual([d['matricula'] for d in datos], ['est0'])
+        self.assertEqual(datos[0]['estado'], 'Riesgo Alto')
+
+    def test_reporte_sin_calcular_no_calcula_en_la_peticion(self):
+        admin = Usuario.objects.create_user(username='admin', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        semestre = Periodo.actual().codigo
+        response = self.client.get('/admin-panel/generar-reporte/', {'preview': '1', 'semestre': semestre, 'tipo_reporte': 'estudiantes_riesgo'})
+        self.assertEqual(response.context['datos_reporte'], [])
+        self.assertIn(reportes.AVISO_RIESGO_PENDIENTE, [str(m) for m in response.context['messages']])
+        self.assertFalse(RiesgoAcademico.objects.exists())
+
+        # Después de calcular_riesgo el mismo reporte (antes en caché vacío) ya tiene filas
+        riesgo.calcular_riesgo()
+        response = self.client.get('/admin-panel/generar-reporte/', {'preview': '1', 'semestre': semestre, 'tipo_reporte': 'estudiantes_riesgo'})
+        self.assertEqual([d['matricula'] for d in response.context['datos_reporte']], ['est0'])
+
+
+class RankingsTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        calificar(self.inscripciones[0], '3.0')
+        calificar(self.inscripciones[1], '4.0')
+        calificar(self.inscripciones[1], '5.0')
+
+    def test_actualizacion_incremental(self):
+        est0, est1 = (i.estudiante for i in self.inscripciones)
+        self.assertEqual(RankingEstudiante.objects.get(estudiante=est1).promedio, Decimal('4.500'))
+        self.assertEqual(rankings.posicion_global(est1.id), 1)
+        self.assertEqual(rankings.posicion_en_curso(self.curso.id, est0.id), 2)
+
+        for _ in range(3):
+            calificar(self.inscripciones[0], '5.0')
+        # Empate en 4.5: desempata el id del estudiante
+        self.assertEqual(rankings.posicion_global(est0.id), 1)
+        curso = RankingCurso.objects.get(curso=self.curso)
+        self.assertEqual(curso.num_estudiantes, 2)
+        self.assertEqual(curso.total_calificaciones, 6)
+        self.assertEqual(curso.promedio, Decimal('4.500'))
+
+        Calificacion.objects.filter(inscripcion=self.inscripciones[1]).delete()
+        self.assertFalse(RankingEstudiante.objects.filter(estudiante=est1).exists())
+        self.assertFalse(RankingEstudianteCurso.objects.filter(estudiante=est1).exists())
+
+    def test_reconstruir_coincide_con_incremental(self):
+        antes = list(RankingEstudiante.objects.order_by('estudiante_id').values_list('estudiante_id', 'promedio'))
+        conteo = rankings.reconstruir()
+        self.assertEqual(conteo, {'estudiantes': 2, 'estudiantes_curso': 2, 'cursos': 1})
+        despues = list(RankingEstudiante.objects.order_by('estudiante_id').values_list('estudiante_id', 'promedio'))
+        self.assertEqual(antes, despues)
+
+    def test_diferencias_coinciden_con_reconstruir(self):
+        def estado():
+            return (
+                list(RankingEstudiante.objects.order_by('estudiante_id').values_list('estudiante_id', 'suma_notas', 'total_calificaciones', 'promedio')),
+                list(RankingEstudianteCurso.objects.order_by('curso_id', 'estudiante_id').values_list('curso_id', 'estudiante_id', 'suma_notas', 'total_calificaciones', 'promedio')),
+                list(RankingCurso.objects.order_by('curso_id').values_list('curso_id', 'num_estudiantes', 'suma_notas', 'total_calificaciones', 'promedio')),
+            )
+
+        otro = Curso.objects.create(nombre='Física', codigo='FIS101', profesor=self.profesor)
+        nota = calificar(self.inscripciones[0], '2.0')
+        # Editar una nota no vuelve a agregar las calificaciones: solo aplica la diferencia
+        nota.nota = Decimal('3.5')
+        with CaptureQueriesContext(connection) as consultas:
+            nota.save()
+        self.assertFalse([q for q in consultas.captured_queries if 'SUM(' in q['sql'].upper()])
+        calificaciones.actualizar(nota, nota.version, self.profesor, 'parcial', Decimal('4.0'), '')
+        # La inscripción se mueve de curso con sus notas; otra se retira y otra se elimina
+        inscripcion = Inscripcion.objects.get(id=self.inscripciones[1].id)
+        inscripcion.curso = otro
+        inscripcion.save()
+        cupos.desactivar(Inscripcion.objects.get(id=self.inscripciones[0].id))
+        calificar(Inscripcion.objects.create(estudiante=self.inscripciones[0].estudiante, curso=otro), '1.0').delete()
+        Inscripcion.objects.filter(curso=otro, estudiante=self.inscripciones[0].estudiante).delete()
+
+        incremental = estado()
+        rankings.reconstruir()
+        self.assertEqual(incremental, estado())
+
+    def test_paginacion(self):
+        pagina = rankings.pagina_global(por_pagina=1)
+        self.assertTrue(pagina['tiene_siguiente'])
+        self.assertEqual(pagina['resultados'][0]['fila'].estudiante, self.inscripciones[1].estudiante)
+        pagina = rankings.pagina_global(pagina['siguiente'], por_pagina=1)
+        self.assertFalse(pagina['tiene_siguiente'])
+        self.assertIsNone(pagina['siguiente'])
+        self.assertEqual(pagina['resultados'][0]['posicion'], 2)
+        # Un cursor inválido vuelve a la primera página
+        self.assertEqual(rankings.pagina_global('x', por_pagina=1)['resultados'][0]['posicion'], 1)
+
+    def test_paginacion_por_cursor_con_empates(self):
+        for i in range(2, 7):
+            estudiante = Usuario.objects.create_user(username=f'est{i}', password='Est123@', rol='estudiante')
+            calificar(Inscripcion.objects.create(estudiante=estudiante, curso=self.curso), '4.5' if i % 2 else '3.0')
+        esperado = list(RankingEstudiante.objects.order_by('-promedio', 'estudiante_id').values_list('estudiante_id', flat=True))
+
+        vistos, posiciones, despues = [], [], None
+        while True:
+            with self.assertNumQueries(1) as consultas:
+                pagina = rankings.pagina_global(despues, por_pagina=2)
+            # Las páginas siguientes filtran por el cursor, no saltan filas con OFFSET
+            self.assertNotIn('OFFSET', consultas.captured_queries[0]['sql'].upper())
+            vistos += [item['fila'].estudiante_id for item in pagina['resultados']]
+            posiciones += [item['posicion'] for item in pagina['resultados']]
+            despues = pagina['siguiente']
+            if not despues:
+                break
+        self.assertEqual(vistos, esperado)
+        self.assertEqual(posiciones, list(range(1, len(esperado) + 1)))
+
+        self.client.force_login(self.profesor)
+        primera = rankings.pagina_curso(self.curso.id, por_pagina=rankings.POR_PAGINA)
+        datos = self.client.get(f'/rankings/curso/{self.curso.id}/', {'despues': rankings.pagina_curso(self.curso.id, por_pagina=3)['siguiente']}).json()
+        self.assertEqual([r['posicion'] for r in datos['resultados']], [item['posicion'] for item in primera['resultados'][3:]])
+
+    def test_reportes_no_reconstruye_rankings(self):
+        RankingCurso.objects.all().delete()
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        response = self.client.get('/admin-panel/reportes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RankingCurso.objects.exists())
+        self.assertIn('reconstruir_rankings', ' '.join(str(m) for m in response.context['messages']))
+
+    def test_endpoints(self):
+        self.client.force_login(self.profesor)
+        datos = self.client.get(f'/rankings/curso/{self.curso.id}/').json()
+        self.assertTrue(datos['success'])
+        self.assertEqual([r['promedio'] for r in datos['resultados']], [4.5, 3.0])
+
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        response = self.client.get('/admin-panel/reportes/')
+        self.assertEqual(len(response.context['estudiantes_top']), 2)
+        datos = self.client.get('/admin-panel/rankings/cursos/?orden=estudiantes').json()
+        self.assertEqual(datos['resultados'][0]['num_estudiantes'], 2)
+
+
+class PeriodoTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        self.actual = Periodo.actual()
+        self.anterior = Periodo.objects.create(codigo='2020-1', fecha_inicio='2020-01-01', fecha_fin='2020-06-30')
+        # Estudiante 1 cursó la materia en 2020-1, grupo B
+        Inscripcion.objects.filter(id=self.inscripciones[1].id).update(periodo=self.anterior, grupo='Grupo B')
+        Inscripcion.objects.filter(id=self.inscripciones[0].id).update(grupo='Grupo A')
+        calificar(self.inscripciones[0], '4.0')
+        calificar(self.inscripciones[1], '2.0')
+
+    def test_inscripcion_nueva_en_periodo_vigente(self):
+        self.assertEqual(Inscripcion.objects.get(id=self.inscripciones[0].id).periodo, self.actual)
+        self.assertEqual(Periodo.codigo_para_fecha(timezone.datetime(2025, 8, 1)), '2025-2')
+
+    def test_mismo_curso_en_otro_periodo(self):
+        # El estudiante 1 repite la materia en el semestre vigente; dos veces en el mismo periodo no
+        estudiante = self.inscripciones[1].estudiante
+        Inscripcion.objects.create(estudiante=estudiante, curso=self.curso)
+        self.assertEqual(Inscripcion.objects.filter(estudiante=estudiante, curso=self.curso).count(), 2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Inscripcion.objects.create(estudiante=estudiante, curso=self.curso, periodo=self.actual)
+
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        response = self.client.post('/admin-panel/inscripciones/crear/', {
+            'estudiante': self.inscripciones[0].estudiante_id, 'curso': self.curso.id, 'periodo': '', 'activo': 'on',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+
+        archivo = io.StringIO('estudiante,curso,periodo,grupo\nest0,MAT101,2020-1,\nest0,MAT101,2020-1,\n')
+        resultado = importacion.importar(archivo, 'inscripciones')
+        self.assertEqual((resultado['creados'], [fila for fila, _ in resultado['errores']]), (1, [3]))
+
+    def test_reportes_filtran_por_periodo_y_grupo(self):
+        datos = reportes.generar_datos('notas_estudiante', {'semestre': '2020-1'})
+        self.assertEqual([d['matricula'] for d in datos], ['est1'])
+        datos = reportes.generar_datos('notas_estudiante', {'semestre': self.actual.codigo, 'grupo': 'Grupo B'})
+        self.assertEqual(datos, [])
+        datos = reportes.generar_datos('resumen_general', {'semestre': self.actual.codigo})
+        self.assertEqual(datos[0]['total_estudiantes'], 1)
+        self.assertEqual(datos[0]['total_calificaciones'], 1)
+        datos = reportes.generar_datos('notas_estudiante', {'estado_academico': 'reprobado'})
+        self.assertEqual([d['matricula'] for d in datos], ['est1'])
+        datos = reportes.generar_datos('estudiantes_riesgo', {'semestre': '2020-1'})
+        self.assertEqual([d['matricula'] for d in datos], ['est1'])
+
+    def test_filtros_desde_base_de_datos(self):
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        response = self.client.get('/admin-panel/generar-reporte/')
+        self.assertEqual(response.context['semestres'], [self.actual.codigo, '2020-1'])
+        self.assertEqual(response.context['grupos'], ['Grupo A', 'Grupo B'])
+
+    def test_mis_notas_separa_periodos(self):
+        # El estudiante 0 ya había cursado la materia en 2020-1; esa inscripción se crea después
+        estudiante = self.inscripciones[0].estudiante
+        anterior = Inscripcion.objects.create(estudiante=estudiante, curso=self.curso, periodo=self.anterior, activo=False)
+        calificar(anterior, '1.0')
+        self.client.force_login(estudiante)
+        response = self.client.get('/estudiante/mis-calificaciones/')
+        tarjetas = {
+            item['periodo'].codigo: (len(item['calificaciones']), item['definitiva'])
+            for item in response.context['calificaciones_por_curso']
+        }
+        self.assertEqual(tarjetas, {self.actual.codigo: (1, Decimal('4.00')), '2020-1': (1, Decimal('1.00'))})
+        self.assertEqual(response.context['promedio_general'], 4.0)
+        estado = self.client.get('/estudiante/estado-academico/')
+        self.assertEqual(estado.context['promedio_general'], Decimal('4.00'))
+
+
+class CacheReportesTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        calificar(self.inscripciones[0], '4.0')
+        calificar(self.inscripciones[1], '2.5')
+        self.llamadas = 0
+
+    def calcular(self, tipo_reporte, filtros):
+        self.llamadas += 1
+        return reportes.generar_datos(tipo_reporte, filtros)
+
+    def test_reutiliza_hasta_que_cambian_las_notas(self):
+        filtros = {'semestre': Periodo.actual().codigo, 'grupo': ' '}
+        datos, desde_cache = cache_reportes.obtener_o_calcular('notas_estudiante', filtros, self.calcular)
+        self.assertFalse(desde_cache)
+        # Filtros equivalentes (espacios, vacíos) usan la misma entrada
+        otra_vez, desde_cache = cache_reportes.obtener_o_calcular(
+            'notas_estudiante', {'semestre': Periodo.actual().codigo + ' ', 'asignatura_id': ''}, self.calcular
+        )
+        self.assertTrue(desde_cache)
+        self.assertEqual(otra_vez, datos)
+        self.assertIsInstance(otra_vez[0]['promedio'], Decimal)
+
+        calificar(self.inscripciones[0], '5.0')
+        datos, desde_cache = cache_reportes.obtener_o_calcular('notas_estudiante', filtros, self.calcular)
+        self.assertFalse(desde_cache)
+        self.assertEqual(self.llamadas, 2)
+        self.assertEqual(datos[0]['total_notas'], 2)
+
+    def test_version_por_curso(self):
+        otro = Curso.objects.create(nombre='Física I', codigo='FIS101', profesor=self.profesor)
+        filtros = {'asignatura_id': self.curso.id}
+        cache_reportes.obtener_o_calcular('notas_asignatura', filtros, self.calcular)
+        # Una nota en otro curso no invalida el reporte filtrado por este curso
+        calificar(Inscripcion.objects.create(estudiante=self.inscripciones[0].estudiante, curso=otro), '3.0')
+        _, desde_cache = cache_reportes.obtener_o_calcular('notas_asignatura', filtros, self.calcular)
+        self.assertTrue(desde_cache)
+
+    def test_exportar_registra_acierto(self):
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        filtros = {'semestre': Periodo.actual().codigo, 'tipo_reporte': 'notas_estudiante'}
+        self.client.get('/admin-panel/generar-reporte/', {**filtros, 'preview': '1'})
+        response = self.client.post('/admin-panel/exportar-reporte-pdf/', filtros)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(HistorialReporte.objects.get().desde_cache)
+        self.assertEqual(HistorialReporte.tasa_aciertos_cache(), 100.0)
+
+
+class ReportesPrecalculadosTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        calificar(self.inscripciones[0], '4.0')
+        self.admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.reporte = ReporteAcademico.objects.create(
+            nombre='Notas del semestre', tipo_reporte='notas_estudiante',
+            semestre=Periodo.actual().codigo, usuario_creador=self.admin,
+        )
+
+    def test_precalcular_solo_si_cambian_los_datos(self):
+        self.assertEqual(reportes.precalcular_activos(), (1, 0))
+        resultado = ResultadoReporte.objects.get(reporte=self.reporte)
+        self.assertTrue(bytes(resultado.archivo_pdf).startswith(b'%PDF'))
+        self.assertIn('est0', resultado.archivo_csv)
+        self.assertEqual(reportes.precalcular_activos(), (0, 1))
+        calificar(self.inscripciones[1], '3.0')
+        self.assertEqual(reportes.precalcular_activos(), (1, 0))
+
+    def test_abrir_actualizar_y_descargar(self):
+        reportes.precalcular(self.reporte)
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin-panel/generar-reporte/', {'reporte': self.reporte.id})
+        self.assertEqual([d['matricula'] for d in response.context['datos_reporte']], ['est0'])
+
+        # Los datos nuevos aparecen solo al actualizar a demanda
+        calificar(self.inscripciones[1], '3.0')
+        response = self.client.get('/admin-panel/generar-reporte/', {'reporte': self.reporte.id})
+        self.assertEqual(len(response.context['datos_reporte']), 1)
+        self.client.post(f'/admin-panel/actualizar-reporte/{self.reporte.id}/')
+        response = self.client.get('/admin-panel/generar-reporte/', {'reporte': self.reporte.id})
+        self.assertEqual(len(response.context['datos_reporte']), 2)
+
+        response = self.client.get(f'/admin-panel/descargar-reporte/{self.reporte.id}/csv/')
+        self.assertIn(b'est1', response.content)
+        self.assertEqual(HistorialReporte.objects.get().formato_exportacion, 'csv')
+        self.assertIsNotNone(self.client.get(f'/admin-panel/cargar-reporte/{self.reporte.id}/').json()['datos_al'])
+
+    def test_reporte_sin_datos_tiene_pdf(self):
+        for tipo in ('notas_estudiante', 'resumen_general'):
+            reporte = ReporteAcademico.objects.create(
+                nombre=f'Vacío {tipo}', tipo_reporte=tipo, semestre='2020-1', usuario_creador=self.admin,
+            )
+            reportes.precalcular(reporte)
+            resultado = ResultadoReporte.objects.get(reporte=reporte)
+            self.assertTrue(bytes(resultado.archivo_pdf).startswith(b'%PDF'))
+            self.assertTrue(resultado.archivo_csv)
+
+        # Un resultado guardado sin PDF se regenera al descargarlo
+        ResultadoReporte.objects.filter(reporte=reporte).update(archivo_pdf=b'')
+        self.client.force_login(self.admin)
+        response = self.client.get(f'/admin-panel/descargar-reporte/{reporte.id}/pdf/')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+
+class ComprobantesLoteTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        calificar(self.inscripciones[0], '4.0')
+        calificar(self.inscripciones[1], '3.5')
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.lote = LoteComprobantes.objects.create(periodo=Periodo.actual())
+
+    def test_genera_zip_y_reanuda(self):
+        with override_settings(MEDIA_ROOT=self.media.name):
+            lote = comprobantes_lote.generar(self.lote, procesos=1)
+            self.assertEqual((lote.estado, lote.procesados, lote.total_estudiantes), ('completado', 2, 2))
+            with zipfile.ZipFile(lote.archivo) as archivo_zip:
+                self.assertEqual(
+                    sorted(archivo_zip.namelist()), ['comprobante_est0.pdf', 'comprobante_est1.pdf']
+                )
+                self.assertTrue(archivo_zip.read('comprobante_est0.pdf').startswith(b'%PDF'))
+
+            # Un lote en proceso con latido reciente es de otra ejecución viva: no se toca
+            LoteComprobantes.objects.filter(id=lote.id).update(estado='en_proceso', latido=timezone.now())
+            self.assertEqual(comprobantes_lote.procesar_pendientes(procesos=1), [])
+            with self.assertRaises(comprobantes_lote.LoteEnProceso):
+                comprobantes_lote.generar(lote, procesos=1)
+
+            # Reanudar un lote interrumpido (latido vencido) no vuelve a escribir los comprobantes existentes
+            vencido = timezone.now() - comprobantes_lote.LATIDO_VENCIDO - timedelta(seconds=1)
+            LoteComprobantes.objects.filter(id=lote.id).update(latido=vencido)
+            procesados = comprobantes_lote.procesar_pendientes(procesos=1)
+            self.assertEqual(len(procesados), 1)
+            with zipfile.ZipFile(lote.archivo) as archivo_zip:
+                self.assertEqual(len(archivo_zip.namelist()), 2)
+
+    def test_solo_una_ejecucion_reclama_el_lote(self):
+        ejecucion = comprobantes_lote.reclamar(self.lote)
+        with self.assertRaises(comprobantes_lote.LoteEnProceso):
+            comprobantes_lote.reclamar(self.lote)
+        # Si el lote se da por abandonado y otra ejecución lo toma, la primera deja de escribir
+        LoteComprobantes.objects.filter(id=self.lote.id).update(latido=None)
+        comprobantes_lote.reclamar(self.lote)
+        with self.assertRaises(comprobantes_lote.LoteEnProceso):
+            comprobantes_lote._latido(self.lote, ejecucion, procesados=1)
+        self.assertEqual(LoteComprobantes.objects.get(id=self.lote.id).procesados, 0)
+
+    def test_panel_crea_lote_y_descarga(self):
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        self.client.post('/admin-panel/comprobantes/', {
+            'semestre': Periodo.actual().codigo, 'asignatura': self.curso.id, 'grupo': '',
+        })
+        nuevo = LoteComprobantes.objects.exclude(id=self.lote.id).get()
+        self.assertEqual((nuevo.estado, nuevo.curso, nuevo.creado_por), ('pendiente', self.curso, admin))
+
+        with override_settings(MEDIA_ROOT=self.media.name):
+            comprobantes_lote.generar(nuevo, procesos=1)
+        progreso = self.client.get(f'/admin-panel/comprobantes/{nuevo.id}/progreso/').json()
+        self.assertEqual(progreso['porcentaje'], 100)
+        response = self.client.get(f'/admin-panel/comprobantes/{nuevo.id}/descargar/')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        response.close()
+        self.assertTrue(os.path.exists(nuevo.archivo))
+
+    def test_comprobante_individual(self):
+        self.client.force_login(self.inscripciones[0].estudiante)
+        response = self.client.get('/estudiante/descargar-comprobante/')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+
+class ImportacionCSVTests(TestCase):
+    def setUp(self):
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+
+    def test_importar_usuarios_con_reporte_de_errores(self):
+        archivo = io.StringIO(
+            'username,email,first_name,last_name,rol,telefono,password\n'
+            'nuevo1,nuevo1@troli.edu.co,Ana,Ruiz,estudiante,3001234567,Clave123@\n'
+            'NUEVO1,otro@troli.edu.co,Ana,Ruiz,estudiante,3001234567,Clave123@\n'
+            'est0,est0b@troli.edu.co,Luis,Mora,estudiante,3001234567,Clave123@\n'
+            'nuevo2,nuevo2@troli.edu.co,Luis,Mora,estudiante,123,Clave123@\n'
+            'nuevo3,nuevo3@troli.edu.co,Eva,Paz,profesor,3001234567,Clave123@\n'
+        )
+        resultado = importacion.importar(archivo, 'usuarios', procesos=1)
+        self.assertEqual(resultado['creados'], 2)
+        self.assertEqual([fila for fila, _ in resultado['errores']], [3, 4, 5])
+        self.assertTrue(Usuario.objects.get(username='nuevo3').check_password('Clave123@'))
+
+    def test_importar_cursos_e_inscripciones(self):
+        cursos = io.StringIO(
+            'codigo,nombre,profesor,creditos\n'
+            'FIS101,Física,profe,4\n'
+            'MAT101,Repetido,profe,3\n'
+            'QUI101,Química,noexiste,3\n'
+        )
+        resultado = importacion.importar(cursos, 'cursos')
+        self.assertEqual((resultado['creados'], len(resultado['errores'])), (1, 2))
+        self.assertTrue(RankingCurso.objects.filter(curso__codigo='FIS101').exists())
+
+        inscripciones = io.StringIO(
+            'estudiante,curso,periodo,grupo\n'
+            'est0,FIS101,2025-2,A\n'
+            'est0,MAT101,,\n'
+            'est1,FIS101,2025-3,\n'
+        )
+        resultado = importacion.importar(inscripciones, 'inscripciones')
+        self.assertEqual(resultado['creados'], 1)
+        self.assertEqual([fila for fila, _ in resultado['errores']], [3, 4])
+        inscripcion = Inscripcion.objects.get(curso__codigo='FIS101')
+        self.assertEqual((inscripcion.periodo.codigo, inscripcion.grupo), ('2025-2', 'A'))
+        self.assertEqual(RankingCurso.objects.get(curso__codigo='FIS101').num_estudiantes, 1)
+
+    def test_carga_desde_el_panel(self):
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        archivo = io.BytesIO('codigo,nombre,profesor\nFIS101,Física,profe\nFIS102,Física II,nadie\n'.encode('utf-8'))
+        archivo.name = 'cursos.csv'
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            response = self.client.post('/admin-panel/importar/', {'tipo': 'cursos', 'archivo': archivo})
+            self.assertEqual(response.context['resultado']['creados'], 1)
+            nombre = response.context['resultado']['archivo_errores']
+            response = self.client.get(f'/admin-panel/importar/errores/{nombre}/')
+            self.assertIn(b'nadie', b''.join(response.streaming_content))
+
+
+class CredencialesTests(TestCase):
+    def test_actualizar_contrasenas_por_lotes(self):
+        usuarios = [Usuario.objects.create_user(username=f'user{i}', password='Vieja123@') for i in range(3)]
+        actualizados = credenciales.actualizar_contrasenas({u.id: f'Nueva{u.id}@x' for u in usuarios}, procesos=1)
+        self.assertEqual(actualizados, 3)
+        for usuario in usuarios:
+            usuario.refresh_from_db()
+            self.assertTrue(usuario.check_password(f'Nueva{usuario.id}@x'))
+
+    def test_hashes_de_otro_perfil_siguen_siendo_validos(self):
+        # Las pruebas usan MD5; un hash PBKDF2 existente se verifica igual
+        hash_pbkdf2 = credenciales.hashear_contrasenas(['Clave123@'], algoritmo='pbkdf2_sha256')[0]
+        usuario = Usuario.objects.create(username='antiguo', password=hash_pbkdf2)
+        self.assertTrue(usuario.check_password('Clave123@'))
+
+    def test_md5_solo_en_las_pruebas(self):
+        self.assertEqual(HASHERS_CONFIGURADOS[0], 'estudiantes.hashers.PBKDF2Configurable')
+        self.assertNotIn('django.contrib.auth.hashers.MD5PasswordHasher', HASHERS_CONFIGURADOS)
+        usuario = Usuario.objects.create_user(username='md5', password='Clave123@')
+        self.assertTrue(usuario.password.startswith('md5$'))
+        # Con la configuración del proyecto un hash MD5 no se acepta
+        with override_settings(PASSWORD_HASHERS=HASHERS_CONFIGURADOS):
+            self.assertFalse(usuario.check_password('Clave123@'))
+
+    def test_iteraciones_pbkdf2_no_bajan_del_valor_de_django(self):
+        self.assertGreaterEqual(hashers.PBKDF2Configurable.iterations, PBKDF2PasswordHasher.iterations)
+        entorno = {**os.environ, 'PERFIL_HASH': 'rapido'}
+        resultado = subprocess.run([sys.executable, 'manage.py', 'check'], env=entorno, capture_output=True,
+                                   text=True, cwd=settings.BASE_DIR)
+        self.assertNotEqual(resultado.returncode, 0)
+        self.assertIn('PERFIL_HASH', resultado.stderr)
+
+
+class LimitesFrecuenciaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='est0', password='Clave123@', rol='estudiante')
+
+    def intentar(self, password):
+        return self.client.post('/login/', {'username': 'est0', 'password': password})
+
+    def test_login_rechaza_rafaga_antes_de_autenticar(self):
+        capacidad = limites.LIMITES['login_usuario'][0]
+        for _ in range(capacidad):
+            self.assertEqual(self.intentar('mala').status_code, 200)
+        response = self.intentar('Clave123@')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertNotIn('_auth_user_id', self.client.session)
+        self.assertEqual(limites.contadores()['login_usuario']['rechazados'], 1)
+
+    def test_consumir_desde_hilos_concurrentes(self):
+        # Cada intento permitido sale de un incr atómico: ninguna ráfaga concurrente pasa de la capacidad
+        capacidad, hilos, por_hilo = 1000, 8, 250
+        limites.LIMITES['prueba_hilos'] = (capacidad, 1)
+        self.addCleanup(limites.LIMITES.pop, 'prueba_hilos')
+        barrera = threading.Barrier(hilos)
+        resultados = []
+
+        def pedir():
+            barrera.wait()
+            resultados.extend(limites.consumir('prueba_hilos', 'ip-compartida')[0] for _ in range(por_hilo))
+
+        trabajadores = [threading.Thread(target=pedir) for _ in range(hilos)]
+        # Cambiar de hilo muy seguido hace visible cualquier lectura seguida de escritura
+        intervalo = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for hilo in trabajadores:
+                hilo.start()
+            for hilo in trabajadores:
+                hilo.join()
+        finally:
+            sys.setswitchinterval(intervalo)
+        self.assertEqual(resultados.count(True), capacidad)
+        self.assertEqual(limites.contadores()['prueba_hilos'], {
+            'permitidos': capacidad, 'rechazados': hilos * por_hilo - capacidad,
+        })
+
+    def test_cambio_de_ventana_no_duplica_la_capacidad(self):
+        # Ventanas de 10 s: una ráfaga al final de una no deja pasar otra completa al empezar la siguiente
+        limites.LIMITES['prueba_borde'] = (10, 1)
+        self.addCleanup(limites.LIMITES.pop, 'prueba_borde')
+        inicio = 1000 * 10
+
+        def permitidos(ahora, intentos):
+            return [limites.consumir('prueba_borde', 'ip', ahora)[0] for _ in range(intentos)].count(True)
+
+        self.assertEqual(permitidos(inicio + 9.9, 15), 10)
+        self.assertEqual(permitidos(inicio + 10.1, 10), 0)
+        # El primer intento cabe cuando el peso de la ráfaga baja de 9, en menos de un segundo
+        self.assertEqual(limites.consumir('prueba_borde', 'ip', inicio + 10.1), (False, 1))
+        # A mitad de la ventana siguiente la anterior pesa la mitad; los rechazos no cuentan
+        self.assertEqual(permitidos(inicio + 15, 10), 5)
+        self.assertEqual(permitidos(inicio + 25, 10), 7)
+
+    def test_login_correcto_reinicia_el_limite(self):
+        capacidad = limites.LIMITES['login_usuario'][0]
+        for _ in range(capacidad - 1):
+            self.intentar('mala')
+        self.assertEqual(self.intentar('Clave123@').status_code, 302)
+        self.client.logout()
+        for _ in range(capacidad):
+            self.assertNotEqual(self.intentar('mala').status_code, 429)
+
+    def test_decorador_en_vistas_costosas(self):
+        self.client.force_login(self.usuario)
+        capacidad = limites.LIMITES['cambiar_contrasena'][0]
+        for _ in range(capacidad):
+            self.client.post('/perfil/cambiar-contrasena/', {'current_password': 'mala'})
+        self.assertEqual(self.client.post('/perfil/cambiar-contrasena/', {'current_password': 'mala'}).status_code, 429)
+        self.assertNotEqual(self.client.get('/perfil/cambiar-contrasena/').status_code, 429)
+
+
+class AutorizacionTests(TestCase):
+    """Con la caché en memoria de cada proceso (la de los tests) la autorización se lee de la base de datos"""
+    def setUp(self):
+        cache.clear()
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        self.admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+
+    def test_sin_cache_compartida_se_lee_de_la_base_de_datos(self):
+        self.assertFalse(autorizacion.cache_compartida())
+        backend = autorizacion.BackendUsuarioEnCache()
+        backend.get_user(self.admin.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_user(self.admin.id), self.admin)
+
+        # Un cambio que otro worker no pudo avisar (sin señal) se ve en el siguiente request
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/admin-panel/usuarios/').status_code, 200)
+        self.assertNotIn(autorizacion.CLAVE_SESION, self.client.session)
+        Usuario.objects.filter(id=self.admin.id).update(rol='profesor')
+        self.assertEqual(self.client.get('/admin-panel/usuarios/').status_code, 302)
+
+    def test_cambio_de_rol_se_refleja_en_el_siguiente_request(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/admin-panel/usuarios/').status_code, 200)
+        self.admin.rol = 'profesor'
+        self.admin.save()
+        self.assertEqual(self.client.get('/admin-panel/usuarios/').status_code, 302)
+
+    def test_cursos_del_profesor_en_el_contexto(self):
+        self.client.force_login(self.profesor)
+        otro = Curso.objects.create(nombre='Física', codigo='FIS101', profesor=self.admin)
+        self.assertEqual(self.client.get(f'/profesor/calificar/{otro.id}/').status_code, 404)
+        otro.profesor = self.profesor
+        otro.save()
+        self.assertEqual(self.client.get(f'/profesor/calificar/{otro.id}/').status_code, 200)
+
+    def test_contrasenas_masivas_cierran_sesiones(self):
+        self.client.force_login(self.admin)
+        credenciales.actualizar_contrasenas({self.admin.id: 'Otra123@x'}, procesos=1)
+        self.assertEqual(self.client.get('/admin-panel/usuarios/').status_code, 302)
+
+
+class AutorizacionCacheCompartidaTests(AutorizacionTests):
+    """Las mismas pruebas con una caché compartida entre procesos (en archivos)"""
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.enterContext(override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': carpeta.name},
+        }))
+        super().setUp()
+
+    def test_sin_cache_compartida_se_lee_de_la_base_de_datos(self):
+        self.assertTrue(autorizacion.cache_compartida())
+
+    def test_usuario_de_la_sesion_se_lee_de_cache(self):
+        backend = autorizacion.BackendUsuarioEnCache()
+        backend.get_user(self.admin.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(self.admin.id), self.admin)
+        self.admin.first_name = 'Nuevo'
+        self.admin.save()
+        self.assertEqual(backend.get_user(self.admin.id).first_name, 'Nuevo')
+
+    def test_contexto_en_la_sesion(self):
+        self.client.force_login(self.profesor)
+        otro = Curso.objects.create(nombre='Física', codigo='FIS101', profesor=self.profesor)
+        self.assertEqual(self.client.get(f'/profesor/calificar/{otro.id}/').status_code, 200)
+        self.assertEqual(self.client.session[autorizacion.CLAVE_SESION]['cursos_dictados'], [self.curso.id, otro.id])
+
+
+class SesionesTests(TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        # La escritura diferida solo se usa con una caché compartida entre procesos
+        self.enterContext(override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': carpeta.name}},
+            SESSION_ENGINE='estudiantes.sesiones',
+        ))
+        cache.clear()
+
+    def guardada(self, store):
+        return Session.objects.get(pk=store.session_key).get_decoded()
+
+    def test_cambios_en_cache_se_vuelcan_despues(self):
+        store = sesiones.SessionStore()
+        store['paso'] = 1
+        store.create()
+        # Dentro del intervalo de la escritura al crearla, los cambios quedan solo en caché
+        store['paso'] = 2
+        store.save()
+        store['paso'] = 3
+        store.save()
+        self.assertEqual(sesiones.SessionStore(store.session_key).load()['paso'], 3)
+        self.assertEqual(self.guardada(store)['paso'], 1)
+        self.assertEqual(sesiones.volcar_pendientes(), 1)
+        self.assertEqual(self.guardada(store)['paso'], 3)
+        self.assertEqual(sesiones.volcar_pendientes(), 0)
+
+        # Pasado el intervalo, el siguiente guardado escribe directo
+        cache.delete(sesiones._clave_escrita(store.session_key))
+        store['paso'] = 4
+        store.save()
+        self.assertEqual(self.guardada(store)['paso'], 4)
+        self.assertEqual(sesiones.volcar_pendientes(), 0)
+
+    def test_cambios_de_autenticacion_van_directo_a_la_base_de_datos(self):
+        usuario = Usuario.objects.create_user(username='est0', password='Clave123@', rol='estudiante')
+        self.client.post('/login/', {'username': 'est0', 'password': 'Clave123@'})
+        sesion = Session.objects.get(pk=self.client.session.session_key)
+        self.assertEqual(sesion.get_decoded()[SESSION_KEY], str(usuario.pk))
+
+        # Aunque la caché se pierda, la sesión sigue iniciada
+        cache.clear()
+        self.assertEqual(self.client.get('/dashboard/estudiante/').status_code, 200)
+
+        store = sesiones.SessionStore(sesion.session_key)
+        store.load()
+        store.pop(SESSION_KEY)
+        store.save()
+        self.assertNotIn(SESSION_KEY, self.guardada(store))
+
+    def test_sin_cache_compartida_escribe_directo(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            store = sesiones.SessionStore()
+            store['paso'] = 1
+            store.create()
+            store['paso'] = 2
+            store.save()
+            self.assertEqual(self.guardada(store)['paso'], 2)
+            self.assertEqual(sesiones.volcar_pendientes(), 0)
+
+    def test_purgar_sesiones_vencidas_por_lotes(self):
+        for i in range(5):
+            store = sesiones.SessionStore()
+            store.set_expiry(-60 if i < 3 else 600)
+            store.create()
+        salida = io.StringIO()
+        call_command('purgar_sesiones', lote=2, stdout=salida)
+        self.assertEqual(Session.objects.count(), 2)
+        self.assertIn('eliminadas:  3', salida.getvalue())
+
+
+class GetCondicionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        self.estudiante = self.inscripciones[0].estudiante
+        calificar(self.inscripciones[0], '4.0')
+        self.client.force_login(self.estudiante)
+
+    def test_304_mientras_no_cambien_los_datos(self):
+        response = self.client.get('/estudiante/mis-calificaciones/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/estudiante/mis-calificaciones/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/estudiante/estado-academico/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Una nota nueva o un cambio de ponderación del curso cambian la versión
+        calificar(self.inscripciones[0], '2.0', tipo='final')
+        response = self.client.get('/estudiante/mis-calificaciones/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        PonderacionEvaluacion.objects.create(curso=self.curso, tipo_evaluacion='final', porcentaje=Decimal('100'))
+        self.assertEqual(self.client.get('/estudiante/mis-calificaciones/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_sin_respuesta_condicional_para_otros_roles(self):
+        self.client.force_login(self.profesor)
+        response = self.client.get('/estudiante/mis-calificaciones/')
+        self.assertFalse(response.has_header('ETag'))
+
+
+class VersionCalificacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profesor, self.curso, self.inscripciones = crear_datos_basicos()
+        self.admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.calificacion = calificar(self.inscripciones[0], '3.0')
+        self.client.force_login(self.profesor)
+
+    def editar(self, nota, version):
+        return self.client.post(f'/profesor/calificar/{self.curso.id}/', {
+            'curso': self.curso.id,
+            'estudiante': self.inscripciones[0].estudiante_id,
+            'tipo_evaluacion': 'parcial',
+            'nota': nota,
+            'calificacion_id': self.calificacion.id,
+            'version': version,
+        }, follow=True)  # la vista revisa los mensajes pendientes: hay que mostrar el de éxito
+
+    def test_edicion_con_version_vieja_no_pisa_el_cambio(self):
+        # Dos formularios abiertos con la versión 1: el segundo en guardar recibe un conflicto
+        self.assertEqual(self.editar('4.0', 1).redirect_chain[-1][1], 302)
+        response = self.editar('2.0', 1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.context['editar_obj'].version, 2)
+        self.calificacion.refresh_from_db()
+        self.assertEqual((self.calificacion.nota, self.calificacion.version), (Decimal('4.0'), 2))
+
+        self.assertEqual(self.editar('2.0', 2).redirect_chain[-1][1], 302)
+        historial = HistorialCalificacion.objects.filter(calificacion=self.calificacion).order_by('id')
+        self.assertEqual(
+            [(h.nota_anterior, h.nota_nueva) for h in historial],
+            [(Decimal('3.0'), Decimal('4.0')), (Decimal('4.0'), Decimal('2.0'))],
+        )
+
+    def test_edicion_actualiza_definitivas_y_rankings(self):
+        definitivas.definitivas_de(self.inscripciones)
+        self.editar('5.0', 1)
+        self.assertFalse(NotaDefinitiva.objects.filter(curso=self.curso).exists())
+        self.assertEqual(RankingCurso.objects.get(curso=self.curso).promedio, Decimal('5.000'))
+
+    def test_conflicto_no_deja_historial(self):
+        Calificacion.objects.filter(id=self.calificacion.id).update(version=2)
+        with self.assertRaises(calificaciones.ConflictoVersion):
+            calificaciones.actualizar(self.calificacion, 1, self.profesor, 'parcial', Decimal('1.0'), '')
+        self.assertFalse(HistorialCalificacion.objects.exists())
+
+    def test_eliminar_con_version_vieja(self):
+        self.editar('4.0', 1)
+        self.client.force_login(self.admin)
+        url = f'/profesor/eliminar-calificacion/{self.calificacion.id}/'
+        response = self.client.post(url, {'motivo': 'Error de digitación', 'version': 1})
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(Calificacion.objects.filter(id=self.calificacion.id).exists())
+
+        response = self.client.post(url, {'motivo': 'Error de digitación', 'version': 2})
+        self.assertRedirects(response, '/admin-panel/calificaciones/', fetch_redirect_response=False)
+        self.assertFalse(Calificacion.objects.filter(id=self.calificacion.id).exists())
+        # El registro de la eliminación queda aunque la calificación ya no exista
+        eliminacion = HistorialCalificacion.objects.get(nota_nueva__isnull=True)
+        self.assertIsNone(eliminacion.calificacion)
+        self.assertEqual(eliminacion.nota_anterior, Decimal('4.0'))
+
+
+class CuposTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profesor = Usuario.objects.create_user(username='profe', password='Profe123@', rol='profesor')
+        self.curso = Curso.objects.create(nombre='Química', codigo='QUI101', profesor=self.profesor, cupo=1)
+        self.estudiantes = [
+            Usuario.objects.create_user(username=f'est{i}', password='Est123@', rol='estudiante') for i in range(3)
+        ]
+
+    def test_cupo_lista_de_espera_y_peticiones_repetidas(self):
+        est0, est1, est2 = self.estudiantes
+        self.assertEqual(cupos.inscribir(est0, self.curso)[0], cupos.INSCRITO)
+        self.assertEqual(cupos.inscribir(est1, self.curso)[0], cupos.EN_ESPERA)
+        self.assertEqual(cupos.inscribir(est2, self.curso)[0], cupos.EN_ESPERA)
+        # Repetir la petición no consume otro cupo ni otro lugar en la lista
+        self.assertEqual(cupos.inscribir(est0, self.curso)[0], cupos.YA_INSCRITO)
+        resultado, espera = cupos.inscribir(est2, self.curso)
+        self.assertEqual((resultado, cupos.posicion_en_espera(espera)), (cupos.YA_EN_ESPERA, 2))
+        self.curso.refresh_from_db()
+        self.assertEqual(self.curso.inscritos, 1)
+
+    def test_conflicto_persistente_no_reintenta_sin_fin(self):
+        # Un IntegrityError que no corresponde a una petición repetida se propaga tras INTENTOS
+        with mock.patch.object(cupos, '_activar', side_effect=IntegrityError) as activar:
+            with self.assertRaises(IntegrityError):
+                cupos.inscribir(self.estudiantes[0], self.curso)
+        self.assertEqual(activar.call_count, cupos.INTENTOS)
+        self.curso.refresh_from_db()
+        self.assertEqual(self.curso.inscritos, 0)
+
+    def test_retiro_promueve_al_primero_de_la_lista(self):
+        est0, est1, est2 = self.estudiantes
+        inscripcion = cupos.inscribir(est0, self.curso)[1]
+        cupos.inscribir(est1, self.curso)
+        cupos.inscribir(est2, self.curso)
+        promovidas = cupos.desactivar(inscripcion)
+        self.assertEqual([p.estudiante for p in promovidas], [est1])
+        self.assertEqual(list(ListaEspera.objects.values_list('estudiante', flat=True)), [est2.id])
+        self.assertTrue(Notificacion.objects.filter(usuario=est1, titulo='Cupo asignado').exists())
+        self.assertEqual(RankingCurso.objects.get(curso=self.curso).num_estudiantes, 1)
+        # Retirar de nuevo la misma inscripción no libera otro cupo
+        self.assertEqual(cupos.desactivar(inscripcion), [])
+        self.curso.refresh_from_db()
+        self.assertEqual(self.curso.inscritos, 1)
+        # Al volver, el estudiante retirado reactiva su inscripción si hay cupo
+        self.assertEqual(cupos.inscribir(est0, self.curso)[0], cupos.EN_ESPERA)
+
+    def test_volver_en_otro_periodo_crea_una_inscripcion_nueva(self):
+        est0 = self.estudiantes[0]
+        anterior = Periodo.objects.create(codigo='2020-1', fecha_inicio='2020-01-01', fecha_fin='2020-06-30')
+        antigua = Inscripcion.objects.create(estudiante=est0, curso=self.curso, periodo=anterior, grupo='Grupo B', activo=False)
+        resultado, inscripcion = cupos.inscribir(est0, self.curso)
+        self.assertEqual(resultado, cupos.INSCRITO)
+        self.assertNotEqual(inscripcion.id, antigua.id)
+        self.assertEqual((inscripcion.periodo, inscripcion.grupo), (Periodo.actual(), ''))
+        antigua.refresh_from_db()
+        self.assertEqual((antigua.periodo, antigua.grupo, antigua.activo), (anterior, 'Grupo B', False))
+
+        # Dentro del mismo periodo, retirarse y volver reactiva la misma fila
+        cupos.desactivar(inscripcion)
+        self.assertEqual(cupos.inscribir(est0, self.curso), (cupos.INSCRITO, inscripcion))
+        self.assertEqual(Inscripcion.objects.filter(estudiante=est0, curso=self.curso).count(), 2)
+
+    def test_vista_de_inscripcion(self):
+        self.client.force_login(self.estudiantes[0])
+        for _ in range(2):
+            self.client.post('/estudiante/inscribirse/', {'curso_id': self.curso.id})
+        self.assertEqual(Inscripcion.objects.filter(curso=self.curso).count(), 1)
+        self.client.force_login(self.estudiantes[1])
+        self.assertRedirects(
+            self.client.post('/estudiante/inscribirse/', {'curso_id': self.curso.id}),
+            '/estudiante/inscribirse/', fetch_redirect_response=False,
+        )
+        self.assertEqual(list(self.client.get('/estudiante/inscribirse/').context['en_espera']),
+                         list(ListaEspera.objects.all()))
+
+    def test_administrador_sube_el_cupo(self):
+        cupos.inscribir(self.estudiantes[0], self.curso)
+        cupos.inscribir(self.estudiantes[1], self.curso)
+        admin = Usuario.objects.create_user(username='admin1', password='Admin123@', rol='administrador')
+        self.client.force_login(admin)
+        response = self.client.post('/admin-panel/inscripciones/crear/', {
+            'estudiante': self.estudiantes[2].id, 'curso': self.curso.id, 'activo': 'on',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('curso', response.context['form'].errors)
+
+        self.client.post(f'/admin-panel/cursos/{self.curso.id}/editar/', {
+            'codigo': 'QUI101', 'nombre': 'Química', 'creditos': 3, 'cupo': 2,
+            'profesor': self.profesor.id, 'activo': 'on',
+        })
+        self.curso.refresh_from_db()
+        self.assertEqual((self.curso.cupo, self.curso.inscritos), (2, 2))
+        self.assertFalse(ListaEspera.objects.exists())
+
+    def test_recontar(self):
+        Inscripcion.objects.create(estudiante=self.estudiantes[0], curso=self.curso)
+        self.assertEqual(cupos.recontar(), 1)
+        self.curso.refresh_from_db()
+        self.assertEqual(self.curso.inscritos, 1)
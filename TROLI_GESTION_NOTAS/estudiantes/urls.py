@@ -27,6 +27,7 @@ urlpatterns = [
     path('profesor/calificar/<int:inscripcion_id>/', views.calificar_estudiante, name='calificar_estudiante'),
     path('profesor/editar-calificacion/<int:calificacion_id>/', views.editar_calificacion, name='editar_calificacion'),
     path('profesor/eliminar-calificacion/<int:calificacion_id>/', views.eliminar_calificacion, name='eliminar_calificacion'),
+    path('rankings/curso/<int:curso_id>/', views.ranking_curso, name='ranking_curso'),
     
     # Notificaciones y perfil
     path('notificaciones/', views.notificaciones, name='notificaciones'),
@@ -69,12 +70,28 @@ urlpatterns = [
     
     # Reportes
     path('admin-panel/reportes/', admin_views.admin_reportes, name='admin_reportes'),
+    path('admin-panel/rankings/estudiantes/', admin_views.admin_ranking_estudiantes, name='admin_ranking_estudiantes'),
+    path('admin-panel/rankings/cursos/', admin_views.admin_ranking_cursos, name='admin_ranking_cursos'),
     
     # Generación de Reportes Académicos
     path('admin-panel/generar-reporte/', admin_views.admin_generar_reporte, name='admin_generar_reporte'),
     path('admin-panel/exportar-reporte-pdf/', admin_views.admin_exportar_reporte_pdf, name='admin_exportar_reporte_pdf'),
     path('admin-panel/guardar-reporte/', admin_views.admin_guardar_reporte, name='admin_guardar_reporte'),
     path('admin-panel/cargar-reporte/<int:reporte_id>/', admin_views.admin_cargar_reporte_guardado, name='admin_cargar_reporte_guardado'),
+    path('admin-panel/actualizar-reporte/<int:reporte_id>/', admin_views.admin_actualizar_reporte_guardado, name='admin_actualizar_reporte_guardado'),
+    path('admin-panel/descargar-reporte/<int:reporte_id>/<str:formato>/', admin_views.admin_descargar_reporte_guardado, name='admin_descargar_reporte_guardado'),
     path('admin-panel/editar-reporte/<int:reporte_id>/', admin_views.admin_editar_reporte, name='admin_editar_reporte'),
     path('admin-panel/eliminar-reporte/<int:reporte_id>/', admin_views.admin_eliminar_reporte, name='admin_eliminar_reporte'),
+    
+    # Comprobantes masivos
+    path('admin-panel/comprobantes/', admin_views.admin_comprobantes, name='admin_comprobantes'),
+    path('admin-panel/comprobantes/<int:lote_id>/progreso/', admin_views.admin_comprobantes_progreso, name='admin_comprobantes_progreso'),
+    path('admin-panel/comprobantes/<int:lote_id>/descargar/', admin_views.admin_comprobantes_descargar, name='admin_comprobantes_descargar'),
+    
+    # Importación masiva CSV
+    path('admin-panel/importar/', admin_views.admin_importar, name='admin_importar'),
+    path('admin-panel/importar/errores/<str:nombre>/', admin_views.admin_importar_errores, name='admin_importar_errores'),
+    
+    # Límites de frecuencia
+    path('admin-panel/limites/', admin_views.admin_limites, name='admin_limites'),
 ]
\ No newline at end of file
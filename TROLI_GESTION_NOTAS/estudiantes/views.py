@@ -2,10 +2,12 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Q, OuterRef, Subquery
 from django.core.paginator import Paginator
-from django.http import JsonResponse, HttpResponse
-from .models import Usuario, Curso, Inscripcion, Calificacion, Notificacion, HistorialCalificacion
+from django.http import Http404, JsonResponse, HttpResponse
+from .models import Usuario, Curso, Inscripcion, Calificacion, ListaEspera, Notificacion, RiesgoAcademico
+from . import analitica, autorizacion, calificaciones, cupos, definitivas, limites, rankings
+from .condicional import condicional_estudiante
 from django.utils import timezone
 from decimal import Decimal, InvalidOperation
 from types import SimpleNamespace
@@ -124,30 +126,39 @@ def inscribirse_curso(request):
         curso_id = request.POST.get('curso_id')
         curso = get_object_or_404(Curso, id=curso_id, activo=True)
         
-        # Verificar si ya está inscrito
-        if Inscripcion.objects.filter(estudiante=request.user, curso=curso).exists():
+        # Toma un cupo con un UPDATE condicionado o deja al estudiante en la lista de espera;
+        # repetir la petición (doble clic, reintento) solo informa el estado actual
+        resultado, registro = cupos.inscribir(request.user, curso)
+        if resultado == cupos.INSCRITO:
+            messages.success(request, f'Te has inscrito exitosamente en {curso.nombre}')
+        elif resultado == cupos.YA_INSCRITO:
             messages.warning(request, 'Ya estás inscrito en este curso')
         else:
-            Inscripcion.objects.create(
-                estudiante=request.user,
-                curso=curso,
-                activo=True
-            )
-            messages.success(request, f'Te has inscrito exitosamente en {curso.nombre}')
+            posicion = cupos.posicion_en_espera(registro)
+            if resultado == cupos.EN_ESPERA:
+                messages.info(request, f'{curso.nombre} no tiene cupos. Quedaste en la lista de espera (posición {posicion}).')
+            else:
+                messages.warning(request, f'Ya estás en la lista de espera de {curso.nombre} (posición {posicion}).')
+            return redirect('inscribirse_curso')
         
         return redirect('mis_cursos')
     
-    # Cursos disponibles (no inscritos)
+    # Cursos disponibles (sin inscripción activa ni lugar en la lista de espera)
     cursos_inscritos = Inscripcion.objects.filter(
-        estudiante=request.user
+        estudiante=request.user, activo=True
     ).values_list('curso_id', flat=True)
+    en_espera = ListaEspera.objects.filter(estudiante=request.user).select_related('curso')
     
     cursos_disponibles = Curso.objects.filter(
         activo=True
-    ).exclude(id__in=cursos_inscritos)
+    ).exclude(id__in=cursos_inscritos).exclude(id__in=[e.curso_id for e in en_espera])
+    
+    for espera in en_espera:
+        espera.posicion = cupos.posicion_en_espera(espera)
     
     context = {
         'cursos_disponibles': cursos_disponibles,
+        'en_espera': en_espera,
     }
     return render(request, 'estudiantes/inscribirse_curso.html', context)
 
@@ -181,10 +192,20 @@ def login_view(request):
         username = request.POST['username']
         password = request.POST['password']
         
+        # Limitar intentos por usuario y por IP antes de calcular el hash de la contraseña
+        for nombre, identificador in (('login_usuario', username), ('login_ip', limites.ip_cliente(request))):
+            permitido, espera = limites.consumir(nombre, identificador)
+            if not permitido:
+                messages.error(request, f'Demasiados intentos de inicio de sesión. Intenta de nuevo en {espera} segundos.')
+                response = render(request, 'estudiantes/login.html', status=429)
+                response['Retry-After'] = str(espera)
+                return response
+        
         # Intentar autenticar al usuario
         user = authenticate(request, username=username, password=password)
         
         if user is not None and user.activo:
+            limites.reiniciar('login_usuario', username)
             login(request, user)
             messages.success(request, f'Bienvenido {user.first_name or user.username}')
             
@@ -211,6 +232,7 @@ def logout_view(request):
 
 # Dashboard para estudiantes
 @login_required
+@condicional_estudiante
 def dashboard_estudiante(request):
     """
     Panel principal para estudiantes
@@ -262,17 +284,10 @@ def dashboard_profesor(request):
         messages.error(request, 'No tienes permisos para acceder a esta página')
         return redirect('login')
     
-    # Obtener cursos asignados al profesor con conteos
-    cursos = Curso.objects.filter(profesor=request.user, activo=True)
-    
-    # Añadir conteos a cada curso
-    for curso in cursos:
-        curso.estudiantes_count = Inscripcion.objects.filter(
-            curso=curso, activo=True
-        ).count()
-        curso.calificaciones_count = Calificacion.objects.filter(
-            inscripcion__curso=curso
-        ).count()
+    # Obtener cursos asignados al profesor con conteos (una sola consulta)
+    cursos = list(
+        Curso.objects.filter(profesor=request.user, activo=True).con_estadisticas()
+    )
     
     # Estadísticas básicas
     total_estudiantes = Inscripcion.objects.filter(
@@ -300,7 +315,7 @@ def dashboard_profesor(request):
     context = {
         'cursos': cursos,
         'total_estudiantes': total_estudiantes,
-        'total_cursos': cursos.count(),
+        'total_cursos': len(cursos),
         'calificaciones_registradas': total_calificaciones,
         'notificaciones_no_leidas': notificaciones_recientes.count(),
         'ultimas_calificaciones': ultimas_calificaciones,
@@ -346,9 +361,12 @@ def dashboard_admin(request):
 # Vista para registrar calificaciones (profesores)
 @login_required
 def registrar_calificacion(request, curso_id):
-    if request.user.rol != 'profesor':
+    if not autorizacion.tiene_rol(request, 'profesor'):
         messages.error(request, 'No tienes permisos para realizar esta acción')
         return redirect('login')
+    # Propiedad del curso desde el contexto en sesión, antes de cualquier consulta
+    if not autorizacion.dicta_curso(request, curso_id):
+        raise Http404('Curso no encontrado')
 
     cursos = Curso.objects.filter(profesor=request.user, activo=True)
     curso_actual = get_object_or_404(Curso, id=curso_id, profesor=request.user)
@@ -376,6 +394,7 @@ def registrar_calificacion(request, curso_id):
             observaciones=editar_obj.observaciones or ''
         )
 
+    status = 200
     if request.method == 'POST':
         # Leer datos del formulario
         curso_post = request.POST.get('curso') or str(curso_actual.id)
@@ -384,6 +403,7 @@ def registrar_calificacion(request, curso_id):
         nota_post = request.POST.get('nota')
         observ_post = request.POST.get('observaciones', '').strip()
         calificacion_id_post = request.POST.get('calificacion_id')
+        version_post = calificaciones.leer_version(request.POST.get('version'))
 
         # Devolver data al template si hay error
         form_data = SimpleNamespace(
@@ -414,7 +434,7 @@ def registrar_calificacion(request, curso_id):
                 curso_id=curso_actual.id,  # Forzamos en el curso actual
                 estudiante_id=estudiante_post,
                 activo=True
-            ).first()
+            ).order_by('-periodo__fecha_inicio').first()
             if not insc:
                 messages.error(request, 'El estudiante no está inscrito en este curso.')
 
@@ -428,33 +448,26 @@ def registrar_calificacion(request, curso_id):
                     inscripcion__curso=curso_actual,
                     profesor=request.user
                 )
-                nota_anterior = calif.nota
-                calif.tipo_evaluacion = tipo_post
-                calif.nota = nota_decimal
-                calif.observaciones = observ_post
-                calif.fecha_evaluacion = calif.fecha_evaluacion or timezone.now().date()
-                calif.profesor = request.user
-                calif.save()
-
-                # Historial
-                HistorialCalificacion.objects.create(
-                    calificacion=calif,
-                    nota_anterior=nota_anterior,
-                    nota_nueva=nota_decimal,
-                    usuario_modificacion=request.user,
-                    motivo='Actualización de calificación'
-                )
-
-                # Notificación al estudiante
-                Notificacion.objects.create(
-                    usuario=calif.inscripcion.estudiante,
-                    tipo='cambio_nota',
-                    titulo='Calificación modificada',
-                    mensaje=f'Se actualizó tu calificación en {calif.inscripcion.curso.nombre} a {nota_decimal}.'
-                )
-
-                messages.success(request, 'Calificación actualizada correctamente.')
-                return redirect('registrar_calificacion', curso_id=curso_actual.id)
+                # Solo se aplica sobre la versión que se mostró; el historial y la notificación van en la misma transacción
+                try:
+                    calificaciones.actualizar(
+                        calif, version_post, request.user, tipo_post, nota_decimal, observ_post
+                    )
+                except calificaciones.ConflictoVersion as conflicto:
+                    if conflicto.actual is None:
+                        messages.error(request, 'La calificación fue eliminada por otro usuario.')
+                        return redirect('registrar_calificacion', curso_id=curso_actual.id)
+                    # Se vuelve a mostrar el formulario con lo ingresado y la versión vigente
+                    messages.error(
+                        request,
+                        f'Otro usuario modificó esta calificación mientras la editabas (nota actual: '
+                        f'{conflicto.actual.nota}). Revisa los datos y vuelve a guardar.'
+                    )
+                    editar_obj = conflicto.actual
+                    status = 409
+                else:
+                    messages.success(request, 'Calificación actualizada correctamente.')
+                    return redirect('registrar_calificacion', curso_id=curso_actual.id)
             else:
                 # Creación
                 calif = Calificacion.objects.create(
@@ -493,7 +506,7 @@ def registrar_calificacion(request, curso_id):
         'editar_obj': editar_obj,
         'selected_curso_id': curso_actual.id,
     }
-    return render(request, 'estudiantes/registrar_calificacion.html', context)
+    return render(request, 'estudiantes/registrar_calificacion.html', context, status=status)
 
 # US-009: Editar calificación - MEJORAR
 @login_required
@@ -524,28 +537,26 @@ def eliminar_calificacion(request, calificacion_id):
             messages.error(request, 'Debe proporcionar un motivo para eliminar la calificación')
             return redirect('eliminar_calificacion', calificacion_id=calificacion_id)
         
-        # Guardar en historial antes de eliminar
-        HistorialCalificacion.objects.create(
-            calificacion=calif,
-            nota_anterior=calif.nota,
-            nota_nueva=None,  # Indica eliminación
-            usuario_modificacion=request.user,
-            motivo=f"ELIMINACIÓN: {motivo}"
-        )
-        
-        # Notificar al estudiante
-        Notificacion.objects.create(
-            usuario=calif.inscripcion.estudiante,
-            tipo='sistema',
-            titulo='Calificación eliminada',
-            mensaje=f'Se eliminó una calificación en {calif.inscripcion.curso.nombre}. Motivo: {motivo}'
-        )
-        
         # Datos para redirección
         curso_id = calif.inscripcion.curso.id
         
-        # Eliminar
-        calif.delete()
+        # Historial, notificación y eliminación en una transacción, solo si nadie la cambió desde que se mostró
+        try:
+            calificaciones.eliminar(
+                calif, calificaciones.leer_version(request.POST.get('version')), request.user, motivo
+            )
+        except calificaciones.ConflictoVersion as conflicto:
+            if conflicto.actual is None:
+                messages.error(request, 'La calificación ya fue eliminada por otro usuario')
+                if request.user.rol == 'profesor':
+                    return redirect('registrar_calificacion', curso_id=curso_id)
+                return redirect('admin_calificaciones_lista')
+            messages.error(
+                request,
+                'Otro usuario modificó esta calificación después de que abriste esta página. '
+                'Revisa los datos actuales antes de confirmar la eliminación.'
+            )
+            return render(request, 'estudiantes/eliminar_calificacion.html', {'calificacion': conflicto.actual}, status=409)
         
         messages.success(request, 'Calificación eliminada correctamente')
         
@@ -561,6 +572,7 @@ def eliminar_calificacion(request, calificacion_id):
 
 # Vista para consultar notas (estudiantes)
 @login_required
+@condicional_estudiante
 def mis_notas(request):
     if request.user.rol != 'estudiante':
         messages.error(request, 'No tienes permisos para acceder a esta página')
@@ -576,7 +588,9 @@ def mis_notas(request):
     # Base queryset
     qs = Calificacion.objects.filter(
         inscripcion__estudiante=request.user
-    ).select_related('inscripcion__curso', 'profesor').order_by('inscripcion__curso__nombre', '-fecha_evaluacion')
+    ).select_related('inscripcion__curso', 'inscripcion__periodo', 'profesor').order_by(
+        'inscripcion__curso__nombre', '-inscripcion__periodo__fecha_inicio', '-fecha_evaluacion'
+    )
 
     if curso_filter:
         qs = qs.filter(inscripcion__curso_id=curso_filter)
@@ -588,36 +602,48 @@ def mis_notas(request):
         inscripcion__estudiante=request.user
     ).distinct()
 
-    # Armar estructura por curso
+    # Armar estructura por inscripción: el mismo curso en otro periodo va en su propia tarjeta
     por_curso = {}
     for c in qs:
-        curso = c.inscripcion.curso
-        if curso.id not in por_curso:
-            por_curso[curso.id] = {
-                'curso': curso,
+        inscripcion = c.inscripcion
+        if inscripcion.id not in por_curso:
+            por_curso[inscripcion.id] = {
+                'curso': inscripcion.curso,
+                'inscripcion': inscripcion,
+                'periodo': inscripcion.periodo,
                 'calificaciones': [],
                 'nota_maxima': None,
                 'nota_minima': None,
                 'promedio': None,
             }
-        por_curso[curso.id]['calificaciones'].append(c)
+        por_curso[inscripcion.id]['calificaciones'].append(c)
 
     calificaciones_por_curso = []
     total_calificaciones = qs.count()
     calificaciones_aprobadas = qs.filter(nota__gte=Decimal('3.0')).count()
 
-    for item in por_curso.values():
+    # Notas definitivas ponderadas (en caché) de las inscripciones listadas
+    notas_definitivas = definitivas.definitivas_de(item['inscripcion'] for item in por_curso.values())
+
+    for inscripcion_id, item in por_curso.items():
         notas = [float(x.nota) for x in item['calificaciones']]
         if notas:
             item['nota_maxima'] = max(notas)
             item['nota_minima'] = min(notas)
             item['promedio'] = round(sum(notas) / len(notas), 1)
+        definitiva = notas_definitivas.get(inscripcion_id)
+        item['definitiva'] = definitiva.nota if definitiva else None
         calificaciones_por_curso.append(item)
 
-    # Promedio general
+    # Promedio general a partir de las notas definitivas de las inscripciones
+    # activas, igual que en ver_estado_academico
     promedio_general = None
-    if total_calificaciones:
-        promedio_general = round(sum(float(x.nota) for x in qs) / total_calificaciones, 1)
+    notas_cursos = [
+        item['definitiva'] for item in calificaciones_por_curso
+        if item['definitiva'] is not None and item['inscripcion'].activo
+    ]
+    if notas_cursos:
+        promedio_general = round(float(sum(notas_cursos)) / len(notas_cursos), 1)
 
     context = {
         'cursos_disponibles': cursos_disponibles,
@@ -700,15 +726,24 @@ def perfil(request):
         })
         
     elif user.rol == 'profesor':
-        cursos = Curso.objects.filter(profesor=user)
-        calificaciones = Calificacion.objects.filter(profesor=user)  # CORREGIDO
+        # Estadísticas de todos los cursos del profesor en una sola consulta; las
+        # inscripciones cuentan también las inactivas y las calificaciones son las
+        # que registró el profesor
+        cursos = list(Curso.objects.filter(profesor=user).con_estadisticas().annotate(
+            inscripciones_count=Count('inscripcion', distinct=True),
+            calificaciones_propias=Count(
+                'inscripcion__calificacion',
+                filter=Q(inscripcion__calificacion__profesor=user),
+                distinct=True
+            ),
+        ))
+        calificaciones_cursos = sum(c.calificaciones_count for c in cursos)
+        suma_notas = sum(c.promedio * c.calificaciones_count for c in cursos if c.promedio is not None)
         context.update({
-            'total_cursos': cursos.count(),
-            'total_estudiantes': Inscripcion.objects.filter(curso__profesor=user).count(),
-            'total_calificaciones': calificaciones.count(),
-            'promedio_cursos': cursos.aggregate(
-                promedio=Avg('inscripcion__calificacion__nota')
-            )['promedio'] or 0,
+            'total_cursos': len(cursos),
+            'total_estudiantes': sum(c.inscripciones_count for c in cursos),
+            'total_calificaciones': sum(c.calificaciones_propias for c in cursos),
+            'promedio_cursos': suma_notas / calificaciones_cursos if calificaciones_cursos else 0,
         })
     else:
         context.update({
@@ -775,8 +810,10 @@ def eliminar_notificacion(request, notificacion_id):
 # Vista AJAX para obtener estudiantes de un curso
 @login_required
 def obtener_estudiantes_curso(request, curso_id):
-    if request.method == 'GET' and request.user.rol == 'profesor':
+    if request.method == 'GET' and autorizacion.tiene_rol(request, 'profesor'):
         try:
+            if not autorizacion.dicta_curso(request, curso_id):
+                raise Http404('Curso no encontrado')
             curso = get_object_or_404(Curso, id=curso_id, profesor=request.user)
             inscripciones = Inscripcion.objects.filter(curso=curso).select_related('estudiante')
             
@@ -796,6 +833,24 @@ def obtener_estudiantes_curso(request, curso_id):
     
     return JsonResponse({'success': False, 'error': 'No autorizado'})
 
+# Vista AJAX para el ranking de estudiantes de un curso
+@login_required
+def ranking_curso(request, curso_id):
+    """Ranking paginado de estudiantes del curso (administrador o profesor del curso)"""
+    if autorizacion.tiene_rol(request, 'administrador') or autorizacion.dicta_curso(request, curso_id):
+        curso = get_object_or_404(Curso, id=curso_id)
+    else:
+        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+
+    pagina = rankings.pagina_curso(curso.id, rankings.cursor_solicitado(request))
+    return JsonResponse({
+        'success': True,
+        'curso': curso.nombre,
+        'tiene_siguiente': pagina['tiene_siguiente'],
+        'siguiente': pagina['siguiente'],
+        'resultados': rankings.filas_estudiantes(pagina),
+    })
+
 # Vista para listar estudiantes de un curso (profesores)
 @login_required
 def estudiantes_curso(request, curso_id=None):
@@ -819,43 +874,43 @@ def estudiantes_curso(request, curso_id=None):
 
     if curso_sel_id:
         curso_seleccionado = get_object_or_404(Curso, id=curso_sel_id, profesor=request.user, activo=True)
-        inscripciones = Inscripcion.objects.filter(curso=curso_seleccionado, activo=True).select_related('estudiante')
-        total_estudiantes = inscripciones.count()
+        # Última calificación de cada inscripción resuelta con una subconsulta
+        ultima = Calificacion.objects.filter(inscripcion=OuterRef('pk')).order_by('-fecha_registro')
+        inscripciones = list(
+            Inscripcion.objects.filter(curso=curso_seleccionado, activo=True)
+            .select_related('estudiante')
+            .annotate(ultima_id=Subquery(ultima.values('id')[:1]))
+        )
+        total_estudiantes = len(inscripciones)
+        ultimas = Calificacion.objects.in_bulk([i.ultima_id for i in inscripciones if i.ultima_id])
 
-        notas_todas = []
-        for insc in inscripciones:
-            califs = Calificacion.objects.filter(inscripcion=insc).order_by('-fecha_registro')
-            notas = list(califs.values_list('nota', flat=True))
-            total_calificaciones += len(notas)
-            if notas:
-                notas_float = [float(n) for n in notas]
-                notas_todas.extend(notas_float)
-                promedio = round(sum(notas_float) / len(notas_float), 1)
-                if promedio >= 3.0:
-                    estudiantes_aprobados += 1
-                ultima = califs.first()
-            else:
-                promedio = None
-                ultima = None
+        # Todas las notas del curso en arreglos NumPy (una sola consulta)
+        analisis = analitica.analizar(inscripcion__curso=curso_seleccionado, inscripcion__activo=True)
+        resumen = analisis['resumen']
+        total_calificaciones = resumen['total']
 
+        for insc in inscripciones:
+            datos_est = analisis['por_estudiante'].get(insc.estudiante_id)
+            promedio = round(datos_est['promedio'], 1) if datos_est else None
+            if promedio is not None and promedio >= 3.0:
+                estudiantes_aprobados += 1
             estudiantes.append({
                 'estudiante': insc.estudiante,
-                'total_calificaciones': len(notas),
+                'total_calificaciones': datos_est['total_calificaciones'] if datos_est else 0,
                 'promedio': promedio,
-                'ultima_calificacion': ultima,
+                'z_score': datos_est['z_score'] if datos_est else None,
+                'ultima_calificacion': ultimas.get(insc.ultima_id),
             })
 
-        if notas_todas:
-            promedio_curso = round(sum(notas_todas) / len(notas_todas), 1)
-            stats['nota_maxima'] = max(notas_todas)
-            stats['nota_minima'] = min(notas_todas)
-            # Distribución
-            for n in notas_todas:
-                if 4.6 <= n <= 5.0: stats['excelente'] += 1
-                elif 4.0 <= n <= 4.5: stats['sobresaliente'] += 1
-                elif 3.5 <= n <= 3.9: stats['bueno'] += 1
-                elif 3.0 <= n <= 3.4: stats['aceptable'] += 1
-                else: stats['insuficiente'] += 1
+        if total_calificaciones:
+            promedio_curso = round(resumen['promedio'], 1)
+            stats.update(analisis['distribucion'])
+            stats['nota_maxima'] = resumen['nota_maxima']
+            stats['nota_minima'] = resumen['nota_minima']
+            stats['desviacion'] = resumen['desviacion']
+            stats['percentiles'] = resumen['percentiles']
+            stats['histograma'] = analisis['histograma']
+            stats['por_tipo'] = analisis['por_tipo']
             stats['tasa_aprobacion'] = (estudiantes_aprobados / max(total_estudiantes, 1)) * 100
 
     context = {
@@ -875,14 +930,26 @@ def estudiantes_curso(request, curso_id=None):
 # US-024: NUEVA - Ver estado académico
 
 @login_required
+@condicional_estudiante
 def ver_estado_academico(request):
     """Ver estado académico del estudiante (Regular/En Riesgo/Reprobado)"""
     if request.user.rol != 'estudiante':
         messages.error(request, 'Esta función es solo para estudiantes')
         return redirect('dashboard')
     
-    calificaciones = Calificacion.objects.filter(inscripcion__estudiante=request.user)
-    promedio_general = calificaciones.aggregate(Avg('nota'))['nota__avg']
+    # Promedio de las notas definitivas ponderadas (en caché) de cada curso
+    inscripciones = list(Inscripcion.objects.filter(
+        estudiante=request.user, activo=True
+    ).select_related('curso'))
+    notas_definitivas = definitivas.definitivas_de(inscripciones)
+    definitivas_cursos = [
+        {'curso': insc.curso, 'definitiva': notas_definitivas[insc.id]}
+        for insc in inscripciones
+        if insc.id in notas_definitivas and notas_definitivas[insc.id].nota is not None
+    ]
+    promedio_general = None
+    if definitivas_cursos:
+        promedio_general = sum(d['definitiva'].nota for d in definitivas_cursos) / len(definitivas_cursos)
     
     if not promedio_general:
         estado = 'Sin Calificaciones'
@@ -906,6 +973,9 @@ def ver_estado_academico(request):
         'color': color,
         'mensaje': mensaje,
         'promedio_general': promedio_general,
+        'definitivas_cursos': definitivas_cursos,
+        # Alerta temprana precalculada por el comando calcular_riesgo
+        'riesgo': RiesgoAcademico.objects.filter(estudiante=request.user).first(),
     }
     return render(request, 'estudiantes/estado_academico.html', context)
 
@@ -1054,135 +1124,37 @@ def actualizar_perfil(request):
 
 # US-013: NUEVA - Descargar comprobante PDF
 @login_required
+@condicional_estudiante
+@limites.limitar('exportar_pdf')
 def descargar_comprobante(request):
     """Generar y descargar comprobante de calificaciones en PDF"""
     if request.user.rol != 'estudiante':
         messages.error(request, 'Esta función es solo para estudiantes')
         return redirect('dashboard')
     
-    from django.http import HttpResponse
-    from reportlab.lib.pagesizes import letter
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.lib import colors
     from datetime import datetime
+    from .comprobantes import escribir_comprobante
+    from .comprobantes_lote import datos_por_estudiante
     
-    # Obtener calificaciones del estudiante
-    calificaciones = Calificacion.objects.filter(
-        inscripcion__estudiante=request.user
-    ).select_related('inscripcion__curso', 'profesor').order_by('inscripcion__curso__nombre', '-fecha_evaluacion')
+    # Obtener calificaciones del estudiante agrupadas por curso (una consulta)
+    calificaciones = Calificacion.objects.filter(inscripcion__estudiante=request.user)
+    datos = next(datos_por_estudiante(calificaciones, datetime.now().strftime("%d/%m/%Y %H:%M")), None)
     
-    if not calificaciones.exists():
+    if datos is None:
         messages.warning(request, 'No tienes calificaciones registradas para generar un comprobante')
         return redirect('mis_calificaciones')
     
-    # Crear PDF
+    # Crear PDF con los estilos compartidos del módulo comprobantes
     response = HttpResponse(content_type='application/pdf')
     fecha_actual = datetime.now().strftime("%Y-%m-%d")
     filename = f'Comprobante_Calificaciones_{request.user.first_name}_{fecha_actual}.pdf'
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    doc = SimpleDocTemplate(response, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#1B3C53'),
-        spaceAfter=30,
-        alignment=1  # Centrado
-    )
-    elements.append(Paragraph('COMPROBANTE DE CALIFICACIONES', title_style))
-    elements.append(Paragraph('Sistema de Gestión de Notas - TROLI', styles['Normal']))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Información del estudiante (SIN numero_documento)
-    info_data = [
-        ['Estudiante:', f'{request.user.first_name} {request.user.last_name}'],
-        ['Usuario:', request.user.username],
-        ['Email:', request.user.email],
-        ['Fecha de emisión:', datetime.now().strftime("%d/%m/%Y %H:%M")],
-    ]
-    info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F9F3EF')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-    ]))
-    elements.append(info_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Tabla de calificaciones
-    elements.append(Paragraph('CALIFICACIONES POR CURSO', styles['Heading2']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Agrupar por curso
-    por_curso = {}
-    for c in calificaciones:
-        curso = c.inscripcion.curso
-        if curso.id not in por_curso:
-            por_curso[curso.id] = {'curso': curso, 'calificaciones': []}
-        por_curso[curso.id]['calificaciones'].append(c)
-    
-    # Crear tabla por cada curso
-    for item in por_curso.values():
-        curso = item['curso']
-        elements.append(Paragraph(f'<b>{curso.nombre} ({curso.codigo})</b>', styles['Normal']))
-        
-        data = [['Tipo', 'Calificación', 'Fecha', 'Profesor']]
-        for cal in item['calificaciones']:
-            data.append([
-                cal.get_tipo_evaluacion_display(),
-                str(cal.nota),
-                cal.fecha_evaluacion.strftime("%d/%m/%Y") if cal.fecha_evaluacion else 'N/A',
-                f'{cal.profesor.first_name} {cal.profesor.last_name}'
-            ])
-        
-        table = Table(data, colWidths=[1.5*inch, 1*inch, 1.2*inch, 2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1B3C53')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
-        elements.append(table)
-        elements.append(Spacer(1, 0.2*inch))
-    
-    # Promedio general
-    promedio_general = calificaciones.aggregate(Avg('nota'))['nota__avg']
-    if promedio_general:
-        promedio_data = [['PROMEDIO GENERAL:', f'{promedio_general:.1f}']]
-        promedio_table = Table(promedio_data, colWidths=[4*inch, 2*inch])
-        promedio_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#6B9BD1')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ]))
-        elements.append(promedio_table)
-    
-    # Pie de página
-    elements.append(Spacer(1, 0.5*inch))
-    elements.append(Paragraph('<i>Documento generado automáticamente por el Sistema TROLI</i>', styles['Normal']))
-    
-    doc.build(elements)
+    escribir_comprobante(response, datos[1])
     return response
 
 # US-014: NUEVA - Cambiar contraseña
 @login_required
+@limites.limitar('cambiar_contrasena', metodos=['POST'])
 def cambiar_contrasena(request):
     """Cambiar contraseña del usuario autenticado"""
     if request.method == 'POST':
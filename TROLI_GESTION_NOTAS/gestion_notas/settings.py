@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -104,6 +106,37 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Perfil de hash de contraseñas (variable de entorno PERFIL_HASH)
+# - estandar: PBKDF2 (por defecto de Django); PBKDF2_ITERACIONES permite subir
+#             las iteraciones, nunca bajarlas del valor de Django
+# - argon2:   Argon2 con ARGON2_PARAMETROS; requiere `pip install argon2-cffi`
+# Los perfiles verifican los hashes del otro, así que cambiar entre ellos no
+# invalida contraseñas existentes. Las pruebas agregan MD5 por su cuenta
+# (ver estudiantes/tests.py); aquí no se acepta.
+PERFIL_HASH = os.environ.get('PERFIL_HASH', 'estandar')
+PBKDF2_ITERACIONES = int(os.environ.get('PBKDF2_ITERACIONES', 0))
+ARGON2_PARAMETROS = {
+    'time_cost': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'memory_cost': int(os.environ.get('ARGON2_MEMORY_COST', 102400)),  # KiB
+    'parallelism': int(os.environ.get('ARGON2_PARALLELISM', 8)),
+}
+_HASHERS_COMPATIBLES = [
+    "estudiantes.hashers.PBKDF2Configurable",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "estudiantes.hashers.Argon2Configurable",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+_PERFILES_HASH = {
+    'estandar': "estudiantes.hashers.PBKDF2Configurable",
+    'argon2': "estudiantes.hashers.Argon2Configurable",
+}
+if PERFIL_HASH not in _PERFILES_HASH:
+    raise ImproperlyConfigured(f"PERFIL_HASH debe ser uno de {', '.join(_PERFILES_HASH)} (recibido: {PERFIL_HASH!r})")
+_HASHER_PREFERIDO = _PERFILES_HASH[PERFIL_HASH]
+PASSWORD_HASHERS = [_HASHER_PREFERIDO] + [h for h in _HASHERS_COMPATIBLES if h != _HASHER_PREFERIDO]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -122,6 +155,9 @@ STATIC_ROOT = BASE_DIR / 'staticfiles_build' / 'static'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+
+# Archivos generados por el sistema (por ejemplo, ZIP de comprobantes)
+MEDIA_ROOT = BASE_DIR / 'media'
 # Configuración del modelo de usuario personalizado
 # Default primary key field type = 'estudiantes.Usuario'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -130,6 +166,31 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Usar el modelo de usuario personalizado
 AUTH_USER_MODEL = 'estudiantes.Usuario'
 
+# Caché de Django. Sin configurar es la de memoria de cada proceso, que los
+# workers no comparten: el contexto de autorización y el usuario de la sesión
+# se leen entonces de la base de datos (ver estudiantes/autorizacion.py).
+# CACHE_REDIS_URL configura una caché compartida, por ejemplo
+# redis://localhost:6379/1 (requiere `pip install redis`).
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+        }
+    }
+
+# Con caché compartida, sesiones en caché con escritura diferida a la base de
+# datos (ver estudiantes/sesiones.py); sin ella, el motor db de Django
+# Otros motores: django.contrib.sessions.backends.db o .cached_db
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'estudiantes.sesiones' if os.environ.get('CACHE_REDIS_URL') else 'django.contrib.sessions.backends.db',
+)
+SESIONES_VOLCADO_SEGUNDOS = int(os.environ.get('SESIONES_VOLCADO_SEGUNDOS', 30))
+
+# Backend de autenticación: guarda en caché el usuario de la sesión (ver estudiantes/autorizacion.py)
+AUTHENTICATION_BACKENDS = ['estudiantes.autorizacion.BackendUsuarioEnCache']
+
 # Rutas de autenticación
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
@@ -0,0 +1,66 @@
+import os
+import random
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestion_notas.settings')
+django.setup()
+
+from estudiantes import analitica
+
+TOTAL_NOTAS = 1_000_000
+TOTAL_ESTUDIANTES = 20_000
+
+
+def estadisticas_con_loop(filas):
+    """Réplica del cálculo anterior de estudiantes_curso (loops de Python)"""
+    stats = {'excelente': 0, 'sobresaliente': 0, 'bueno': 0, 'aceptable': 0, 'insuficiente': 0}
+    por_estudiante = {}
+    notas_todas = []
+    for estudiante_id, _, nota in filas:
+        n = float(nota)
+        notas_todas.append(n)
+        por_estudiante.setdefault(estudiante_id, []).append(n)
+    promedios = {e: round(sum(n) / len(n), 1) for e, n in por_estudiante.items()}
+    for n in notas_todas:
+        if 4.6 <= n <= 5.0: stats['excelente'] += 1
+        elif 4.0 <= n <= 4.5: stats['sobresaliente'] += 1
+        elif 3.5 <= n <= 3.9: stats['bueno'] += 1
+        elif 3.0 <= n <= 3.4: stats['aceptable'] += 1
+        else: stats['insuficiente'] += 1
+    stats['promedio'] = sum(notas_todas) / len(notas_todas)
+    return stats, promedios
+
+
+def estadisticas_vectorizadas(filas):
+    datos = analitica.arreglos_desde_filas(filas)
+    return analitica.analizar_arreglos(datos)
+
+
+if __name__ == '__main__':
+    random.seed(42)
+    tipos = analitica.TIPOS_EVALUACION
+    # Filas con el mismo formato que entrega analitica.cargar_notas
+    filas = [
+        (random.randrange(TOTAL_ESTUDIANTES), random.randrange(len(tipos)), round(random.uniform(0, 5), 1))
+        for _ in range(TOTAL_NOTAS)
+    ]
+    print(f"Calificaciones: {TOTAL_NOTAS:,} - Estudiantes: {TOTAL_ESTUDIANTES:,}")
+
+    inicio = time.perf_counter()
+    stats_loop, _ = estadisticas_con_loop(filas)
+    tiempo_loop = time.perf_counter() - inicio
+    print(f"Loop de Python:   {tiempo_loop:.3f} s")
+
+    inicio = time.perf_counter()
+    analisis = estadisticas_vectorizadas(filas)
+    tiempo_numpy = time.perf_counter() - inicio
+    print(f"NumPy (incluye conversión de filas): {tiempo_numpy:.3f} s")
+    print(f"Aceleración: {tiempo_loop / tiempo_numpy:.1f}x")
+
+    for rango, cantidad in analisis['distribucion'].items():
+        assert cantidad == stats_loop[rango], rango
+    print("Distribución verificada contra el loop original")
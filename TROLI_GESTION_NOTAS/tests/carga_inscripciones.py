@@ -0,0 +1,129 @@
+"""
+Prueba de carga de inscripciones: miles de intentos simultáneos sobre un curso con cupo
+
+Usa una base SQLite temporal (no toca db.sqlite3). Cada hilo tiene su propia
+conexión, como los workers del servidor. Parte de los intentos repiten
+estudiante para probar que las peticiones repetidas no consumen otro cupo.
+Al final verifica que no haya sobrecupo, que el contador coincida con las
+inscripciones activas y que los retiros pasen los cupos a la lista de espera
+en orden de llegada.
+
+    python tests/carga_inscripciones.py --intentos 3000 --estudiantes 2000 --cupo 100 --hilos 16
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestion_notas.settings')
+django.setup()
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, connections
+
+from estudiantes import cupos
+from estudiantes.models import Curso, Inscripcion, ListaEspera, Usuario
+
+
+def preparar(total_estudiantes, cupo):
+    profesor = Usuario.objects.create_user(username='profe_carga', password=None, rol='profesor')
+    curso = Curso.objects.create(nombre='Curso con cupo', codigo='CARGA101', profesor=profesor, cupo=cupo)
+    Usuario.objects.bulk_create([
+        Usuario(username=f'carga{i}', rol='estudiante', password='!') for i in range(total_estudiantes)
+    ])
+    return curso, list(Usuario.objects.filter(rol='estudiante').order_by('id'))
+
+
+def atender(curso, tanda):
+    """Intentos de un hilo; retorna (Counter de resultados, errores de base de datos)"""
+    resultados, errores = Counter(), 0
+    try:
+        for estudiante in tanda:
+            try:
+                resultado, _ = cupos.inscribir(estudiante, curso)
+                resultados[resultado] += 1
+            except OperationalError:
+                errores += 1
+    finally:
+        connections.close_all()
+    return resultados, errores
+
+
+def en_paralelo(funcion, tandas):
+    with ThreadPoolExecutor(max_workers=len(tandas)) as ejecutor:
+        return list(ejecutor.map(funcion, tandas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--intentos', type=int, default=3000)
+    parser.add_argument('--estudiantes', type=int, default=2000)
+    parser.add_argument('--cupo', type=int, default=100)
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--retiros', type=int, default=20, help='inscripciones que se desactivan al final')
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp()
+    settings.DATABASES['default']['NAME'] = os.path.join(directorio, 'carga.sqlite3')
+    settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 30
+    call_command('migrate', verbosity=0)
+
+    curso, estudiantes = preparar(args.estudiantes, args.cupo)
+    random.seed(42)
+    intentos = [random.choice(estudiantes) for _ in range(args.intentos)]
+    tandas = [intentos[i::args.hilos] for i in range(args.hilos)]
+    print(f"Intentos: {args.intentos:,} de {args.estudiantes:,} estudiantes - cupo {args.cupo} - {args.hilos} hilos")
+
+    inicio = time.perf_counter()
+    salidas = en_paralelo(lambda tanda: atender(curso, tanda), tandas)
+    duracion = time.perf_counter() - inicio
+
+    resultados = sum((r for r, _ in salidas), Counter())
+    errores = sum(e for _, e in salidas)
+    print(f"Duración: {duracion:.2f} s - {args.intentos / duracion:,.0f} intentos/s")
+    for nombre in (cupos.INSCRITO, cupos.YA_INSCRITO, cupos.EN_ESPERA, cupos.YA_EN_ESPERA):
+        print(f"   - {nombre:<14} {resultados[nombre]:6,}")
+    print(f"   - {'errores':<14} {errores:6,}")
+
+    curso.refresh_from_db()
+    activas = Inscripcion.objects.filter(curso=curso, activo=True).count()
+    distintos = len({e.id for e in intentos})
+    assert errores == 0, 'hubo errores de base de datos'
+    assert activas == curso.inscritos == min(args.cupo, distintos), (activas, curso.inscritos)
+    assert resultados[cupos.INSCRITO] == activas
+    assert ListaEspera.objects.filter(curso=curso).count() == distintos - activas
+    print(f"Sin sobrecupo: {activas} inscritos activos, contador {curso.inscritos}, "
+          f"{distintos - activas} en lista de espera")
+
+    # Retiros simultáneos: los cupos pasan a los primeros de la lista de espera
+    primeros = list(ListaEspera.objects.filter(curso=curso).order_by('id').values_list('estudiante_id', flat=True)[:args.retiros])
+    retiros = list(Inscripcion.objects.filter(curso=curso, activo=True)[:args.retiros])
+
+    def retirar(tanda):
+        try:
+            for inscripcion in tanda:
+                cupos.desactivar(inscripcion)
+        finally:
+            connections.close_all()
+
+    en_paralelo(retirar, [retiros[i::args.hilos] for i in range(args.hilos)])
+    curso.refresh_from_db()
+    activas = Inscripcion.objects.filter(curso=curso, activo=True)
+    assert activas.count() == curso.inscritos == min(args.cupo, distintos)
+    assert set(activas.filter(estudiante_id__in=primeros).values_list('estudiante_id', flat=True)) == set(primeros)
+    print(f"Retiros: {len(retiros)} cupos pasaron a los primeros {len(primeros)} de la lista de espera")
+    connections.close_all()
+    shutil.rmtree(directorio)
+
+
+if __name__ == '__main__':
+    main()
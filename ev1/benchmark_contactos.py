@@ -0,0 +1,80 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from contactos import (
+    Contacto,
+    ContactStore,
+    SQLiteContactStore,
+    buscar_contacto,
+    existe_correo,
+    existe_nombre,
+    existe_telefono
+)
+
+NOMBRES = ["Ana", "Luis", "María", "José", "Camila", "Diego", "Valentina", "Pedro", "Sofía", "Javier"]
+APELLIDOS = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda"]
+CONSULTAS = 200
+
+
+
+def generar_contactos(cantidad):
+    aleatorio = random.Random(42)
+    contactos = []
+    for i in range(cantidad):
+        nombre = f"{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} {i}"
+        telefono = f"+569{i:08d}"
+        correo = f"contacto{i}@empresa.cl"
+        contactos.append(Contacto(nombre, telefono, correo, "Analista"))
+    return contactos
+
+
+
+def medir(funcion, argumentos):
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcion(argumento)
+    return (time.perf_counter() - inicio) / len(argumentos)
+
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Generando {cantidad} contactos...")
+    contactos = generar_contactos(cantidad)
+
+    inicio = time.perf_counter()
+    store = ContactStore(contactos)
+    print(f"Construcción de índices: {time.perf_counter() - inicio:.2f} s")
+
+    directorio = tempfile.mkdtemp()
+    inicio = time.perf_counter()
+    sqlite = SQLiteContactStore(os.path.join(directorio, "contactos.db"))
+    sqlite.agregar_varios(generar_contactos(cantidad))
+    print(f"Carga en SQLite: {time.perf_counter() - inicio:.2f} s")
+
+    aleatorio = random.Random(7)
+    muestra = [aleatorio.choice(contactos) for _ in range(CONSULTAS)]
+    # Las búsquedas lineales se miden con menos consultas porque cada una recorre toda la lista
+    lineales = muestra[:max(1, CONSULTAS // 20)]
+
+    pruebas = [
+        ("existe_correo", existe_correo, lambda c: c.correo.upper()),
+        ("existe_nombre", existe_nombre, lambda c: c.nombre),
+        ("existe_telefono", existe_telefono, lambda c: c.telefono),
+        ("buscar (prefijo de correo)", buscar_contacto, lambda c: c.correo[:-10]),
+    ]
+    print(f"\n{'Consulta':<28}{'lista':>14}{'ContactStore':>16}{'SQLite':>14}")
+    for titulo, funcion, valor in pruebas:
+        lista = medir(lambda v: funcion(contactos, v), [valor(c) for c in lineales])
+        indice = medir(lambda v: funcion(store, v), [valor(c) for c in muestra])
+        bd = medir(lambda v: funcion(sqlite, v), [valor(c) for c in muestra])
+        print(f"{titulo:<28}{lista * 1000:>11.3f} ms{indice * 1000:>13.4f} ms{bd * 1000:>11.4f} ms")
+    sqlite.cerrar()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import gc
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from contactos import Contacto, escribir_lista_json
+
+CARGOS = ["Analista", "Gerente", "Asistente", "Ejecutivo de ventas", "Desarrollador", "Contador"]
+
+
+
+class ContactoConDict:
+    # Contacto como era antes: atributos en un __dict__ por instancia y cargo sin internar
+    def __init__(self, nombre, telefono, correo, cargo):
+        self.nombre = nombre
+        self.telefono = telefono
+        self.correo = correo
+        self.cargo = cargo
+
+    def to_dict(self):
+        return {"nombre": self.nombre, "telefono": self.telefono, "correo": self.correo, "cargo": self.cargo}
+
+
+
+def generar(clase, cantidad):
+    contactos = []
+    for i in range(cantidad):
+        # Cada cargo es un str nuevo, como los que entrega json.load al leer el archivo
+        cargo = "".join(list(CARGOS[i % len(CARGOS)]))
+        contactos.append(clase(f"Contacto {i}", f"+569{i:08d}", f"contacto{i}@empresa.cl", cargo))
+    return contactos
+
+
+
+def medir_memoria(clase, cantidad):
+    gc.collect()
+    tracemalloc.start()
+    contactos = generar(clase, cantidad)
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return contactos, memoria
+
+
+
+def medir_guardado(escribir, contactos):
+    inicio = time.perf_counter()
+    escribir(io.StringIO(), contactos)
+    return time.perf_counter() - inicio
+
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Memoria de {cantidad} contactos (tracemalloc, incluye los str de cada campo y la lista)")
+
+    antes, memoria_antes = medir_memoria(ContactoConDict, cantidad)
+    guardado_antes = medir_guardado(
+        lambda f, cs: json.dump([c.to_dict() for c in cs], f, ensure_ascii=False, indent=2), antes
+    )
+    del antes
+
+    despues, memoria_despues = medir_memoria(Contacto, cantidad)
+    guardado_despues = medir_guardado(escribir_lista_json, despues)
+    del despues
+
+    print(f"{'':<22}{'bytes/contacto':>16}{'total':>12}{'guardar JSON':>15}")
+    print(f"{'__dict__ (antes)':<22}{memoria_antes / cantidad:>16.1f}{memoria_antes / 2**20:>9.1f} MB{guardado_antes:>13.2f} s")
+    print(f"{'__slots__ (después)':<22}{memoria_despues / cantidad:>16.1f}{memoria_despues / 2**20:>9.1f} MB{guardado_despues:>13.2f} s")
+    print(f"Reducción: {(1 - memoria_despues / memoria_antes) * 100:.0f}%")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from contactos import Contacto, ContactStore, SQLiteContactStore
+
+NOMBRES = ["José", "María", "Ana", "Luis", "Camila", "Diego", "Valentina", "Pedro", "Sofía", "Javier",
+           "Martín", "Florencia", "Tomás", "Catalina", "Benjamín", "Isidora", "Matías", "Antonia"]
+SILABAS = ["gon", "za", "lez", "mu", "ñoz", "ro", "jas", "dí", "az", "pé", "rez", "so", "to", "sil", "va",
+           "con", "tre", "ras", "mar", "tí", "nez", "se", "pul", "ve", "da", "fuen", "tes", "ca", "rra"]
+CARGOS = ["Analista", "Gerente", "Asistente", "Ejecutivo de ventas", "Desarrollador", "Contador"]
+CONSULTAS = 100
+
+
+
+def generar_contactos(cantidad):
+    aleatorio = random.Random(42)
+    contactos = []
+    for i in range(cantidad):
+        apellido = "".join(aleatorio.choice(SILABAS) for _ in range(aleatorio.randint(3, 4))).capitalize()
+        nombre = f"{aleatorio.choice(NOMBRES)} {apellido}"
+        correo = f"{nombre.split()[0][0].lower()}{apellido.lower()}{i}@empresa.cl"
+        contactos.append(Contacto(nombre, f"+569{i:08d}", correo, aleatorio.choice(CARGOS)))
+    return contactos
+
+
+
+def con_error(texto, aleatorio):
+    # Quita las tildes de la mitad de las consultas y cambia una letra del apellido
+    if aleatorio.random() < 0.5:
+        texto = texto.translate(str.maketrans("áéíóúñ", "aeioun"))
+    posicion = aleatorio.randrange(len(texto) // 2, len(texto))
+    return texto[:posicion] + aleatorio.choice("aeiourslnz") + texto[posicion + 1:]
+
+
+
+def medir(almacen, consultas):
+    tiempos, aciertos = [], 0
+    for consulta, esperado in consultas:
+        inicio = time.perf_counter()
+        resultados = almacen.buscar_aproximado(consulta, 10)
+        tiempos.append(time.perf_counter() - inicio)
+        aciertos += any(c.correo == esperado for c in resultados)
+    tiempos.sort()
+    return {
+        "mediana": statistics.median(tiempos) * 1000,
+        "p95": tiempos[int(len(tiempos) * 0.95) - 1] * 1000,
+        "maximo": tiempos[-1] * 1000,
+        "aciertos": aciertos / len(consultas) * 100,
+    }
+
+
+
+def mostrar(titulo, r):
+    print(f"{titulo:<10}{r['mediana']:>10.1f} ms{r['p95']:>10.1f} ms{r['maximo']:>10.1f} ms{r['aciertos']:>11.0f}%")
+
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cantidad_sqlite = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    print(f"Generando {cantidad} contactos...")
+    contactos = generar_contactos(cantidad)
+    store = ContactStore(contactos)
+
+    inicio = time.perf_counter()
+    indice = store.indice_trigramas()
+    print(f"Índice de trigramas: {time.perf_counter() - inicio:.1f} s, {len(indice):,} entradas "
+          f"({len(indice) * 4 / 2**20:.0f} MB en listas)")
+
+    aleatorio = random.Random(7)
+    # Nombre completo con error de tipeo, buscando al contacto exacto entre los 10 primeros
+    consultas = [(con_error(c.nombre, aleatorio), c.correo) for c in aleatorio.sample(contactos, CONSULTAS)]
+    print(f"\n{'':<10}{'mediana':>13}{'p95':>13}{'máximo':>13}{'en top 10':>12}")
+    mostrar("memoria", medir(store, consultas))
+
+    if cantidad_sqlite:
+        directorio = tempfile.mkdtemp()
+        sqlite = SQLiteContactStore(os.path.join(directorio, "contactos.db"))
+        inicio = time.perf_counter()
+        sqlite.agregar_varios(contactos[:cantidad_sqlite])
+        print(f"\nCarga de {cantidad_sqlite} contactos en SQLite: {time.perf_counter() - inicio:.1f} s")
+        muestra = aleatorio.sample(contactos[:cantidad_sqlite], min(CONSULTAS, cantidad_sqlite))
+        mostrar("sqlite", medir(sqlite, [(con_error(c.nombre, aleatorio), c.correo) for c in muestra]))
+        sqlite.cerrar()
+        shutil.rmtree(directorio)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from contactos import (
+    ErrorContacto,
+    abrir_almacen,
+    actualizar_contacto,
+    borrar_contacto,
+    buscar_contacto,
+    contacto_por_correo,
+    crear_contacto,
+    describir_contacto
+)
+from intercambio import exportar, importar
+
+# Línea de comandos sin preguntas, para usar desde scripts:
+#   python main.py add --nombre "Ana Pérez" --telefono +56911112222 --correo ana@empresa.cl
+#   python main.py list --limit 50 --offset 100 --formato jsonl
+#   python main.py batch operaciones.jsonl
+# Los listados se escriben a medida que se leen, sin cargar todos los contactos.
+# Termina con código 1 si la operación falla (el motivo se escribe en stderr).
+
+
+
+def _opciones_comunes(parser, por_defecto=True):
+    # Se aceptan antes o después del comando; en los subcomandos solo cuentan si se indican
+    parser.add_argument(
+        "--almacen", choices=["sqlite", "json"], default=None if por_defecto else argparse.SUPPRESS,
+        help="sqlite (por defecto, o CONTACTOS_ALMACEN) o json con diario"
+    )
+    parser.add_argument(
+        "--formato", choices=["texto", "jsonl"], default="texto" if por_defecto else argparse.SUPPRESS,
+        help="formato de salida"
+    )
+    return parser
+
+
+
+def construir_parser():
+    parser = _opciones_comunes(argparse.ArgumentParser(prog="main.py", description="Agenda de contactos CONNECT ME"))
+    comunes = _opciones_comunes(argparse.ArgumentParser(add_help=False), por_defecto=False)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    agregar = comandos.add_parser("add", parents=[comunes], help="registrar un contacto")
+    agregar.add_argument("--nombre", required=True)
+    agregar.add_argument("--telefono", required=True)
+    agregar.add_argument("--correo", required=True)
+    agregar.add_argument("--cargo", default="")
+
+    modificar = comandos.add_parser("update", parents=[comunes], help="modificar el contacto con el correo indicado")
+    modificar.add_argument("correo")
+    modificar.add_argument("--nombre")
+    modificar.add_argument("--telefono")
+    modificar.add_argument("--nuevo-correo", dest="nuevo_correo")
+    modificar.add_argument("--cargo")
+
+    eliminar = comandos.add_parser("delete", parents=[comunes], help="eliminar el contacto con el correo indicado")
+    eliminar.add_argument("correo")
+
+    buscar = comandos.add_parser("search", parents=[comunes], help="buscar por el inicio del nombre o del correo")
+    buscar.add_argument("criterio")
+    buscar.add_argument("--limit", type=int, default=None)
+    buscar.add_argument(
+        "--aproximada", action="store_true", help="búsqueda aproximada por trigramas (sin tildes, tolera errores)"
+    )
+
+    listar = comandos.add_parser("list", parents=[comunes], help="listar contactos por páginas")
+    listar.add_argument("--limit", type=int, default=None)
+    listar.add_argument("--offset", type=int, default=0)
+
+    importar_ = comandos.add_parser("import", parents=[comunes], help="importar un archivo .csv, .vcf o .jsonl")
+    importar_.add_argument("archivo")
+    importar_.add_argument("--rechazos", help="CSV donde escribir las filas rechazadas")
+
+    exportar_ = comandos.add_parser("export", parents=[comunes], help="exportar a un archivo .csv, .vcf o .jsonl")
+    exportar_.add_argument("archivo")
+
+    lote = comandos.add_parser(
+        "batch", parents=[comunes], help="ejecutar operaciones JSONL (una por línea, como {\"op\": \"add\", ...}); - lee stdin"
+    )
+    lote.add_argument("archivo", nargs="?", default="-")
+    return parser
+
+
+
+def _escribir(contactos, formato):
+    # Escribe cada contacto apenas se obtiene; retorna cuántos se escribieron
+    escritos = 0
+    salida = sys.stdout
+    for c in contactos:
+        salida.write((c.to_json() if formato == "jsonl" else describir_contacto(c)) + "\n")
+        escritos += 1
+    return escritos
+
+
+
+# ============= OPERACIONES =============
+
+def ejecutar(almacen, op, datos):
+    # Ejecuta una operación con sus datos como diccionario; la usan los comandos y batch
+    if op == "add":
+        return crear_contacto(almacen, datos["nombre"], datos["telefono"], datos["correo"], datos.get("cargo") or "")
+    if op == "update":
+        contacto = contacto_por_correo(almacen, datos["correo"])
+        return actualizar_contacto(
+            almacen, contacto, datos.get("nombre"), datos.get("telefono"), datos.get("nuevo_correo"), datos.get("cargo")
+        )
+    if op == "delete":
+        borrar_contacto(almacen, contacto_por_correo(almacen, datos["correo"]))
+        return None
+    raise ErrorContacto(f"operación desconocida: {op}")
+
+
+
+def ejecutar_lote(almacen, archivo):
+    # Retorna (operaciones, errores); cada error se informa en stdout con su número de línea
+    operaciones = errores = 0
+    for numero, linea in enumerate(archivo, 1):
+        if not linea.strip():
+            continue
+        operaciones += 1
+        try:
+            datos = json.loads(linea)
+            ejecutar(almacen, datos.get("op"), datos)
+        except (ErrorContacto, KeyError, AttributeError, json.JSONDecodeError) as e:
+            errores += 1
+            motivo = f"falta el campo {e}" if isinstance(e, KeyError) else e
+            sys.stdout.write(f"línea {numero}: Error: {motivo}\n")
+    return operaciones, errores
+
+
+
+def _comando(almacen, args):
+    if args.comando in ("add", "update", "delete"):
+        contacto = ejecutar(almacen, args.comando, vars(args))
+        if contacto is not None:
+            _escribir([contacto], args.formato)
+    elif args.comando == "search":
+        if args.aproximada:
+            resultados = almacen.buscar_aproximado(args.criterio, args.limit or 10)
+        else:
+            resultados = buscar_contacto(almacen, args.criterio)[:args.limit]
+        _escribir(resultados, args.formato)
+    elif args.comando == "list":
+        _escribir(almacen.listar(args.offset, args.limit), args.formato)
+    elif args.comando == "import":
+        resultado = importar(almacen, args.archivo, args.rechazos)
+        print(
+            f"Leídas: {resultado['leidas']}, agregados: {resultado['agregados']}, "
+            f"rechazadas: {resultado['rechazados']} ({resultado['segundos']:.2f} s)",
+            file=sys.stderr,
+        )
+    elif args.comando == "export":
+        resultado = exportar(almacen, args.archivo)
+        print(f"Exportados: {resultado['escritos']} ({resultado['segundos']:.2f} s)", file=sys.stderr)
+    elif args.comando == "batch":
+        inicio = time.perf_counter()
+        if args.archivo == "-":
+            operaciones, errores = ejecutar_lote(almacen, sys.stdin)
+        else:
+            with open(args.archivo, "r", encoding="utf-8") as archivo:
+                operaciones, errores = ejecutar_lote(almacen, archivo)
+        segundos = time.perf_counter() - inicio
+        por_segundo = f"{operaciones / segundos:,.0f}" if segundos else "-"
+        print(f"Operaciones: {operaciones}, errores: {errores} ({por_segundo} op/s)", file=sys.stderr)
+        return 1 if errores else 0
+    return 0
+
+
+
+def main(argv=None):
+    args = construir_parser().parse_args(argv)
+    try:
+        almacen = abrir_almacen(args.almacen)
+    except ErrorContacto as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        return _comando(almacen, args)
+    except BrokenPipeError:
+        # La salida se cortó (por ejemplo, con | head); no es un error
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (ErrorContacto, ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        almacen.cerrar()
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
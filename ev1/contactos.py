@@ -1,14 +1,42 @@
 import os
 import json
+import re
+import sqlite3
+import sys
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from json.encoder import encode_basestring
+
+try:
+    import fcntl
+except ImportError:
+    # Windows no tiene fcntl; el bloqueo del archivo de contactos usa msvcrt
+    fcntl = None
+    import msvcrt
+
+import trigramas
 
 ARCHIVO_CONTACTOS = "contactos.json"
+ARCHIVO_DIARIO = "contactos.jsonl"
+ARCHIVO_BD = "contactos.db"
+ARCHIVO_TRIGRAMAS = "contactos.trgm"
+OPERACIONES_POR_COMPACTACION = 500
 
 class Contacto:
-    def __init__(self, nombre, telefono, correo, cargo):
+    # Con __slots__ cada contacto no lleva su propio __dict__; los cargos se repiten mucho
+    # entre contactos y se internan para guardar una sola copia de cada uno
+    __slots__ = ("id", "nombre", "telefono", "correo", "cargo")
+
+    def __init__(self, nombre, telefono, correo, cargo, id=None):
+        # id solo lo usa el almacén SQLite para ubicar la fila del contacto
+        self.id = id
         self.nombre = nombre
         self.telefono = telefono
         self.correo = correo
-        self.cargo = cargo
+        # Los archivos antiguos o importados pueden traer el cargo vacío (null) o sin la clave
+        self.cargo = sys.intern(cargo or "")
 
     def to_dict(self):
         return {
@@ -24,55 +52,1131 @@ class Contacto:
             data["nombre"],
             data["telefono"],
             data["correo"],
-            data["cargo"]
+            data.get("cargo")
+        )
+
+    def to_json(self):
+        # Mismo JSON que json.dumps(self.to_dict(), ensure_ascii=False), sin armar el diccionario
+        return (
+            f'{{"nombre": {encode_basestring(self.nombre)}, "telefono": {encode_basestring(self.telefono)}, '
+            f'"correo": {encode_basestring(self.correo)}, "cargo": {encode_basestring(self.cargo)}}}'
         )
 
 
 
-def cargar_contactos():
-    if not os.path.exists(ARCHIVO_CONTACTOS):
-        # Crear el archivo vacío si no existe
-        with open(ARCHIVO_CONTACTOS, "w", encoding="utf-8") as f:
-            json.dump([], f)
-        return []
+def escribir_lista_json(archivo, contactos):
+    # Lista JSON con un contacto por línea, escrita directamente desde los objetos Contacto
+    archivo.write("[")
+    separador = "\n"
+    for contacto in contactos:
+        archivo.write(separador + contacto.to_json())
+        separador = ",\n"
+    archivo.write("\n]\n")
+
+
+
+class AlmacenContactos(ABC):
+    # Interfaz común de los almacenes de contactos que usan las funciones del menú.
+    # Las subclases implementan los métodos abstractos; los demás tienen un comportamiento por defecto.
+    # ContactStore guarda todo en memoria; SQLiteContactStore consulta la base de datos.
+
+    @staticmethod
+    def normalizar(texto):
+        return texto.strip().casefold()
+
+    @staticmethod
+    def palabras(contacto):
+        # Nombre y correo completos, y cada palabra de ambos, para buscar por el inicio de cualquiera
+        nombre = AlmacenContactos.normalizar(contacto.nombre)
+        correo = AlmacenContactos.normalizar(contacto.correo)
+        palabras = {nombre, correo}
+        palabras.update(re.split(r"\s+", nombre))
+        palabras.update(re.split(r"[^\w]+", correo))
+        palabras.discard("")
+        return palabras
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    @abstractmethod
+    def __iter__(self):
+        pass
+
+    @abstractmethod
+    def agregar(self, contacto):
+        pass
+
+    def agregar_varios(self, contactos):
+        # Agrega una tanda de contactos ya validados; retorna cuántos se agregaron
+        for contacto in contactos:
+            self.agregar(contacto)
+        return len(contactos)
+
+    @abstractmethod
+    def eliminar(self, contacto):
+        pass
+
+    @abstractmethod
+    def modificar(self, contacto, nombre, telefono, correo, cargo):
+        pass
+
+    @abstractmethod
+    def existe_correo(self, correo):
+        pass
+
+    @abstractmethod
+    def existe_nombre(self, nombre):
+        pass
+
+    @abstractmethod
+    def existe_telefono(self, telefono):
+        pass
+
+    @abstractmethod
+    def correos_existentes(self, correos):
+        # De los correos normalizados dados, los que ya tiene algún contacto
+        pass
+
+    @abstractmethod
+    def nombres_telefonos_existentes(self, pares):
+        # De los pares (nombre, teléfono) normalizados dados, los que ya tiene algún contacto
+        pass
+
+    @abstractmethod
+    def buscar_exacto(self, criterio, campos=("correo", "nombre", "telefono")):
+        pass
+
+    @abstractmethod
+    def buscar(self, criterio):
+        pass
+
+    @abstractmethod
+    def buscar_aproximado(self, criterio, limite=10):
+        # Contactos parecidos al criterio (sin tildes, con errores de tipeo), los más parecidos primero
+        pass
+
+    def listar(self, desplazamiento=0, limite=None):
+        # Iterador sobre una página de contactos, en orden de registro
+        return islice(iter(self), desplazamiento, None if limite is None else desplazamiento + limite)
+
+    @abstractmethod
+    def guardar(self):
+        pass
+
+    def transaccion(self):
+        # Contexto en que se revisan los duplicados y se hace el cambio sin que otro proceso
+        # modifique los contactos entremedio
+        return nullcontext(self)
+
+    def sincronizar(self):
+        # Trae los cambios que otros procesos hicieron desde la última lectura
+        pass
+
+    def vigente(self, contacto):
+        # El contacto tal como está ahora en el almacén, o None si otro proceso lo eliminó
+        return contacto
+
+    def cerrar(self):
+        pass
+
+
+
+class ContactStore(AlmacenContactos):
+    # Contactos en memoria con índices para no recorrer la lista en cada consulta:
+    # - correo, nombre y teléfono normalizados (casefold) -> contactos, para duplicados en O(1)
+    # - lista ordenada de (palabra, número) para buscar por prefijo con bisect
+    # - índice de trigramas (trigramas.py) para la búsqueda aproximada; se arma la primera vez
+    #   que se usa, o se lee del archivo que guarda el diario
+    # Los índices se actualizan en agregar, modificar y eliminar.
+    # Si tiene un diario (DiarioContactos), cada cambio se agrega también al diario.
+
+    def __init__(self, contactos=(), diario=None):
+        self.diario = diario
+        self._contactos = {}      # número -> Contacto, en orden de registro
+        self._numeros = {}        # Contacto -> número
+        self._siguiente = 0
+        self._por_correo = {}
+        self._por_nombre = {}
+        self._por_telefono = {}
+        self._prefijos = []
+        self._desordenado = False  # las cargas masivas agregan al final y se ordena en la próxima consulta
+        self._trigramas = None
+        for contacto in contactos:
+            self._registrar(contacto, ordenar=False)
+
+    def _indexar(self, contacto, numero, ordenar=True):
+        self._por_correo.setdefault(self.normalizar(contacto.correo), set()).add(numero)
+        self._por_nombre.setdefault(self.normalizar(contacto.nombre), set()).add(numero)
+        self._por_telefono.setdefault(self.normalizar(contacto.telefono), set()).add(numero)
+        for palabra in self.palabras(contacto):
+            if ordenar and not self._desordenado:
+                insort(self._prefijos, (palabra, numero))
+            else:
+                self._prefijos.append((palabra, numero))
+                self._desordenado = True
+        if self._trigramas is not None:
+            self._trigramas.agregar(numero, contacto)
+
+    def _ordenar_prefijos(self):
+        if self._desordenado:
+            self._prefijos.sort()
+            self._desordenado = False
+
+    def _desindexar(self, contacto, numero):
+        for indice, valor in (
+            (self._por_correo, contacto.correo),
+            (self._por_nombre, contacto.nombre),
+            (self._por_telefono, contacto.telefono),
+        ):
+            clave = self.normalizar(valor)
+            indice[clave].discard(numero)
+            if not indice[clave]:
+                del indice[clave]
+        self._ordenar_prefijos()
+        for palabra in self.palabras(contacto):
+            posicion = bisect_left(self._prefijos, (palabra, numero))
+            del self._prefijos[posicion]
+        if self._trigramas is not None:
+            self._trigramas.quitar(numero, contacto)
+
+    def indice_trigramas(self):
+        if self._trigramas is None:
+            self._trigramas = trigramas.IndiceTrigramas()
+            for numero, contacto in self._contactos.items():
+                self._trigramas.agregar(numero, contacto)
+        return self._trigramas
+
+    def _reiniciar(self, contactos):
+        # Otro proceso compactó el archivo: se vuelve a cargar todo, con el mismo diario
+        ContactStore.__init__(self, contactos, self.diario)
+
+    def _registrar(self, contacto, ordenar=True):
+        numero = self._siguiente
+        self._siguiente += 1
+        self._contactos[numero] = contacto
+        self._numeros[contacto] = numero
+        self._indexar(contacto, numero, ordenar)
+
+    def __len__(self):
+        return len(self._contactos)
+
+    def __iter__(self):
+        return iter(self._contactos.values())
+
+    def transaccion(self):
+        if self.diario:
+            return self.diario.transaccion(self)
+        return nullcontext(self)
+
+    def sincronizar(self):
+        if self.diario:
+            self.diario.sincronizar(self)
+
+    def vigente(self, contacto):
+        if contacto in self._numeros:
+            return contacto
+        # Después de una recarga completa los objetos son otros: se busca por correo
+        encontrados = self.buscar_exacto(contacto.correo, ("correo",))
+        return encontrados[0] if encontrados else None
+
+    def agregar(self, contacto):
+        with self.transaccion():
+            self._registrar(contacto)
+            if self.diario:
+                self.diario.alta(contacto)
+
+    def agregar_varios(self, contactos):
+        # Agrega las palabras al final en vez de insertar cada una en su lugar
+        with self.transaccion():
+            for contacto in contactos:
+                self._registrar(contacto, ordenar=False)
+            if self.diario:
+                self.diario.altas(contactos)
+        return len(contactos)
+
+    def eliminar(self, contacto):
+        with self.transaccion():
+            numero = self._numeros.pop(contacto)
+            self._desindexar(contacto, numero)
+            del self._contactos[numero]
+            if self.diario:
+                self.diario.baja(contacto.correo)
+
+    def modificar(self, contacto, nombre, telefono, correo, cargo):
+        with self.transaccion():
+            numero = self._numeros[contacto]
+            correo_anterior = contacto.correo
+            self._desindexar(contacto, numero)
+            contacto.nombre = nombre
+            contacto.telefono = telefono
+            contacto.correo = correo
+            contacto.cargo = cargo
+            self._indexar(contacto, numero)
+            if self.diario:
+                self.diario.cambio(correo_anterior, contacto)
+
+    def _obtener(self, numeros):
+        return [self._contactos[n] for n in sorted(numeros)]
+
+    def existe_correo(self, correo):
+        return self.normalizar(correo) in self._por_correo
+
+    def existe_nombre(self, nombre):
+        return self.normalizar(nombre) in self._por_nombre
+
+    def existe_telefono(self, telefono):
+        return self.normalizar(telefono) in self._por_telefono
+
+    def correos_existentes(self, correos):
+        return {c for c in correos if c in self._por_correo}
+
+    def nombres_telefonos_existentes(self, pares):
+        return {
+            (n, t) for n, t in pares
+            if self._por_nombre.get(n, set()) & self._por_telefono.get(t, set())
+        }
+
+    def buscar_exacto(self, criterio, campos=("correo", "nombre", "telefono")):
+        # Contactos cuyo correo, nombre o teléfono es exactamente el criterio
+        clave = self.normalizar(criterio)
+        indices = {"correo": self._por_correo, "nombre": self._por_nombre, "telefono": self._por_telefono}
+        numeros = set()
+        for campo in campos:
+            numeros |= indices[campo].get(clave, set())
+        return self._obtener(numeros)
+
+    def buscar(self, criterio):
+        # Contactos con una palabra del nombre o del correo que empieza por el criterio
+        prefijo = self.normalizar(criterio)
+        if not prefijo:
+            return list(self)
+        numeros = set()
+        self._ordenar_prefijos()
+        posicion = bisect_left(self._prefijos, (prefijo,))
+        while posicion < len(self._prefijos) and self._prefijos[posicion][0].startswith(prefijo):
+            numeros.add(self._prefijos[posicion][1])
+            posicion += 1
+        return self._obtener(numeros)
+
+    def buscar_aproximado(self, criterio, limite=10):
+        # Se piden más candidatos que el límite porque el orden final usa el texto completo
+        candidatos = self.indice_trigramas().candidatos(criterio, limite * 4)
+        return trigramas.ordenar(criterio, [(n, self._contactos[numero]) for n, numero in candidatos], limite)
+
+    def guardar(self):
+        if self.diario:
+            # Los cambios ya quedaron en el diario; solo se compacta cada cierto número de cambios
+            self.diario.compactar_si_corresponde(self)
+        else:
+            _guardar_lista(self)
+
+    def cerrar(self):
+        if not self.diario:
+            return
+        cambios = self.diario.operaciones
+        if cambios:
+            self.diario.compactar(self)
+        if self._trigramas is not None and (cambios or not self.diario.trigramas_guardados):
+            self.diario.guardar_trigramas(self)
+
+
+
+class SQLiteContactStore(AlmacenContactos):
+    # Contactos en una base SQLite; no se cargan en memoria, cada consulta usa un índice:
+    # - correo_clave, nombre_clave y telefono_clave son los valores normalizados (casefold),
+    #   con índice único en correo_clave, así los duplicados se detectan sin distinguir mayúsculas
+    # - la tabla palabras tiene las mismas palabras que el índice de prefijos de ContactStore
+    #   y se busca por rango (palabra >= prefijo AND palabra < prefijo + máximo)
+    # - la tabla trigramas tiene los trigramas de trigramas.py; la búsqueda aproximada cuenta
+    #   los trigramas en común con GROUP BY
+    # Cada cambio se confirma al hacerlo.
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS contactos (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            telefono TEXT NOT NULL,
+            correo TEXT NOT NULL,
+            cargo TEXT NOT NULL,
+            nombre_clave TEXT NOT NULL,
+            telefono_clave TEXT NOT NULL,
+            correo_clave TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS contactos_correo ON contactos (correo_clave);
+        CREATE INDEX IF NOT EXISTS contactos_nombre ON contactos (nombre_clave);
+        CREATE INDEX IF NOT EXISTS contactos_telefono ON contactos (telefono_clave);
+        CREATE TABLE IF NOT EXISTS palabras (
+            palabra TEXT NOT NULL,
+            contacto_id INTEGER NOT NULL REFERENCES contactos (id) ON DELETE CASCADE,
+            PRIMARY KEY (palabra, contacto_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS palabras_contacto ON palabras (contacto_id);
+        CREATE TABLE IF NOT EXISTS trigramas (
+            trigrama TEXT NOT NULL,
+            contacto_id INTEGER NOT NULL REFERENCES contactos (id) ON DELETE CASCADE,
+            PRIMARY KEY (trigrama, contacto_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS trigramas_contacto ON trigramas (contacto_id);
+    """
+    COLUMNAS = "id, nombre, telefono, correo, cargo"
+    CAMPOS = {"correo": "correo_clave", "nombre": "nombre_clave", "telefono": "telefono_clave"}
+    PARAMETROS_POR_CONSULTA = 900
+
+    def __init__(self, ruta=ARCHIVO_BD):
+        # Si otro proceso está escribiendo, se espera hasta 10 segundos en vez de fallar de inmediato
+        self.conexion = sqlite3.connect(ruta, timeout=10)
+        self.conexion.execute("PRAGMA foreign_keys = ON")
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        # Con WAL, NORMAL no arriesga la integridad de la base y evita un fsync por cada cambio
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        self.conexion.executescript(self.ESQUEMA)
+        self._completar_trigramas()
+
+    def _completar_trigramas(self):
+        # Las bases creadas antes de la búsqueda aproximada no tienen la tabla trigramas llena
+        vacia = self.conexion.execute("SELECT 1 FROM trigramas LIMIT 1").fetchone() is None
+        if vacia and self.conexion.execute("SELECT 1 FROM contactos LIMIT 1").fetchone():
+            with self.conexion:
+                for contacto in self._filas(f"SELECT {self.COLUMNAS} FROM contactos"):
+                    self._indexar_trigramas(contacto)
+
+    @staticmethod
+    def _contacto(fila):
+        return Contacto(fila[1], fila[2], fila[3], fila[4], id=fila[0])
+
+    def _filas(self, consulta, parametros=()):
+        return [self._contacto(f) for f in self.conexion.execute(consulta, parametros)]
+
+    def _valores(self, contacto):
+        return (
+            contacto.nombre, contacto.telefono, contacto.correo, contacto.cargo,
+            self.normalizar(contacto.nombre), self.normalizar(contacto.telefono), self.normalizar(contacto.correo),
+        )
+
+    def _insertar(self, contacto):
+        cursor = self.conexion.execute(
+            "INSERT INTO contactos (nombre, telefono, correo, cargo, nombre_clave, telefono_clave, correo_clave)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._valores(contacto),
+        )
+        contacto.id = cursor.lastrowid
+        self._indexar_palabras(contacto)
+        self._indexar_trigramas(contacto)
+
+    def _indexar_palabras(self, contacto):
+        self.conexion.executemany(
+            "INSERT INTO palabras (palabra, contacto_id) VALUES (?, ?)",
+            [(p, contacto.id) for p in self.palabras(contacto)],
+        )
+
+    def _indexar_trigramas(self, contacto):
+        self.conexion.executemany(
+            "INSERT INTO trigramas (trigrama, contacto_id) VALUES (?, ?)",
+            [(t, contacto.id) for t in trigramas.trigramas(trigramas.texto_contacto(contacto))],
+        )
+
+    def __len__(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM contactos").fetchone()[0]
+
+    def __iter__(self):
+        cursor = self.conexion.execute(f"SELECT {self.COLUMNAS} FROM contactos ORDER BY id")
+        return (self._contacto(f) for f in cursor)
+
+    def listar(self, desplazamiento=0, limite=None):
+        cursor = self.conexion.execute(
+            f"SELECT {self.COLUMNAS} FROM contactos ORDER BY id LIMIT ? OFFSET ?",
+            (-1 if limite is None else limite, desplazamiento),
+        )
+        return (self._contacto(f) for f in cursor)
+
+    @contextmanager
+    def transaccion(self):
+        # BEGIN IMMEDIATE toma el bloqueo de escritura de la base desde el principio, así que
+        # ningún otro proceso agrega un duplicado entre la revisión y el cambio
+        if self.conexion.in_transaction:
+            yield self
+            return
+        self.conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            if self.conexion.in_transaction:
+                self.conexion.rollback()
+            raise
+        if self.conexion.in_transaction:
+            self.conexion.commit()
+
+    def vigente(self, contacto):
+        encontrados = self._filas(f"SELECT {self.COLUMNAS} FROM contactos WHERE id = ?", (contacto.id,))
+        return encontrados[0] if encontrados else None
+
+    def agregar(self, contacto):
+        try:
+            with self.conexion:
+                self._insertar(contacto)
+        except sqlite3.IntegrityError:
+            # El índice único de correo_clave rechaza el correo aunque lo haya agregado otro proceso
+            raise ErrorContacto("ya existe un contacto con ese correo electrónico.")
+
+    def agregar_varios(self, contactos):
+        # Inserta en una sola transacción; omite los correos repetidos y retorna cuántos se agregaron
+        agregados = 0
+        with self.conexion:
+            for contacto in contactos:
+                try:
+                    self._insertar(contacto)
+                except sqlite3.IntegrityError:
+                    continue
+                agregados += 1
+        return agregados
+
+    def eliminar(self, contacto):
+        with self.conexion:
+            self.conexion.execute("DELETE FROM contactos WHERE id = ?", (contacto.id,))
+
+    def modificar(self, contacto, nombre, telefono, correo, cargo):
+        nuevo = Contacto(nombre, telefono, correo, cargo, id=contacto.id)
+        try:
+            with self.conexion:
+                self.conexion.execute(
+                    "UPDATE contactos SET nombre = ?, telefono = ?, correo = ?, cargo = ?,"
+                    " nombre_clave = ?, telefono_clave = ?, correo_clave = ? WHERE id = ?",
+                    self._valores(nuevo) + (contacto.id,),
+                )
+                self.conexion.execute("DELETE FROM palabras WHERE contacto_id = ?", (contacto.id,))
+                self.conexion.execute("DELETE FROM trigramas WHERE contacto_id = ?", (contacto.id,))
+                self._indexar_palabras(nuevo)
+                self._indexar_trigramas(nuevo)
+        except sqlite3.IntegrityError:
+            raise ErrorContacto("ya existe un contacto con ese correo electrónico.")
+        contacto.nombre = nombre
+        contacto.telefono = telefono
+        contacto.correo = correo
+        contacto.cargo = cargo
+
+    def _existe(self, columna, valor):
+        consulta = f"SELECT 1 FROM contactos WHERE {columna} = ? LIMIT 1"
+        return self.conexion.execute(consulta, (self.normalizar(valor),)).fetchone() is not None
+
+    def existe_correo(self, correo):
+        return self._existe("correo_clave", correo)
+
+    def existe_nombre(self, nombre):
+        return self._existe("nombre_clave", nombre)
+
+    def existe_telefono(self, telefono):
+        return self._existe("telefono_clave", telefono)
+
+    def _consultar_en(self, consulta, valores):
+        # consulta tiene un {} que se reemplaza por los ? de la lista; se divide en partes por el
+        # límite de parámetros de SQLite
+        valores = list(valores)
+        for inicio in range(0, len(valores), self.PARAMETROS_POR_CONSULTA):
+            parte = valores[inicio:inicio + self.PARAMETROS_POR_CONSULTA]
+            yield from self.conexion.execute(consulta.format(", ".join("?" * len(parte))), parte)
+
+    def correos_existentes(self, correos):
+        return {f[0] for f in self._consultar_en("SELECT correo_clave FROM contactos WHERE correo_clave IN ({})", correos)}
+
+    def nombres_telefonos_existentes(self, pares):
+        pares = set(pares)
+        filas = self._consultar_en(
+            "SELECT nombre_clave, telefono_clave FROM contactos WHERE nombre_clave IN ({})", {n for n, _ in pares}
+        )
+        return {f for f in filas if f in pares}
+
+    def buscar_exacto(self, criterio, campos=("correo", "nombre", "telefono")):
+        # Un SELECT por campo unidos con UNION, para que cada uno use su índice
+        consultas = " UNION ".join(
+            f"SELECT {self.COLUMNAS} FROM contactos WHERE {self.CAMPOS[campo]} = ?" for campo in campos
+        )
+        clave = self.normalizar(criterio)
+        return self._filas(f"{consultas} ORDER BY id", (clave,) * len(campos))
+
+    def buscar(self, criterio):
+        prefijo = self.normalizar(criterio)
+        if not prefijo:
+            return list(self)
+        return self._filas(
+            f"SELECT {self.COLUMNAS} FROM contactos WHERE id IN ("
+            " SELECT contacto_id FROM palabras WHERE palabra >= ? AND palabra < ?"
+            ") ORDER BY id",
+            (prefijo, prefijo + "\U0010ffff"),
+        )
+
+    def buscar_aproximado(self, criterio, limite=10):
+        buscados = sorted(trigramas.trigramas(criterio))
+        if not buscados:
+            return []
+        filas = self.conexion.execute(
+            f"SELECT contacto_id, COUNT(*) AS comunes FROM trigramas WHERE trigrama IN ({', '.join('?' * len(buscados))})"
+            " GROUP BY contacto_id HAVING comunes >= ? ORDER BY comunes DESC, contacto_id LIMIT ?",
+            buscados + [trigramas.minimo_comun(len(buscados)), limite * 4],
+        ).fetchall()
+        comunes = dict(filas)
+        contactos = self._consultar_en(f"SELECT {self.COLUMNAS} FROM contactos WHERE id IN ({{}})", comunes)
+        return trigramas.ordenar(criterio, [(comunes[f[0]], self._contacto(f)) for f in contactos], limite)
+
+    def guardar(self):
+        # Cada cambio ya se confirmó en agregar, modificar o eliminar
+        pass
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+
+def migrar_json(almacen, archivo_contactos=ARCHIVO_CONTACTOS, archivo_diario=ARCHIVO_DIARIO):
+    # Copia al almacén los contactos del archivo JSON (con los cambios pendientes del diario, si hay)
+    # sin modificar ninguno de los dos. Retorna (agregados, omitidos); se omiten los correos repetidos.
+    # Lanza ArchivoDanado si el archivo JSON no se puede leer.
+    contactos = list(DiarioContactos(archivo_contactos, archivo_diario).leer())
+    agregados = almacen.agregar_varios(contactos)
+    return agregados, len(contactos) - agregados
+
+
+
+class BloqueoArchivo:
+    # Bloqueo exclusivo entre procesos (advisory: solo lo respetan los procesos que lo piden)
+    # sobre un archivo .lock aparte. Se puede tomar de nuevo dentro del mismo proceso: solo
+    # la primera vez bloquea y solo la última salida lo libera.
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+        self._niveles = 0
+
+    def __enter__(self):
+        if self._niveles == 0:
+            archivo = open(self.ruta, "a+b")
+            try:
+                _bloquear(archivo)
+            except OSError:
+                archivo.close()
+                raise
+            self._archivo = archivo
+        self._niveles += 1
+        return self
+
+    def __exit__(self, *excepcion):
+        self._niveles -= 1
+        if self._niveles == 0:
+            _desbloquear(self._archivo)
+            self._archivo.close()
+            self._archivo = None
+
+
+
+def _bloquear(archivo):
+    if fcntl:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+    else:
+        # Windows: msvcrt bloquea un byte del archivo; LK_LOCK reintenta por 10 segundos
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK, 1)
+
+
+
+def _desbloquear(archivo):
+    if fcntl:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+    else:
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+
+def _firma_archivo(ruta):
+    # Cambia cada vez que el archivo se reemplaza o se modifica; None si no existe
+    try:
+        datos = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return datos.st_ino, datos.st_mtime_ns, datos.st_size
+
+
+
+class DiarioContactos:
+    # Persistencia por diario: cada alta, cambio o baja se agrega como una línea JSON
+    # al final de ARCHIVO_DIARIO, sin reescribir la lista completa. Cada
+    # OPERACIONES_POR_COMPACTACION cambios el diario se compacta: se escribe la lista
+    # completa en ARCHIVO_CONTACTOS y se empieza un diario vacío.
+    #
+    # El archivo de contactos y la primera línea del diario llevan un número de
+    # generación. Si el programa se interrumpe entre reemplazar el archivo de contactos
+    # y vaciar el diario, las generaciones no coinciden y el diario viejo se descarta
+    # (sus cambios ya están en el archivo de contactos).
+    #
+    # Varios procesos pueden usar los mismos archivos: todo cambio se hace con el bloqueo
+    # de ARCHIVO_CONTACTOS.lock tomado y después de sincronizar. Para sincronizar se comparan
+    # inodo, fecha y tamaño de los archivos con los de la última lectura: si solo creció el
+    # diario se aplican las líneas nuevas (desde la posición ya leída); si otro proceso
+    # compactó, se vuelve a cargar todo.
+
+    def __init__(self, archivo_contactos=ARCHIVO_CONTACTOS, archivo_diario=ARCHIVO_DIARIO,
+                 limite=OPERACIONES_POR_COMPACTACION, archivo_trigramas=ARCHIVO_TRIGRAMAS):
+        self.archivo_contactos = archivo_contactos
+        self.archivo_diario = archivo_diario
+        self.archivo_trigramas = archivo_trigramas
+        self.limite = limite
+        self.bloqueo = BloqueoArchivo(archivo_contactos + ".lock")
+        self.generacion = 0
+        self.operaciones = 0
+        self.trigramas_guardados = False
+        self.danado = False       # el diario tenía una línea completa que no se pudo aplicar
+        self._firma_contactos = None
+        self._firma_diario = None
+        self._posicion = 0        # bytes del diario ya aplicados al store
+
+    def cargar(self, store=None):
+        # Carga el store completo; si se pasa un store, lo vuelve a llenar en el lugar
+        with self.bloqueo:
+            generacion, contactos = _leer_archivo_contactos(self.archivo_contactos)
+            self._firma_contactos = _firma_archivo(self.archivo_contactos)
+            self.generacion = generacion
+            if store is None:
+                store = ContactStore(contactos)
+            else:
+                store._reiniciar(contactos)
+            # El índice de trigramas guardado sirve si es de la misma generación; el diario lo pone al día
+            store._trigramas = trigramas.IndiceTrigramas.cargar(self.archivo_trigramas, generacion)
+            self.trigramas_guardados = store._trigramas is not None
+            store.diario = None
+            completo = self._repetir(store)
+            store.diario = self
+            # Una línea cortada al final (escritura interrumpida) se descarta al compactar
+            if not completo or self.operaciones >= self.limite:
+                self._apartar_si_danado()
+                self._compactar(store)
+            return store
+
+    def leer(self):
+        # Los contactos con los cambios del diario aplicados, en un store sin diario; no escribe
+        # en los archivos (lo usa la migración a SQLite)
+        with self.bloqueo:
+            self.generacion, contactos = _leer_archivo_contactos(self.archivo_contactos)
+            store = ContactStore(contactos)
+            self._repetir(store, iniciar=False)
+            return store
+
+    def _repetir(self, store, iniciar=True):
+        # Aplica al store los cambios del diario; retorna False si hay una línea dañada
+        self.operaciones = 0
+        self.danado = False
+        if not os.path.exists(self.archivo_diario):
+            if iniciar:
+                self._iniciar()
+            return True
+        with open(self.archivo_diario, "rb") as f:
+            self._firma_diario = _firma_archivo(self.archivo_diario)
+            try:
+                cabecera = json.loads(f.readline() or b"{}")
+            except json.JSONDecodeError:
+                self.danado = True
+                return False
+            if cabecera.get("generacion") != self.generacion:
+                return False
+            self._posicion = f.tell()
+            return self._aplicar_desde(f, store)
+
+    def _aplicar_desde(self, f, store):
+        for linea in iter(f.readline, b""):
+            if not linea.endswith(b"\n"):
+                return False
+            try:
+                self._aplicar(store, json.loads(linea))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # Una línea completa que no se puede aplicar no es una escritura interrumpida
+                self.danado = True
+                return False
+            self.operaciones += 1
+            self._posicion = f.tell()
+        return True
+
+    def sincronizar(self, store):
+        # Aplica los cambios que otros procesos guardaron desde la última lectura; retorna si hubo
+        with self.bloqueo:
+            firma_diario = _firma_archivo(self.archivo_diario)
+            if _firma_archivo(self.archivo_contactos) != self._firma_contactos or (
+                firma_diario is None or firma_diario[0] != self._firma_diario[0]
+            ):
+                self.cargar(store)
+                return True
+            if firma_diario[2] == self._posicion:
+                return False
+            with open(self.archivo_diario, "rb") as f:
+                f.seek(self._posicion)
+                store.diario = None
+                try:
+                    completo = self._aplicar_desde(f, store)
+                finally:
+                    store.diario = self
+            self._firma_diario = _firma_archivo(self.archivo_diario)
+            if not completo:
+                self._apartar_si_danado()
+                self._compactar(store)
+            return True
+
+    def transaccion(self, store):
+        # Toma el bloqueo y sincroniza; lo que se haga dentro no se mezcla con otros procesos
+        return _Transaccion(self, store)
+
+    @staticmethod
+    def _aplicar(store, registro):
+        if registro["op"] == "alta":
+            # agregar_varios deja el orden del índice de prefijos para el final de la carga
+            store.agregar_varios([Contacto.from_dict(registro["contacto"])])
+            return
+        encontrados = store.buscar_exacto(registro["correo"], ("correo",))
+        if not encontrados:
+            return
+        if registro["op"] == "baja":
+            store.eliminar(encontrados[0])
+        else:
+            datos = registro["contacto"]
+            store.modificar(encontrados[0], datos["nombre"], datos["telefono"], datos["correo"], datos["cargo"])
+
+    def _escribir(self, *lineas):
+        # Se llama dentro de una transacción, así que el diario termina donde se leyó por última vez
+        with self.bloqueo:
+            with open(self.archivo_diario, "ab") as f:
+                f.write("".join(linea + "\n" for linea in lineas).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                self._posicion = f.tell()
+            self._firma_diario = _firma_archivo(self.archivo_diario)
+        self.operaciones += len(lineas)
+
+    def alta(self, contacto):
+        self._escribir(f'{{"op": "alta", "contacto": {contacto.to_json()}}}')
+
+    def altas(self, contactos):
+        self._escribir(*(f'{{"op": "alta", "contacto": {c.to_json()}}}' for c in contactos))
+
+    def cambio(self, correo_anterior, contacto):
+        self._escribir(
+            f'{{"op": "cambio", "correo": {encode_basestring(correo_anterior)}, "contacto": {contacto.to_json()}}}'
+        )
+
+    def baja(self, correo):
+        self._escribir(f'{{"op": "baja", "correo": {encode_basestring(correo)}}}')
+
+    def _iniciar(self):
+        _reemplazar_archivo(self.archivo_diario, lambda f: f.write(json.dumps({"generacion": self.generacion}) + "\n"))
+        self._firma_diario = _firma_archivo(self.archivo_diario)
+        self._posicion = self._firma_diario[2]
+        self.operaciones = 0
+
+    def _apartar_si_danado(self):
+        # Se conserva una copia del diario dañado antes de que la compactación lo reemplace
+        if self.danado:
+            apartado = _apartar(self.archivo_diario)
+            print(f"Aviso: el diario tenía líneas dañadas; se guardó una copia en {apartado}.", file=sys.stderr)
+            self.danado = False
+
+    def compactar(self, store):
+        # Se sincroniza antes para no escribir una lista sin los cambios de otros procesos
+        with self.transaccion(store):
+            self._compactar(store)
+
+    def _compactar(self, store):
+        self.generacion += 1
+
+        def escribir(f):
+            f.write(f'{{"generacion": {self.generacion}, "contactos": ')
+            escribir_lista_json(f, store)
+            f.write("}\n")
+
+        _reemplazar_archivo(self.archivo_contactos, escribir)
+        self._firma_contactos = _firma_archivo(self.archivo_contactos)
+        self._iniciar()
+        self.trigramas_guardados = False
+
+    def guardar_trigramas(self, store):
+        # Las claves del índice son los números del store; al volver a cargar, los contactos se
+        # numeran 0, 1, 2... en el orden del archivo, así que se renumeran si hubo eliminaciones
+        with self.transaccion(store):
+            indice = store.indice_trigramas()
+            if store._siguiente != len(store):
+                indice = indice.renumerar({numero: i for i, numero in enumerate(store._contactos)})
+            _reemplazar_archivo(self.archivo_trigramas, lambda f: indice.guardar(f, self.generacion))
+        self.trigramas_guardados = True
+
+    def compactar_si_corresponde(self, store):
+        if self.operaciones >= self.limite:
+            self.compactar(store)
+
+
+
+class _Transaccion:
+    def __init__(self, diario, store):
+        self.diario = diario
+        self.store = store
+
+    def __enter__(self):
+        self.diario.bloqueo.__enter__()
+        try:
+            self.diario.sincronizar(self.store)
+        except BaseException:
+            self.diario.bloqueo.__exit__(None, None, None)
+            raise
+        return self.store
+
+    def __exit__(self, *excepcion):
+        self.diario.bloqueo.__exit__(*excepcion)
+
+
+
+def _reemplazar_archivo(ruta, escribir):
+    # escribir(f) escribe el contenido en un archivo temporal que luego se renombra:
+    # el archivo nunca queda a medio escribir
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        escribir(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+
+def _apartar(ruta):
+    # Renombra el archivo a ruta.corrupto (o .corrupto1, .corrupto2...) sin modificarlo; retorna el nombre nuevo
+    destino, numero = ruta + ".corrupto", 0
+    while os.path.exists(destino):
+        numero += 1
+        destino = f"{ruta}.corrupto{numero}"
+    os.replace(ruta, destino)
+    return destino
+
+
+
+class ArchivoDanado(ValueError):
+    pass
+
+
+
+def _leer_archivo_contactos(ruta):
+    # (generación, contactos); acepta la lista simple y el formato con generación del diario
+    # Lanza ArchivoDanado si el archivo no es una lista de contactos válida
     try:
-        with open(ARCHIVO_CONTACTOS, "r", encoding="utf-8") as f:
+        with open(ruta, "r", encoding="utf-8") as f:
             datos = json.load(f)
-            return [Contacto.from_dict(c) for c in datos]
-    except (json.JSONDecodeError, ValueError):
+        if isinstance(datos, dict):
+            return datos.get("generacion", 0), [Contacto.from_dict(c) for c in datos["contactos"]]
+        return 0, [Contacto.from_dict(c) for c in datos]
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ArchivoDanado(f"{ruta} no se puede leer ({e})") from e
+
+
+
+def _crear_archivo_contactos(ruta=ARCHIVO_CONTACTOS):
+    # Crear el archivo vacío si no existe (y si otro proceso no lo creó mientras tanto)
+    if not os.path.exists(ruta):
+        with BloqueoArchivo(ruta + ".lock"):
+            if not os.path.exists(ruta):
+                _reemplazar_archivo(ruta, lambda f: json.dump([], f))
+
+
+
+def cargar_contactos():
+    _crear_archivo_contactos()
+    try:
+        return _leer_archivo_contactos(ARCHIVO_CONTACTOS)[1]
+    except ArchivoDanado:
         return []
 
 
 
+def cargar_contactos_diario(diario=None):
+    diario = diario or DiarioContactos()
+    _crear_archivo_contactos(diario.archivo_contactos)
+    with diario.bloqueo:
+        try:
+            return diario.cargar()
+        except ArchivoDanado as e:
+            # El archivo dañado se aparta sin tocarlo, junto con su diario, y se parte con una agenda vacía
+            apartado = _apartar(diario.archivo_contactos)
+            if os.path.exists(diario.archivo_diario):
+                _apartar(diario.archivo_diario)
+            # El índice guardado podría coincidir en generación con el archivo nuevo
+            if os.path.exists(diario.archivo_trigramas):
+                os.remove(diario.archivo_trigramas)
+            print(f"Aviso: {e}; se guardó como {apartado} y se empieza una agenda vacía.", file=sys.stderr)
+            diario.generacion = 0
+            store = ContactStore(diario=diario)
+            diario._compactar(store)
+            return store
+
+
+
+def abrir_almacen(tipo=None):
+    # tipo "json" usa el archivo JSON con diario (todo en memoria); "sqlite" (por defecto, o lo que
+    # indique CONTACTOS_ALMACEN) consulta la base de datos y la crea desde el JSON la primera vez
+    tipo = tipo or os.environ.get("CONTACTOS_ALMACEN", "sqlite")
+    if tipo == "json":
+        return cargar_contactos_diario()
+    if not os.path.exists(ARCHIVO_BD) and os.path.exists(ARCHIVO_CONTACTOS):
+        try:
+            crear_bd_desde_json()
+        except ArchivoDanado as e:
+            raise ErrorContacto(f"no se pudo migrar a SQLite: {e}. Corrija el archivo y vuelva a intentarlo.")
+    return SQLiteContactStore(ARCHIVO_BD)
+
+
+
+def crear_bd_desde_json(ruta_bd=ARCHIVO_BD, archivo_contactos=ARCHIVO_CONTACTOS, archivo_diario=ARCHIVO_DIARIO):
+    # La base se arma en un archivo temporal que se renombra solo si la migración termina: si falla,
+    # no queda una base vacía y la próxima ejecución lo vuelve a intentar
+    with BloqueoArchivo(ruta_bd + ".lock"):
+        if os.path.exists(ruta_bd):
+            # Otro proceso la creó mientras se esperaba el bloqueo
+            return
+        temporal = ruta_bd + ".tmp"
+        _eliminar_bd(temporal)
+        almacen = SQLiteContactStore(temporal)
+        try:
+            agregados, omitidos = migrar_json(almacen, archivo_contactos, archivo_diario)
+            # Sin WAL todo queda en el archivo principal, que es el único que se renombra
+            almacen.conexion.execute("PRAGMA journal_mode = DELETE")
+        except BaseException:
+            almacen.cerrar()
+            _eliminar_bd(temporal)
+            raise
+        almacen.cerrar()
+        os.replace(temporal, ruta_bd)
+    if agregados or omitidos:
+        print(
+            f"Se migraron {agregados} contacto(s) desde el archivo JSON ({omitidos} correo(s) repetido(s) omitido(s)).",
+            file=sys.stderr,
+        )
+
+
+
+def _eliminar_bd(ruta):
+    for archivo in (ruta, ruta + "-wal", ruta + "-shm", ruta + "-journal"):
+        if os.path.exists(archivo):
+            os.remove(archivo)
+
+
+
 def guardar_contactos(contactos):
+    if isinstance(contactos, AlmacenContactos):
+        contactos.guardar()
+    else:
+        _guardar_lista(contactos)
+
+
+
+def _guardar_lista(contactos):
+    # Archivo temporal y renombrado: otro proceso que lea al mismo tiempo ve la lista anterior o la nueva
     try:
-        with open(ARCHIVO_CONTACTOS, "w", encoding="utf-8") as f:
-            json.dump([c.to_dict() for c in contactos], f, ensure_ascii=False, indent=2)
+        with BloqueoArchivo(ARCHIVO_CONTACTOS + ".lock"):
+            _reemplazar_archivo(ARCHIVO_CONTACTOS, lambda f: escribir_lista_json(f, contactos))
     except Exception as e:
         print(f"Error al guardar contactos: {e}")
 
 
 
 def buscar_contacto(contactos, criterio):
+    if isinstance(contactos, AlmacenContactos):
+        return contactos.buscar(criterio)
     return [c for c in contactos if criterio.lower() in c.nombre.lower() or criterio.lower() in c.correo.lower()]
 
 
 
 def existe_correo(contactos, correo):
+    if isinstance(contactos, AlmacenContactos):
+        return contactos.existe_correo(correo)
     return any(c.correo.lower() == correo.lower() for c in contactos)
 
 
 
 def existe_nombre(contactos, nombre):
+    if isinstance(contactos, AlmacenContactos):
+        return contactos.existe_nombre(nombre)
     return any(c.nombre.lower() == nombre.lower() for c in contactos)
 
 
 
 def existe_telefono(contactos, telefono):
+    if isinstance(contactos, AlmacenContactos):
+        return contactos.existe_telefono(telefono)
     return any(c.telefono.lower() == telefono.lower() for c in contactos)
 
 
 
+class ErrorContacto(ValueError):
+    pass
+
+
+
+# Operaciones sin input(): las usan los menús, la línea de comandos (cli.py) y los scripts.
+# Lanzan ErrorContacto con el mismo mensaje que muestran los menús.
+
+def crear_contacto(contactos, nombre, telefono, correo, cargo=""):
+    nombre, telefono, correo, cargo = nombre.strip(), telefono.strip(), correo.strip(), cargo.strip()
+    if len(telefono) > 20:
+        raise ErrorContacto("el número de teléfono no puede superar los 20 caracteres.")
+    with contactos.transaccion():
+        if existe_correo(contactos, correo):
+            raise ErrorContacto("ya existe un contacto con ese correo electrónico.")
+        if existe_nombre(contactos, nombre) and existe_telefono(contactos, telefono):
+            raise ErrorContacto("ya existe un contacto con ese nombre y número de teléfono.")
+        contacto = Contacto(nombre, telefono, correo, cargo)
+        contactos.agregar(contacto)
+        guardar_contactos(contactos)
+    return contacto
+
+
+
+def contacto_por_correo(contactos, correo):
+    encontrados = contactos.buscar_exacto(correo, ("correo",))
+    if not encontrados:
+        raise ErrorContacto("este contacto no existe.")
+    return encontrados[0]
+
+
+
+def actualizar_contacto(contactos, contacto, nombre=None, telefono=None, correo=None, cargo=None):
+    # Los datos que no se indican (o vienen vacíos) se mantienen
+    with contactos.transaccion():
+        contacto = _vigente(contactos, contacto)
+        nombre = (nombre or "").strip() or contacto.nombre
+        telefono = (telefono or "").strip() or contacto.telefono
+        correo = (correo or "").strip() or contacto.correo
+        cargo = (cargo or "").strip() or contacto.cargo
+        if len(telefono) > 20:
+            raise ErrorContacto("el número de teléfono no puede superar los 20 caracteres.")
+        if correo != contacto.correo and existe_correo(contactos, correo):
+            raise ErrorContacto("ya existe un contacto con ese correo electrónico.")
+        contactos.modificar(contacto, nombre, telefono, correo, cargo)
+        guardar_contactos(contactos)
+    return contacto
+
+
+
+def borrar_contacto(contactos, contacto):
+    with contactos.transaccion():
+        contactos.eliminar(_vigente(contactos, contacto))
+        guardar_contactos(contactos)
+
+
+
+def _vigente(contactos, contacto):
+    # El contacto pudo cambiar o desaparecer en otro proceso desde que se buscó
+    vigente = contactos.vigente(contacto)
+    if vigente is None:
+        raise ErrorContacto("este contacto no existe.")
+    return vigente
+
+
+
+def describir_contacto(contacto):
+    return f"Nombre: {contacto.nombre}, Teléfono: {contacto.telefono}, Correo: {contacto.correo}, Cargo: {contacto.cargo}"
+
+
+
 def registrar_contacto(contactos):
     print("\n ★ Registrar nuevo contacto  ★")
     nombre = input("Nombre: ").strip()
@@ -82,34 +1186,25 @@ def registrar_contacto(contactos):
         return
     correo = input("Correo electrónico: ").strip()
     cargo = input("Cargo en la empresa: ").strip()
-    if existe_correo(contactos, correo):
-        print("Error: ya existe un contacto con ese correo electrónico.")
-        return
-    if existe_nombre(contactos, nombre) and existe_telefono(contactos, telefono):
-        print("Error: ya existe un contacto con ese nombre y número de teléfono.")
+    try:
+        crear_contacto(contactos, nombre, telefono, correo, cargo)
+    except ErrorContacto as e:
+        print(f"Error: {e}")
         return
-    contacto = Contacto(nombre, telefono, correo, cargo)
-    contactos.append(contacto)
-    guardar_contactos(contactos)
     print("Contacto registrado exitosamente.")
 
 
 
 def eliminar_contacto(contactos):
     print("\n ★ Eliminar contacto ★ ")
-    criterio = input("Ingrese el nombre, correo electrónico o número de teléfono del contacto a eliminar: ").strip().lower()
-    encontrados = [
-        c for c in contactos
-        if criterio == c.correo.lower()
-        or criterio == c.nombre.lower()
-        or criterio == c.telefono.lower()
-    ]
+    criterio = input("Ingrese el nombre, correo electrónico o número de teléfono del contacto a eliminar: ").strip()
+    encontrados = contactos.buscar_exacto(criterio)
     if not encontrados:
         print("Error: este contacto no existe.")
         return
     print(f"Se encontraron {len(encontrados)} contacto(s):")
     for idx, c in enumerate(encontrados, 1):
-        print(f"{idx}. Nombre: {c.nombre}, Teléfono: {c.telefono}, Correo: {c.correo}, Cargo: {c.cargo}")
+        print(f"{idx}. {describir_contacto(c)}")
     if len(encontrados) > 1:
         seleccion = input("Ingrese el número del contacto que desea eliminar: ").strip()
         if not seleccion.isdigit() or int(seleccion) < 1 or int(seleccion) > len(encontrados):
@@ -121,8 +1216,11 @@ def eliminar_contacto(contactos):
     print(f"¿Está seguro que desea eliminar el contacto '{contacto_a_eliminar.nombre}'? (s/n)")
     confirm = input().strip().lower()
     if confirm == "s":
-        contactos.remove(contacto_a_eliminar)
-        guardar_contactos(contactos)
+        try:
+            borrar_contacto(contactos, contacto_a_eliminar)
+        except ErrorContacto as e:
+            print(f"Error: {e}")
+            return
         print("Contacto eliminado exitosamente.")
     else:
         print("Acción cancelada.")
@@ -131,18 +1229,15 @@ def eliminar_contacto(contactos):
 
 def modificar_contacto(contactos):
     print("\n ★ Modificar información de contacto ★ ")
-    criterio = input("Ingrese el nombre o correo electrónico del contacto a modificar: ").strip().lower()
-    encontrados = [
-        c for c in contactos
-        if criterio == c.correo.lower() or criterio == c.nombre.lower()
-    ]
+    criterio = input("Ingrese el nombre o correo electrónico del contacto a modificar: ").strip()
+    encontrados = contactos.buscar_exacto(criterio, ("correo", "nombre"))
     if not encontrados:
         print("Error: este contacto no existe.")
         return
     if len(encontrados) > 1:
         print(f"Se encontraron {len(encontrados)} contacto(s):")
         for idx, c in enumerate(encontrados, 1):
-            print(f"{idx}. Nombre: {c.nombre}, Teléfono: {c.telefono}, Correo: {c.correo}, Cargo: {c.cargo}")
+            print(f"{idx}. {describir_contacto(c)}")
         seleccion = input("Ingrese el número del contacto que desea modificar: ").strip()
         if not seleccion.isdigit() or int(seleccion) < 1 or int(seleccion) > len(encontrados):
             print("Selección inválida.")
@@ -150,7 +1245,7 @@ def modificar_contacto(contactos):
         contacto = encontrados[int(seleccion) - 1]
     else:
         contacto = encontrados[0]
-    print(f"Contacto actual: Nombre: {contacto.nombre}, Teléfono: {contacto.telefono}, Correo: {contacto.correo}, Cargo: {contacto.cargo}")
+    print(f"Contacto actual: {describir_contacto(contacto)}")
     print("¿Está seguro que desea modificar la información de este contacto? (si/no)")
     confirm = input().strip().lower()
     if confirm != "si":
@@ -163,14 +1258,11 @@ def modificar_contacto(contactos):
         return
     nuevo_correo = input(f"Nuevo correo [{contacto.correo}]: ").strip() or contacto.correo
     cargo = input(f"Nuevo cargo [{contacto.cargo}]: ").strip() or contacto.cargo
-    if nuevo_correo != contacto.correo and existe_correo(contactos, nuevo_correo):
-        print("Error: ya existe un contacto con ese correo electrónico.")
+    try:
+        actualizar_contacto(contactos, contacto, nombre, telefono, nuevo_correo, cargo)
+    except ErrorContacto as e:
+        print(f"Error: {e}")
         return
-    contacto.nombre = nombre
-    contacto.telefono = telefono
-    contacto.correo = nuevo_correo
-    contacto.cargo = cargo
-    guardar_contactos(contactos)
     print("Contacto modificado exitosamente.")
 
 
@@ -181,7 +1273,7 @@ def listar_contactos(contactos):
         print("No hay contactos registrados.")
         return
     for idx, c in enumerate(contactos, 1):
-        print(f"{idx}. Nombre: {c.nombre}, Teléfono: {c.telefono}, Correo: {c.correo}, Cargo: {c.cargo}")
+        print(f"{idx}. {describir_contacto(c)}")
 
 
 
@@ -189,8 +1281,13 @@ def buscar_contactos_menu(contactos):
     print("\n ★ Buscar contacto  ★")
     criterio = input("Ingrese nombre o correo a buscar: ").strip()
     resultados = buscar_contacto(contactos, criterio)
+    if not resultados and isinstance(contactos, AlmacenContactos):
+        # Sin coincidencias exactas se muestran los contactos parecidos (sin tildes, con errores de tipeo)
+        resultados = contactos.buscar_aproximado(criterio)
+        if resultados:
+            print("No hay coincidencias exactas. Contactos parecidos:")
     if not resultados:
         print("Error: este contacto no existe.")
         return
     for c in resultados:
-        print(f"Nombre: {c.nombre}, Teléfono: {c.telefono}, Correo: {c.correo}, Cargo: {c.cargo}")
+        print(describir_contacto(c))
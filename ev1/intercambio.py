@@ -0,0 +1,276 @@
+import csv
+import json
+import os
+import time
+
+from contactos import AlmacenContactos, Contacto
+
+CAMPOS = ["nombre", "telefono", "correo", "cargo"]
+TAMANO_LOTE = 1000
+FORMATOS = {".csv": "csv", ".vcf": "vcard", ".vcard": "vcard", ".jsonl": "jsonl"}
+
+# Importación y exportación de contactos en CSV, vCard y JSONL.
+# Los archivos se leen y escriben fila a fila, así que la memoria usada no depende
+# del tamaño del archivo: solo se guarda en memoria un lote de TAMANO_LOTE filas a la vez.
+
+
+
+def formato_de(ruta):
+    formato = FORMATOS.get(os.path.splitext(ruta)[1].lower())
+    if formato is None:
+        raise ValueError(f"Formato no soportado: {ruta} (use .csv, .vcf o .jsonl)")
+    return formato
+
+
+
+# ============= LECTURA =============
+
+def leer_csv(archivo):
+    # Encabezados sin distinguir mayúsculas; cargo es opcional
+    lector = csv.reader(archivo)
+    encabezados = [e.strip().lower() for e in next(lector, [])]
+    faltantes = [c for c in CAMPOS[:3] if c not in encabezados]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+    for fila in lector:
+        if not any(fila):
+            continue
+        yield lector.line_num, dict(zip(encabezados, fila))
+
+
+
+def leer_jsonl(archivo):
+    for numero, linea in enumerate(archivo, 1):
+        if not linea.strip():
+            continue
+        try:
+            datos = json.loads(linea)
+        except json.JSONDecodeError:
+            yield numero, None
+            continue
+        yield numero, datos if isinstance(datos, dict) else None
+
+
+
+def _desescapar_vcard(valor):
+    resultado = []
+    caracteres = iter(valor)
+    for c in caracteres:
+        if c == "\\":
+            siguiente = next(caracteres, "")
+            resultado.append("\n" if siguiente in "nN" and siguiente else siguiente)
+        else:
+            resultado.append(c)
+    return "".join(resultado)
+
+
+
+def _lineas_vcard(archivo):
+    # Une las líneas plegadas (las que empiezan con espacio o tabulación continúan la anterior)
+    pendiente, inicio = None, 0
+    for numero, linea in enumerate(archivo, 1):
+        linea = linea.rstrip("\r\n")
+        if linea[:1] in (" ", "\t") and pendiente is not None:
+            pendiente += linea[1:]
+            continue
+        if pendiente is not None:
+            yield inicio, pendiente
+        pendiente, inicio = linea, numero
+    if pendiente is not None:
+        yield inicio, pendiente
+
+
+
+def leer_vcard(archivo):
+    # Usa FN (nombre), el primer TEL, el primer EMAIL y TITLE (cargo) de cada tarjeta
+    propiedades = {"FN": "nombre", "TEL": "telefono", "EMAIL": "correo", "TITLE": "cargo"}
+    datos, inicio = None, 0
+    for numero, linea in _lineas_vcard(archivo):
+        nombre, _, valor = linea.partition(":")
+        # Los nombres pueden tener parámetros (TEL;TYPE=work) o grupo (item1.EMAIL)
+        nombre = nombre.split(";")[0].split(".")[-1].upper()
+        if nombre == "BEGIN" and valor.upper() == "VCARD":
+            datos, inicio = {}, numero
+        elif nombre == "END" and datos is not None:
+            yield inicio, datos
+            datos = None
+        elif datos is not None and nombre in propiedades:
+            datos.setdefault(propiedades[nombre], _desescapar_vcard(valor))
+
+
+
+LECTORES = {"csv": leer_csv, "jsonl": leer_jsonl, "vcard": leer_vcard}
+
+
+
+# ============= IMPORTACIÓN =============
+
+def _validar(datos):
+    # (Contacto, None) o (None, motivo); mismas reglas que registrar_contacto
+    if datos is None:
+        return None, "fila con formato inválido"
+    valores = {c: str(datos.get(c) or "").strip() for c in CAMPOS}
+    if not valores["nombre"]:
+        return None, "falta el nombre"
+    if not valores["correo"]:
+        return None, "falta el correo electrónico"
+    if len(valores["telefono"]) > 20:
+        return None, "el número de teléfono supera los 20 caracteres"
+    return Contacto(valores["nombre"], valores["telefono"], valores["correo"], valores["cargo"]), None
+
+
+
+def _procesar_lote(almacen, lote, rechazar):
+    # Descarta los duplicados del lote (contra el almacén y dentro del mismo lote) y agrega el resto
+    # En una transacción para que otro proceso no agregue los mismos contactos entremedio
+    normalizar = AlmacenContactos.normalizar
+    claves = [
+        (normalizar(c.correo), (normalizar(c.nombre), normalizar(c.telefono))) for _, c in lote
+    ]
+    with almacen.transaccion():
+        correos = almacen.correos_existentes({correo for correo, _ in claves})
+        pares = almacen.nombres_telefonos_existentes({par for _, par in claves})
+        aceptados = []
+        for (fila, contacto), (correo, par) in zip(lote, claves):
+            if correo in correos:
+                rechazar(fila, "ya existe un contacto con ese correo electrónico")
+            elif par in pares:
+                rechazar(fila, "ya existe un contacto con ese nombre y número de teléfono")
+            else:
+                correos.add(correo)
+                pares.add(par)
+                aceptados.append(contacto)
+        return almacen.agregar_varios(aceptados) if aceptados else 0
+
+
+
+def importar(almacen, ruta, ruta_rechazos=None, formato=None):
+    # Retorna {'leidas', 'agregados', 'rechazados', 'segundos'}
+    # Las filas rechazadas se escriben en ruta_rechazos (CSV con fila y motivo), si se indica
+    lector = LECTORES[formato or formato_de(ruta)]
+    resultado = {"leidas": 0, "agregados": 0, "rechazados": 0}
+    inicio = time.perf_counter()
+    with open(ruta, "r", encoding="utf-8-sig", newline="") as archivo, \
+            open(ruta_rechazos or os.devnull, "w", encoding="utf-8", newline="") as salida:
+        rechazos = csv.writer(salida)
+        rechazos.writerow(["fila", "motivo"])
+
+        def rechazar(fila, motivo):
+            resultado["rechazados"] += 1
+            rechazos.writerow([fila, motivo])
+
+        lote = []
+        for fila, datos in lector(archivo):
+            resultado["leidas"] += 1
+            contacto, motivo = _validar(datos)
+            if motivo:
+                rechazar(fila, motivo)
+                continue
+            lote.append((fila, contacto))
+            if len(lote) >= TAMANO_LOTE:
+                resultado["agregados"] += _procesar_lote(almacen, lote, rechazar)
+                lote = []
+        if lote:
+            resultado["agregados"] += _procesar_lote(almacen, lote, rechazar)
+    almacen.guardar()
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+
+# ============= EXPORTACIÓN =============
+
+def _escapar_vcard(valor):
+    return valor.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+
+def escribir_csv(contactos, archivo):
+    escritor = csv.writer(archivo)
+    escritor.writerow(CAMPOS)
+    escritos = 0
+    for c in contactos:
+        escritor.writerow([c.nombre, c.telefono, c.correo, c.cargo])
+        escritos += 1
+    return escritos
+
+
+
+def escribir_jsonl(contactos, archivo):
+    escritos = 0
+    for c in contactos:
+        archivo.write(c.to_json() + "\n")
+        escritos += 1
+    return escritos
+
+
+
+def escribir_vcard(contactos, archivo):
+    escritos = 0
+    for c in contactos:
+        archivo.write(
+            "BEGIN:VCARD\r\nVERSION:3.0\r\n"
+            f"FN:{_escapar_vcard(c.nombre)}\r\n"
+            f"N:{_escapar_vcard(c.nombre)};;;;\r\n"
+            f"TEL:{_escapar_vcard(c.telefono)}\r\n"
+            f"EMAIL:{_escapar_vcard(c.correo)}\r\n"
+            f"TITLE:{_escapar_vcard(c.cargo)}\r\n"
+            "END:VCARD\r\n"
+        )
+        escritos += 1
+    return escritos
+
+
+
+ESCRITORES = {"csv": escribir_csv, "jsonl": escribir_jsonl, "vcard": escribir_vcard}
+
+
+
+def exportar(almacen, ruta, formato=None):
+    # Retorna {'escritos', 'segundos'}
+    escritor = ESCRITORES[formato or formato_de(ruta)]
+    inicio = time.perf_counter()
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        escritos = escritor(almacen, archivo)
+    return {"escritos": escritos, "segundos": time.perf_counter() - inicio}
+
+
+
+# ============= MENÚ =============
+
+def _filas_por_segundo(cantidad, segundos):
+    return f"{cantidad / segundos:,.0f}" if segundos else "-"
+
+
+
+def importar_contactos_menu(contactos):
+    print("\n ★ Importar contactos ★")
+    ruta = input("Archivo a importar (.csv, .vcf o .jsonl): ").strip()
+    if not os.path.exists(ruta):
+        print("Error: el archivo no existe.")
+        return
+    ruta_rechazos = os.path.splitext(ruta)[0] + "_rechazos.csv"
+    try:
+        resultado = importar(contactos, ruta, ruta_rechazos)
+    except (ValueError, UnicodeDecodeError) as e:
+        print(f"Error: {e}")
+        return
+    print(f"Filas leídas: {resultado['leidas']}")
+    print(f"Contactos agregados: {resultado['agregados']}")
+    print(f"Filas rechazadas: {resultado['rechazados']}")
+    if resultado["rechazados"]:
+        print(f"Detalle de las filas rechazadas en {ruta_rechazos}")
+    print(f"Tiempo: {resultado['segundos']:.2f} s ({_filas_por_segundo(resultado['leidas'], resultado['segundos'])} filas/s)")
+
+
+
+def exportar_contactos_menu(contactos):
+    print("\n ★ Exportar contactos ★")
+    ruta = input("Archivo de destino (.csv, .vcf o .jsonl): ").strip()
+    try:
+        resultado = exportar(contactos, ruta)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return
+    print(f"Contactos exportados: {resultado['escritos']}")
+    print(f"Tiempo: {resultado['segundos']:.2f} s ({_filas_por_segundo(resultado['escritos'], resultado['segundos'])} filas/s)")
@@ -1,11 +1,16 @@
+import sys
+
+import cli
 from contactos import (
-    cargar_contactos,
+    ErrorContacto,
+    abrir_almacen,
     registrar_contacto,
     modificar_contacto,
     eliminar_contacto,
     listar_contactos,
     buscar_contactos_menu
 )
+from intercambio import importar_contactos_menu, exportar_contactos_menu
 
 def mostrar_menu():
     print("\n ★ CONNECT ME ★ ")
@@ -14,31 +19,45 @@ def mostrar_menu():
     print("3. Eliminar contacto")
     print("4. Mostrar listado de contactos")
     print("5. Buscar contacto")
-    print("6. Salir")
+    print("6. Importar contactos")
+    print("7. Exportar contactos")
+    print("8. Salir")
 
 def main():
-    contactos = cargar_contactos()
+    # Los cambios se guardan al hacerlos; no hace falta recargar los contactos
+    try:
+        contactos = abrir_almacen()
+    except ErrorContacto as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     while True:
+        # Otro proceso (otra ventana o un script con cli.py) pudo cambiar los contactos
+        contactos.sincronizar()
         mostrar_menu()
         opcion = input("Seleccione una opción: ").strip()
         if opcion == "1":
             registrar_contacto(contactos)
-            contactos = cargar_contactos()
         elif opcion == "2":
             modificar_contacto(contactos)
-            contactos = cargar_contactos()
         elif opcion == "3":
             eliminar_contacto(contactos)
-            contactos = cargar_contactos()
         elif opcion == "4":
             listar_contactos(contactos)
         elif opcion == "5":
             buscar_contactos_menu(contactos)
         elif opcion == "6":
+            importar_contactos_menu(contactos)
+        elif opcion == "7":
+            exportar_contactos_menu(contactos)
+        elif opcion == "8":
+            contactos.cerrar()
             print("Programa finalizado.")
             break
         else:
             print("Opción inválida. Intente de nuevo.")
 
 if __name__ == "__main__":
+    # Con argumentos funciona como línea de comandos (ver cli.py); sin argumentos muestra el menú
+    if len(sys.argv) > 1:
+        sys.exit(cli.main(sys.argv[1:]))
     main()
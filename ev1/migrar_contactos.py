@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+from contactos import (
+    ARCHIVO_BD,
+    ARCHIVO_CONTACTOS,
+    ARCHIVO_DIARIO,
+    ArchivoDanado,
+    SQLiteContactStore,
+    migrar_json
+)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copia los contactos de contactos.json a la base SQLite")
+    parser.add_argument("--json", default=ARCHIVO_CONTACTOS, help="archivo JSON de origen")
+    parser.add_argument("--diario", default=ARCHIVO_DIARIO, help="diario de cambios del archivo JSON")
+    parser.add_argument("--bd", default=ARCHIVO_BD, help="base de datos SQLite de destino")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.json):
+        print(f"Error: no existe el archivo {args.json}.")
+        sys.exit(1)
+    inicio = time.perf_counter()
+    almacen = SQLiteContactStore(args.bd)
+    try:
+        agregados, omitidos = migrar_json(almacen, args.json, args.diario)
+    except ArchivoDanado as e:
+        almacen.cerrar()
+        print(f"Error: {e}.")
+        sys.exit(1)
+    total = len(almacen)
+    almacen.cerrar()
+    print(f"Contactos migrados: {agregados}")
+    print(f"Correos repetidos omitidos: {omitidos}")
+    print(f"Total en {args.bd}: {total} ({time.perf_counter() - inicio:.2f} s)")
+
+
+
+if __name__ == "__main__":
+    main()
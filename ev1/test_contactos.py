@@ -0,0 +1,187 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+import contactos
+import trigramas
+from contactos import DiarioContactos, ErrorContacto, abrir_almacen, cargar_contactos_diario, crear_contacto
+
+# Pruebas de la persistencia de contactos. Se ejecutan desde la carpeta ev1:
+#   python -m unittest -v
+# Cada prueba trabaja en una carpeta temporal propia, con los nombres de archivo por defecto.
+
+
+
+class PruebaEnCarpeta(unittest.TestCase):
+    def setUp(self):
+        self.anterior = os.getcwd()
+        self.carpeta = tempfile.mkdtemp()
+        os.chdir(self.carpeta)
+
+    def tearDown(self):
+        os.chdir(self.anterior)
+        shutil.rmtree(self.carpeta)
+
+    def escribir(self, ruta, texto):
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+    def leer(self, ruta):
+        with open(ruta, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+
+class ArchivoDanadoTests(PruebaEnCarpeta):
+    def test_archivo_danado_se_aparta_sin_modificarlo(self):
+        danado = '[{"nombre": "Ana", "telefono": "1", "correo": "ana@x.cl", "cargo": ""},'
+        self.escribir(contactos.ARCHIVO_CONTACTOS, danado)
+        with redirect_stderr(io.StringIO()) as aviso:
+            store = cargar_contactos_diario()
+        self.assertEqual(len(store), 0)
+        self.assertIn("contactos.json.corrupto", aviso.getvalue())
+        self.assertEqual(self.leer(contactos.ARCHIVO_CONTACTOS + ".corrupto"), danado)
+
+        # La agenda nueva funciona y un segundo archivo dañado no pisa la copia anterior
+        crear_contacto(store, "Luis", "2", "luis@x.cl")
+        store.cerrar()
+        self.escribir(contactos.ARCHIVO_CONTACTOS, "no es json")
+        with redirect_stderr(io.StringIO()):
+            cargar_contactos_diario()
+        self.assertEqual(self.leer(contactos.ARCHIVO_CONTACTOS + ".corrupto"), danado)
+        self.assertEqual(self.leer(contactos.ARCHIVO_CONTACTOS + ".corrupto1"), "no es json")
+
+    def test_linea_danada_del_diario_se_conserva(self):
+        store = cargar_contactos_diario()
+        crear_contacto(store, "Ana", "1", "ana@x.cl")
+        with open(contactos.ARCHIVO_DIARIO, "a", encoding="utf-8") as f:
+            f.write('{"op": "alta"}\n')
+        with redirect_stderr(io.StringIO()):
+            store = cargar_contactos_diario()
+        self.assertEqual([c.correo for c in store], ["ana@x.cl"])
+        self.assertIn('{"op": "alta"}', self.leer(contactos.ARCHIVO_DIARIO + ".corrupto"))
+
+    def test_linea_cortada_al_final_se_descarta_sin_aviso(self):
+        store = cargar_contactos_diario()
+        crear_contacto(store, "Ana", "1", "ana@x.cl")
+        with open(contactos.ARCHIVO_DIARIO, "a", encoding="utf-8") as f:
+            f.write('{"op": "alta", "contacto": {"nom')
+        with redirect_stderr(io.StringIO()) as aviso:
+            store = cargar_contactos_diario(DiarioContactos())
+        self.assertEqual(len(store), 1)
+        self.assertEqual(aviso.getvalue(), "")
+        self.assertFalse(os.path.exists(contactos.ARCHIVO_DIARIO + ".corrupto"))
+
+
+
+class MigracionTests(PruebaEnCarpeta):
+    def test_migracion_fallida_se_reintenta(self):
+        self.escribir(contactos.ARCHIVO_CONTACTOS, '[{"nombre": "Ana"')
+        with self.assertRaises(ErrorContacto):
+            abrir_almacen("sqlite")
+        self.assertFalse(os.path.exists(contactos.ARCHIVO_BD))
+        self.assertEqual(self.leer(contactos.ARCHIVO_CONTACTOS), '[{"nombre": "Ana"')
+
+        self.escribir(contactos.ARCHIVO_CONTACTOS, '[{"nombre": "Ana", "telefono": "1", "correo": "ana@x.cl", "cargo": ""}]')
+        with redirect_stderr(io.StringIO()):
+            almacen = abrir_almacen("sqlite")
+        self.assertEqual([c.correo for c in almacen], ["ana@x.cl"])
+        almacen.cerrar()
+        self.assertFalse(os.path.exists(contactos.ARCHIVO_DIARIO))
+
+    def test_migracion_no_modifica_el_json_ni_el_diario(self):
+        store = cargar_contactos_diario(DiarioContactos(limite=1000))
+        crear_contacto(store, "Ana", "1", "ana@x.cl")
+        crear_contacto(store, "Luis", "2", "luis@x.cl")
+        antes = {ruta: self.leer(ruta) for ruta in (contactos.ARCHIVO_CONTACTOS, contactos.ARCHIVO_DIARIO)}
+        with redirect_stderr(io.StringIO()):
+            almacen = abrir_almacen("sqlite")
+        self.assertEqual(sorted(c.correo for c in almacen), ["ana@x.cl", "luis@x.cl"])
+        almacen.cerrar()
+        self.assertEqual({ruta: self.leer(ruta) for ruta in antes}, antes)
+
+
+
+class ContactoTests(unittest.TestCase):
+    def test_cargo_nulo_o_ausente(self):
+        for datos in ({"nombre": "Ana", "telefono": "1", "correo": "ana@x.cl", "cargo": None},
+                      {"nombre": "Ana", "telefono": "1", "correo": "ana@x.cl"}):
+            contacto = contactos.Contacto.from_dict(datos)
+            self.assertEqual(contacto.cargo, "")
+            self.assertEqual(contacto.to_json(), '{"nombre": "Ana", "telefono": "1", "correo": "ana@x.cl", "cargo": ""}')
+
+
+
+class IndiceTrigramasTests(PruebaEnCarpeta):
+    def test_indice_guardado_se_vuelve_a_leer(self):
+        store = cargar_contactos_diario()
+        crear_contacto(store, "José Pérez", "1", "jose@x.cl")
+        crear_contacto(store, "Ana Soto", "2", "ana@x.cl")
+        store.buscar_aproximado("jose")
+        store.cerrar()
+        store = cargar_contactos_diario()
+        self.assertIsNotNone(store._trigramas)
+        self.assertEqual([c.correo for c in store.buscar_aproximado("perez")], ["jose@x.cl"])
+
+    def test_archivo_de_indice_invalido_se_ignora(self):
+        store = cargar_contactos_diario()
+        crear_contacto(store, "José Pérez", "1", "jose@x.cl")
+        store.buscar_aproximado("jose")
+        store.cerrar()
+        for contenido in (b"\x80\x05basura", b'{"generacion": 1, "listas": []}', b'{"listas": {"jos": "no es base64"}}'):
+            with open(contactos.ARCHIVO_TRIGRAMAS, "wb") as f:
+                f.write(contenido)
+            for generacion in range(4):
+                self.assertIsNone(trigramas.IndiceTrigramas.cargar(contactos.ARCHIVO_TRIGRAMAS, generacion))
+            store = cargar_contactos_diario()
+            self.assertEqual([c.correo for c in store.buscar_aproximado("jose perez")], ["jose@x.cl"])
+
+
+
+class ProcesosConcurrentesTests(PruebaEnCarpeta):
+    PROCESOS = 4
+    POR_PROCESO = 40
+
+    def lanzar(self, almacen, lotes):
+        # Un proceso de main.py batch por lote, todos a la vez sobre los mismos archivos
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        procesos = [
+            subprocess.Popen(
+                [sys.executable, main, "batch", "--almacen", almacen],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for _ in lotes
+        ]
+        salidas = [p.communicate("".join(lote)) for p, lote in zip(procesos, lotes)]
+        return [salida for salida, _ in salidas]
+
+    def alta(self, correo):
+        return f'{{"op": "add", "nombre": "{correo}", "telefono": "{len(correo)}", "correo": "{correo}"}}\n'
+
+    def revisar(self, almacen):
+        lotes = [[self.alta(f"p{p}c{i}@x.cl") for i in range(self.POR_PROCESO)] + [self.alta("comun@x.cl")]
+                 for p in range(self.PROCESOS)]
+        salidas = self.lanzar(almacen, lotes)
+        # El correo que todos intentan agregar queda una sola vez
+        self.assertEqual(sum("ya existe" in salida for salida in salidas), self.PROCESOS - 1)
+        store = cargar_contactos_diario() if almacen == "json" else abrir_almacen("sqlite")
+        correos = [c.correo for c in store]
+        store.cerrar()
+        self.assertEqual(len(correos), self.PROCESOS * self.POR_PROCESO + 1)
+        self.assertEqual(len(set(correos)), len(correos))
+
+    def test_diario_json(self):
+        self.revisar("json")
+
+    def test_sqlite(self):
+        self.revisar("sqlite")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import base64
+import heapq
+import json
+import math
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# Índice de trigramas para la búsqueda aproximada de contactos.
+# El texto (nombre, correo y cargo) se normaliza sin tildes ni mayúsculas y cada palabra
+# se divide en trigramas con relleno, como "  jose " -> "  j", " jo", "jos", "ose", "se ".
+# Para cada trigrama se guarda la lista ordenada de claves de los contactos que lo tienen
+# (array de enteros sin signo, 4 bytes por entrada).
+#
+# Una consulta busca los contactos que comparten al menos UMBRAL de sus trigramas. Para no
+# contar todas las listas: un contacto que comparte m de los n trigramas de la consulta
+# está en al menos una de las n - m + 1 listas más cortas; esas se cuentan y en las demás
+# solo se buscan (con bisect) los candidatos encontrados, salvo que la lista sea corta.
+#
+# El índice se guarda como JSON (no pickle: el archivo lo puede escribir cualquiera y solo
+# debe contener datos); cada lista va como los bytes del array en base64, que se leen sin
+# convertir entero por entero.
+
+UMBRAL = 0.5
+# Una lista más larga que esto por cada candidato se revisa con bisect en vez de contarla entera
+VERIFICAR_DESDE = 16
+
+
+
+def normalizar(texto):
+    # Sin tildes ni diacríticos y sin distinguir mayúsculas: "José" -> "jose"
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+
+def trigramas(texto):
+    resultado = set()
+    for palabra in re.findall(r"\w+", normalizar(texto)):
+        relleno = f"  {palabra} "
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+
+
+def texto_contacto(contacto):
+    return f"{contacto.nombre} {contacto.correo} {contacto.cargo}"
+
+
+
+def minimo_comun(cantidad, umbral=UMBRAL):
+    # Trigramas en común que necesita un contacto para pasar el umbral
+    return max(1, math.ceil(umbral * cantidad))
+
+
+
+def ordenar(consulta, candidatos, limite):
+    # candidatos: [(trigramas en común, contacto)]; ordena por la parte de la consulta que cubre
+    # cada contacto y, a igualdad, por la similitud con el texto completo del contacto
+    buscados = trigramas(consulta)
+    if not buscados:
+        return []
+
+    def puntaje(candidato):
+        comunes, contacto = candidato
+        propios = trigramas(texto_contacto(contacto))
+        return comunes / len(buscados), len(buscados & propios) / len(buscados | propios)
+
+    return [c for _, c in heapq.nlargest(limite, candidatos, key=puntaje)]
+
+
+
+class IndiceTrigramas:
+    def __init__(self, listas=None):
+        self._listas = listas or {}   # trigrama -> array("I") ordenado de claves
+
+    def __len__(self):
+        return sum(len(lista) for lista in self._listas.values())
+
+    def agregar(self, clave, contacto):
+        for trigrama in trigramas(texto_contacto(contacto)):
+            lista = self._listas.get(trigrama)
+            if lista is None:
+                self._listas[trigrama] = array("I", [clave])
+            elif lista[-1] < clave:
+                # Caso común: las claves nuevas son mayores que todas las anteriores
+                lista.append(clave)
+            else:
+                lista.insert(bisect_left(lista, clave), clave)
+
+    def quitar(self, clave, contacto):
+        # contacto debe tener todavía los datos con que se agregó
+        for trigrama in trigramas(texto_contacto(contacto)):
+            lista = self._listas.get(trigrama)
+            if lista is None:
+                continue
+            posicion = bisect_left(lista, clave)
+            if posicion < len(lista) and lista[posicion] == clave:
+                del lista[posicion]
+                if not lista:
+                    del self._listas[trigrama]
+
+    def candidatos(self, consulta, maximo, umbral=UMBRAL):
+        # [(trigramas en común, clave)] de los contactos que pasan el umbral, los de más en común primero
+        buscados = trigramas(consulta)
+        if not buscados:
+            return []
+        minimo = minimo_comun(len(buscados), umbral)
+        listas = sorted((self._listas.get(t, ()) for t in buscados), key=len)
+        cortas = len(listas) - minimo + 1
+        cuenta = Counter()
+        for lista in listas[:cortas]:
+            cuenta.update(lista)
+        for lista in listas[cortas:]:
+            if len(lista) <= len(cuenta) * VERIFICAR_DESDE:
+                # Contar la lista entera (en C) sale más barato que buscar cada candidato; las claves
+                # nuevas que agrega no llegan al mínimo porque no estaban en las listas cortas
+                cuenta.update(lista)
+                continue
+            for clave in list(cuenta):
+                posicion = bisect_left(lista, clave)
+                if posicion < len(lista) and lista[posicion] == clave:
+                    cuenta[clave] += 1
+        return heapq.nlargest(
+            maximo, ((n, clave) for clave, n in cuenta.items() if n >= minimo), key=lambda c: (c[0], -c[1])
+        )
+
+    def renumerar(self, nuevas):
+        # Índice con las claves cambiadas según el diccionario nuevas (debe conservar el orden)
+        return IndiceTrigramas({t: array("I", map(nuevas.__getitem__, l)) for t, l in self._listas.items()})
+
+    def guardar(self, archivo, generacion):
+        json.dump({
+            "generacion": generacion,
+            "orden": sys.byteorder,
+            "bytes": array("I").itemsize,
+            "listas": {t: base64.b64encode(lista.tobytes()).decode("ascii") for t, lista in self._listas.items()},
+        }, archivo, ensure_ascii=False)
+
+    @staticmethod
+    def cargar(ruta, generacion):
+        # Índice guardado para esa generación del archivo de contactos, o None si no hay, es de otra
+        # o no se puede leer (en ese caso el índice se vuelve a armar)
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            if (datos.get("generacion") != generacion or datos.get("orden") != sys.byteorder
+                    or datos.get("bytes") != array("I").itemsize):
+                return None
+            listas = {}
+            for trigrama, codificada in datos["listas"].items():
+                listas[trigrama] = array("I")
+                listas[trigrama].frombytes(base64.b64decode(codificada, validate=True))
+            return IndiceTrigramas(listas)
+        except Exception:
+            return None